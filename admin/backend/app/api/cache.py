@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Request, status
+from pydantic import BaseModel, Field
+from typing import Optional
+from app.core.cache import response_cache, bump_cache_version, CACHE_NAMESPACES
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+class CacheInvalidateRequest(BaseModel):
+    namespace: Optional[str] = Field(None, description="무효화할 캐시 ('traffic', 'costs', 'surveys'), 없으면 전체")
+    environment: Optional[str] = Field(None, description="'stg' 또는 'prod', 없으면 두 환경 모두")
+
+@router.post("/cache/invalidate", status_code=status.HTTP_200_OK, summary="대시보드 응답 캐시 무효화")
+async def invalidate_cache(payload: CacheInvalidateRequest, request: Request):
+    """
+    대시보드 캐시를 즉시 비웁니다.
+    - 이 워커: 바로 제거
+    - 다른 워커: 공유 version(cache_versions-{env})을 올려 다음 확인 때(최대 수 초) 제거
+    롤업 백필 / 설문 통계 재계산 CLI는 이 API 없이 직접 version을 올립니다. (app.core.cache.bump_cache_version)
+    """
+    removed = response_cache.invalidate(payload.namespace, payload.environment)
+    namespaces = [payload.namespace] if payload.namespace else list(CACHE_NAMESPACES)
+    signaled = []
+    for env in ([payload.environment] if payload.environment else ["stg", "prod"]):
+        db = getattr(request.app.state, f"{env}_db", None)
+        if db is None:
+            continue
+        try:
+            await bump_cache_version(db, env, namespaces)
+            signaled.append(env)
+        except Exception as e:
+            logger.warning(f"Failed to signal cache invalidation ({env}): {e}")
+    return {"removed": removed, "signaled": signaled}
+
+@router.get("/cache/stats", status_code=status.HTTP_200_OK, summary="대시보드 응답 캐시 상태")
+async def get_cache_stats():
+    return response_cache.stats()
@@ -1,4 +1,167 @@
-from fastapi import APIRouter
-from pathlib import Path
+from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.db.mongodb import get_collection
+from app.db.pagination import encode_cursor, with_cursor, keyset_sort
+from pydantic import BaseModel
+from typing import List, Dict, Any, Optional, AsyncIterator
+from datetime import datetime, time
+from bson import ObjectId
+import csv
+import io
+import json
+import logging
 
-router = APIRouter()
\ No newline at end of file
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# 내보내기 시 MongoDB 커서 배치 크기 (메모리에는 이 정도만 올라감)
+EXPORT_BATCH_SIZE = 500
+# 스트리밍 응답 청크 크기 (문자 수)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# 응답/내보내기 필드 (chat 컬렉션)
+CONVERSATION_FIELDS = ["id", "date", "chatId", "question", "answer", "decision"]
+
+# API 응답 모델 정의
+class ConversationPage(BaseModel):
+    data: List[Dict[str, Any]]
+    nextCursor: Optional[str] = None # 다음 페이지 커서 (마지막 페이지면 None)
+
+get_chat_collection = get_collection("chat")
+
+
+# --- 헬퍼 함수 ---
+def _build_query(startDate: str | None, endDate: str | None, chatId: str | None) -> Dict[str, Any]:
+    """날짜 범위('YYYY-MM-DD', 양 끝 포함) + 세션(chatId) 필터"""
+    query: Dict[str, Any] = {}
+    try:
+        if startDate or endDate:
+            query["date"] = {}
+            if startDate:
+                query["date"]["$gte"] = datetime.combine(datetime.fromisoformat(startDate), time.min)
+            if endDate:
+                query["date"]["$lte"] = datetime.combine(datetime.fromisoformat(endDate), time.max)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
+    if chatId:
+        if not ObjectId.is_valid(chatId):
+            raise HTTPException(status_code=400, detail="Invalid chatId.")
+        query["chatId"] = ObjectId(chatId)
+    return query
+
+
+def _serialize(doc: Dict[str, Any]) -> Dict[str, Any]:
+    doc_date = doc.get("date")
+    return {
+        "id": str(doc["_id"]),
+        "date": doc_date.isoformat() + "Z" if doc_date else None,
+        "chatId": str(doc["chatId"]) if doc.get("chatId") else None,
+        "question": doc.get("question"),
+        "answer": doc.get("answer"),
+        "decision": doc.get("decision"),
+    }
+
+
+# --- API 엔드포인트 정의 ---
+
+@router.get("/conversations", response_model=ConversationPage, summary="대화 로그 목록 (커서 페이지네이션)")
+async def get_conversations(
+    collection: AsyncIOMotorCollection = Depends(get_chat_collection),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None, description="이전 응답의 nextCursor"),
+    sort: str = Query('desc', enum=['asc', 'desc']),
+    startDate: str | None = Query(None),
+    endDate: str | None = Query(None),
+    chatId: str | None = Query(None, description="특정 사용자 세션만 조회")
+):
+    """
+    대화 로그를 (date, _id) 키셋 커서로 페이지네이션하여 반환합니다.
+    skip을 쓰지 않으므로 페이지 깊이와 관계없이 일정한 시간이 걸립니다.
+    """
+    sort_order = 1 if sort == 'asc' else -1
+    query = _build_query(startDate, endDate, chatId)
+    try:
+        query = with_cursor(query, cursor, sort_order)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    try:
+        # 다음 페이지 존재 여부 확인용 1건 추가 조회
+        docs = await collection.find(query, {"search_terms": 0}).sort(keyset_sort(sort_order)).limit(limit + 1).to_list(length=limit + 1)
+        has_next = len(docs) > limit
+        docs = docs[:limit]
+        return ConversationPage(
+            data=[_serialize(doc) for doc in docs],
+            nextCursor=encode_cursor(docs[-1]) if has_next and docs else None
+        )
+    except Exception as e:
+        logger.error(f"Error fetching conversations: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
+
+
+async def _export_rows(collection: AsyncIOMotorCollection, query: Dict[str, Any], sort_order: int) -> AsyncIterator[Dict[str, Any]]:
+    cursor = collection.find(query, {"search_terms": 0}).sort(keyset_sort(sort_order)).batch_size(EXPORT_BATCH_SIZE)
+    async for doc in cursor:
+        yield _serialize(doc)
+
+
+async def _ndjson_stream(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    lines: List[str] = []
+    size = 0
+    async for row in rows:
+        line = json.dumps(row, ensure_ascii=False) + "\n"
+        lines.append(line)
+        size += len(line)
+        # 64KB 단위로 전송
+        if size >= STREAM_CHUNK_SIZE:
+            yield "".join(lines)
+            lines, size = [], 0
+    if lines:
+        yield "".join(lines)
+
+
+async def _csv_stream(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CONVERSATION_FIELDS)
+    # 엑셀에서 한글이 깨지지 않도록 BOM 추가
+    yield "\ufeff"
+    writer.writeheader()
+    async for row in rows:
+        writer.writerow(row)
+        # 배치 단위로 내보내 버퍼가 커지지 않게 함
+        if buffer.tell() >= STREAM_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+@router.get("/conversations/export", summary="대화 로그 내보내기 (NDJSON/CSV 스트리밍)")
+async def export_conversations(
+    collection: AsyncIOMotorCollection = Depends(get_chat_collection),
+    format: str = Query('ndjson', enum=['ndjson', 'csv']),
+    sort: str = Query('asc', enum=['asc', 'desc']),
+    startDate: str | None = Query(None),
+    endDate: str | None = Query(None),
+    chatId: str | None = Query(None)
+):
+    """
+    기간 내 대화 로그를 스트리밍으로 내보냅니다.
+    MongoDB 커서에서 EXPORT_BATCH_SIZE 단위로 읽어 바로 전송하므로, 몇 달치를 내보내도 메모리 사용량이 일정합니다.
+    """
+    sort_order = 1 if sort == 'asc' else -1
+    query = _build_query(startDate, endDate, chatId)
+    rows = _export_rows(collection, query, sort_order)
+
+    period = f"{startDate or 'all'}_{endDate or 'now'}"
+    if format == 'csv':
+        body, media_type, filename = _csv_stream(rows), "text/csv; charset=utf-8", f"conversations_{period}.csv"
+    else:
+        body, media_type, filename = _ndjson_stream(rows), "application/x-ndjson", f"conversations_{period}.ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
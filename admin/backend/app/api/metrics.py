@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorCollection
-from app.db.mongodb import get_mongo_db, get_collection
+from app.db.mongodb import get_mongo_db, get_collection, get_db_env
+from app.core.cache import response_cache, ttl_for_granularity
+from app.db.rollups import ROLLUP_COLLECTION, KST, fetch_buckets, sum_buckets, parse_bucket_key
 from pydantic import BaseModel
 from typing import List, Dict, Any
 import logging
-from datetime import datetime, timedelta, time
+from datetime import datetime, timedelta
 from enum import Enum
-import asyncio # 3개의 DB 집계를 동시에 실행하기 위함
+import asyncio # 3개의 버킷 조회를 동시에 실행하기 위함
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -49,34 +51,32 @@ class CostsResponse(BaseModel):
 
 
 # --- 3. 날짜 처리 헬퍼 함수 (year 제외) ---
-def get_date_range_and_group(period: Period) -> (datetime, datetime, str, str):
+def get_date_range_and_group(period: Period) -> (datetime, str, str):
     """
-    기간(period)에 따라 MongoDB 집계에 필요한
-    시작/종료 날짜, 그룹 포맷, 라벨 포맷을 반환합니다.
+    기간(period)에 따라 롤업 버킷 조회에 필요한
+    시작 시각, 버킷 단위(granularity), 라벨 포맷을 반환합니다.
     """
-    now = datetime.now() 
+    now = datetime.now(KST)
     
     if period == Period.DAY:
         start_date = now - timedelta(days=1)
-        group_format = "%Y-%m-%dT%H:00" 
+        granularity = "hour"
         label_format = "%H시"
     elif period == Period.WEEK:
         start_date = now - timedelta(days=7)
-        start_date = datetime.combine(start_date.date(), time.min)
-        group_format = "%Y-%m-%d"
+        granularity = "day"
         label_format = "%m-%d"
     elif period == Period.MONTH:
         start_date = now - timedelta(days=30)
-        start_date = datetime.combine(start_date.date(), time.min)
-        group_format = "%Y-%m-%d"
+        granularity = "day"
         label_format = "%m-%d"
 
-    return start_date, now, group_format, label_format
+    return start_date, granularity, label_format
 
 
 # --- 4. API 엔드포인트: /api/costs ---
 
-get_metadata_collection = get_collection("metadata")
+get_rollup_collection = get_collection(ROLLUP_COLLECTION)
 
 @router.get(
     "/costs", # cost.js가 호출하는 엔드포인트
@@ -84,85 +84,62 @@ get_metadata_collection = get_collection("metadata")
     summary="[비용] 기간별 모든 비용 데이터 (UsageCostInquiry용)"
 )
 async def get_costs_endpoint(
-    collection: AsyncIOMotorCollection = Depends(get_metadata_collection),
+    collection: AsyncIOMotorCollection = Depends(get_rollup_collection),
+    env: str = Depends(get_db_env),
     period: Period = Query(..., description="조회 기간 (day, week, month)")
 ):
     """
     프론트의 '사용비용 조회' 페이지가 요청하는 모든 데이터를 반환합니다.
-    - DB 컬렉션: `meta-stg`
-    - 집계: `metadata.token_usage.total_cost_usd` (LLM 비용)
-    - 참고: 서버/DB 비용은 meta-stg에 없으므로 0으로 반환합니다.
+    - DB 컬렉션: `rollup-{env}` (metadata.token_usage.total_cost_usd 버킷)
+    - 집계: 버킷 `cost_usd` (LLM 비용), 원본 문서는 읽지 않음
+    - 참고: 서버/DB 비용은 롤업에 없으므로 0으로 반환합니다.
+    - 캐시: (환경, 기간)별, TTL은 버킷 단위에 맞춤 (app.core.cache)
     """
-    try:
-        start_date, end_date, group_format, label_format = get_date_range_and_group(period)
-        
-        # *** 집계할 필드 경로 ***
-        COST_FIELD = "metadata.token_usage.total_cost_usd"
-
-        # 1. 기간별(Period) 데이터 집계 (LLM 비용)
-        pipeline_period = [
-            {"$match": {"date": {"$gte": start_date, "$lte": end_date}}},
-            {
-                "$group": {
-                    "_id": {"$dateToString": {
-                        "format": group_format, 
-                        "date": "$date", 
-                        "timezone": "Asia/Seoul"
-                    }},
-                    "cost": {"$sum": f"${COST_FIELD}"}
-                }
-            },
-            {"$sort": {"_id": 1}}
-        ]
+    _, granularity, _ = get_date_range_and_group(period)
+    return await response_cache.get_or_compute(
+        "costs", env, {"period": period},
+        ttl=ttl_for_granularity(granularity, datetime.now(KST)),
+        compute=lambda: _get_costs_data(collection, period),
+        db=collection.database
+    )
 
-        # 2. 전체(Grand Total) 비용 집계
-        year_ago = datetime.now() - timedelta(days=365)
-        pipeline_grand_total = [
-            {"$match": {"date": {"$gte": year_ago}}},
-            {"$group": {"_id": None, "totalCost": {"$sum": f"${COST_FIELD}"}}}
-        ]
-        
-        # 3. 주간(Weekly) 비용 집계 (월 예상 비용 계산용)
-        week_ago = datetime.now() - timedelta(days=7)
-        pipeline_weekly = [
-            {"$match": {"date": {"$gte": week_ago}}},
-            {"$group": {"_id": None, "weeklyCost": {"$sum": f"${COST_FIELD}"}}}
-        ]
 
-        # 4. 3개 집계 동시 실행
-        (period_result, grand_total_result, weekly_result) = await asyncio.gather(
-            collection.aggregate(pipeline_period).to_list(length=None),
-            collection.aggregate(pipeline_grand_total).to_list(length=1),
-            collection.aggregate(pipeline_weekly).to_list(length=1)
+async def _get_costs_data(collection: AsyncIOMotorCollection, period: Period) -> CostsResponse:
+    try:
+        start_date, granularity, label_format = get_date_range_and_group(period)
+        now = datetime.now(KST)
+
+        # *** 집계할 버킷 필드 ***
+        COST_FIELD = "cost_usd"
+
+        # 1. 기간별(Period) 버킷 (LLM 비용)
+        # 2. 전체(Grand Total) 비용: 최근 365일 일별 버킷 합계
+        # 3. 주간(Weekly) 비용: 최근 7일 시간별 버킷 합계 (월 예상 비용 계산용)
+        # 4. 3개 조회 동시 실행
+        (period_result, grand_total, weekly_total) = await asyncio.gather(
+            fetch_buckets(collection, granularity, start_date),
+            sum_buckets(collection, "day", now - timedelta(days=365), COST_FIELD),
+            sum_buckets(collection, "hour", now - timedelta(days=7), COST_FIELD)
         )
 
-        # 5-1. grandTotal 계산
-        grand_total = grand_total_result[0].get("totalCost", 0) if grand_total_result else 0
-
-        # 5-2. periodCosts (LLM) 계산
+        # 5-1. periodCosts (LLM) 계산
         llm_points = []
         llm_total = 0
         for item in period_result:
-            if not item.get("_id"): continue
             try:
-                if period == Period.DAY:
-                    time_obj = datetime.strptime(item["_id"], "%Y-%m-%dT%H:00")
-                else: # week, month
-                    time_obj = datetime.strptime(item["_id"], "%Y-%m-%d")
-                time_label = time_obj.strftime(label_format)
-            except ValueError:
-                time_label = item["_id"]
+                time_label = parse_bucket_key(granularity, item["key"]).strftime(label_format)
+            except (KeyError, ValueError):
+                time_label = item.get("key", "")
             
-            cost = item.get("cost", 0)
+            cost = item.get(COST_FIELD, 0)
             llm_total += cost
             llm_points.append(CostPoint(time=time_label, value=cost)) # 'value' 사용
 
-        # 5-3. Server, DB 비용 (데이터 없으므로 0)
+        # 5-2. Server, DB 비용 (데이터 없으므로 0)
         empty_period_data = PeriodCostData(total=0, points=[])
 
-        # 5-4. estimatedMonthlyCost (월 예상 비용) 계산
+        # 5-3. estimatedMonthlyCost (월 예상 비용) 계산
         # cost.js의 로직(주간*4)
-        weekly_total = weekly_result[0].get("weeklyCost", 0) if weekly_result else 0
         estimated_total = weekly_total * 4
         
         # 4주치 포인트 생성
@@ -2,15 +2,15 @@
 from fastapi import APIRouter, Query
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, List
-import json, yaml, os, boto3
+import yaml, os
+
+from app.db.usage_store import get_usage_store
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
 # =========================
 # ✅ 파일 경로 설정
 # =========================
-DATA_FILE = Path(__file__).resolve().parent.parent / "data" / "data.jsonl"   # LLM 사용 로그
 PRICING_FILE = Path(__file__).resolve().parent.parent / "config" / "pricing.yaml"  # 모델 단가 설정
 
 # =========================
@@ -29,68 +29,27 @@ def load_pricing():
         return []
 
 # =========================
-# ✅ 대화 로그 로드
-# =========================
-def get_conversations():
-    """LLM 호출 로그(JSONL)를 불러와 파싱합니다."""
-    if not DATA_FILE.exists():
-        return []
-    convs = []
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    convs.append(json.loads(line))
-    except Exception as e:
-        print(f"Error loading sample.jsonl: {e}")
-    return convs
-
-# =========================
-# ✅ 토큰 사용량 데이터 추출
-# =========================
-def extract_token_usage(conv: Dict[str, Any]) -> Dict[str, Any]:
-    """대화 데이터에서 토큰 사용량과 비용을 추출합니다."""
-    token_usage = conv.get("token_usage", {})
-
-    return {
-        "input_tokens": token_usage.get("input_tokens", 0),
-        "output_tokens": token_usage.get("output_tokens", 0),
-        "total_cost_usd": token_usage.get("total_cost_usd", 0)
-    }
-
-# =========================
-# ✅ AWS 비용 계산 (Cost Explorer API)
+# ✅ AWS 비용 조회 (Cost Explorer 동기화 저장소)
 # =========================
 def get_aws_costs(days: int = 7):
     """
-    AWS Cost Explorer API로 최근 n일간의 EC2, S3, DynamoDB 등 비용을 가져옵니다.
-    API 오류가 발생하면 기본값(0원)을 반환합니다.
+    최근 n일간의 EC2, S3, DynamoDB 등 비용을 로컬 저장소에서 가져옵니다.
+    Cost Explorer 호출은 백그라운드 동기화(app.core.aws_cost_sync)만 수행하며,
+    저장소 조회에 실패하면 기본값(0원)을 반환합니다.
     """
     try:
-        client = boto3.client("ce", region_name="us-east-1")
-
         end = datetime.utcnow().date()
         start = end - timedelta(days=days)
-
-        response = client.get_cost_and_usage(
-            TimePeriod={"Start": start.strftime("%Y-%m-%d"), "End": end.strftime("%Y-%m-%d")},
-            Granularity="DAILY",
-            Metrics=["UnblendedCost"],
-            GroupBy=[{"Type": "DIMENSION", "Key": "SERVICE"}],
-        )
+        rows = get_usage_store().aws_costs(start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
 
         service_costs = {}
         daily_points = {}
 
-        for result in response.get("ResultsByTime", []):
-            date = result["TimePeriod"]["Start"]
-            for group in result.get("Groups", []):
-                service = group["Keys"][0]
-                amount = float(group["Metrics"]["UnblendedCost"]["Amount"])
-                service_costs[service] = service_costs.get(service, 0) + amount
-                if service not in daily_points:
-                    daily_points[service] = []
-                daily_points[service].append({"time": date, "value": round(amount, 4)})
+        for date, service, amount in rows:
+            service_costs[service] = service_costs.get(service, 0) + amount
+            if service not in daily_points:
+                daily_points[service] = []
+            daily_points[service].append({"time": date, "value": round(amount, 4)})
 
         total_cost = round(sum(service_costs.values()), 4)
 
@@ -113,32 +72,17 @@ def get_aws_costs(days: int = 7):
 # =========================
 def get_llm_costs(days: int = 7):
     """
-    sample.jsonl 로그를 기반으로 LLM API 호출 비용을 계산합니다.
+    data.jsonl 로그를 기반으로 LLM API 호출 비용을 계산합니다.
     기간(days) 동안의 총합 및 일별 데이터 포인트를 반환합니다.
+    로그 전체를 읽지 않고, 증분 색인 저장소(usage_store)에 새 줄만 적재한 뒤 기간만 집계합니다.
     """
-    now = datetime.now()
-    convs = get_conversations()
-    total_cost = 0.0
-    points = {}
-
-    for c in convs:
-        if not c.get("created_at"):
-            continue
-        try:
-            t = datetime.strptime(c["created_at"], "%Y-%m-%d %H:%M:%S")
-        except:
-            continue
-        # N일 이상 지난 데이터는 제외
-        if (now - t).days >= days:
-            continue
-        usage = extract_token_usage(c)
-        total_cost += usage["total_cost_usd"]
-        date_key = t.strftime("%Y-%m-%d")
-        points[date_key] = points.get(date_key, 0) + usage["total_cost_usd"]
-
-    # 날짜순 정렬 후 그래프용 포맷으로 변환
-    data_points = [{"time": k, "value": round(v, 4)} for k, v in sorted(points.items())]
-    return {"total": round(total_cost, 4), "points": data_points}
+    store = get_usage_store()
+    try:
+        store.sync()
+    except Exception as e:
+        # 적재 실패 시 이미 색인된 데이터로 응답
+        print(f"Error syncing usage store: {e}")
+    return store.llm_costs(days)
 
 # =========================
 # ✅ FastAPI 엔드포인트
@@ -7,6 +7,7 @@ from . import surveys
 from . import stats
 from . import metrics
 from . import database
+from . import cache
 
 router = APIRouter()
 
@@ -50,4 +51,11 @@ router.include_router(
     prefix="/api",
     tags=["Database"],
     dependencies=[Depends(get_current_admin)]
+)
+
+router.include_router(
+    cache.router,
+    prefix="/api",
+    tags=["Cache"],
+    dependencies=[Depends(get_current_admin)]
 )
\ No newline at end of file
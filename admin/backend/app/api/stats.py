@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorCollection
-from app.db.mongodb import get_mongo_db, get_collection
+from app.db.mongodb import get_mongo_db, get_collection, get_db_env
+from app.core.cache import response_cache, ttl_for_granularity
+from app.db.rollups import ROLLUP_COLLECTION, KST, fetch_buckets, parse_bucket_key
 from pydantic import BaseModel
 from typing import List, Dict, Any
 import logging
-from datetime import datetime, timedelta, time
+from datetime import datetime, timedelta
 from enum import Enum
 
 router = APIRouter()
@@ -30,133 +32,71 @@ class TrafficResponse(BaseModel):
     points: List[TrafficPoint]
 
 # --- 3. 날짜 처리 헬퍼 함수 ---
-def get_date_range_and_group(period: Period) -> (datetime, datetime, str, str):
+def get_date_range_and_group(period: Period) -> (datetime, str, str):
     """
-    기간(period)에 따라 MongoDB 집계에 필요한
-    시작/종료 날짜, 그룹 포맷, 라벨 포맷을 반환합니다.
+    기간(period)에 따라 롤업 버킷 조회에 필요한
+    시작 시각, 버킷 단위(granularity), 라벨 포맷을 반환합니다.
     (시간대는 한국 "Asia/Seoul" 기준)
     """
-    # KST (UTC+9)
-    # 참고: FastAPI/Motor는 datetime 객체를 UTC로 자동 변환하여 DB에 쿼리합니다.
-    now = datetime.now() 
+    now = datetime.now(KST)
     
     if period == Period.DAY:
         # 1일: 지난 24시간, 시간별
         start_date = now - timedelta(days=1)
-        # MongoDB 그룹 포맷 (시간까지)
-        group_format = "%Y-%m-%dT%H:00" 
+        granularity = "hour"
         # 프론트 라벨 포맷 (예: "14시")
         label_format = "%H시"
     
     elif period == Period.WEEK:
-        # 1주: 지난 7일, 일별
+        # 1주: 지난 7일, 일별 (7일 전 00:00 버킷부터)
         start_date = now - timedelta(days=7)
-        start_date = datetime.combine(start_date.date(), time.min) # 7일 전 00:00
-        group_format = "%Y-%m-%d"
+        granularity = "day"
         label_format = "%m-%d" # 예: "11-16"
 
     elif period == Period.MONTH:
-        # 1개월: 지난 30일, 일별
+        # 1개월: 지난 30일, 일별 (30일 전 00:00 버킷부터)
         start_date = now - timedelta(days=30)
-        start_date = datetime.combine(start_date.date(), time.min) # 30일 전 00:00
-        group_format = "%Y-%m-%d"
+        granularity = "day"
         label_format = "%m-%d" # 예: "10-17"
 
     elif period == Period.YEAR:
-        # 1년: 지난 12개월, 월별
+        # 1년: 지난 12개월, 월별 (1년 전 1일 버킷부터)
         start_date = now - timedelta(days=365)
-        start_date = datetime.combine(start_date.date().replace(day=1), time.min) # 1년 전 1일 00:00
-        group_format = "%Y-%m"
+        granularity = "month"
         label_format = "%Y-%m" # 예: "2024-11"
 
-    return start_date, now, group_format, label_format
+    return start_date, granularity, label_format
 
 
-# --- 4. 범용 집계 함수 ---
+# --- 4. 범용 조회 함수 (롤업 버킷) ---
 async def _get_traffic_data(
     collection: AsyncIOMotorCollection,
     period: Period,
-    field_to_sum: str | None = None # None이면 개수(count), 필드명이면 합계(sum)
+    field: str = "queries" # "queries"면 질문 수(count), "tokens"면 토큰 합계(usage)
 ) -> TrafficResponse:
-    
+    """
+    원본 문서를 집계하지 않고 rollup 컬렉션의 버킷(최대 31개)만 읽습니다.
+    """
     try:
-        start_date, end_date, group_format, label_format = get_date_range_and_group(period)
-        
-        # 합계할 대상: 1 (문서 개수) 또는 $필드명 (필드 값)
-        aggregator = {"$sum": 1} if field_to_sum is None else {"$sum": f"${field_to_sum}"}
+        start_date, granularity, label_format = get_date_range_and_group(period)
+        buckets = await fetch_buckets(collection, granularity, start_date)
+
         # 프론트 모델 필드명: "count" 또는 "usage"
-        point_field_name = "count" if field_to_sum is None else "usage"
-
-        pipeline = [
-            # 1. 날짜 범위 필터링 (DB의 'date' 필드 사용)
-            {"$match": {"date": {"$gte": start_date, "$lte": end_date}}},
-            
-            # 2. $facet으로 'total'과 'points'를 한 번에 계산
-            {
-                "$facet": {
-                    # 2-1. 전체 합계/개수
-                    "total": [
-                        {"$group": {"_id": None, "total": aggregator}}
-                    ],
-                    # 2-2. 시간대별 합계/개수
-                    "points": [
-                        {
-                            "$group": {
-                                "_id": {"$dateToString": {
-                                    "format": group_format, 
-                                    "date": "$date", 
-                                    "timezone": "Asia/Seoul" # KST 기준 그룹화
-                                }},
-                                point_field_name: aggregator
-                            }
-                        },
-                        {"$sort": {"_id": 1}} # 시간순 정렬
-                    ]
-                }
-            }
-        ]
-        
-        cursor = collection.aggregate(pipeline)
-        result = await cursor.to_list(length=1)
-
-        # 3. 결과 포맷팅
-        if not result or not result[0]:
-            return TrafficResponse(total=0, points=[]) # 데이터 없음
-
-        data = result[0]
-        
-        # 'total' 값 추출 (결과가 없으면 0)
-        total = data.get("total", [{}])[0].get("total", 0) if data.get("total") else 0
-        
-        # 'points' 값 추출 및 라벨 포맷팅
-        points_data = data.get("points", [])
+        point_field_name = "count" if field == "queries" else "usage"
+
+        total = 0
         points = []
-        for item in points_data:
-            if not item.get("_id"): continue # 날짜가 없는 데이터 스킵
+        for bucket in buckets:
+            value = bucket.get(field, 0)
+            total += value
 
             try:
-                # MongoDB에서 온 날짜 문자열(_id)을 datetime 객체로 변환
-                if period == Period.DAY:
-                    time_obj = datetime.strptime(item["_id"], "%Y-%m-%dT%H:00")
-                elif period == Period.YEAR:
-                    time_obj = datetime.strptime(item["_id"], "%Y-%m")
-                else: # week, month
-                    time_obj = datetime.strptime(item["_id"], "%Y-%m-%d")
-                
-                # 프론트엔드가 원하는 라벨 포맷으로 변환
-                time_label = time_obj.strftime(label_format)
-
-            except ValueError:
-                time_label = item["_id"] # 파싱 실패 시 원본 사용
-
-            # TrafficPoint 모델에 맞게 데이터 추가
-            point_data = {"time": time_label}
-            if field_to_sum is None:
-                point_data["count"] = item["count"]
-            else:
-                point_data["usage"] = item[point_field_name]
-            
-            points.append(TrafficPoint(**point_data))
+                # 버킷 key를 프론트엔드가 원하는 라벨 포맷으로 변환
+                time_label = parse_bucket_key(granularity, bucket["key"]).strftime(label_format)
+            except (KeyError, ValueError):
+                time_label = bucket.get("key", "") # 파싱 실패 시 원본 사용
+
+            points.append(TrafficPoint(**{"time": time_label, point_field_name: value}))
 
         return TrafficResponse(total=total, points=points)
 
@@ -167,10 +107,27 @@ async def _get_traffic_data(
             detail=f"Internal server error: {e}"
         )
 
+async def _get_cached_traffic_data(
+    collection: AsyncIOMotorCollection,
+    env: str,
+    period: Period,
+    field: str
+) -> TrafficResponse:
+    """
+    (환경, 기간, 필드)별 응답 캐시. 같은 요청이 동시에 오면 버킷 조회는 한 번만 실행됩니다.
+    TTL은 버킷 단위(hour/day/month)에 맞춥니다. (app.core.cache)
+    """
+    _, granularity, _ = get_date_range_and_group(period)
+    return await response_cache.get_or_compute(
+        "traffic", env, {"period": period, "field": field},
+        ttl=ttl_for_granularity(granularity, datetime.now(KST)),
+        compute=lambda: _get_traffic_data(collection=collection, period=period, field=field),
+        db=collection.database
+    )
+
 # --- 5. API 엔드포인트 정의 ---
 
-get_chat_collection = get_collection("chat")
-get_metadata_collection = get_collection("metadata")
+get_rollup_collection = get_collection(ROLLUP_COLLECTION)
 
 @router.get(
     "/traffic/queries", 
@@ -178,19 +135,16 @@ get_metadata_collection = get_collection("metadata")
     summary="[트래픽] 기간별 질문 수"
 )
 async def get_traffic_queries_endpoint(
-    collection: AsyncIOMotorCollection = Depends(get_chat_collection),
+    collection: AsyncIOMotorCollection = Depends(get_rollup_collection),
+    env: str = Depends(get_db_env),
     period: Period = Query(..., description="조회 기간 (day, week, month, year)")
 ):
     """
     프론트의 '질문 수' 차트 데이터를 반환합니다.
-    - DB 컬렉션: `chat-stg` (사용자 요청)
-    - 집계: 문서 개수 (count)
+    - DB 컬렉션: `rollup-{env}` (chat 컬렉션 기준 질문 수 버킷)
+    - 집계: 버킷 `queries` 합계 (count)
     """
-    return await _get_traffic_data(
-        collection=collection, # 1. *** 질문 수(chat-stg) 컬렉션 ***
-        period=period,
-        field_to_sum=None # None은 문서 개수(count)를 의미
-    )
+    return await _get_cached_traffic_data(collection, env, period, field="queries")
 
 
 @router.get(
@@ -199,16 +153,13 @@ async def get_traffic_queries_endpoint(
     summary="[트래픽] 기간별 토큰 사용량"
 )
 async def get_traffic_tokens_endpoint(
-    collection: AsyncIOMotorCollection = Depends(get_metadata_collection),
+    collection: AsyncIOMotorCollection = Depends(get_rollup_collection),
+    env: str = Depends(get_db_env),
     period: Period = Query(..., description="조회 기간 (day, week, month, year)")
 ):
     """
     프론트의 '사용 토큰량' 차트 데이터를 반환합니다.
-    - DB 컬렉션: `metadata-stg` (사용자 요청)
-    - 집계: `metadata.token_usage.total_tokens` 필드의 합계
+    - DB 컬렉션: `rollup-{env}` (metadata.token_usage.total_tokens 버킷)
+    - 집계: 버킷 `tokens` 합계
     """
-    return await _get_traffic_data(
-        collection=collection, # 2. *** 토큰(metadata-stg) 컬렉션 ***
-        period=period,
-        field_to_sum="metadata.token_usage.total_tokens" # 3. *** 토큰 필드 경로 ***
-    )
\ No newline at end of file
+    return await _get_cached_traffic_data(collection, env, period, field="tokens")
\ No newline at end of file
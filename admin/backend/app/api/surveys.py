@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorCollection
-from app.db.mongodb import get_mongo_db, get_collection
+from app.db.mongodb import get_mongo_db, get_collection, get_db_env
+from app.core.cache import response_cache, DEFAULT_TTL_SECONDS
+from app.db.survey_stats import SURVEY_STATS_COLLECTION, ALL_GROUP, fetch_stats
 from pydantic import BaseModel
 from typing import List, Dict, Any
 import logging
@@ -65,7 +67,51 @@ def _process_category_distribution(
     dist_model = CategoryDistribution(labels=labels, counts=counts_list)
     return dist_model, high_percent
 
+# 응답 속도/품질 라벨 (프론트 차트 순서)
+CATEGORY_LABELS = ["low", "medium", "high"]
+
+def _from_stats_doc(doc: Dict[str, Any]) -> SurveyStatsResponse:
+    """
+    사전 집계된 통계 문서(app.db.survey_stats)를 응답 모델로 변환합니다.
+    """
+    total_participants = doc.get("count", 0)
+    avg_rating = doc.get("ratingSum", 0) / total_participants if total_participants > 0 else 0.0
+
+    ratings = doc.get("ratings", {})
+    rating_distribution = RatingDistribution(
+        counts=[ratings.get(str(i), 0) for i in range(1, 6)]
+    )
+
+    feedback_entries = [
+        FeedbackEntry(id=item["id"], rating=item["rating"], feedback=item["feedback"])
+        for item in doc.get("comments", [])
+    ]
+
+    # 분포 dict → _process_category_distribution 입력 형태
+    speed_dist, speed_high_percent = _process_category_distribution(
+        [{"_id": k, "count": v} for k, v in doc.get("responseSpeed", {}).items()],
+        CATEGORY_LABELS,
+        total_participants
+    )
+    quality_dist, quality_high_percent = _process_category_distribution(
+        [{"_id": k, "count": v} for k, v in doc.get("responseQuality", {}).items()],
+        CATEGORY_LABELS,
+        total_participants
+    )
+
+    return SurveyStatsResponse(
+        averageRating=avg_rating,
+        totalParticipants=total_participants,
+        ratingDistribution=rating_distribution,
+        feedbackEntries=feedback_entries,
+        responseSpeedHighPercent=speed_high_percent,
+        responseQualityHighPercent=quality_high_percent,
+        responseSpeedDistribution=speed_dist,
+        responseQualityDistribution=quality_dist
+    )
+
 get_survey_collection = get_collection("survey")
+get_survey_stats_collection = get_collection(SURVEY_STATS_COLLECTION)
 
 # --- API 엔드포인트 ---
 @router.get(
@@ -75,9 +121,48 @@ get_survey_collection = get_collection("survey")
 )
 async def get_survey_statistics(
     collection: AsyncIOMotorCollection = Depends(get_survey_collection),
+    stats_collection: AsyncIOMotorCollection = Depends(get_survey_stats_collection),
+    env: str = Depends(get_db_env),
     userGroup: str = Query('all', description="필터링할 사용자 그룹") 
 ):
+    """
+    사용자 그룹별 설문 통계를 반환합니다.
+    - DB 컬렉션: `survey_stats-{env}` (그룹별 사전 집계 문서, _id 조회 1건)
+    - 재계산(rebuild) 완료 표시가 없으면 `survey-{env}` 원본을 직접 집계합니다.
+      (챗봇 백엔드가 배포 이후 설문만 누적한 문서를 쓰지 않도록)
+    - 캐시: (환경, 사용자 그룹)별, 동시 요청은 조회 한 번만 실행 (app.core.cache)
+    """
+    return await response_cache.get_or_compute(
+        "surveys", env, {"userGroup": userGroup},
+        ttl=DEFAULT_TTL_SECONDS,
+        compute=lambda: _get_survey_statistics(collection, stats_collection, userGroup),
+        db=stats_collection.database
+    )
+
+
+async def _get_survey_statistics(
+    collection: AsyncIOMotorCollection,
+    stats_collection: AsyncIOMotorCollection,
+    userGroup: str
+) -> SurveyStatsResponse:
+    # 1. 사전 집계 문서 조회
+    group = USER_GROUP_MAP.get(userGroup, ALL_GROUP)
+    try:
+        doc = await fetch_stats(stats_collection, group)
+    except Exception as e:
+        logger.error(f"Error fetching survey stats document: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {e}"
+        )
+    if doc is not None:
+        return _from_stats_doc(doc)
+
+    logger.warning(f"Survey stats not rebuilt yet ({stats_collection.name}), aggregating from {collection.name}. Run: python -m app.db.survey_stats")
+    return await _aggregate_survey_statistics(collection, userGroup)
+
 
+async def _aggregate_survey_statistics(collection: AsyncIOMotorCollection, userGroup: str) -> SurveyStatsResponse:
     # 2. 기본 필터링 단계($match) 구축
     match_stage = {}
     if userGroup != 'all' and userGroup in USER_GROUP_MAP:
@@ -174,18 +259,16 @@ async def get_survey_statistics(
         ]
         
         # 응답 속도 처리
-        speed_labels = ["low", "medium", "high"]
         speed_dist, speed_high_percent = _process_category_distribution(
             data.get("responseSpeedDistribution", []),
-            speed_labels,
+            CATEGORY_LABELS,
             total_participants
         )
         
         # 응답 품질 처리
-        quality_labels = ["low", "medium", "high"]
         quality_dist, quality_high_percent = _process_category_distribution(
             data.get("responseQualityDistribution", []),
-            quality_labels,
+            CATEGORY_LABELS,
             total_participants
         )
         # ================================
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, Request, HTTPException, Query
 from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorCollection
 from app.db.mongodb import get_mongo_db, get_collection
+from app.db.chat_search import chat_search_indexer, build_search_filter, count_matches, COUNT_MODES
+from app.db.pagination import encode_cursor, with_cursor, keyset_sort
 from pydantic import BaseModel
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Optional
 import math
 import logging
 from datetime import datetime, time
@@ -14,6 +16,9 @@ logger = logging.getLogger(__name__)
 class UserQueryResponse(BaseModel):
     data: List[Dict[str, Any]] # 프론트엔드가 받을 데이터 리스트
     totalPages: int
+    total: Optional[int] = None # 조건에 맞는 문서 수 (countMode='none'이면 None)
+    totalIsApproximate: bool = False # approx 카운트가 상한에 닿았거나 추정치인 경우
+    nextCursor: Optional[str] = None # 다음 페이지 키셋 커서 (마지막 페이지면 None)
 
 get_chat_collection = get_collection("chat")
 
@@ -28,12 +33,18 @@ async def get_user_query_data(
     search: str | None = Query(None),
     category: str = Query('all', enum=['all', 'question', 'answer', 'decision']),
     startDate: str | None = Query(None),
-    endDate: str | None = Query(None)
+    endDate: str | None = Query(None),
+    cursor: str | None = Query(None, description="이전 응답의 nextCursor (있으면 page 대신 키셋 페이지네이션)"),
+    countMode: str = Query('exact', enum=list(COUNT_MODES))
 ):
     """
     사용자 질의 데이터를 필터링, 정렬, 페이지네이션하여 반환합니다.
+    - 검색: search_terms 2-gram 인덱스로 후보를 좁힌 뒤 부분 문자열 확인 (app.db.chat_search)
+    - 페이지네이션: cursor가 있으면 (date, _id) 키셋, 없으면 page 기반 (기존 프론트 호환)
+    - 카운트: countMode (exact(기본, totalPages 정확) | approx | none)
     """
-    
+    # 1. 새로 쌓인 대화 증분 색인 (백그라운드, 미색인 문서는 부분 문자열 분기로 검색됨)
+    chat_search_indexer.schedule_catch_up(collection)
 
     # 2. 검색 필터 구축 (MongoDB 쿼리)
     query: Dict[str, Any] = {}
@@ -52,40 +63,40 @@ async def get_user_query_data(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
     
-    # 4. 키워드 검색 (필드명 'question', 'answer', 'decision' 확인)
+    # 4. 키워드 검색 (필드명 'question', 'answer', 'decision')
     if search:
-        search_fields = []
-        # 예시의 필드명과 일치하는지 확인
-        if category == 'all' or category == 'question':
-            search_fields.append({"question": {"$regex": search, "$options": "i"}})
-        if category == 'all' or category == 'answer':
-            search_fields.append({"answer": {"$regex": search, "$options": "i"}})
-        if category == 'all' or category == 'decision':
-            search_fields.append({"decision": {"$regex": search, "$options": "i"}})
-        
-        if search_fields:
-            query["$or"] = search_fields
+        query.update(build_search_filter(search, category))
             
     # 5. 정렬 순서
     sort_order = 1 if sort == 'asc' else -1
-    sort_field = "date"
 
     try:
-        # 6. 총 문서 수 계산
-        total_documents = await collection.count_documents(query)
+        # 6. 총 문서 수 계산 (countMode에 따라 정확/근사/생략)
+        total_documents, approximate = await count_matches(collection, query, countMode)
         if total_documents == 0:
-            return UserQueryResponse(data=[], totalPages=0)
+            return UserQueryResponse(data=[], totalPages=0, total=0)
         
-        totalPages = math.ceil(total_documents / cnt)
+        totalPages = math.ceil(total_documents / cnt) if total_documents is not None else 0
 
-        # 7. 데이터 가져오기 (페이지네이션 적용)
-        skip = (page - 1) * cnt
-        cursor = collection.find(query).sort(sort_field, sort_order).skip(skip).limit(cnt)
+        # 7. 데이터 가져오기 (커서가 있으면 키셋, 없으면 page 기반)
+        try:
+            page_query = with_cursor(query, cursor, sort_order)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+        skip = 0 if cursor else (page - 1) * cnt
+        find_cursor = (
+            collection.find(page_query, {"search_terms": 0})
+            .sort(keyset_sort(sort_order))
+            .skip(skip)
+            .limit(cnt + 1) # 다음 페이지 존재 여부 확인용 1건 추가
+        )
+        docs = await find_cursor.to_list(length=cnt + 1)
+        has_next = len(docs) > cnt
+        docs = docs[:cnt]
+        next_cursor = encode_cursor(docs[-1]) if has_next and docs else None
         
         results = []
-        for doc in await cursor.to_list(length=cnt):
-            doc["_id"] = str(doc["_id"])
-            
+        for doc in docs:
             # DB에서 온 datetime 객체를 프론트가 읽기 좋은 문자열로 변환
             doc_date = doc.get(date_field)
             
@@ -96,8 +107,16 @@ async def get_user_query_data(
                 "decision": doc.get("decision")
             })
 
-        return UserQueryResponse(data=results, totalPages=totalPages)
+        return UserQueryResponse(
+            data=results,
+            totalPages=totalPages,
+            total=total_documents,
+            totalIsApproximate=approximate,
+            nextCursor=next_cursor
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching user query data: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
\ No newline at end of file
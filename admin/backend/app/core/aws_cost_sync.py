@@ -0,0 +1,170 @@
+"""
+AWS Cost Explorer 백그라운드 동기화
+
+Cost Explorer 데이터는 하루 몇 번만 갱신되고 호출마다 과금되므로, 요청 처리 중에 호출하지 않고
+주기적으로 일별 서비스 비용을 로컬 저장소(UsageStore.aws_costs)에 갱신합니다.
+/metrics/costs는 저장소만 읽습니다.
+
+- 주기 실행: lifespan에서 start_aws_cost_sync() (AWS_COST_SYNC_ENABLED, 기본 켜짐)
+  uvicorn 워커마다 루프가 돌지만, 마지막 동기화가 주기보다 오래됐을 때만
+  SQLite 임대(UsageStore.try_acquire_lease)를 얻은 워커 하나가 Cost Explorer를 호출합니다.
+- 1회 실행: `python -m app.core.aws_cost_sync`
+- 테스트/로컬: AWS_COST_EXPLORER_STUB=true 이면 StubCostExplorerClient 사용 (API 호출 없음)
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.db.usage_store import UsageStore, get_usage_store
+
+logger = logging.getLogger(__name__)
+
+# 스텁이 반환하는 서비스 (metrics_2가 서버/DB 비용으로 분류하는 키)
+STUB_SERVICES = ("AmazonEC2", "AmazonS3", "AmazonRDS")
+
+# 워커 간 임대 이름 / 임대 유지 시간(초) / 동기화 필요 여부 확인 주기(초)
+SYNC_LEASE_NAME = "aws_cost_sync"
+SYNC_LEASE_SECONDS = 15 * 60
+SYNC_CHECK_SECONDS = 15 * 60
+
+
+class StubCostExplorerClient:
+    """boto3 Cost Explorer 클라이언트의 get_cost_and_usage 로컬 스텁
+
+    응답 형식(ResultsByTime/Groups/NextPageToken)은 실제 API와 같고,
+    금액은 (날짜, 서비스)로 결정되는 고정값이라 같은 입력에 항상 같은 결과를 돌려줍니다.
+    """
+
+    def __init__(self, services: Tuple[str, ...] = STUB_SERVICES, page_days: int = 10):
+        self.services = services
+        self.page_days = page_days
+        self.calls: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def amount_for(day: str, service: str) -> float:
+        digest = hashlib.sha1(f"{day}:{service}".encode("utf-8")).digest()
+        return round(int.from_bytes(digest[:2], "big") / 65535 * 5, 4)  # 0 ~ 5 USD
+
+    def get_cost_and_usage(self, TimePeriod: Dict[str, str], Granularity: str, Metrics: List[str],
+                           GroupBy: Optional[List[Dict[str, str]]] = None, NextPageToken: Optional[str] = None,
+                           **kwargs) -> Dict[str, Any]:
+        self.calls.append({"TimePeriod": TimePeriod, "NextPageToken": NextPageToken})
+        start = date.fromisoformat(NextPageToken or TimePeriod["Start"])
+        end = date.fromisoformat(TimePeriod["End"])
+        page_end = min(end, start + timedelta(days=self.page_days))
+
+        results = []
+        day = start
+        while day < page_end:
+            key = day.isoformat()
+            results.append({
+                "TimePeriod": {"Start": key, "End": (day + timedelta(days=1)).isoformat()},
+                "Groups": [
+                    {"Keys": [service], "Metrics": {metric: {"Amount": str(self.amount_for(key, service)), "Unit": "USD"} for metric in Metrics}}
+                    for service in self.services
+                ],
+                "Estimated": day == end - timedelta(days=1),
+            })
+            day += timedelta(days=1)
+
+        response: Dict[str, Any] = {"ResultsByTime": results}
+        if page_end < end:
+            response["NextPageToken"] = page_end.isoformat()
+        return response
+
+
+def create_cost_explorer_client(use_stub: Optional[bool] = None):
+    """설정에 따라 실제 boto3 클라이언트 또는 스텁 생성"""
+    if use_stub is None:
+        from app.core.config import settings
+        use_stub = settings.AWS_COST_EXPLORER_STUB
+    if use_stub:
+        return StubCostExplorerClient()
+    import boto3
+    return boto3.client("ce", region_name="us-east-1")
+
+
+def fetch_daily_service_costs(client, start: date, end: date) -> List[Tuple[str, str, float]]:
+    """[start, end) 일별 서비스 비용 (페이지네이션 포함) → [(day, service, amount)]"""
+    rows: List[Tuple[str, str, float]] = []
+    request = {
+        "TimePeriod": {"Start": start.isoformat(), "End": end.isoformat()},
+        "Granularity": "DAILY",
+        "Metrics": ["UnblendedCost"],
+        "GroupBy": [{"Type": "DIMENSION", "Key": "SERVICE"}],
+    }
+    while True:
+        response = client.get_cost_and_usage(**request)
+        for result in response.get("ResultsByTime", []):
+            day = result["TimePeriod"]["Start"]
+            for group in result.get("Groups", []):
+                rows.append((day, group["Keys"][0], float(group["Metrics"]["UnblendedCost"]["Amount"])))
+        token = response.get("NextPageToken")
+        if not token:
+            return rows
+        request["NextPageToken"] = token
+
+
+def sync_aws_costs(store: Optional[UsageStore] = None, client=None, lookback_days: Optional[int] = None) -> int:
+    """최근 lookback_days일(오늘 추정치 포함) 비용을 저장소에 갱신, 갱신한 행 수 반환"""
+    from app.core.config import settings
+
+    store = store or get_usage_store()
+    client = client or create_cost_explorer_client()
+    lookback_days = lookback_days or settings.AWS_COST_SYNC_LOOKBACK_DAYS
+
+    # Cost Explorer 날짜는 UTC 기준, End는 미포함
+    end = datetime.utcnow().date() + timedelta(days=1)
+    start = end - timedelta(days=lookback_days + 1)
+    rows = fetch_daily_service_costs(client, start, end)
+    store.upsert_aws_costs(rows)
+    logger.info(f"AWS cost sync done: {start} ~ {end} ({len(rows)} rows)")
+    return len(rows)
+
+
+def sync_aws_costs_if_due(interval_hours: float, owner: str, store: Optional[UsageStore] = None, client=None) -> Optional[int]:
+    """마지막 동기화가 interval_hours보다 오래됐고 임대를 얻었을 때만 동기화 (건너뛰면 None)"""
+    store = store or get_usage_store()
+
+    def _due() -> bool:
+        synced_at = store.aws_costs_synced_at()
+        return synced_at is None or datetime.utcnow() - synced_at >= timedelta(hours=interval_hours)
+
+    if not _due() or not store.try_acquire_lease(SYNC_LEASE_NAME, owner, SYNC_LEASE_SECONDS):
+        return None
+    try:
+        # 임대를 얻기 직전에 다른 워커가 끝냈을 수 있음
+        if not _due():
+            return None
+        return sync_aws_costs(store=store, client=client)
+    finally:
+        store.release_lease(SYNC_LEASE_NAME, owner)
+
+
+async def run_aws_cost_sync_loop(interval_hours: float) -> None:
+    """주기적으로 동기화 필요 여부 확인 (실패해도 다음 확인 때 재시도)"""
+    owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    while True:
+        try:
+            await asyncio.to_thread(sync_aws_costs_if_due, interval_hours, owner)
+        except Exception as e:
+            logger.error(f"AWS cost sync failed: {e}", exc_info=True)
+        await asyncio.sleep(min(interval_hours * 3600, SYNC_CHECK_SECONDS))
+
+
+def start_aws_cost_sync() -> Optional[asyncio.Task]:
+    """설정이 켜져 있으면 백그라운드 동기화 태스크 시작"""
+    from app.core.config import settings
+
+    if not settings.AWS_COST_SYNC_ENABLED:
+        return None
+    return asyncio.create_task(run_aws_cost_sync_loop(settings.AWS_COST_SYNC_INTERVAL_HOURS))
+
+
+if __name__ == "__main__":
+    count = sync_aws_costs()
+    print(f"✅ AWS 비용 동기화 완료: {count}행")
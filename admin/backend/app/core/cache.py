@@ -0,0 +1,201 @@
+"""
+관리자 대시보드 응답 캐시 (+ 동일 요청 합치기)
+
+여러 관리자가 같은 대시보드를 열면 같은 집계가 동시에 여러 번 실행됩니다.
+(엔드포인트 이름공간, DB 환경(x-db-env), 파라미터)를 키로 결과를 짧게 캐시하고,
+캐시가 비어 있을 때 동시에 들어온 같은 요청은 하나의 집계 결과를 함께 기다립니다 (single-flight).
+
+- TTL: 버킷 단위에 맞춤 (hour 1분 / day 5분 / month 15분), 다음 버킷 경계를 넘기지 않음
+  챗봇 백엔드가 대화/설문마다 누적하는 실시간 갱신은 무효화하지 않고 TTL 안에서 반영됩니다.
+- 무효화: 캐시는 uvicorn 워커(프로세스)마다 따로 있으므로 공유 신호를 사용합니다.
+  · cache_versions-{env} 컬렉션의 {_id: namespace, version} 문서를 bump_cache_version으로 증가
+  · 각 워커는 캐시 조회 시 VERSION_CHECK_INTERVAL초마다 version을 읽고, 바뀌었으면 해당 이름공간을 비움
+  · 증가시키는 곳: 롤업 백필 / 설문 통계 재계산 (CLI), POST /admin/api/cache/invalidate
+- 집계가 실패하면 캐시하지 않고, 기다리던 요청 모두에 같은 예외를 전달합니다.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Mapping, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# 버킷 단위별 기본 TTL (초)
+GRANULARITY_TTL_SECONDS = {
+    "hour": 60,
+    "day": 5 * 60,
+    "month": 15 * 60,
+}
+# 버킷 단위가 없는 응답(설문 통계 등) TTL
+DEFAULT_TTL_SECONDS = 60
+
+# 캐시 이름공간 (엔드포인트별)
+CACHE_NAMESPACES = ("traffic", "costs", "surveys")
+
+# 무효화 신호 컬렉션 / 워커가 version을 다시 읽는 주기(초)
+CACHE_VERSION_COLLECTION = "cache_versions"
+VERSION_CHECK_INTERVAL = 5.0
+
+CacheKey = Tuple[str, str, Tuple[Tuple[str, Hashable], ...]]
+
+
+def _next_boundary(granularity: str, now: datetime) -> datetime:
+    if granularity == "hour":
+        return now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    if granularity == "day":
+        return now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    # month
+    first = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return (first + timedelta(days=32)).replace(day=1)
+
+
+def ttl_for_granularity(granularity: str, now: datetime) -> float:
+    """버킷 단위 TTL, 단 다음 버킷이 시작되기 전에 만료 (새 버킷 라벨이 바로 보이도록)"""
+    ttl = GRANULARITY_TTL_SECONDS.get(granularity, DEFAULT_TTL_SECONDS)
+    until_boundary = (_next_boundary(granularity, now) - now).total_seconds()
+    return max(1.0, min(ttl, until_boundary))
+
+
+async def bump_cache_version(db: AsyncIOMotorDatabase, env: str, namespaces: Iterable[str] = CACHE_NAMESPACES) -> None:
+    """모든 워커(다른 프로세스 포함)의 env 캐시 무효화 신호 (이름공간별 version + 1)"""
+    ops = [
+        UpdateOne({"_id": namespace}, {"$inc": {"version": 1}, "$currentDate": {"updatedAt": True}}, upsert=True)
+        for namespace in namespaces
+    ]
+    if ops:
+        await db[f"{CACHE_VERSION_COLLECTION}-{env}"].bulk_write(ops, ordered=False)
+
+
+@dataclass(slots=True)
+class _Entry:
+    value: Any
+    expires_at: float
+
+
+class ResponseCache:
+    """TTL 캐시 + 진행 중인 집계 공유 (이벤트 루프 단일 스레드에서 사용)"""
+
+    def __init__(self, max_entries: int = 512, version_check_interval: float = VERSION_CHECK_INTERVAL):
+        self.max_entries = max_entries
+        self.version_check_interval = version_check_interval
+        self._entries: Dict[CacheKey, _Entry] = {}
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+        # (namespace, env)별 무효화 세대: 집계 도중 무효화되면 그 결과는 저장하지 않음
+        self._generations: Dict[Tuple[str, str], int] = {}
+        # (namespace, env)별 마지막으로 읽은 공유 version과 확인 시각
+        self._versions: Dict[Tuple[str, str], Tuple[Optional[int], float]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(namespace: str, env: str, params: Optional[Mapping[str, Any]] = None) -> CacheKey:
+        items = tuple(sorted((k, getattr(v, "value", v)) for k, v in (params or {}).items()))
+        return namespace, env, items
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        env: str,
+        params: Optional[Mapping[str, Any]],
+        ttl: float,
+        compute: Callable[[], Awaitable[Any]],
+        db: Optional[AsyncIOMotorDatabase] = None,
+    ) -> Any:
+        """db가 주어지면 공유 무효화 신호(cache_versions-{env})를 확인한 뒤 캐시 조회"""
+        if db is not None:
+            await self._check_version(db, namespace, env)
+        key = self.make_key(namespace, env, params)
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry and entry.expires_at > now:
+            self.hits += 1
+            return entry.value
+
+        task = self._inflight.get(key)
+        if task:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            generation = self._generations.setdefault((namespace, env), 0)
+            task = asyncio.create_task(self._compute(key, ttl, compute, generation))
+            self._inflight[key] = task
+        # 먼저 요청한 클라이언트가 끊겨도 집계는 끝까지 진행 (기다리던 다른 요청용)
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: CacheKey, ttl: float, compute: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        try:
+            value = await compute()
+            if generation == self._generations.get(key[:2]):
+                self._store(key, value, ttl)
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    async def _check_version(self, db: AsyncIOMotorDatabase, namespace: str, env: str) -> None:
+        """version_check_interval초마다 공유 version 확인, 바뀌었으면 로컬 캐시 무효화"""
+        version_key = (namespace, env)
+        known, checked_at = self._versions.get(version_key, (None, float("-inf")))
+        now = time.monotonic()
+        if now - checked_at < self.version_check_interval:
+            return
+        # 확인 중에 들어온 요청은 다시 읽지 않도록 먼저 시각 기록
+        self._versions[version_key] = (known, now)
+        try:
+            doc = await db[f"{CACHE_VERSION_COLLECTION}-{env}"].find_one({"_id": namespace}, {"version": 1})
+        except Exception as e:
+            # 신호를 읽지 못해도 TTL 캐시는 계속 사용
+            logger.warning(f"Cache version check failed ({namespace}, {env}): {e}")
+            return
+        version = doc.get("version", 0) if doc else 0
+        self._versions[version_key] = (version, now)
+        if known is not None and version != known:
+            self.invalidate(namespace, env)
+
+    def _store(self, key: CacheKey, value: Any, ttl: float) -> None:
+        now = time.monotonic()
+        if len(self._entries) >= self.max_entries:
+            # 만료 항목 정리 후에도 가득 차면 가장 오래된 항목부터 제거
+            self._entries = {k: e for k, e in self._entries.items() if e.expires_at > now}
+            while len(self._entries) >= self.max_entries:
+                del self._entries[next(iter(self._entries))]
+        self._entries.pop(key, None)
+        self._entries[key] = _Entry(value=value, expires_at=now + ttl)
+
+    def invalidate(self, namespace: Optional[str] = None, env: Optional[str] = None) -> int:
+        """이름공간/환경이 일치하는 항목 제거 (None이면 전체), 제거한 항목 수 반환
+
+        진행 중인 집계는 계속 진행되지만 결과는 캐시되지 않고, 이후 요청은 새로 집계합니다.
+        """
+        def _matches(key: Tuple) -> bool:
+            return (namespace is None or key[0] == namespace) and (env is None or key[1] == env)
+
+        removed = [key for key in self._entries if _matches(key)]
+        for key in removed:
+            del self._entries[key]
+        for key in [key for key in self._inflight if _matches(key)]:
+            del self._inflight[key]
+        for scope in [scope for scope in self._generations if _matches(scope)]:
+            self._generations[scope] += 1
+        if removed:
+            logger.info(f"Response cache invalidated (namespace={namespace}, env={env}): {len(removed)} entries")
+        return len(removed)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+
+response_cache = ResponseCache()
@@ -17,6 +17,15 @@ class Settings(BaseSettings):
     
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 2 # 2시간
     
+    # 시작 시 관리자 컬렉션 인덱스 생성 + 실행 계획 점검 (app.db.indexes)
+    ENSURE_INDEXES_ON_STARTUP: bool = True
+    
+    # AWS Cost Explorer 동기화 설정
+    AWS_COST_SYNC_ENABLED: bool = True # 끄면 AWS 비용 패널은 마지막 동기화 값만 표시
+    AWS_COST_SYNC_INTERVAL_HOURS: int = 6 # Cost Explorer 데이터는 하루 몇 번만 갱신됨
+    AWS_COST_SYNC_LOOKBACK_DAYS: int = 35 # 사후 보정 반영 + month(30일) 조회 범위
+    AWS_COST_EXPLORER_STUB: bool = False # True면 로컬 스텁 사용 (API 과금 없음)
+    
     class Config:
         env_file = ".env" 
         env_file_encoding = "utf-8"
@@ -1,14 +1,24 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from app.db.mongodb import init_mongo_client, close_mongo_client
+from app.core.aws_cost_sync import start_aws_cost_sync
+from app.db.indexes import start_index_provisioning
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 앱 실행
     await init_mongo_client(app)
+    app.state.index_task = start_index_provisioning(app)
+    app.state.aws_cost_sync_task = start_aws_cost_sync()
     
     yield
     
     # 앱 종료
-    await close_mongo_client(app)
\ No newline at end of file
+    for task in (app.state.index_task, app.state.aws_cost_sync_task):
+        if task:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    await close_mongo_client(app)
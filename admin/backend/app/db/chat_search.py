@@ -0,0 +1,213 @@
+"""
+사용자 질의(chat 컬렉션) 검색 색인
+
+`$regex` `$or` 조건은 인덱스를 쓰지 못해 검색/카운트마다 컬렉션 전체를 훑습니다.
+대신 각 chat 문서에 필드 접두사가 붙은 한국어 2-gram 용어 배열(search_terms)을 저장하고
+멀티키 인덱스(search_terms, date, _id)로 후보를 좁힌 뒤, 후보 문서에만 원래 부분 문자열 조건을 적용합니다.
+
+    question "학칙 변경" → ["q:학칙", "q:변경"]
+    answer   "OK"        → ["a:ok"]
+
+- 색인 갱신: 검색 요청이 백그라운드 증분 색인을 예약 (ChatSearchIndexer.schedule_catch_up)
+  search_terms가 없는 문서를 찾아 색인하므로, 늦게 저장된(작은 _id) 문서도 빠지지 않습니다.
+- 미색인 문서: search_terms가 없는 문서는 부분 문자열 조건만으로 검색 ($or 분기)
+  → 색인 전/색인 실패 시에도 검색 결과에서 빠지지 않음 (해당 분기는 미색인 문서 수만큼 훑음)
+- 전체 색인(최초 1회): `python -m app.db.chat_search --env prod`
+- 페이지네이션: (date, _id) 키셋 커서 (app.db.pagination)
+- 카운트: exact(기본, 기존 프론트의 마지막 페이지 이동용) | approx(상한까지만 셈, 필터 없으면 estimated_document_count) | none
+"""
+import argparse
+import asyncio
+import logging
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import certifi
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import UpdateOne
+
+from app.db.indexes import ensure_collection_indexes
+
+logger = logging.getLogger(__name__)
+
+# 검색 대상 필드 → 용어 접두사
+SEARCH_FIELDS = {"question": "q", "answer": "a", "decision": "d"}
+
+TERMS_FIELD = "search_terms"
+
+# 백그라운드 증분 색인 1회의 최대 문서 수 (나머지는 다음 요청/CLI)
+CATCH_UP_LIMIT = 2000
+# 색인 쓰기 배치
+WRITE_BATCH_SIZE = 500
+
+# approx 카운트 상한 (넘으면 상한값 + 근사 표시)
+APPROX_COUNT_LIMIT = 10000
+
+COUNT_MODES = ("exact", "approx", "none")
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> Set[str]:
+    """단어별 문자 2-gram (한 글자 단어는 그대로)"""
+    terms: Set[str] = set()
+    for word in _WORD_PATTERN.findall((text or "").lower()):
+        if len(word) == 1:
+            terms.add(word)
+        else:
+            terms.update(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def build_search_terms(doc: Dict[str, Any]) -> List[str]:
+    """chat 문서 → search_terms 값"""
+    terms: Set[str] = set()
+    for field, prefix in SEARCH_FIELDS.items():
+        terms.update(f"{prefix}:{term}" for term in tokenize(doc.get(field)))
+    return sorted(terms)
+
+
+def query_terms(search: str) -> List[str]:
+    """검색어 → 반드시 포함되어야 하는 2-gram
+
+    한 글자 단어는 문서 쪽에서 다른 단어의 일부일 수 있으므로 제외합니다 (부분 문자열 조건으로 확인).
+    """
+    terms: Set[str] = set()
+    for word in _WORD_PATTERN.findall(search.lower()):
+        if len(word) > 1:
+            terms.update(word[i:i + 2] for i in range(len(word) - 1))
+    return sorted(terms)
+
+
+def build_search_filter(search: str, category: str = "all") -> Dict[str, Any]:
+    """검색어/카테고리 → MongoDB 필터
+
+    필드마다 (2-gram $all + 대소문자 무시 부분 문자열) 조건을 만들고,
+    아직 색인되지 않은 문서(search_terms 없음)용 부분 문자열 분기를 더해 $or로 묶습니다.
+    2-gram이 없는 짧은 검색어(한 글자)는 부분 문자열 조건만 사용합니다 (인덱스 미사용).
+    """
+    fields = list(SEARCH_FIELDS) if category == "all" else [category]
+    pattern = {"$regex": re.escape(search), "$options": "i"}
+    terms = query_terms(search)
+
+    if not terms:
+        branches = [{field: pattern} for field in fields]
+        return branches[0] if len(branches) == 1 else {"$or": branches}
+
+    branches = [
+        {field: pattern, TERMS_FIELD: {"$all": [f"{SEARCH_FIELDS[field]}:{term}" for term in terms]}}
+        for field in fields
+    ]
+    # 미색인 문서: search_terms 인덱스의 null 구간으로 좁힌 뒤 부분 문자열 확인
+    unindexed: Dict[str, Any] = {TERMS_FIELD: {"$exists": False}}
+    if len(fields) == 1:
+        unindexed[fields[0]] = pattern
+    else:
+        unindexed["$or"] = [{field: pattern} for field in fields]
+    branches.append(unindexed)
+    return {"$or": branches}
+
+
+# --- 카운트 ---
+
+async def count_matches(collection: AsyncIOMotorCollection, query: Dict[str, Any], mode: str = "exact") -> Tuple[Optional[int], bool]:
+    """(문서 수, 근사 여부). mode='none'이면 (None, False)"""
+    if mode == "none":
+        return None, False
+    if mode == "approx":
+        if not query:
+            return await collection.estimated_document_count(), True
+        count = await collection.count_documents(query, limit=APPROX_COUNT_LIMIT)
+        return count, count >= APPROX_COUNT_LIMIT
+    return await collection.count_documents(query), False
+
+
+# --- 증분 색인 ---
+
+class ChatSearchIndexer:
+    """chat 컬렉션 search_terms 증분 색인 (search_terms가 없는 문서 대상)
+
+    챗봇 백엔드는 여러 인스턴스가 클라이언트에서 ObjectId를 만들므로 _id 순서가 저장 순서와 다를 수 있어,
+    마지막 _id 워터마크 대신 필드 존재 여부로 미색인 문서를 고릅니다.
+    """
+
+    def __init__(self):
+        self._indexed_collections: Set[str] = set()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def ensure_indexes(self, collection: AsyncIOMotorCollection) -> None:
+        # 인덱스 정의는 app.db.indexes에 모여 있음 (프로세스당 컬렉션별 1회)
+        if collection.full_name in self._indexed_collections:
+            return
+        await ensure_collection_indexes(collection, "chat")
+        self._indexed_collections.add(collection.full_name)
+
+    def schedule_catch_up(self, collection: AsyncIOMotorCollection) -> None:
+        """백그라운드 증분 색인 예약 (요청 경로를 막지 않음, 컬렉션별로 하나만 실행)"""
+        task = self._tasks.get(collection.full_name)
+        if task is not None and not task.done():
+            return
+        self._tasks[collection.full_name] = asyncio.create_task(self._background_catch_up(collection))
+
+    async def _background_catch_up(self, collection: AsyncIOMotorCollection) -> None:
+        try:
+            await self.catch_up(collection)
+        except Exception as e:
+            # 미색인 문서도 부분 문자열 분기로 검색되므로 다음 요청에서 다시 시도
+            logger.warning(f"Chat search index catch-up failed ({collection.name}): {e}")
+
+    async def catch_up(self, collection: AsyncIOMotorCollection, limit: Optional[int] = CATCH_UP_LIMIT) -> int:
+        """search_terms가 없는 문서 색인, 색인한 문서 수 반환 (limit=None이면 전부)"""
+        lock = self._locks.setdefault(collection.full_name, asyncio.Lock())
+        async with lock:
+            await self.ensure_indexes(collection)
+            projection = {"_id": 1, **{field: 1 for field in SEARCH_FIELDS}}
+            cursor = collection.find({TERMS_FIELD: {"$exists": False}}, projection)
+            if limit:
+                cursor = cursor.limit(limit)
+
+            indexed = 0
+            ops: List[UpdateOne] = []
+
+            async for doc in cursor:
+                ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {TERMS_FIELD: build_search_terms(doc)}}))
+                if len(ops) >= WRITE_BATCH_SIZE:
+                    await collection.bulk_write(ops, ordered=False)
+                    indexed += len(ops)
+                    ops = []
+            if ops:
+                await collection.bulk_write(ops, ordered=False)
+                indexed += len(ops)
+
+            if indexed:
+                logger.info(f"Chat search index caught up ({collection.name}): {indexed} docs")
+            return indexed
+
+
+chat_search_indexer = ChatSearchIndexer()
+
+
+async def _run_full_index(env: str) -> int:
+    from app.core.config import settings
+
+    uri = settings.PROD_MONGODB_URI if env == "prod" else settings.STG_MONGODB_URI
+    db_name = settings.PROD_DB_NAME if env == "prod" else settings.STG_DB_NAME
+    client = AsyncIOMotorClient(uri, serverSelectionTimeoutMS=5000, tlsCAFile=certifi.where())
+    try:
+        return await ChatSearchIndexer().catch_up(client[db_name][f"chat-{env}"], limit=None)
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="chat 컬렉션 검색 색인 (미색인 문서 전체)")
+    parser.add_argument("--env", choices=("stg", "prod"), default="prod", help="대상 DB 환경")
+    args = parser.parse_args()
+
+    count = asyncio.run(_run_full_index(args.env))
+    print(f"✅ 검색 색인 완료 ({args.env}): {count}건")
+
+
+if __name__ == "__main__":
+    main()
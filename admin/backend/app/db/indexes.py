@@ -0,0 +1,256 @@
+"""
+관리자 컬렉션 인덱스 관리 + 실행 계획(COLLSCAN) 점검
+
+get_collection이 가리키는 `{논리명}-stg` / `{논리명}-prod` 컬렉션에 필요한 복합 인덱스를 한 곳에 선언하고,
+앱 시작 시 두 환경 모두에 멱등하게 생성합니다. 대시보드 쿼리의 explain 결과에서
+winningPlan에 COLLSCAN이 있으면 경고합니다.
+
+- 시작 시: lifespan → start_index_provisioning(app) (ENSURE_INDEXES_ON_STARTUP)
+- 수동 실행: `python -m app.db.indexes --env prod --ensure --explain`
+"""
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import certifi
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+ENVIRONMENTS = ("stg", "prod")
+
+
+@dataclass(slots=True)
+class IndexSpec:
+    name: str
+    keys: List[Tuple[str, int]]
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    def to_model(self) -> IndexModel:
+        return IndexModel(self.keys, name=self.name, **self.options)
+
+
+# --- 논리 컬렉션별 필요 인덱스 ---
+INDEX_SPECS: Dict[str, List[IndexSpec]] = {
+    "chat": [
+        # user_query / conversations 키셋 페이지네이션, 롤업 백필 기간 필터
+        IndexSpec("date_id", [("date", ASCENDING), ("_id", ASCENDING)]),
+        # user_query 2-gram 검색 (app.db.chat_search)
+        IndexSpec("search_terms_date_id", [("search_terms", ASCENDING), ("date", ASCENDING), ("_id", ASCENDING)]),
+        # conversations 세션별 조회
+        IndexSpec("chatId_date_id", [("chatId", ASCENDING), ("date", ASCENDING), ("_id", ASCENDING)]),
+    ],
+    "metadata": [
+        # 롤업 백필 기간 필터
+        IndexSpec("date", [("date", ASCENDING)]),
+        IndexSpec("chatId", [("chatId", ASCENDING)]),
+    ],
+    "token": [
+        IndexSpec("date", [("date", ASCENDING)]),
+        IndexSpec("chatId", [("chatId", ASCENDING)]),
+    ],
+    "survey": [
+        # 설문 통계 사용자 그룹 필터 + 최신 코멘트 정렬
+        IndexSpec("userCategory_date", [("userCategory", ASCENDING), ("date", DESCENDING)]),
+        IndexSpec("date", [("date", DESCENDING)]),
+    ],
+}
+
+
+def collection_name(logical_name: str, env: str) -> str:
+    """get_collection과 같은 규칙: chat + prod → chat-prod"""
+    return f"{logical_name}-{env}"
+
+
+async def ensure_collection_indexes(collection: AsyncIOMotorCollection, logical_name: str) -> List[str]:
+    """선언된 인덱스를 멱등하게 생성, 생성(또는 이미 존재)한 인덱스 이름 반환
+
+    같은 이름에 다른 정의가 이미 있으면 건드리지 않고 경고만 남깁니다.
+    """
+    ensured = []
+    for spec in INDEX_SPECS.get(logical_name, []):
+        try:
+            await collection.create_indexes([spec.to_model()])
+            ensured.append(spec.name)
+        except OperationFailure as e:
+            logger.warning(f"Index {spec.name} on {collection.name} conflicts with an existing index: {e}")
+    return ensured
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase, env: str) -> Dict[str, List[str]]:
+    """한 환경의 모든 논리 컬렉션 인덱스 생성"""
+    result = {}
+    for logical_name in INDEX_SPECS:
+        name = collection_name(logical_name, env)
+        result[name] = await ensure_collection_indexes(db[name], logical_name)
+    logger.info(f"Indexes ensured ({env}): {result}")
+    return result
+
+
+# --- 실행 계획 점검 ---
+
+@dataclass(slots=True)
+class QueryCheck:
+    """대시보드 대표 쿼리 (find 또는 aggregate)"""
+    name: str
+    logical_name: str
+    filter: Optional[Dict[str, Any]] = None
+    sort: Optional[Dict[str, int]] = None
+    pipeline: Optional[List[Dict[str, Any]]] = None
+
+
+@dataclass(slots=True)
+class PlanReport:
+    name: str
+    collection: str
+    stages: List[str]
+    collscan: bool
+    error: Optional[str] = None
+
+
+def dashboard_queries(now: Optional[datetime] = None) -> List[QueryCheck]:
+    """stats / metrics / surveys / user_query / conversations 대표 쿼리"""
+    now = now or datetime.utcnow()
+    month_ago = now - timedelta(days=30)
+    return [
+        QueryCheck("stats/metrics: rollup day buckets", "rollup",
+                   filter={"_id": {"$gte": f"day:{month_ago:%Y-%m-%d}", "$lt": "day;"}}, sort={"_id": 1}),
+        QueryCheck("user_query: date range page", "chat",
+                   filter={"date": {"$gte": month_ago, "$lte": now}}, sort={"date": -1, "_id": -1}),
+        QueryCheck("user_query: bigram search", "chat",
+                   filter={"search_terms": {"$all": ["q:학칙"]}, "question": {"$regex": "학칙", "$options": "i"}},
+                   sort={"date": -1, "_id": -1}),
+        QueryCheck("conversations: session page", "chat",
+                   filter={"chatId": ObjectId("0" * 24)}, sort={"date": 1, "_id": 1}),
+        QueryCheck("rollup backfill: metadata date range", "metadata",
+                   pipeline=[{"$match": {"date": {"$gte": month_ago}}},
+                             {"$group": {"_id": None, "n": {"$sum": 1}}}]),
+        QueryCheck("surveys: user group statistics", "survey",
+                   pipeline=[{"$match": {"userCategory": "1학년"}},
+                             {"$group": {"_id": "$rating", "count": {"$sum": 1}}}]),
+    ]
+
+
+def _winning_plans(node: Any) -> List[Any]:
+    """explain 결과에서 winningPlan 하위 트리만 수집 (rejectedPlans 제외)"""
+    plans = []
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "winningPlan":
+                plans.append(value)
+            elif key != "rejectedPlans":
+                plans.extend(_winning_plans(value))
+    elif isinstance(node, list):
+        for item in node:
+            plans.extend(_winning_plans(item))
+    return plans
+
+
+def _plan_stages(node: Any) -> List[str]:
+    stages = []
+    if isinstance(node, dict):
+        if isinstance(node.get("stage"), str):
+            stages.append(node["stage"])
+        for value in node.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(node, list):
+        for item in node:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+def summarize_explain(name: str, collection: str, explain: Dict[str, Any]) -> PlanReport:
+    stages = [stage for plan in _winning_plans(explain) for stage in _plan_stages(plan)]
+    return PlanReport(name=name, collection=collection, stages=stages, collscan="COLLSCAN" in stages)
+
+
+async def explain_query(db: AsyncIOMotorDatabase, env: str, check: QueryCheck) -> PlanReport:
+    name = collection_name(check.logical_name, env)
+    if check.pipeline is not None:
+        command = {"aggregate": name, "pipeline": check.pipeline, "cursor": {}}
+    else:
+        command = {"find": name, "filter": check.filter or {}}
+        if check.sort:
+            command["sort"] = check.sort
+    try:
+        explain = await db.command("explain", command, verbosity="queryPlanner")
+    except Exception as e:
+        return PlanReport(name=check.name, collection=name, stages=[], collscan=False, error=str(e))
+    return summarize_explain(check.name, name, explain)
+
+
+async def check_query_plans(db: AsyncIOMotorDatabase, env: str) -> List[PlanReport]:
+    """대시보드 쿼리 실행 계획 점검, COLLSCAN은 경고 로그"""
+    reports = [await explain_query(db, env, check) for check in dashboard_queries()]
+    for report in reports:
+        if report.error:
+            logger.warning(f"[explain] {report.name} ({report.collection}) failed: {report.error}")
+        elif report.collscan:
+            logger.warning(f"[explain] COLLSCAN: {report.name} ({report.collection}) stages={report.stages}")
+    return reports
+
+
+# --- 앱 시작 시 실행 ---
+
+async def provision_indexes(app) -> None:
+    """STG/PROD 모두 인덱스 생성 후 실행 계획 점검 (실패해도 앱 동작에는 영향 없음)"""
+    for env in ENVIRONMENTS:
+        db = getattr(app.state, f"{env}_db", None)
+        if db is None:
+            continue
+        try:
+            await ensure_indexes(db, env)
+            await check_query_plans(db, env)
+        except Exception as e:
+            logger.error(f"Index provisioning failed ({env}): {e}", exc_info=True)
+
+
+def start_index_provisioning(app) -> Optional[asyncio.Task]:
+    """설정이 켜져 있으면 백그라운드로 인덱스 생성 (대용량 컬렉션 빌드가 시작을 막지 않도록)"""
+    from app.core.config import settings
+
+    if not settings.ENSURE_INDEXES_ON_STARTUP:
+        return None
+    return asyncio.create_task(provision_indexes(app))
+
+
+async def _run(env: str, ensure: bool, explain: bool) -> None:
+    from app.core.config import settings
+
+    uri = settings.PROD_MONGODB_URI if env == "prod" else settings.STG_MONGODB_URI
+    db_name = settings.PROD_DB_NAME if env == "prod" else settings.STG_DB_NAME
+    client = AsyncIOMotorClient(uri, serverSelectionTimeoutMS=5000, tlsCAFile=certifi.where())
+    try:
+        db = client[db_name]
+        if ensure:
+            for name, indexes in (await ensure_indexes(db, env)).items():
+                print(f"✅ {name}: {', '.join(indexes) or '-'}")
+        if explain:
+            for report in await check_query_plans(db, env):
+                mark = "⚠️ COLLSCAN" if report.collscan else ("❌" if report.error else "✅")
+                detail = report.error or " > ".join(report.stages)
+                print(f"{mark} {report.name} ({report.collection}): {detail}")
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="관리자 컬렉션 인덱스 생성 / 실행 계획 점검")
+    parser.add_argument("--env", choices=ENVIRONMENTS, default="prod", help="대상 DB 환경")
+    parser.add_argument("--ensure", action="store_true", help="선언된 인덱스 생성")
+    parser.add_argument("--explain", action="store_true", help="대시보드 쿼리 COLLSCAN 점검")
+    args = parser.parse_args()
+    if not (args.ensure or args.explain):
+        parser.error("--ensure 또는 --explain 중 하나 이상 지정하세요")
+
+    asyncio.run(_run(args.env, args.ensure, args.explain))
+
+
+if __name__ == "__main__":
+    main()
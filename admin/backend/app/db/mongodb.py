@@ -57,13 +57,18 @@ async def close_mongo_client(app: FastAPI):
         app.state.prod_mongo_client.close()
 
 
-# MongoDB 객체 가져오기
-async def get_mongo_db(request: Request) -> AsyncIOMotorDatabase:
+# 요청 DB 환경 ('stg' 또는 'prod')
+def get_db_env(request: Request) -> str:
     # 헤더에서 환경 정보를 읽어옵니다. (기본값은 'prod' 으로 설정)
     env_header = request.headers.get("x-db-env", "prod").lower()
     
-    # 유효성 검사 (stg, prod 외에는 기본값 처리 혹은 에러)
-    env = "stg" if env_header == "stg" else "prod"
+    # 유효성 검사 (stg, prod 외에는 기본값 처리)
+    return "stg" if env_header == "stg" else "prod"
+
+
+# MongoDB 객체 가져오기
+async def get_mongo_db(request: Request) -> AsyncIOMotorDatabase:
+    env = get_db_env(request)
 
     db_instance = None
     if env == "stg":
@@ -87,8 +92,7 @@ def get_collection(logical_base_name: str) -> callable:
     ) -> AsyncIOMotorCollection:
         
         # 1. 헤더에서 환경 정보 확인 (get_mongo_db와 동일한 로직)
-        env_header = request.headers.get("x-db-env", "prod").lower()
-        env = "stg" if env_header == "stg" else "prod"
+        env = get_db_env(request)
         
         # 2. 환경 접미사 결정
         env_suffix = "-prod" if env == "prod" else "-stg"
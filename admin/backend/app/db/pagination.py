@@ -0,0 +1,49 @@
+"""
+(date, _id) 키셋 페이지네이션 헬퍼
+
+skip은 페이지가 깊어질수록 건너뛸 문서를 모두 읽어야 하므로, 마지막 문서의 (date, _id)를
+불투명 커서로 넘겨 그 다음 문서부터 (date, _id) 인덱스로 바로 이어 읽습니다.
+"""
+import base64
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """마지막 문서의 (date, _id) → 불투명 커서 문자열"""
+    doc_date = doc.get("date")
+    raw = f"{doc_date.isoformat() if doc_date else ''}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], ObjectId]:
+    raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+    date_part, _, id_part = raw.partition("|")
+    return (datetime.fromisoformat(date_part) if date_part else None), ObjectId(id_part)
+
+
+def keyset_filter(cursor: str, sort_order: int) -> Dict[str, Any]:
+    """정렬 (date, _id) 기준으로 커서 다음 문서들 조건"""
+    doc_date, doc_id = decode_cursor(cursor)
+    op = "$gt" if sort_order == 1 else "$lt"
+    return {"$or": [
+        {"date": {op: doc_date}},
+        {"date": doc_date, "_id": {op: doc_id}},
+    ]}
+
+
+def with_cursor(query: Dict[str, Any], cursor: Optional[str], sort_order: int) -> Dict[str, Any]:
+    """기존 필터에 커서 조건 결합 (잘못된 커서면 ValueError)"""
+    if not cursor:
+        return query
+    try:
+        condition = keyset_filter(cursor, sort_order)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+    return {"$and": [query, condition]} if query else condition
+
+
+def keyset_sort(sort_order: int):
+    return [("date", sort_order), ("_id", sort_order)]
@@ -0,0 +1,235 @@
+"""
+시간 버킷 사전 집계(롤업) 컬렉션
+
+대시보드(트래픽/비용)가 원본 chat/metadata 문서를 매번 `$group` 하지 않도록
+시간/일/월 단위 버킷에 질문 수, 토큰 합, 비용 합(모델 프리셋별 포함)을 미리 누적합니다.
+
+- 실시간 누적: 챗봇 백엔드(ChatStatsRollupDao)가 대화 저장 시 `$inc` upsert
+- 과거 데이터: 이 모듈의 backfill (CLI: `python -m app.db.rollups --env prod --since 2024-01-01`)
+
+버킷 문서 형태 (컬렉션: rollup-{env})
+    {
+        "_id": "hour:2024-11-16T15:00",   # "{granularity}:{key}" (KST 기준 key)
+        "granularity": "hour",
+        "key": "2024-11-16T15:00",
+        "queries": 12,
+        "tokens": 34567,
+        "cost_usd": 0.0123,
+        "models": {"base": {"queries": 10, "tokens": 30000, "cost_usd": 0.01}, ...}
+    }
+
+_id가 granularity 접두사 + 정렬 가능한 key 문자열이므로 기간 조회는 _id 범위 스캔(기본 인덱스)으로 끝납니다.
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, time
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import certifi
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import DeleteMany, ReplaceOne
+
+from app.core.cache import bump_cache_version
+
+logger = logging.getLogger(__name__)
+
+KST = ZoneInfo("Asia/Seoul")
+
+ROLLUP_COLLECTION = "rollup"
+
+# 버킷 단위별 key 포맷 (챗봇 백엔드 ChatStatsRollupDao와 동일해야 함)
+GRANULARITY_FORMATS = {
+    "hour": "%Y-%m-%dT%H:00",
+    "day": "%Y-%m-%d",
+    "month": "%Y-%m",
+}
+
+# 버킷에 누적되는 값 필드
+VALUE_FIELDS = ("queries", "tokens", "cost_usd")
+
+# 백필 시 한 번에 쓰는 버킷 수
+WRITE_BATCH_SIZE = 1000
+
+
+def to_kst(dt: datetime) -> datetime:
+    """naive datetime은 KST로 간주"""
+    return dt.replace(tzinfo=KST) if dt.tzinfo is None else dt.astimezone(KST)
+
+
+def bucket_key(granularity: str, dt: datetime) -> str:
+    return to_kst(dt).strftime(GRANULARITY_FORMATS[granularity])
+
+
+def bucket_id(granularity: str, key: str) -> str:
+    return f"{granularity}:{key}"
+
+
+def parse_bucket_key(granularity: str, key: str) -> datetime:
+    return datetime.strptime(key, GRANULARITY_FORMATS[granularity])
+
+
+def model_key(preset: Optional[str]) -> str:
+    """MongoDB 필드명으로 쓸 수 있도록 프리셋 이름 정리 ('.', '$' 불가)"""
+    name = str(preset or "").strip() or "unknown"
+    return name.replace(".", "_").replace("$", "_")
+
+
+def _id_range(granularity: str, since: datetime) -> Dict[str, str]:
+    # ';'는 ':' 다음 문자이므로 해당 granularity의 마지막 _id보다 큼
+    return {"$gte": bucket_id(granularity, bucket_key(granularity, since)), "$lt": f"{granularity};"}
+
+
+# --- 조회 ---
+
+async def fetch_buckets(collection: AsyncIOMotorCollection, granularity: str, since: datetime) -> List[dict]:
+    """since가 속한 버킷부터 최신 버킷까지 key 오름차순"""
+    cursor = collection.find({"_id": _id_range(granularity, since)}).sort("_id", 1)
+    return await cursor.to_list(length=None)
+
+
+async def sum_buckets(collection: AsyncIOMotorCollection, granularity: str, since: datetime, field: str) -> float:
+    """since가 속한 버킷부터 field 합계"""
+    pipeline = [
+        {"$match": {"_id": _id_range(granularity, since)}},
+        {"$group": {"_id": None, "total": {"$sum": f"${field}"}}},
+    ]
+    result = await collection.aggregate(pipeline).to_list(length=1)
+    return result[0].get("total", 0) if result else 0
+
+
+# --- 백필 ---
+
+def _empty_bucket(granularity: str, key: str) -> dict:
+    return {
+        "_id": bucket_id(granularity, key),
+        "granularity": granularity,
+        "key": key,
+        "queries": 0,
+        "tokens": 0,
+        "cost_usd": 0.0,
+        "models": {},
+    }
+
+
+def build_buckets(hourly_queries: List[dict], hourly_usage: List[dict]) -> Dict[str, dict]:
+    """시간별 집계 결과로 시간/일/월 버킷 생성
+
+    Args:
+        hourly_queries: [{"_id": "2024-11-16T15:00", "queries": n}] (chat 컬렉션)
+        hourly_usage: [{"_id": {"hour": ..., "preset": ...}, "queries", "tokens", "cost_usd"}] (metadata 컬렉션)
+    """
+    buckets: Dict[str, dict] = {}
+
+    def _targets(hour_key: str):
+        # 시간 key 앞부분이 곧 일/월 key
+        for granularity, key in (("hour", hour_key), ("day", hour_key[:10]), ("month", hour_key[:7])):
+            _id = bucket_id(granularity, key)
+            if _id not in buckets:
+                buckets[_id] = _empty_bucket(granularity, key)
+            yield buckets[_id]
+
+    for item in hourly_queries:
+        if not item.get("_id"):
+            continue
+        for bucket in _targets(item["_id"]):
+            bucket["queries"] += item.get("queries", 0)
+
+    for item in hourly_usage:
+        hour_key = (item.get("_id") or {}).get("hour")
+        if not hour_key:
+            continue
+        model = model_key(item["_id"].get("preset"))
+        for bucket in _targets(hour_key):
+            # 총 질문 수는 chat 컬렉션 기준이므로 모델별 질문 수만 누적
+            bucket["tokens"] += item.get("tokens", 0)
+            bucket["cost_usd"] += item.get("cost_usd", 0)
+            per_model = bucket["models"].setdefault(model, {field: 0 for field in VALUE_FIELDS})
+            for field in VALUE_FIELDS:
+                per_model[field] += item.get(field, 0)
+
+    return buckets
+
+
+async def backfill(db: AsyncIOMotorDatabase, env_suffix: str, since: Optional[datetime] = None) -> Dict[str, int]:
+    """원본 chat/metadata 문서로 버킷 재계산 (멱등)
+
+    since가 속한 달의 1일 00:00(KST)부터 재계산하여, 부분 기간으로 일/월 버킷이 덮어써지지 않게 합니다.
+    범위 안에서 원본이 없어진 버킷은 삭제합니다.
+    재계산 중 챗봇 백엔드가 누적한 값은 덮어써질 수 있으므로 트래픽이 적은 시간에 실행하세요.
+    """
+    chat = db[f"chat{env_suffix}"]
+    metadata = db[f"metadata{env_suffix}"]
+    rollup = db[f"{ROLLUP_COLLECTION}{env_suffix}"]
+
+    match: dict = {}
+    if since is not None:
+        since = datetime.combine(to_kst(since).date().replace(day=1), time.min, tzinfo=KST)
+        match = {"date": {"$gte": since}}
+
+    hour_expr = {"$dateToString": {"format": GRANULARITY_FORMATS["hour"], "date": "$date", "timezone": "Asia/Seoul"}}
+    hourly_queries, hourly_usage = await asyncio.gather(
+        chat.aggregate([
+            {"$match": match},
+            {"$group": {"_id": hour_expr, "queries": {"$sum": 1}}},
+        ]).to_list(length=None),
+        metadata.aggregate([
+            {"$match": match},
+            {"$group": {
+                "_id": {"hour": hour_expr, "preset": "$metadata.token_usage.preset"},
+                "queries": {"$sum": 1},
+                "tokens": {"$sum": "$metadata.token_usage.total_tokens"},
+                "cost_usd": {"$sum": "$metadata.token_usage.total_cost_usd"},
+            }},
+        ]).to_list(length=None),
+    )
+
+    buckets = build_buckets(hourly_queries, hourly_usage)
+    docs = list(buckets.values())
+    for i in range(0, len(docs), WRITE_BATCH_SIZE):
+        batch = docs[i:i + WRITE_BATCH_SIZE]
+        await rollup.bulk_write([ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in batch], ordered=False)
+
+    # 재계산 범위 안의 오래된 버킷 정리
+    stale_ops = []
+    for granularity in GRANULARITY_FORMATS:
+        id_filter = _id_range(granularity, since) if since is not None else {"$gte": f"{granularity}:", "$lt": f"{granularity};"}
+        keep = [doc["_id"] for doc in docs if doc["granularity"] == granularity]
+        stale_ops.append(DeleteMany({"_id": {**id_filter, "$nin": keep}}))
+    result = await rollup.bulk_write(stale_ops, ordered=False)
+
+    counts = {granularity: sum(1 for doc in docs if doc["granularity"] == granularity) for granularity in GRANULARITY_FORMATS}
+    counts["deleted"] = result.deleted_count
+    logger.info(f"Rollup backfill done ({rollup.name}): {counts}")
+
+    # 모든 관리자 워커의 트래픽/비용 응답 캐시 무효화
+    await bump_cache_version(db, env_suffix.lstrip("-"), ["traffic", "costs"])
+    return counts
+
+
+async def _run_backfill(env: str, since: Optional[datetime]) -> Dict[str, int]:
+    from app.core.config import settings
+
+    uri = settings.PROD_MONGODB_URI if env == "prod" else settings.STG_MONGODB_URI
+    db_name = settings.PROD_DB_NAME if env == "prod" else settings.STG_DB_NAME
+    client = AsyncIOMotorClient(uri, serverSelectionTimeoutMS=5000, tlsCAFile=certifi.where())
+    try:
+        return await backfill(client[db_name], f"-{env}", since)
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대시보드 롤업 버킷 백필")
+    parser.add_argument("--env", choices=("stg", "prod"), default="prod", help="대상 DB 환경")
+    parser.add_argument("--since", type=lambda s: datetime.strptime(s, "%Y-%m-%d"), default=None,
+                        help="재계산 시작일 (YYYY-MM-DD, 해당 월 1일부터). 생략 시 전체")
+    args = parser.parse_args()
+
+    counts = asyncio.run(_run_backfill(args.env, args.since))
+    print(f"✅ 롤업 백필 완료 ({args.env}): {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+설문 통계 사전 집계(materialized view) 컬렉션
+
+/statistics-survey가 요청마다 survey 컬렉션 전체에 5갈래 `$facet`을 돌리지 않도록
+사용자 그룹별(+ 전체) 통계 문서를 미리 유지하고, 엔드포인트는 _id 한 건만 읽습니다.
+
+- 실시간 갱신: 챗봇 백엔드(SurveyStatsDao)가 설문 저장 시 그룹 문서와 "all" 문서에 `$inc` / `$push` upsert
+- 전체 재계산: 이 모듈의 rebuild (CLI: `python -m app.db.survey_stats --env prod`)
+- 재계산 표시: rebuild가 {"_id": "_meta", "builtAt"} 문서를 기록합니다. 이 문서가 없으면
+  통계 문서는 배포 이후 설문만 누적된 상태일 수 있으므로 fetch_stats가 None을 반환합니다 (원본 집계로 대체).
+
+통계 문서 형태 (컬렉션: survey_stats-{env})
+    {
+        "_id": "1학년",                     # userCategory 값, 전체는 "all"
+        "count": 42,
+        "ratingSum": 170,                   # 평균 = ratingSum / count
+        "ratings": {"1": 2, "5": 20, ...},
+        "responseSpeed": {"high": 30, ...},
+        "responseQuality": {"high": 25, ...},
+        "comments": [{"id", "rating", "feedback", "date"}, ...],   # 최신순 최대 100개
+        "updatedAt": ISODate
+    }
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import certifi
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import DeleteMany, ReplaceOne
+
+from app.core.cache import bump_cache_version
+
+logger = logging.getLogger(__name__)
+
+SURVEY_STATS_COLLECTION = "survey_stats"
+
+# 전체 사용자 통계 문서 _id
+ALL_GROUP = "all"
+
+# 재계산 완료 표시 문서 _id
+META_ID = "_meta"
+
+# 문서에 유지하는 최신 코멘트 수 (챗봇 백엔드 SurveyStatsDao와 동일해야 함)
+COMMENT_LIMIT = 100
+
+# 분포를 누적하는 필드
+DISTRIBUTION_FIELDS = {"rating": "ratings", "responseSpeed": "responseSpeed", "responseQuality": "responseQuality"}
+
+
+def _field_key(value: Any) -> Optional[str]:
+    """분포 값 → MongoDB 필드명 ('.', '$' 치환, 비어 있으면 None)"""
+    if value is None or value == "":
+        return None
+    return str(value).replace(".", "_").replace("$", "_")
+
+
+def empty_stats(group: str) -> Dict[str, Any]:
+    return {
+        "_id": group,
+        "count": 0,
+        "ratingSum": 0,
+        "ratings": {},
+        "responseSpeed": {},
+        "responseQuality": {},
+        "comments": [],
+    }
+
+
+def build_stats(counts: List[dict]) -> Dict[str, Dict[str, Any]]:
+    """(userCategory, rating, responseSpeed, responseQuality)별 건수 → 그룹별 + 전체 통계 문서 (코멘트 제외)
+
+    Args:
+        counts: [{"_id": {"userCategory", "rating", "responseSpeed", "responseQuality"}, "count": n}]
+    """
+    stats: Dict[str, Dict[str, Any]] = {ALL_GROUP: empty_stats(ALL_GROUP)}
+    for item in counts:
+        key = item.get("_id") or {}
+        n = item.get("count", 0)
+        targets = [stats[ALL_GROUP]]
+        group = key.get("userCategory")
+        if group:
+            targets.append(stats.setdefault(group, empty_stats(group)))
+        for doc in targets:
+            doc["count"] += n
+            if isinstance(key.get("rating"), (int, float)):
+                doc["ratingSum"] += key["rating"] * n
+            for source, target in DISTRIBUTION_FIELDS.items():
+                field = _field_key(key.get(source))
+                if field:
+                    doc[target][field] = doc[target].get(field, 0) + n
+    return stats
+
+
+def _comment_entry(doc: dict) -> Dict[str, Any]:
+    return {"id": str(doc["_id"]), "rating": doc.get("rating"), "feedback": doc.get("comment"), "date": doc.get("date")}
+
+
+async def _latest_comments(survey: AsyncIOMotorCollection, group: str) -> List[Dict[str, Any]]:
+    query: Dict[str, Any] = {"comment": {"$nin": [None, ""]}}
+    if group != ALL_GROUP:
+        query["userCategory"] = group
+    cursor = survey.find(query, {"rating": 1, "comment": 1, "date": 1}).sort("date", -1).limit(COMMENT_LIMIT)
+    return [_comment_entry(doc) async for doc in cursor]
+
+
+async def rebuild(db: AsyncIOMotorDatabase, env_suffix: str) -> Dict[str, int]:
+    """survey 원본으로 통계 문서 전체 재계산 (멱등), 그룹별 설문 수 반환
+
+    재계산 중 챗봇 백엔드가 누적한 값은 덮어써질 수 있으므로 설문이 적은 시간에 실행하세요.
+    """
+    survey = db[f"survey{env_suffix}"]
+    stats_collection = db[f"{SURVEY_STATS_COLLECTION}{env_suffix}"]
+
+    counts = await survey.aggregate([
+        {"$group": {
+            "_id": {
+                "userCategory": "$userCategory",
+                "rating": "$rating",
+                "responseSpeed": "$responseSpeed",
+                "responseQuality": "$responseQuality",
+            },
+            "count": {"$sum": 1},
+        }},
+    ]).to_list(length=None)
+
+    stats = build_stats(counts)
+    comments = await asyncio.gather(*[_latest_comments(survey, group) for group in stats])
+    now = datetime.utcnow()
+    for doc, group_comments in zip(stats.values(), comments):
+        doc["comments"] = group_comments
+        doc["updatedAt"] = now
+
+    ops = [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in stats.values()]
+    # 설문이 모두 사라진 그룹 정리
+    ops.append(DeleteMany({"_id": {"$nin": [*stats, META_ID]}}))
+    await stats_collection.bulk_write(ops, ordered=False)
+    # 통계 문서를 모두 쓴 뒤에 완료 표시
+    await stats_collection.replace_one({"_id": META_ID}, {"_id": META_ID, "builtAt": now}, upsert=True)
+
+    result = {group: doc["count"] for group, doc in stats.items()}
+    logger.info(f"Survey stats rebuilt ({stats_collection.name}): {result}")
+
+    # 모든 관리자 워커의 설문 통계 응답 캐시 무효화
+    await bump_cache_version(db, env_suffix.lstrip("-"), ["surveys"])
+    return result
+
+
+async def fetch_stats(collection: AsyncIOMotorCollection, group: str = ALL_GROUP) -> Optional[Dict[str, Any]]:
+    """그룹 통계 문서 (_id 조회 1번), 재계산 전이면 None
+
+    재계산 이후 설문이 없는 그룹은 빈 통계를 반환합니다.
+    """
+    docs = {doc["_id"]: doc async for doc in collection.find({"_id": {"$in": [group, META_ID]}})}
+    if META_ID not in docs:
+        return None
+    return docs.get(group) or empty_stats(group)
+
+
+async def _run_rebuild(env: str) -> Dict[str, int]:
+    from app.core.config import settings
+
+    uri = settings.PROD_MONGODB_URI if env == "prod" else settings.STG_MONGODB_URI
+    db_name = settings.PROD_DB_NAME if env == "prod" else settings.STG_DB_NAME
+    client = AsyncIOMotorClient(uri, serverSelectionTimeoutMS=5000, tlsCAFile=certifi.where())
+    try:
+        return await rebuild(client[db_name], f"-{env}")
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="설문 통계 사전 집계 전체 재계산")
+    parser.add_argument("--env", choices=("stg", "prod"), default="prod", help="대상 DB 환경")
+    args = parser.parse_args()
+
+    counts = asyncio.run(_run_rebuild(args.env))
+    print(f"✅ 설문 통계 재계산 완료 ({args.env}): {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+LLM 사용 로그(data.jsonl) 증분 색인 저장소
+
+/metrics/costs 요청마다 data.jsonl 전체를 읽지 않도록, 로그를 로컬 SQLite 파일로 증분 적재하고
+created_at 인덱스로 요청 기간만 집계합니다.
+
+- 증분 적재: 마지막으로 읽은 바이트 위치(ingest_state)부터 새로 추가된 완전한 줄만 읽음
+- 여러 uvicorn 워커가 동시에 sync해도 offset 읽기~적재~offset 기록을 BEGIN IMMEDIATE
+  트랜잭션 하나로 묶어 같은 줄을 두 번 적재하지 않음
+- 파일이 줄어들거나 교체되면(inode 변경) 해당 원본의 기존 행을 지우고 처음부터 다시 읽음
+- 조회: SQL GROUP BY로 일별 합계만 메모리에 올림 (로그 크기와 무관)
+- AWS 비용: 백그라운드 동기화(app.core.aws_cost_sync)가 일별 서비스 비용을 aws_costs 테이블에 갱신
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DATA_FILE = DATA_DIR / "data.jsonl"              # LLM 사용 로그 (원본)
+USAGE_DB_FILE = DATA_DIR / "usage.sqlite3"       # 증분 색인 저장소
+
+CREATED_AT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 한 트랜잭션에 적재하는 행 수
+INSERT_BATCH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    created_at     TEXT NOT NULL,   -- 'YYYY-MM-DD HH:MM:SS'
+    day            TEXT NOT NULL,   -- 'YYYY-MM-DD'
+    input_tokens   INTEGER NOT NULL DEFAULT 0,
+    output_tokens  INTEGER NOT NULL DEFAULT 0,
+    total_cost_usd REAL NOT NULL DEFAULT 0,
+    source         TEXT             -- 원본 로그 경로
+);
+CREATE INDEX IF NOT EXISTS idx_usage_created_at ON usage (created_at);
+CREATE TABLE IF NOT EXISTS ingest_state (
+    source TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    inode  INTEGER
+);
+CREATE TABLE IF NOT EXISTS aws_costs (
+    day     TEXT NOT NULL,   -- 'YYYY-MM-DD' (Cost Explorer TimePeriod.Start)
+    service TEXT NOT NULL,
+    amount  REAL NOT NULL,
+    PRIMARY KEY (day, service)
+);
+CREATE TABLE IF NOT EXISTS sync_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# 이전 스키마(source/inode 컬럼 없음)에 추가할 컬럼
+_MIGRATIONS = (
+    ("usage", "source", "TEXT"),
+    ("ingest_state", "inode", "INTEGER"),
+)
+
+
+def _parse_row(line: str) -> Optional[Tuple[str, str, int, int, float]]:
+    """로그 한 줄 → usage 행 (형식이 잘못된 줄은 경고 후 None)
+
+    잘못된 줄에서 예외가 나면 배치가 롤백되어 offset이 멈추므로, 변환 실패는 모두 건너뜁니다.
+    """
+    try:
+        conv = json.loads(line)
+        created_at = datetime.strptime(conv["created_at"], CREATED_AT_FORMAT)
+        token_usage = conv.get("token_usage") or {}
+        return (
+            created_at.strftime(CREATED_AT_FORMAT),
+            created_at.strftime("%Y-%m-%d"),
+            int(token_usage.get("input_tokens", 0) or 0),
+            int(token_usage.get("output_tokens", 0) or 0),
+            float(token_usage.get("total_cost_usd", 0) or 0),
+        )
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        logger.warning(f"Skipping malformed usage log line: {e!r} ({line[:200].strip()})")
+        return None
+
+
+class UsageStore:
+    """data.jsonl 증분 적재 + 기간 집계"""
+
+    def __init__(self, db_path: Path = USAGE_DB_FILE, source: Path = DATA_FILE):
+        self.db_path = Path(db_path)
+        self.source = Path(source)
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(_SCHEMA)
+            for table, column, column_type in _MIGRATIONS:
+                columns = {info[1] for info in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _read_new_lines(self, offset: int) -> Iterator[Tuple[int, str]]:
+        """offset부터 개행으로 끝나는 줄만 (다음 offset, 줄) 순서로 반환
+
+        마지막 줄이 아직 쓰는 중(개행 없음)이면 다음 sync에서 읽습니다.
+        """
+        with open(self.source, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                offset += len(raw)
+                yield offset, raw.decode("utf-8", errors="replace")
+
+    def sync(self) -> int:
+        """원본 로그에 새로 추가된 줄 적재, 적재한 행 수 반환"""
+        if not self.source.exists():
+            return 0
+        inserted = 0
+        with self._lock, closing(self._connect()) as conn:
+            conn.isolation_level = None  # 트랜잭션 직접 관리
+            while True:
+                count, done = self._sync_batch(conn)
+                inserted += count
+                if done:
+                    return inserted
+
+    def _sync_batch(self, conn: sqlite3.Connection) -> Tuple[int, bool]:
+        """최대 INSERT_BATCH_SIZE행 적재 (offset 읽기부터 기록까지 쓰기 락 보유), (적재 행 수, 끝 여부) 반환
+
+        BEGIN IMMEDIATE로 다른 워커의 sync를 기다리게 하므로, 락을 얻은 뒤 읽는 offset은
+        항상 앞선 워커가 기록한 값입니다.
+        """
+        source = str(self.source)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            stat = self.source.stat()
+            row = conn.execute("SELECT offset, inode FROM ingest_state WHERE source = ?", (source,)).fetchone()
+            offset, inode = row if row else (0, None)
+            if offset > stat.st_size or (inode is not None and inode != stat.st_ino):
+                # 파일 교체/초기화: 이전 파일에서 적재한 행을 지우고 처음부터 (회전된 파일 이중 집계 방지)
+                conn.execute("DELETE FROM usage WHERE source = ? OR source IS NULL", (source,))
+                offset = 0
+
+            rows: List[Tuple] = []
+            for next_offset, line in self._read_new_lines(offset):
+                offset = next_offset
+                parsed = _parse_row(line) if line.strip() else None
+                if parsed:
+                    rows.append(parsed + (source,))
+                if len(rows) >= INSERT_BATCH_SIZE:
+                    break
+
+            conn.executemany(
+                "INSERT INTO usage (created_at, day, input_tokens, output_tokens, total_cost_usd, source) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute(
+                "INSERT INTO ingest_state (source, offset, inode) VALUES (?, ?, ?) "
+                "ON CONFLICT(source) DO UPDATE SET offset = excluded.offset, inode = excluded.inode",
+                (source, offset, stat.st_ino),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows), len(rows) < INSERT_BATCH_SIZE
+
+    def daily_costs(self, since: datetime) -> List[Tuple[str, float]]:
+        """since 이후(초과) 일별 비용 합계 [(YYYY-MM-DD, cost)] 날짜순"""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT day, SUM(total_cost_usd) FROM usage WHERE created_at > ? GROUP BY day ORDER BY day",
+                (since.strftime(CREATED_AT_FORMAT),),
+            ).fetchall()
+
+    def llm_costs(self, days: int = 7, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """최근 days일 LLM 비용 총합 + 일별 포인트 (get_llm_costs 응답 형식)"""
+        now = now or datetime.now()
+        rows = self.daily_costs(now - timedelta(days=days))
+        total = sum(cost for _, cost in rows)
+        return {
+            "total": round(total, 4),
+            "points": [{"time": day, "value": round(cost, 4)} for day, cost in rows],
+        }
+
+    # --- AWS 비용 (Cost Explorer 동기화 결과) ---
+
+    def upsert_aws_costs(self, rows: List[Tuple[str, str, float]], synced_at: Optional[datetime] = None) -> int:
+        """(day, service, amount) 행 갱신 + 마지막 동기화 시각 기록
+
+        Cost Explorer는 지난 날짜 비용도 사후 보정하므로 같은 (day, service)는 덮어씁니다.
+        """
+        synced_at = synced_at or datetime.utcnow()
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO aws_costs (day, service, amount) VALUES (?, ?, ?) "
+                "ON CONFLICT(day, service) DO UPDATE SET amount = excluded.amount",
+                rows,
+            )
+            conn.execute(
+                "INSERT INTO sync_meta (key, value) VALUES ('aws_costs_synced_at', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (synced_at.isoformat(timespec="seconds"),),
+            )
+        return len(rows)
+
+    def aws_costs_synced_at(self) -> Optional[datetime]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM sync_meta WHERE key = 'aws_costs_synced_at'").fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    # --- 워커 간 작업 임대 (여러 uvicorn 워커 중 하나만 실행) ---
+
+    def try_acquire_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """name 작업 임대 획득 (비어 있거나 만료됐거나 이미 owner 소유면 True)
+
+        sync_meta의 'lease:{name}' 값("owner|만료 epoch")을 BEGIN IMMEDIATE 안에서 읽고 쓰므로
+        동시에 시도해도 한 워커만 성공합니다. 임대한 워커가 죽으면 ttl_seconds 뒤 다른 워커가 가져갑니다.
+        """
+        key = f"lease:{name}"
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT value FROM sync_meta WHERE key = ?", (key,)).fetchone()
+                if row:
+                    holder, _, expires = row[0].partition("|")
+                    if holder != owner and float(expires or 0) > now:
+                        conn.execute("ROLLBACK")
+                        return False
+                conn.execute(
+                    "INSERT INTO sync_meta (key, value) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (key, f"{owner}|{now + ttl_seconds}"),
+                )
+                conn.execute("COMMIT")
+                return True
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def release_lease(self, name: str, owner: str) -> None:
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM sync_meta WHERE key = ? AND value LIKE ?", (f"lease:{name}", f"{owner}|%"))
+
+    def aws_costs(self, start_day: str, end_day: str) -> List[Tuple[str, str, float]]:
+        """[start_day, end_day) 구간 (day, service, amount) 날짜순"""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT day, service, amount FROM aws_costs WHERE day >= ? AND day < ? ORDER BY day, service",
+                (start_day, end_day),
+            ).fetchall()
+
+
+_default_store: Optional[UsageStore] = None
+_default_lock = threading.Lock()
+
+
+def get_usage_store() -> UsageStore:
+    """프로세스 공용 저장소"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = UsageStore()
+        return _default_store
@@ -52,7 +52,23 @@ class RagMetadata:
     """원본 RAG 컨텍스트 (요약 전 MongoDB에서 가져온 원문)"""
     
     condensed_context: Optional[str] = None
-    """요약된 컨텍스트 (LLM으로 가공된 버전)"""
+    """요약된 컨텍스트 (LLM 또는 로컬 추출로 가공된 버전)"""
+
+    # 요약 정책 (condense_policy)
+    condense_mode: Optional[str] = None
+    """요약 방식: raw(원문 전달) | extractive(로컬 추출) | llm(LLM 요약)"""
+
+    condense_reason: Optional[str] = None
+    """요약 방식 결정 근거"""
+
+    context_tokens: int = 0
+    """요약 전 컨텍스트 토큰 수"""
+
+    condense_latency_ms: float = 0.0
+    """요약 단계 소요 시간 (ms)"""
+
+    condense_saved_ms: float = 0.0
+    """LLM 요약을 생략하여 절약한 시간 추정 (ms, llm 모드는 0)"""
 
     def to_dict(self) -> Dict[str, Any]:
         """JSON 직렬화용 딕셔너리 변환
@@ -74,6 +90,11 @@ class RagMetadata:
             "has_condensed_context": bool(self.condensed_context),
             "condensed_context": self.condensed_context,  # 요약된 컨텍스트 전체 포함
             "condensed_context_length": len(self.condensed_context) if self.condensed_context else 0,
+            "condense_mode": self.condense_mode,
+            "condense_reason": self.condense_reason,
+            "context_tokens": self.context_tokens,
+            "condense_latency_ms": self.condense_latency_ms,
+            "condense_saved_ms": self.condense_saved_ms,
         }
 
 
@@ -208,9 +229,17 @@ class TokenUsageMetadata:
     OpenAI Responses API의 output_tokens_details.reasoning_tokens에서 추출됩니다.
     """
 
+    cached_tokens: int = 0
+    """프롬프트 캐시 적중 입력 토큰 수
+
+    OpenAI Responses API의 input_tokens_details.cached_tokens에서 추출됩니다.
+    input_tokens 등에 이미 포함된 값이며, cache_input 단가로 비용이 계산됩니다.
+    """
+
     tracking_mode: str = "tiktoken_only"
     """토큰 계산 방식
 
+    - api_only: 스트리밍 중 토큰화 없이 API usage만 사용, usage 미수신 시 종료 후 tiktoken 폴백
     - api_first: OpenAI API usage 우선 사용, 없으면 tiktoken 폴백
     - tiktoken_only: tiktoken 기반 예측만 사용
     - hybrid: API usage와 tiktoken 예측을 모두 추적
@@ -229,6 +258,13 @@ class TokenUsageMetadata:
     }
     """
     
+    role_models: Optional[Dict[str, str]] = None
+    """역할별 사용 모델
+
+    예: {"gate": "o3-mini", "condense": "gpt-4.1-nano", "streaming": "gpt-4.1"}
+    가격 변경 시 role_breakdown과 함께 과거 비용을 재계산하는 데 사용됩니다.
+    """
+    
     def to_dict(self) -> Dict[str, Any]:
         """JSON 직렬화용 딕셔너리 변환"""
         result = {
@@ -237,6 +273,7 @@ class TokenUsageMetadata:
             "function_tokens": self.function_tokens,
             "rag_tokens": self.rag_tokens,
             "reasoning_tokens": self.reasoning_tokens,
+            "cached_tokens": self.cached_tokens,
             "total_tokens": self.total_tokens,
             "input_cost_usd": self.input_cost_usd,
             "output_cost_usd": self.output_cost_usd,
@@ -254,6 +291,10 @@ class TokenUsageMetadata:
         if self.role_breakdown:
             result["role_breakdown"] = self.role_breakdown
 
+        # role_models가 있으면 추가
+        if self.role_models:
+            result["role_models"] = self.role_models
+
         return result
 
 
@@ -6,7 +6,6 @@ import asyncio
 import time
 import logging
 from typing import Any, Dict, List, Optional, AsyncGenerator
-from datetime import datetime
 
 # 로거 설정
 logger = logging.getLogger(__name__)
@@ -16,12 +15,15 @@ from app.ai.chatbot.config import model, client, currTime
 from app.ai.chatbot.metadata import FunctionCallMetadata, RagMetadata, ChatMetadata, TokenUsageMetadata, ToolReasoningMetadata, TimingMetadata
 from app.ai.functions import FunctionCalling, tools
 from app.ai.rag.service import RagService
-from app.ai.utils.token_counter import TokenCounter
+from app.ai.rag.condense_policy import get_condense_policy
+from app.ai.rag.extractive_condenser import extractive_condense, format_condensed
+from app.ai.utils.token_counter import TokenCounter, bind_token_counter, current_token_counter
 from app.ai.utils.cost_calculator import CostCalculator
+from app.ai.data.chat_log_writer import CHAT_LOG_ENABLED, build_chat_log, get_chat_log_writer
 # from app.ai.events.chat_observer import chat_observer, ChatEvent  # 협의 후 활성화 예정
 
 # LLM Manager import
-from app.ai.llm import get_provider, get_llm_manager
+from app.ai.llm import get_provider, get_llm_manager, ExtractiveProvider
 
 class ChatbotStream:
     def __init__(self, model,system_role,instruction,**kwargs):
@@ -34,12 +36,10 @@ class ChatbotStream:
           - 사용할 모델명 저장
           - 사용자 이름
         """
-        # 현재 날짜를 system_role에 추가
-        current_date = datetime.now().strftime("%Y년 %m월 %d일")
-        system_role_with_date = f"{system_role}\n\n현재 날짜: {current_date}"
-
-        self.system_role = system_role_with_date
-        self.context = [{"role": "system","content": system_role_with_date}]
+        # system_role은 요청 간 바이트 단위로 동일해야 프롬프트 캐시가 적중합니다.
+        # 현재 날짜/시간은 _build_final_context에서 컨텍스트 맨 뒤에 추가합니다.
+        self.system_role = system_role
+        self.context = [{"role": "system","content": system_role}]
                
         self.current_field = "main"
         
@@ -53,7 +53,8 @@ class ChatbotStream:
         self.debug = os.getenv("RAG_DEBUG", "1") not in ("0", "false", "False")
 
         # Phase 3: 토큰 사용량 및 비용 추적 (먼저 초기화)
-        self.token_counter = TokenCounter(model=model)
+        # 요청 중에는 stream_chat에서 바인딩한 요청별 카운터가 우선 사용됨
+        self._default_token_counter = TokenCounter(model=model)
         self.cost_calculator = CostCalculator()
 
         # Phase 2: 모듈형 RAG 서비스 인스턴스화 (token_counter 전달)
@@ -74,6 +75,11 @@ class ChatbotStream:
         self._dbg(f"[INIT] Async functions cached: {[k for k, v in self._async_function_flags.items() if v]}")
 
 
+
+    @property
+    def token_counter(self) -> TokenCounter:
+        """현재 요청에 바인딩된 토큰 카운터 (요청 밖에서는 기본 카운터)"""
+        return current_token_counter(self._default_token_counter)
     def _dbg(self, msg: str):
         """작은 디버그 헬퍼: RAG 관련 내부 상태를 보기 쉽게 출력."""
         if self.debug:
@@ -434,7 +440,9 @@ class ChatbotStream:
         }
         return instruction_map.get(language, instruction_map["KOR"])
 
-    async def _condense_rag_context(self, user_question: str, raw_context: str) -> str:
+    async def _condense_rag_context(
+        self, user_question: str, raw_context: str, documents: Optional[List[dict]] = None
+    ) -> str:
         """
         긴 RAG 컨텍스트를 사용자 질문에 맞게 요약
         
@@ -445,6 +453,7 @@ class ChatbotStream:
         Args:
             user_question: 사용자 질문
             raw_context: 원본 RAG 컨텍스트
+            documents: 컨텍스트에 담긴 검색 문서 (extractive provider가 청크 점수로 사용)
         
         Returns:
             str: 요약된 컨텍스트 (실패 시 원본 일부 반환)
@@ -479,6 +488,12 @@ class ChatbotStream:
         try:
             # LLM Manager 사용 (교체 가능)
             provider = get_provider("condense")
+            if isinstance(provider, ExtractiveProvider):
+                # 프리셋에서 로컬 추출 요약 선택 → LLM 호출/2차 시도 없음
+                condensed = provider.condense(user_question, sanitized_rag, documents)
+                self._dbg(f"[CONDENSE] 로컬 추출 요약 - 길이: {len(condensed)}자")
+                return condensed
+
             condensed, usage1 = await provider.simple_completion(condense_prompt)
             condensed = condensed.strip()
 
@@ -540,6 +555,47 @@ class ChatbotStream:
             self._dbg(f"[CONDENSE] Fallback 사용 - 길이: {len(fallback)}자")
             return fallback
 
+    def _build_static_guidance(self) -> str:
+        """요청과 무관한 고정 지침 블록을 구성합니다.
+
+        OpenAI 자동 프롬프트 캐시는 요청 간 동일한 접두(prefix)에만 적중하므로,
+        이 블록에는 날짜/질문/검색결과 등 요청마다 달라지는 값을 넣지 않습니다.
+        system_role 바로 뒤에 위치하여 [system_role + 고정 지침]이 캐시 접두가 됩니다.
+
+        Returns:
+            str: [일반지침], [기억검색지침], [웹검색지침], [함수결과지침]을 합친 문자열
+        """
+        # 요약 모드(raw / extractive / llm)는 요청마다 달라지므로 두 형식을 모두 안내 (접두 바이트 고정)
+        rag_guidance = (
+            "기억검색 결과입니다. <기억검색> 안에 <반영> </반영> 태그가 있으면(요약본) 태그 내부 내용을 보고 사용자의 원하는 쿼리에 맞게 대답하고, "
+            "태그 밖 내용은 참조용으로만 사용하세요. "
+            "<반영> 태그가 없으면(원문) <기억검색> 태그 내부의 규정 원문을 참고하여 사용자 질문에 맞는 부분을 찾아 정확히 답변하세요. "
+            "표, 조항 번호, 학점 요건, 별표 등이 포함되어 있으니 질문과 관련된 정보를 선별하여 답변하고, "
+            "원문 구조(제○조, 제○항 등)를 유지하여 인용하세요. 태그 밖 임의 창작 금지."
+        )
+
+        web_guidance = (
+            "다음은 인터넷 검색결과입니다. 공식 근거가 아니므로 참고용으로만 사용하세요. "
+            "검색이 안되어 우회/문의 안내만 있을 경우, 무시하고 이 내용은'참조만' 하세요. 반드시 기억검색 근거를 우선 반영하세요. 참조란 안내 전화번호 사이트만을 반영하는것을 말합니다 "
+        )
+        func_guidance = (
+            "다음은 함수(검색/메뉴 등) 호출 결과입니다. <함수결과> 태그 내부 내용은 참고용이며, 반드시 아래 기억검색(<기억검색>) 근거를 우선 답변에 반영하세요. "
+            "'함수 호출'이라는 표현은 사용하지 말고, 거짓 정보 생성 금지."
+        )
+
+        sections = [
+            "[일반지침]\n" + self.instruction,
+            "[기억검색지침]\n" + rag_guidance + "\n(<기억검색> 블록이 있을 때만 적용)",
+            "[웹검색지침]\n" + web_guidance + "\n(<인터넷검색> 블록이 있을 때만 적용)",
+            "[함수결과지침]\n" + func_guidance + "\n(<함수결과> 블록이 있을 때만 적용)",
+            "[사용자쿼리지침]\n"
+            "대화 마지막의 [요청정보] 메시지에 현재 날짜/시간, 사용자 쿼리, 기억검색/함수호출 결과가 담겨 있습니다. "
+            "위 [일반지침],[기억검색지침],[웹검색지침],[함수결과지침]에 따라 사용자가 원하는 대답에 맞게 통합해 전달하세요.\n"
+            "- 함수호출 결과: 있으면 반영\n"
+            "- 기억검색 결과: 있으면 반영 / 함수 호출 존재 자체는 언급 금지",
+        ]
+        return "\n\n".join(sections)
+
     def _build_final_context(
         self,
         message: str,
@@ -549,8 +605,10 @@ class ChatbotStream:
     ) -> List[Dict[str, str]]:
         """최종 LLM 입력 컨텍스트를 구성합니다.
 
-        사용자 질문, 요약된 기억검색 결과, 함수 호출 정보를 통합하여
-        단일 시스템 메시지 형태로 정리한 뒤 기존 대화문맥에 추가합니다.
+        프롬프트 캐시 적중을 위해 고정 영역과 가변 영역을 분리합니다.
+        - 접두(고정): system_role → 고정 지침 블록 (요청 간 바이트 동일)
+        - 중간: 대화 히스토리 + 현재 사용자 메시지
+        - 꼬리(가변): 현재 날짜/시간, 사용자 쿼리, 기억검색/함수 결과, 언어 지침
 
         Args:
             message: 현재 사용자 질문.
@@ -562,13 +620,17 @@ class ChatbotStream:
             OpenAI Responses API에 전달할 컨텍스트 리스트.
         """
 
-        base_context = self.to_openai_context(self.context[:])
+        history = self.to_openai_context(self.context[1:])
+        base_context = [
+            {"role": "system", "content": self.system_role},
+            {"role": "system", "content": self._build_static_guidance()},
+        ] + history
         has_rag = bool(condensed_rag and condensed_rag.strip())
         has_funcs = bool(func_results)
 
         sections: List[str] = []
 
-        # 0) 현재 날짜/시간
+        # 0) 현재 날짜/시간 (가변 영역의 시작)
         current_datetime = currTime()  # "2025.11.15 14:30:25" 형식
         sections.append(
             f"[현재 날짜/시간]\n{current_datetime}\n"
@@ -576,38 +638,11 @@ class ChatbotStream:
             "**중요**: '공지사항'이라는 단어만 있어도 사용자는 현재 시점의 최신 공지사항을 원하는 것으로 이해하세요."
         )
 
-        # 1) 사용자 쿼리 지침
-        query_guidance = (
-            f"이것은 사용자 쿼리입니다: {message}\n"
-            "다음 정보를 [사용자쿼리지침],[일반지침],[기억검색지침],[웹검색지침] 등 서술된 서술과 지침에 따라 사용자가 원하는 대답에 맞게 통합해 전달하세요.\n"
-            "- 함수호출 결과: 있으면 반영\n"
-            "- 기억검색 결과: 있으면 반영 / 함수 호출 존재 자체는 언급 금지"
-        )
-        sections.append("[사용자쿼리지침]\n" + query_guidance)
-
-        # 2) 일반 지침
-        sections.append("[일반지침]\n" + self.instruction)
+        # 1) 사용자 쿼리
+        sections.append(f"[사용자쿼리]\n이것은 사용자 쿼리입니다: {message}")
 
-        # 3) 기억검색 지침 및 본문
+        # 2) 기억검색 본문 (지침은 고정 블록에 있음)
         if has_rag:
-            # 요약 사용 여부에 따라 지침 변경
-            use_rag_condense = os.getenv("USE_RAG_CONDENSE", "1") == "1"
-            
-            if use_rag_condense:
-                # 요약본 사용 시: <반영> 태그 기반 지침
-                rag_guidance = (
-                    "기억검색 결과입니다. <반영> </반영> 태그 내부 내용을 보고 사용자의 원하는 쿼리에 맞게 대답하세요. "
-                    "<기억검색></기억검색> 태그는 참조용이며 태그 밖 임의 창작 금지"
-                )
-            else:
-                # 원문 직접 사용 시: 규정 원문 기반 지침
-                rag_guidance = (
-                    "기억검색 결과입니다. <기억검색> 태그 내부의 규정 원문을 참고하여 사용자 질문에 맞는 부분을 찾아 정확히 답변하세요. "
-                    "표, 조항 번호, 학점 요건, 별표 등이 포함되어 있으니 질문과 관련된 정보를 선별하여 답변하세요. "
-                    "원문 구조(제○조, 제○항 등)를 유지하여 인용하고, 태그 밖 임의 창작 금지."
-                )
-            
-            sections.append("[기억검색지침]\n" + rag_guidance)
             sections.append("[기억검색]\n<기억검색>\n" + condensed_rag + "\n</기억검색>")
 
         web_status: Optional[str] = None
@@ -667,19 +702,9 @@ class ChatbotStream:
                 all_bad = all(_is_error_or_empty(t) for t in web_outputs)
                 web_status = "empty-or-error" if all_bad else "ok"
 
-            web_guidance = (
-                "다음은 인터넷 검색결과입니다. 공식 근거가 아니므로 참고용으로만 사용하세요. "
-                "검색이 안되어 우회/문의 안내만 있을 경우, 무시하고 이 내용은'참조만' 하세요. 반드시 기억검색 근거를 우선 반영하세요. 참조란 안내 전화번호 사이트만을 반영하는것을 말합니다 "
-            )
-            sections.append("[웹검색지침]\n" + web_guidance)
             if web_functions_block:
                 sections.append("[인터넷 검색결과]\n<인터넷검색>\n" + web_functions_block + "\n</인터넷검색>")
 
-            func_guidance = (
-                "다음은 함수(검색/메뉴 등) 호출 결과입니다. <함수결과> 태그 내부 내용은 참고용이며, 반드시 아래 기억검색(<기억검색>) 근거를 우선 답변에 반영하세요. "
-                "'함수 호출'이라는 표현은 사용하지 말고, 거짓 정보 생성 금지."
-            )
-            sections.append("[함수결과지침]\n" + func_guidance)
             if other_functions_block:
                 sections.append("[함수결과]\n<함수결과>\n" + other_functions_block + "\n</함수결과>")
 
@@ -714,22 +739,11 @@ class ChatbotStream:
 
         # 언어 지침 추가 (항상 마지막에 추가)
         language_instruction = self._get_language_instruction(language)
-
-        # 추가 정보가 없으면 원본 컨텍스트에 언어 지침만 추가
-        if not (has_rag or has_funcs):
-            base_context.append({
-                "role": "system",
-                "content": f"[언어지침]\n{language_instruction}",
-            })
-            self._last_web_status = web_status
-            return base_context
-
-        # 추가 정보가 있으면 sections 마지막에 언어 지침 추가
         sections.append(f"[언어지침]\n{language_instruction}")
 
         base_context.append({
             "role": "system",
-            "content": "\n\n".join(sections),
+            "content": "[요청정보]\n\n" + "\n\n".join(sections),
         })
 
         self._last_web_status = web_status
@@ -959,10 +973,12 @@ class ChatbotStream:
                 - {"type": "completed", "text": "..."}: 완료된 전체 텍스트
         """
         completed_text = ""
+        # api_only 모드에서는 델타 단위 토큰화를 생략 (response.completed usage 사용)
+        track_deltas = self.token_counter.tracks_stream_deltas()
 
         try:
             # Note: Responses API는 stream_options를 지원하지 않음
-            # streaming output tokens는 tiktoken으로 계산
+            # streaming output tokens는 response.completed usage 사용 (모드에 따라 tiktoken 추정 병행)
             response_stream = client.responses.create(
                 model=self.model,
                 input=context,
@@ -980,8 +996,9 @@ class ChatbotStream:
                     }
                     completed_text += event.delta
 
-                    # 출력 토큰 계산 (임시, response.done에서 API usage로 교체)
-                    self.token_counter.count_output_delta(event.delta)
+                    # 출력 토큰 계산 (임시, response.completed에서 API usage로 교체)
+                    if track_deltas:
+                        self.token_counter.count_output_delta(event.delta)
 
                 elif event.type == "response.output_item.done":
                     # 출력 아이템 완료 - 전체 텍스트 수집
@@ -1007,6 +1024,7 @@ class ChatbotStream:
                             "output_tokens": getattr(event.usage, "output_tokens", 0),
                             "total_tokens": getattr(event.usage, "total_tokens", 0),
                             "reasoning_tokens": getattr(event.usage.output_tokens_details, 'reasoning_tokens', 0) if hasattr(event.usage, 'output_tokens_details') else 0,
+                            "cached_tokens": getattr(event.usage.input_tokens_details, 'cached_tokens', 0) if getattr(event.usage, 'input_tokens_details', None) else 0,
                         }
 
                         # TokenCounter 업데이트 (tiktoken 추정값을 API 실제값으로 교체)
@@ -1019,12 +1037,13 @@ class ChatbotStream:
                         )
 
                         self._dbg(f"[STREAM] API usage 반영: input={usage_data['input_tokens']}, "
+                                  f"cached={usage_data['cached_tokens']}, "
                                   f"output={usage_data['output_tokens']}, "
                                   f"reasoning={usage_data['reasoning_tokens']}")
 
-            # 스트리밍 완료 후 버퍼 플러시 (남은 델타 처리)
-            self._dbg(f"[STREAM] 스트리밍 완료, 델타 버퍼 플러시")
-            self.token_counter.flush_delta_buffer(role="streaming")
+            # 스트리밍 완료 후 토큰 집계 마무리 (델타 버퍼 플러시 / usage 미수신 시 tiktoken 폴백)
+            self._dbg(f"[STREAM] 스트리밍 완료, 토큰 집계 마무리")
+            self.token_counter.finalize_streaming(role="streaming", output_text=completed_text)
 
             # 완료 이벤트
             yield {
@@ -1059,6 +1078,7 @@ class ChatbotStream:
         6.5. 출처 정보 스트리밍
         7. 메타데이터 전송
         8. 완료 신호
+        8.5. 채팅 로그 저장 (write-behind 큐)
         9. 응답 저장
 
         Args:
@@ -1077,7 +1097,8 @@ class ChatbotStream:
         # === 1단계: 초기화 ===
         self.add_user_message_in_context(user_input)
         metadata = ChatMetadata()
-        self.token_counter.reset()  # 토큰 카운터 초기화
+        # 요청별 토큰 카운터 바인딩 (싱글톤 인스턴스를 공유하는 동시 요청 간 집계 분리)
+        bind_token_counter(TokenCounter(model=self.model))
         self._dbg("[STREAM_CHAT] 1단계: 메시지 추가 완료")
 
         # === 2단계: RAG 검색 + 함수 호출 병렬 실행 ===
@@ -1098,7 +1119,6 @@ class ChatbotStream:
         
         if rag_result.merged_documents_text:
             self._dbg(f"[STREAM_CHAT] RAG 검색 완료 - 원본 길이: {len(rag_result.merged_documents_text)}자")
-            self._dbg(f"[STREAM_CHAT] 요약 모드: {'사용' if use_rag_condense else '생략 (원문 직접 사용)'}")
             
             # === RAG 검색 결과 상세 디버그 출력 ===
             self._dbg("=" * 80)
@@ -1124,19 +1144,34 @@ class ChatbotStream:
             #self._dbg(f"  - 원본 컨텍스트 샘플:\n{context_sample}")
             #self._dbg("=" * 80)
             
-            if use_rag_condense:
-                # 요약 사용 (기존 방식)
-                self._dbg("[STREAM_CHAT] 3단계: RAG 요약 시작...")
+            # 토큰 수/청크 수/점수 분포로 요약 방식 결정 (raw | extractive | llm)
+            condense_policy = get_condense_policy()
+            decision = condense_policy.decide(rag_result, enabled=use_rag_condense)
+            self._dbg(f"[STREAM_CHAT] 3단계: 요약 모드={decision.mode} ({decision.reason})")
+
+            condense_start = time.perf_counter()
+            if decision.mode == "llm":
                 condensed_rag = await self._condense_rag_context(
-                    user_input, rag_result.merged_documents_text
+                    user_input, rag_result.merged_documents_text, rag_result.context_documents
                 )
-                self._dbg(f"[STREAM_CHAT] RAG 요약 완료 - 요약 길이: {len(condensed_rag)}자")
+            elif decision.mode == "extractive":
+                # 로컬 추출 요약 (LLM 호출 없음)
+                condensed_rag = format_condensed(extractive_condense(
+                    user_input, rag_result.merged_documents_text, documents=rag_result.context_documents
+                ))
             else:
                 # 요약 생략, 원본 직접 사용
-                self._dbg("[STREAM_CHAT] 3단계: RAG 요약 생략 (원본 직접 사용)")
                 condensed_rag = rag_result.merged_documents_text
-                self._dbg(f"[STREAM_CHAT] 원본 컨텍스트 길이: {len(condensed_rag)}자")
-            
+            condense_ms = (time.perf_counter() - condense_start) * 1000
+
+            if decision.mode == "llm":
+                condense_policy.record_llm_latency(condense_ms)
+            condense_saved_ms = condense_policy.saved_latency_ms(decision.mode, condense_ms)
+            self._dbg(
+                f"[STREAM_CHAT] RAG 요약 완료 - {len(condensed_rag)}자, {condense_ms:.0f}ms "
+                f"(절약 추정 {condense_saved_ms:.0f}ms)"
+            )
+
             # RAG 메타데이터 설정
             metadata.rag = RagMetadata(
                 is_regulation=rag_result.is_regulation,
@@ -1148,7 +1183,12 @@ class ChatbotStream:
                 chunk_ids=list(rag_result.chunk_ids),
                 source_documents=rag_result.source_documents,  # 출처 문서 정보 추가
                 raw_context=rag_result.merged_documents_text,  # 원본 컨텍스트 추가
-                condensed_context=condensed_rag if use_rag_condense else None,  # 요약 사용 시만 저장
+                condensed_context=condensed_rag if decision.mode != "raw" else None,  # 요약 사용 시만 저장
+                condense_mode=decision.mode,
+                condense_reason=decision.reason,
+                context_tokens=decision.context_tokens,
+                condense_latency_ms=round(condense_ms, 1),
+                condense_saved_ms=round(condense_saved_ms, 1),
             )
         else:
             self._dbg("[STREAM_CHAT] RAG 검색 결과 없음")
@@ -1268,6 +1308,7 @@ class ChatbotStream:
             function_tokens=token_usage["function_tokens"],
             rag_tokens=token_usage["rag_tokens"],
             reasoning_tokens=token_usage.get("reasoning_tokens", 0),
+            cached_tokens=token_usage.get("cached_input_tokens", 0),
             total_tokens=token_usage["total_tokens"],
             input_cost_usd=input_cost_usd,
             output_cost_usd=output_cost_usd,
@@ -1276,9 +1317,19 @@ class ChatbotStream:
             model=self.model,
             preset=active_preset,  # 현재 프리셋 추가
             tracking_mode=self.token_counter.get_tracking_mode(),  # 토큰 추적 모드
-            role_breakdown=self.token_counter.get_role_breakdown()  # 역할별 토큰 상세 추가
+            role_breakdown=self.token_counter.get_role_breakdown(),  # 역할별 토큰 상세 추가
+            role_models=self.token_counter.get_role_model_map()  # 역할별 모델 (비용 재계산용)
         )
         
+        # === 7.5단계: 채팅 로그 저장 (write-behind, 메타데이터 전송 전) ===
+        # 큐에 넣기만 하고 저장은 백그라운드에서 배치로 처리 (응답 지연 없음)
+        # 마지막 yield(metadata/done) 이후에는 클라이언트가 스트림을 닫아 제너레이터가 재개되지 않을 수 있으므로 먼저 수행
+        if CHAT_LOG_ENABLED:
+            try:
+                get_chat_log_writer().enqueue(build_chat_log(user_input, completed_text, metadata, language))
+            except Exception as e:
+                logger.warning(f"[STREAM_CHAT] 채팅 로그 큐 추가 실패: {e}")
+        
         yield json.dumps({
             "type": "metadata",
             "data": metadata.to_dict()
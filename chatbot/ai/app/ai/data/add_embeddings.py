@@ -1,6 +1,10 @@
 """
 MongoDB Vector Search를 위한 embedding 필드 추가 스크립트
 
+여러 문서를 한 번의 embeddings 요청으로 묶고(토큰 예산 기준), N개의 요청을
+rate limiter 아래에서 동시에 실행한 뒤 bulk_write로 저장합니다.
+진행 상황은 _id 기준으로 체크포인트되어 중단 후 재실행 시 이어서 처리합니다.
+
 사용법:
     # 테스트 (10개 문서만)
     python app/ai/data/add_embeddings.py --test
@@ -10,17 +14,27 @@ MongoDB Vector Search를 위한 embedding 필드 추가 스크립트
 
     # 특정 개수만 실행
     python app/ai/data/add_embeddings.py --limit 100
+
+    # 동시 요청 수 / 요청당 토큰 예산 / 분당 한도 조정
+    python app/ai/data/add_embeddings.py --concurrency 8 --batch-tokens 100000 --rpm 3000 --tpm 1000000
+
+    # 체크포인트 무시하고 처음부터 다시 스캔
+    python app/ai/data/add_embeddings.py --reset-checkpoint
 """
 
 import os
 import sys
 import time
+import asyncio
 import argparse
-from typing import List
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Tuple
 from dotenv import load_dotenv
-from pymongo import MongoClient
-from openai import OpenAI
+from pymongo import MongoClient, UpdateOne
+from openai import OpenAI, AsyncOpenAI
 import certifi
+import tiktoken
 
 # 환경변수 로드
 load_dotenv("app/apikey.env")
@@ -29,9 +43,18 @@ MONGODB_URI = os.getenv("MONGODB_URI")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 DB_NAME = os.getenv("MONGO_DB_NAME", "halla-chatbot-stg")
 COLLECTION_NAME = "regulation_chunks"
+CHECKPOINT_COLLECTION_NAME = "embedding_backfill_checkpoints"
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIM = 1536
+
+# OpenAI embeddings API 제한
+MAX_INPUT_TOKENS = 8191        # 입력 1개당 최대 토큰
+MAX_INPUTS_PER_REQUEST = 2048  # 요청 1회당 최대 입력 수
 
 # OpenAI 클라이언트
 openai_client = OpenAI(api_key=OPENAI_API_KEY)
+async_openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=5)
 
 # MongoDB 클라이언트
 mongo_client = MongoClient(
@@ -42,22 +65,267 @@ mongo_client = MongoClient(
 )
 db = mongo_client[DB_NAME]
 collection = db[COLLECTION_NAME]
+checkpoint_collection = db[CHECKPOINT_COLLECTION_NAME]
+
+# text-embedding-3-small 토크나이저
+enc = tiktoken.get_encoding("cl100k_base")
 
 
 def get_embedding(text: str) -> List[float]:
     """OpenAI text-embedding-3-small 모델로 임베딩 생성"""
     response = openai_client.embeddings.create(
         input=text,
-        model="text-embedding-3-small"
+        model=EMBEDDING_MODEL
     )
     return response.data[0].embedding
 
 
-def add_embeddings(limit: int = None, test_mode: bool = False, batch_size: int = 50):
-    """모든 문서에 embedding 필드 추가 (배치 처리 방식)
+# ============================================================
+# Rate limiter / 체크포인트
+# ============================================================
+
+class RateLimiter:
+    """분당 요청 수(RPM)와 분당 토큰 수(TPM)를 제한하는 토큰 버킷"""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens: int) -> None:
+        """요청 1회 + tokens만큼의 용량이 생길 때까지 대기"""
+        tokens = min(tokens, self.tpm)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                wait = max(
+                    (1 - self._requests) * 60 / self.rpm if self._requests < 1 else 0,
+                    (tokens - self._tokens) * 60 / self.tpm if self._tokens < tokens else 0,
+                )
+                await asyncio.sleep(wait)
+
+
+def load_checkpoint(job: str) -> Optional[Any]:
+    """마지막으로 완료된 _id 조회 (없으면 None)"""
+    doc = checkpoint_collection.find_one({"_id": job})
+    return doc.get("last_id") if doc else None
+
+
+def save_checkpoint(job: str, last_id: Any, processed: int, errors: int) -> None:
+    """완료된 _id 워터마크 저장 (이 _id 이하 문서는 모두 처리 완료)"""
+    checkpoint_collection.update_one(
+        {"_id": job},
+        {
+            "$set": {"last_id": last_id, "updated_at": datetime.now(timezone.utc)},
+            "$inc": {"processed": processed, "errors": errors},
+        },
+        upsert=True,
+    )
 
-    커서 타임아웃 방지를 위해 배치 단위로 _id만 조회 후 개별 처리
+
+def reset_checkpoint(job: str) -> None:
+    checkpoint_collection.delete_one({"_id": job})
+
+
+# ============================================================
+# 배치 구성 / 임베딩 / 저장
+# ============================================================
+
+@dataclass
+class EmbeddingBatch:
+    """embeddings 요청 1회 분량"""
+    seq: int
+    ids: List[Any] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    tokens: int = 0
+    skipped: int = 0        # 빈 텍스트 등으로 건너뛴 문서 수
+    last_id: Any = None     # 배치가 커버하는 마지막 _id (건너뛴 문서 포함)
+
+
+def _prepare_text(text: str) -> Tuple[str, int]:
+    """입력 1개 토큰 수 계산 (최대 토큰 초과 시 잘라냄)"""
+    tokens = enc.encode(text)
+    if len(tokens) > MAX_INPUT_TOKENS:
+        return enc.decode(tokens[:MAX_INPUT_TOKENS]), MAX_INPUT_TOKENS
+    return text, len(tokens)
+
+
+def iter_batches(query: dict, limit: Optional[int], max_batch_tokens: int, max_batch_size: int):
+    """_id 오름차순으로 문서를 읽어 토큰 예산 단위 배치 생성"""
+    cursor = collection.find(query, {"text": 1}).sort("_id", 1).batch_size(1000)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    seq = 0
+    batch = EmbeddingBatch(seq=seq)
+    for doc in cursor:
+        text = doc.get("text", "")
+        if not text:
+            print(f"  ⚠️ 빈 텍스트: {doc['_id']}")
+            batch.skipped += 1
+            batch.last_id = doc["_id"]
+            continue
+
+        text, n_tokens = _prepare_text(text)
+        if batch.texts and (batch.tokens + n_tokens > max_batch_tokens or len(batch.texts) >= max_batch_size):
+            yield batch
+            seq += 1
+            batch = EmbeddingBatch(seq=seq)
+
+        batch.ids.append(doc["_id"])
+        batch.texts.append(text)
+        batch.tokens += n_tokens
+        batch.last_id = doc["_id"]
+
+    if batch.texts or batch.skipped:
+        yield batch
+
+
+async def embed_batch(batch: EmbeddingBatch, limiter: RateLimiter) -> List[List[float]]:
+    """배치 전체를 한 번의 embeddings 요청으로 처리"""
+    if not batch.texts:
+        return []
+    await limiter.acquire(batch.tokens)
+    response = await async_openai_client.embeddings.create(
+        input=batch.texts,
+        model=EMBEDDING_MODEL
+    )
+    # 응답 순서는 index 기준으로 정렬하여 입력과 맞춤
+    return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+
+def write_embeddings(ids: List[Any], embeddings: List[List[float]]) -> int:
+    """bulk_write로 배치 저장 (순서 무관)"""
+    if not ids:
+        return 0
+    # updated_at: 로컬 벡터 인덱스 재생성 기준
+    now = datetime.now(timezone.utc)
+    result = collection.bulk_write(
+        [UpdateOne({"_id": doc_id}, {"$set": {"embedding": embedding, "updated_at": now}}) for doc_id, embedding in zip(ids, embeddings)],
+        ordered=False,
+    )
+    return result.modified_count
+
+
+async def run_backfill(
+    limit: Optional[int] = None,
+    concurrency: int = 4,
+    max_batch_tokens: int = 100_000,
+    max_batch_size: int = 256,
+    rpm: int = 3000,
+    tpm: int = 1_000_000,
+    job: str = COLLECTION_NAME,
+) -> dict:
+    """embedding 백필 파이프라인
+
+    - 배치 생성(커서 읽기 + 토큰 계산)은 스레드에서 수행
+    - 최대 concurrency개의 embeddings 요청을 동시에 실행
+    - 완료 순서와 무관하게 연속으로 끝난 배치까지만 체크포인트 전진
+
+    Returns:
+        dict: {"processed", "errors", "elapsed", "docs_per_sec"}
     """
+    max_batch_size = min(max_batch_size, MAX_INPUTS_PER_REQUEST)
+    query = {"embedding": {"$exists": False}}
+    last_id = load_checkpoint(job)
+    if last_id is not None:
+        query["_id"] = {"$gt": last_id}
+        print(f"[정보] 체크포인트에서 재개: _id > {last_id}")
+
+    limiter = RateLimiter(rpm=rpm, tpm=tpm)
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {"processed": 0, "errors": 0}
+    start_time = time.time()
+
+    # 체크포인트 워터마크 (seq 순서대로 완료된 배치까지만 전진)
+    finished: dict = {}
+    next_seq = 0
+    pending_counts = [0, 0]
+    checkpoint_lock = asyncio.Lock()
+
+    async def advance_checkpoint() -> None:
+        nonlocal next_seq
+        async with checkpoint_lock:
+            last_done = None
+            while next_seq in finished:
+                last_done = finished.pop(next_seq).last_id
+                next_seq += 1
+            if last_done is None:
+                return
+            processed, errors = pending_counts
+            pending_counts[0] = pending_counts[1] = 0
+            await asyncio.to_thread(save_checkpoint, job, last_done, processed, errors)
+
+    async def process(batch: EmbeddingBatch) -> None:
+        try:
+            embeddings = await embed_batch(batch, limiter)
+            await asyncio.to_thread(write_embeddings, batch.ids, embeddings)
+            stats["processed"] += len(batch.ids)
+            pending_counts[0] += len(batch.ids)
+        except Exception as e:
+            # 실패한 배치는 embedding이 없는 상태로 남아 전체 완료 후 다음 실행에서 다시 처리됨
+            print(f"  ❌ 배치 {batch.seq} 오류 ({len(batch.ids)}개, {batch.ids[0] if batch.ids else '-'}~): {e}")
+            stats["errors"] += len(batch.ids)
+            pending_counts[1] += len(batch.ids)
+        finally:
+            stats["errors"] += batch.skipped
+            pending_counts[1] += batch.skipped
+            finished[batch.seq] = batch
+            await advance_checkpoint()
+            semaphore.release()
+
+            elapsed = time.time() - start_time
+            rate = stats["processed"] / elapsed if elapsed > 0 else 0
+            print(f"  ✓ {stats['processed']}개 완료, 오류 {stats['errors']}개 ({rate:.1f} docs/s)")
+
+    batches = iter_batches(query, limit, max_batch_tokens, max_batch_size)
+    tasks = []
+    while True:
+        await semaphore.acquire()
+        batch = await asyncio.to_thread(next, batches, None)
+        if batch is None:
+            semaphore.release()
+            break
+        tasks.append(asyncio.create_task(process(batch)))
+
+    if tasks:
+        await asyncio.gather(*tasks)
+
+    if not limit:
+        # 전체 스캔 완료: 다음 실행은 실패/누락 문서만 처음부터 다시 조회
+        await asyncio.to_thread(reset_checkpoint, job)
+
+    elapsed = time.time() - start_time
+    stats["elapsed"] = elapsed
+    stats["docs_per_sec"] = stats["processed"] / elapsed if elapsed > 0 else 0.0
+    return stats
+
+
+def add_embeddings(
+    limit: int = None,
+    test_mode: bool = False,
+    batch_size: int = 256,
+    concurrency: int = 4,
+    batch_tokens: int = 100_000,
+    rpm: int = 3000,
+    tpm: int = 1_000_000,
+    reset: bool = False,
+):
+    """embedding이 없는 모든 문서에 embedding 필드 추가 (배치 + 동시 요청 + 체크포인트)"""
 
     if test_mode:
         limit = 10
@@ -65,96 +333,38 @@ def add_embeddings(limit: int = None, test_mode: bool = False, batch_size: int =
         print("테스트 모드: 10개 문서만 처리")
         print("=" * 50)
 
-    # embedding이 없는 문서만 조회
-    query = {"embedding": {"$exists": False}}
+    if reset:
+        reset_checkpoint(COLLECTION_NAME)
+        print("[정보] 체크포인트 초기화")
 
-    total_without_embedding = collection.count_documents(query)
+    # embedding이 없는 문서만 조회
+    total_without_embedding = collection.count_documents({"embedding": {"$exists": False}})
     print(f"\n[정보] embedding 없는 문서: {total_without_embedding}개")
 
     if total_without_embedding == 0:
         print("모든 문서에 이미 embedding이 있습니다.")
         return
 
-    # 처리할 총 개수 결정
-    total_to_process = min(limit, total_without_embedding) if limit else total_without_embedding
-    print(f"[정보] 처리할 문서 수: {total_to_process}개")
-    print(f"[정보] 배치 크기: {batch_size}개")
-
-    processed = 0
-    errors = 0
-    start_time = time.time()
-
+    print(f"[정보] 요청당 최대 {batch_size}개 / {batch_tokens} 토큰, 동시 요청 {concurrency}개 (RPM {rpm}, TPM {tpm})")
     print("\n[시작] Embedding 추가 작업 시작...")
     print("-" * 50)
 
-    # 배치 처리: 커서 타임아웃 방지
-    while processed + errors < total_to_process:
-        # 매 배치마다 새로운 쿼리로 _id만 조회 (빠름)
-        remaining = total_to_process - (processed + errors)
-        current_batch_size = min(batch_size, remaining)
-
-        # _id만 조회하여 빠르게 가져옴
-        doc_ids = list(collection.find(
-            {"embedding": {"$exists": False}},
-            {"_id": 1}
-        ).limit(current_batch_size))
-
-        if not doc_ids:
-            print("  [정보] 더 이상 처리할 문서 없음")
-            break
-
-        for doc_ref in doc_ids:
-            doc_id = doc_ref["_id"]
-
-            # 개별 문서 조회
-            doc = collection.find_one({"_id": doc_id})
-            if not doc:
-                continue
-
-            text = doc.get("text", "")
-
-            if not text:
-                print(f"  ⚠️ 빈 텍스트: {doc_id}")
-                errors += 1
-                continue
-
-            try:
-                # 임베딩 생성
-                embedding = get_embedding(text)
-
-                # MongoDB에 업데이트
-                collection.update_one(
-                    {"_id": doc_id},
-                    {"$set": {"embedding": embedding}}
-                )
-
-                processed += 1
-
-                # 진행 상황 출력 (50개마다)
-                if processed % 50 == 0:
-                    elapsed = time.time() - start_time
-                    rate = processed / elapsed if elapsed > 0 else 0
-                    remaining_docs = total_to_process - processed - errors
-                    eta = remaining_docs / rate if rate > 0 else 0
-                    print(f"  ✓ {processed}/{total_to_process}개 완료 ({rate:.1f} docs/s, 예상 남은 시간: {eta/60:.1f}분)")
-
-            except Exception as e:
-                print(f"  ❌ 오류 ({doc_id}): {e}")
-                errors += 1
-                continue
-
-        # 배치 완료 후 잠시 대기 (Rate limit 방지)
-        time.sleep(0.5)
-
-    elapsed = time.time() - start_time
+    stats = asyncio.run(run_backfill(
+        limit=limit,
+        concurrency=concurrency,
+        max_batch_tokens=batch_tokens,
+        max_batch_size=batch_size,
+        rpm=rpm,
+        tpm=tpm,
+    ))
 
+    elapsed = stats["elapsed"]
     print("-" * 50)
     print(f"\n[완료] Embedding 추가 작업 완료!")
-    print(f"  - 처리: {processed}개")
-    print(f"  - 오류: {errors}개")
+    print(f"  - 처리: {stats['processed']}개")
+    print(f"  - 오류: {stats['errors']}개")
     print(f"  - 소요 시간: {elapsed:.1f}초 ({elapsed/60:.1f}분)")
-    if processed > 0:
-        print(f"  - 평균 속도: {processed/elapsed:.2f} docs/s")
+    print(f"  - 평균 속도: {stats['docs_per_sec']:.2f} docs/s")
 
     # 최종 확인
     with_embedding = collection.count_documents({"embedding": {"$exists": True}})
@@ -177,10 +387,10 @@ def verify_embeddings():
         print(f"  - embedding 타입: {type(embedding)}")
         print(f"  - 첫 5개 값: {embedding[:5]}")
 
-        if len(embedding) == 1536:
-            print("  ✅ 차원 검증 통과 (1536)")
+        if len(embedding) == EMBEDDING_DIM:
+            print(f"  ✅ 차원 검증 통과 ({EMBEDDING_DIM})")
         else:
-            print(f"  ❌ 차원 불일치! 예상: 1536, 실제: {len(embedding)}")
+            print(f"  ❌ 차원 불일치! 예상: {EMBEDDING_DIM}, 실제: {len(embedding)}")
     else:
         print("  ❌ embedding 있는 문서를 찾을 수 없습니다.")
 
@@ -190,6 +400,12 @@ def main():
     parser.add_argument("--test", action="store_true", help="테스트 모드 (10개 문서만)")
     parser.add_argument("--limit", type=int, help="처리할 문서 수 제한")
     parser.add_argument("--verify", action="store_true", help="embedding 검증만 실행")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 embeddings 요청 수")
+    parser.add_argument("--batch-size", type=int, default=256, help="요청당 최대 문서 수 (최대 2048)")
+    parser.add_argument("--batch-tokens", type=int, default=100_000, help="요청당 최대 토큰 수")
+    parser.add_argument("--rpm", type=int, default=3000, help="분당 최대 요청 수")
+    parser.add_argument("--tpm", type=int, default=1_000_000, help="분당 최대 토큰 수")
+    parser.add_argument("--reset-checkpoint", action="store_true", help="체크포인트를 지우고 처음부터 스캔")
     args = parser.parse_args()
 
     print("=" * 50)
@@ -202,7 +418,16 @@ def main():
         verify_embeddings()
         return
 
-    add_embeddings(limit=args.limit, test_mode=args.test)
+    add_embeddings(
+        limit=args.limit,
+        test_mode=args.test,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        batch_tokens=args.batch_tokens,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        reset=args.reset_checkpoint,
+    )
     verify_embeddings()
 
 
@@ -0,0 +1,293 @@
+"""
+채팅 로그 write-behind 저장
+
+stream_chat이 done 이벤트를 보내기 직전 완료된 대화(질문/답변/ChatMetadata)를 큐에 넣기만 하고,
+백그라운드 태스크가 모아서 insert_many로 저장합니다. 사용자 응답 지연에는 영향이 없습니다.
+
+기본값은 꺼짐(CHAT_LOG_ENABLED=0)입니다. 켜면 CHAT_LOG_TTL_DAYS일 뒤 만료되는 TTL 인덱스를 만듭니다.
+
+- 플러시 조건: CHAT_LOG_BATCH_SIZE건이 모이거나 CHAT_LOG_FLUSH_INTERVAL초가 지나면
+- Mongo를 쓸 수 없으면(MONGO_AVAILABLE=False 또는 쓰기 실패) 디스크 스풀(JSON Lines)에 기록하고,
+  CHAT_LOG_RETRY_INTERVAL초마다 ping으로 복구를 확인해 스풀을 다시 적재합니다.
+  종료 시에도 Mongo가 살아 있으면 스풀을 먼저 적재합니다.
+  컨테이너 파일시스템은 재배포 때 사라지므로, 종료 시점까지 Mongo가 복구되지 않는 경우까지 보존하려면
+  CHAT_LOG_SPOOL_DIR을 영구 볼륨(EFS 등) 경로로 지정하세요.
+- 스풀 쓰기도 실패하면(디스크 부족 등) 배치를 메모리에 되돌려 재시도합니다 (큐 크기만큼만 보관).
+- 큐가 가득 차면(CHAT_LOG_QUEUE_SIZE) 새 로그를 버리고 개수만 셉니다 (메모리 상한).
+
+저장 위치는 챗봇 백엔드가 쓰는 chat/metadata 컬렉션이 아닌 별도 컬렉션(CHAT_LOG_COLLECTION)입니다.
+(대시보드 롤업이 같은 대화를 두 번 세지 않도록)
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError
+
+CHAT_LOG_ENABLED = os.getenv("CHAT_LOG_ENABLED", "0") == "1"
+CHAT_LOG_COLLECTION = os.getenv("CHAT_LOG_COLLECTION", "chat_logs")
+CHAT_LOG_BATCH_SIZE = int(os.getenv("CHAT_LOG_BATCH_SIZE", "100"))
+CHAT_LOG_FLUSH_INTERVAL = float(os.getenv("CHAT_LOG_FLUSH_INTERVAL", "2.0"))
+CHAT_LOG_QUEUE_SIZE = int(os.getenv("CHAT_LOG_QUEUE_SIZE", "10000"))
+CHAT_LOG_RETRY_INTERVAL = float(os.getenv("CHAT_LOG_RETRY_INTERVAL", "30"))
+# 보관 기간(일), date 필드 TTL 인덱스 (0이면 만료 없음)
+CHAT_LOG_TTL_DAYS = int(os.getenv("CHAT_LOG_TTL_DAYS", "90"))
+CHAT_LOG_SPOOL_DIR = Path(
+    os.getenv("CHAT_LOG_SPOOL_DIR", str(Path(__file__).parent / ".chat_log_spool"))
+)
+
+_SPOOL_SUFFIX = ".jsonl"
+_REPLAY_SUFFIX = ".replaying"
+# 재적재 중 워커가 죽어 남은 파일을 다시 대상에 넣기까지의 시간(초)
+_STALE_REPLAY_SECONDS = 600
+
+
+def build_chat_log(question: str, answer: str, metadata: Any, language: str = "KOR") -> Dict[str, Any]:
+    """완료된 대화 → 저장할 문서 (metadata는 ChatMetadata 또는 dict)"""
+    return {
+        "question": question,
+        "answer": answer,
+        "language": language,
+        "metadata": metadata.to_dict() if hasattr(metadata, "to_dict") else metadata,
+        "date": datetime.now(timezone.utc),
+    }
+
+
+class ChatLogWriter:
+    """채팅 로그 배치 저장기 (프로세스당 1개, 이벤트 루프 안에서 사용)"""
+
+    def __init__(
+        self,
+        collection=None,
+        batch_size: int = CHAT_LOG_BATCH_SIZE,
+        flush_interval: float = CHAT_LOG_FLUSH_INTERVAL,
+        max_queue: int = CHAT_LOG_QUEUE_SIZE,
+        spool_dir: Path = CHAT_LOG_SPOOL_DIR,
+        retry_interval: float = CHAT_LOG_RETRY_INTERVAL,
+    ):
+        self._collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_dir = Path(spool_dir)
+        self.retry_interval = retry_interval
+        self.max_queue = max_queue
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._stop_event = asyncio.Event()
+        # 큐에서 꺼냈지만 아직 저장하지 않은 로그 (종료 시 함께 저장)
+        self._pending: List[Dict[str, Any]] = []
+        self._mongo_ok: Optional[bool] = None
+        self._next_probe = 0.0
+        self.stats = {"written": 0, "spooled": 0, "replayed": 0, "dropped": 0}
+
+    # --- 요청 경로 (블로킹 없음) ---
+
+    def enqueue(self, record: Dict[str, Any]) -> bool:
+        """로그 1건 추가 (await 없음), 큐가 가득 차면 False"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            if self.stats["dropped"] % 100 == 1:
+                print(f"[CHAT_LOG] 큐 가득 참, 로그 버림 (누적 {self.stats['dropped']}건)")
+            return False
+
+    def _ensure_started(self) -> None:
+        if self._stopping:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    # --- 백그라운드 플러시 ---
+
+    async def _collect(self) -> None:
+        """flush_interval초 동안 batch_size까지 _pending에 모음"""
+        deadline = time.monotonic() + self.flush_interval
+        while len(self._pending) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                self._pending.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            await self._collect()
+            batch, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._flush, batch)
+            except Exception as e:
+                # Mongo 저장과 스풀 모두 실패 (디스크 부족 등): 배치를 되돌리고 잠시 후 재시도
+                print(f"[CHAT_LOG] 플러시 오류, {self.retry_interval}초 후 재시도: {e}")
+                self._retain(batch)
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=self.retry_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _retain(self, batch: List[Dict[str, Any]]) -> None:
+        """저장하지 못한 배치를 다음 배치 앞에 되돌림 (max_queue건 초과분은 오래된 것부터 버림)"""
+        self._pending = batch + self._pending
+        overflow = len(self._pending) - self.max_queue
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.stats["dropped"] += overflow
+            print(f"[CHAT_LOG] 보관 한도 초과, 로그 {overflow}건 버림 (누적 {self.stats['dropped']}건)")
+
+    def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        """(스레드) Mongo에 저장, 실패하면 스풀. 연결이 살아 있으면 쌓인 스풀도 재적재"""
+        if self._mongo_available():
+            if batch and not self._insert(batch):
+                self._spool(batch)
+            elif self._mongo_ok:
+                self._replay_spool()
+        elif batch:
+            self._spool(batch)
+
+    def _get_collection(self):
+        if self._collection is None:
+            from app.ai.data.mongodb_client import db
+            collection = db[CHAT_LOG_COLLECTION]
+            if CHAT_LOG_TTL_DAYS > 0:
+                try:
+                    collection.create_index("date", expireAfterSeconds=CHAT_LOG_TTL_DAYS * 86400, name="date_ttl")
+                except Exception as e:
+                    print(f"[CHAT_LOG] TTL 인덱스 생성 실패: {e}")
+            self._collection = collection
+        return self._collection
+
+    def _mongo_available(self) -> bool:
+        """최초에는 MONGO_AVAILABLE, 이후 쓰기 실패 시 retry_interval마다 ping으로 재확인"""
+        if self._mongo_ok is None:
+            from app.ai.data.mongodb_client import MONGO_AVAILABLE
+            self._mongo_ok = MONGO_AVAILABLE
+            self._next_probe = time.monotonic() + self.retry_interval
+        if not self._mongo_ok and time.monotonic() >= self._next_probe:
+            self._next_probe = time.monotonic() + self.retry_interval
+            try:
+                self._get_collection().database.command("ping")
+                self._mongo_ok = True
+                print("[CHAT_LOG] Mongo 연결 복구, 스풀 재적재 시작")
+            except Exception:
+                pass
+        return self._mongo_ok
+
+    def _insert(self, docs: List[Dict[str, Any]]) -> bool:
+        try:
+            # _id를 미리 지정해 재시도(스풀 재적재)해도 같은 로그가 두 번 저장되지 않게 함
+            for doc in docs:
+                doc.setdefault("_id", ObjectId())
+            self._get_collection().insert_many(docs, ordered=False)
+            self.stats["written"] += len(docs)
+            return True
+        except BulkWriteError as e:
+            if all(error.get("code") == 11000 for error in e.details.get("writeErrors", [])) and not e.details.get("writeConcernErrors"):
+                # 이전 시도에서 일부가 이미 저장된 경우 (중복 키만 실패)
+                self.stats["written"] += e.details.get("nInserted", 0)
+                return True
+            return self._on_insert_error(e)
+        except Exception as e:
+            return self._on_insert_error(e)
+
+    def _on_insert_error(self, e: Exception) -> bool:
+        self._mongo_ok = False
+        self._next_probe = time.monotonic() + self.retry_interval
+        print(f"[CHAT_LOG] Mongo 저장 실패, 디스크 스풀로 전환: {e}")
+        return False
+
+    # --- 디스크 스풀 ---
+
+    def _spool(self, docs: List[Dict[str, Any]]) -> None:
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        # 워커별 파일명 (여러 gunicorn 워커가 같은 디렉터리 사용)
+        path = self.spool_dir / f"{os.getpid()}-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}{_SPOOL_SUFFIX}"
+        # 임시 파일에 다 쓴 뒤 교체 (쓰다 실패한 파일이 재적재 대상이 되지 않도록)
+        tmp = path.with_suffix(".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for doc in docs:
+                    f.write(json_util.dumps(doc, ensure_ascii=False) + "\n")
+            os.replace(tmp, path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            raise
+        self.stats["spooled"] += len(docs)
+
+    def _replay_spool(self) -> None:
+        if not self.spool_dir.exists():
+            return
+        for orphan in self.spool_dir.glob(f"*{_REPLAY_SUFFIX}"):
+            try:
+                if time.time() - orphan.stat().st_mtime > _STALE_REPLAY_SECONDS:
+                    orphan.rename(orphan.with_suffix(_SPOOL_SUFFIX))
+            except OSError:
+                continue
+        for path in sorted(self.spool_dir.glob(f"*{_SPOOL_SUFFIX}")):
+            # 다른 워커와 동시에 같은 파일을 적재하지 않도록 이름을 바꿔 선점
+            claimed = path.with_suffix(_REPLAY_SUFFIX)
+            try:
+                path.rename(claimed)
+            except OSError:
+                continue
+            with open(claimed, encoding="utf-8") as f:
+                docs = [json_util.loads(line) for line in f if line.strip()]
+            if docs and not self._insert(docs):
+                claimed.rename(path)
+                return
+            claimed.unlink()
+            self.stats["replayed"] += len(docs)
+            print(f"[CHAT_LOG] 스풀 재적재: {path.name} ({len(docs)}건)")
+
+    # --- 종료 ---
+
+    async def close(self) -> None:
+        """백그라운드 태스크 종료 후 큐에 남은 로그 저장 (실패 시 스풀)
+
+        태스크를 cancel하지 않고 현재 배치(최대 flush_interval초)가 끝나기를 기다립니다.
+        (queue.get과 cancel이 겹치면 꺼낸 로그가 유실될 수 있음)
+        """
+        self._stopping = True
+        self._stop_event.set()
+        if self._task:
+            await self._task
+            self._task = None
+        remaining, self._pending = self._pending, []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        for i in range(0, len(remaining), self.batch_size):
+            batch = remaining[i:i + self.batch_size]
+            try:
+                await asyncio.to_thread(self._flush, batch)
+            except Exception as e:
+                print(f"[CHAT_LOG] 종료 중 저장 실패, 로그 {len(remaining) - i}건 유실: {e}")
+                break
+        # 재배포로 컨테이너 디스크가 사라지기 전에 남은 스풀 적재 시도 (배치가 없으면 재적재만 수행)
+        try:
+            await asyncio.to_thread(self._flush, [])
+        except Exception as e:
+            print(f"[CHAT_LOG] 종료 중 스풀 재적재 실패: {e}")
+        if self.spool_dir.exists() and any(self.spool_dir.glob(f"*{_SPOOL_SUFFIX}")):
+            print(f"[CHAT_LOG] 적재하지 못한 스풀이 남아 있음: {self.spool_dir} (영구 볼륨이 아니면 재배포 시 유실)")
+
+
+_writer: Optional[ChatLogWriter] = None
+
+
+def get_chat_log_writer() -> ChatLogWriter:
+    """프로세스 공용 저장기"""
+    global _writer
+    if _writer is None:
+        _writer = ChatLogWriter()
+    return _writer
@@ -7,21 +7,29 @@
 3. 원본 문서는 유지하고 새 청크 문서 추가
 4. 청크 문서에는 parent_id로 원본 참조
 
+성능:
+- 후보는 서버에서 UTF-8 바이트 길이로 거른 뒤 커서로 스트리밍 (토큰 수 <= 바이트 수)
+- 문서당 tiktoken 인코딩은 1회, 이후 분할/출력은 토큰 오프셋으로 계산
+- 문서 분할은 프로세스 풀에서 병렬 처리, 저장은 ordered bulk_write 배치
+
 사용법:
     # 테스트 (dry-run)
     python app/ai/data/chunk_large_docs.py --test
 
     # 실제 실행
-    python app/ai/data/chunk_large_docs.py
+    python app/ai/data/chunk_large_docs.py --workers 4
 """
 
 import os
 import re
 import time
 import argparse
-from typing import List, Dict, Tuple, Any
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Any, Optional
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, InsertOne, UpdateOne, DeleteMany
 from bson import ObjectId
 import certifi
 import tiktoken
@@ -46,15 +54,48 @@ collection = db[COLLECTION_NAME]
 # tiktoken 인코더
 enc = tiktoken.get_encoding('cl100k_base')
 
+# 임베딩 모델 입력 토큰 제한
+TOKEN_LIMIT = 8192
+
 # 청크 최대 토큰 수 (8192 제한 대비 여유)
 MAX_CHUNK_TOKENS = 7500
 
+# bulk_write 1회당 최대 작업 수
+WRITE_BATCH_SIZE = 500
+
 
 def count_tokens(text: str) -> int:
     """텍스트의 토큰 수 계산"""
     return len(enc.encode(text))
 
 
+class TokenIndex:
+    """텍스트를 1회 인코딩하여 문자 구간별 토큰 수를 계산하는 인덱스
+
+    각 토큰의 시작 문자 오프셋을 보관하고, 구간 [start, end)에서 시작하는
+    토큰 수를 이분 탐색으로 구합니다. 구간 경계에서 토큰이 달라질 수 있어
+    재인코딩 결과와 ±1 토큰 차이가 날 수 있으나 MAX_CHUNK_TOKENS 여유분 안에 있습니다.
+    """
+
+    def __init__(self, text: str):
+        tokens = enc.encode(text)
+        _, self.offsets = enc.decode_with_offsets(tokens)
+        self.total = len(tokens)
+
+    def count(self, start: int, end: int) -> int:
+        """문자 구간 [start, end)의 토큰 수"""
+        return bisect_left(self.offsets, end) - bisect_left(self.offsets, start)
+
+
+def _strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """text[start:end].strip()에 해당하는 구간"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
 def find_split_points(text: str) -> List[Tuple[int, str]]:
     """
     텍스트에서 분리 포인트 찾기 (별표 단위만)
@@ -92,22 +133,25 @@ def find_split_points(text: str) -> List[Tuple[int, str]]:
     return filtered
 
 
-def split_by_semantic_units(text: str, metadata: Dict) -> List[Dict]:
+def split_by_semantic_units(text: str, metadata: Dict, index: Optional[TokenIndex] = None) -> List[Dict]:
     """
     의미 단위로 텍스트 분할
 
     전략:
     1. 별표/부칙 경계에서 1차 분할
     2. 각 조각이 MAX_CHUNK_TOKENS 초과시 강제 분할
+
+    Args:
+        index: text의 TokenIndex (없으면 1회 인코딩하여 생성)
     """
-    total_tokens = count_tokens(text)
+    index = index or TokenIndex(text)
 
-    if total_tokens <= MAX_CHUNK_TOKENS:
+    if index.total <= MAX_CHUNK_TOKENS:
         # 분할 필요 없음
         return [{
             'text': text,
             'metadata': metadata,
-            'chunk_info': {'index': 0, 'total': 1, 'type': 'full'}
+            'chunk_info': {'index': 0, 'total': 1, 'type': 'full', 'tokens': index.total}
         }]
 
     # 분리 포인트 찾기
@@ -115,21 +159,18 @@ def split_by_semantic_units(text: str, metadata: Dict) -> List[Dict]:
 
     if not split_points:
         # 분리 포인트 없으면 강제 분할
-        return split_by_token_limit(text, metadata)
+        return split_by_token_limit(text, metadata, index=index)
 
     # 분리 포인트에서 분할
     chunks = []
     positions = [0] + [p[0] for p in split_points] + [len(text)]
 
     for i in range(len(positions) - 1):
-        start = positions[i]
-        end = positions[i + 1]
-        chunk_text = text[start:end].strip()
-
-        if not chunk_text:
+        start, end = _strip_span(text, positions[i], positions[i + 1])
+        if start >= end:
             continue
 
-        chunk_tokens = count_tokens(chunk_text)
+        chunk_tokens = index.count(start, end)
 
         if chunk_tokens <= MAX_CHUNK_TOKENS:
             # 청크 타입 결정
@@ -139,13 +180,13 @@ def split_by_semantic_units(text: str, metadata: Dict) -> List[Dict]:
                 chunk_type = 'tail'
 
             chunks.append({
-                'text': chunk_text,
+                'text': text[start:end],
                 'metadata': metadata.copy(),
-                'chunk_info': {'type': chunk_type}
+                'chunk_info': {'type': chunk_type, 'tokens': chunk_tokens}
             })
         else:
-            # 아직 큰 경우 추가 분할
-            sub_chunks = split_by_token_limit(chunk_text, metadata)
+            # 아직 큰 경우 추가 분할 (같은 토큰 인덱스 재사용)
+            sub_chunks = split_by_token_limit(text, metadata, index=index, span=(start, end))
             chunks.extend(sub_chunks)
 
     # 인덱스 부여
@@ -156,40 +197,52 @@ def split_by_semantic_units(text: str, metadata: Dict) -> List[Dict]:
     return chunks
 
 
-def split_by_token_limit(text: str, metadata: Dict) -> List[Dict]:
+def split_by_token_limit(
+    text: str,
+    metadata: Dict,
+    index: Optional[TokenIndex] = None,
+    span: Optional[Tuple[int, int]] = None,
+) -> List[Dict]:
     """
     토큰 제한으로 강제 분할 (줄바꿈 기준)
+
+    Args:
+        index: text의 TokenIndex (없으면 1회 인코딩하여 생성)
+        span: 분할할 문자 구간 (기본: 전체)
     """
-    lines = text.split('\n')
+    index = index or TokenIndex(text)
+    span_start, span_end = span or (0, len(text))
+
     chunks = []
-    current_chunk = []
+    chunk_start = span_start
     current_tokens = 0
+    line_start = span_start
 
-    for line in lines:
-        line_tokens = count_tokens(line)
-
-        if current_tokens + line_tokens > MAX_CHUNK_TOKENS:
-            if current_chunk:
-                chunk_text = '\n'.join(current_chunk)
-                chunks.append({
-                    'text': chunk_text,
-                    'metadata': metadata.copy(),
-                    'chunk_info': {'type': 'split'}
-                })
-            current_chunk = [line]
+    def _append(start: int, end: int, tokens: int) -> None:
+        chunks.append({
+            'text': text[start:end],
+            'metadata': metadata.copy(),
+            'chunk_info': {'type': 'split', 'tokens': tokens}
+        })
+
+    while line_start <= span_end:
+        newline = text.find('\n', line_start, span_end)
+        line_end = span_end if newline == -1 else newline
+        line_tokens = index.count(line_start, line_end)
+
+        if current_tokens + line_tokens > MAX_CHUNK_TOKENS and line_start > chunk_start:
+            # 직전 줄바꿈 전까지를 청크로 확정
+            _append(chunk_start, line_start - 1, current_tokens)
+            chunk_start = line_start
             current_tokens = line_tokens
         else:
-            current_chunk.append(line)
             current_tokens += line_tokens
 
+        line_start = line_end + 1
+
     # 마지막 청크
-    if current_chunk:
-        chunk_text = '\n'.join(current_chunk)
-        chunks.append({
-            'text': chunk_text,
-            'metadata': metadata.copy(),
-            'chunk_info': {'type': 'split'}
-        })
+    if chunk_start < span_end:
+        _append(chunk_start, span_end, current_tokens)
 
     # 인덱스 부여
     for i, chunk in enumerate(chunks):
@@ -199,7 +252,79 @@ def split_by_token_limit(text: str, metadata: Dict) -> List[Dict]:
     return chunks
 
 
-def process_large_documents(dry_run: bool = True):
+def split_document(doc: Dict) -> Tuple[Any, int, List[Dict]]:
+    """문서 1개 분할 (프로세스 풀 작업 단위)
+
+    Returns:
+        (_id, 원본 토큰 수, 청크 목록). 토큰 제한 이하 문서는 빈 청크 목록
+    """
+    text = doc.get('text', '')
+    index = TokenIndex(text)
+    if index.total <= TOKEN_LIMIT:
+        return doc['_id'], index.total, []
+    return doc['_id'], index.total, split_by_semantic_units(text, doc.get('metadata', {}), index=index)
+
+
+def iter_candidates():
+    """토큰 제한을 넘을 수 있는 문서를 커서로 스트리밍
+
+    토큰 수는 UTF-8 바이트 수를 넘지 않으므로 바이트 길이가 TOKEN_LIMIT 이하인
+    문서는 서버에서 제외합니다. 이미 분할된 원본과 분할 청크도 제외합니다.
+    """
+    return collection.find(
+        {
+            'embedding': {'$exists': False},
+            'chunked': {'$exists': False},
+            'metadata.parent_id': {'$exists': False},
+            '$expr': {'$gt': [{'$strLenBytes': {'$ifNull': ['$text', '']}}, TOKEN_LIMIT]},
+        },
+        {'_id': 1, 'text': 1, 'metadata': 1}
+    ).batch_size(100)
+
+
+def iter_split_results(docs, workers: int):
+    """문서 분할 결과 생성 (workers > 1이면 프로세스 풀, 제출 작업 수 제한)"""
+    if workers <= 1:
+        for doc in docs:
+            yield split_document(doc)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for doc in docs:
+            in_flight.append(pool.submit(split_document, doc))
+            if len(in_flight) >= workers * 4:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def build_write_ops(doc_id, chunks: List[Dict]) -> List[Any]:
+    """원본 1개의 저장 작업 (기존 분할 청크 삭제 → 청크 삽입 → 원본 chunked 표시)
+
+    ordered bulk_write에서 이 순서가 유지되므로 중간에 실패하면 원본이
+    chunked로 표시되지 않아 재실행 시 다시 처리됩니다.
+    """
+    ops: List[Any] = [DeleteMany({'metadata.parent_id': str(doc_id)})]
+    for chunk in chunks:
+        ops.append(InsertOne({
+            'text': chunk['text'],
+            'metadata': {
+                **chunk['metadata'],
+                'parent_id': str(doc_id),
+                'chunk_index': chunk['chunk_info']['index'],
+                'chunk_total': chunk['chunk_info']['total'],
+                'chunk_type': chunk['chunk_info'].get('type', 'unknown'),
+            }
+        }))
+    ops.append(UpdateOne(
+        {'_id': doc_id},
+        {'$set': {'chunked': True, 'chunk_count': len(chunks)}}
+    ))
+    return ops
+
+
+def process_large_documents(dry_run: bool = True, workers: int = 1):
     """
     8192 토큰 초과 문서 처리
     """
@@ -211,76 +336,44 @@ def process_large_documents(dry_run: bool = True):
         print("[모드] DRY-RUN (실제 DB 변경 없음)")
     else:
         print("[모드] 실제 실행")
+    print(f"[정보] 워커 {workers}개")
 
-    # embedding 없고 토큰 초과인 문서 조회
-    docs = list(collection.find(
-        {'embedding': {'$exists': False}},
-        {'_id': 1, 'text': 1, 'metadata': 1}
-    ))
-
-    large_docs = []
-    for doc in docs:
-        text = doc.get('text', '')
-        tokens = count_tokens(text)
-        if tokens > 8192:
-            large_docs.append((tokens, doc))
-
-    large_docs.sort(reverse=True)
-
-    print(f"\n[정보] 8192 토큰 초과 문서: {len(large_docs)}개")
-
-    if not large_docs:
-        print("처리할 문서가 없습니다.")
-        return
-
+    start_time = time.time()
+    scanned = 0
+    large_docs = 0
     total_chunks_created = 0
+    pending_ops: List[Any] = []
 
-    for i, (tokens, doc) in enumerate(large_docs, 1):
-        doc_id = doc['_id']
-        text = doc.get('text', '')
-        metadata = doc.get('metadata', {})
-
-        source_file = metadata.get('source_file', 'N/A')[:40]
-        law_id = metadata.get('law_article_id', 'N/A')
+    def flush_ops():
+        if pending_ops and not dry_run:
+            collection.bulk_write(pending_ops, ordered=True)
+        pending_ops.clear()
 
-        print(f"\n[{i}/{len(large_docs)}] {source_file}")
-        print(f"  원본: {tokens:,} 토큰, law_article_id: {law_id}")
-
-        # 청크 분할
-        chunks = split_by_semantic_units(text, metadata)
+    for doc_id, tokens, chunks in iter_split_results(iter_candidates(), workers):
+        scanned += 1
+        if not chunks:
+            continue
+        large_docs += 1
 
+        print(f"\n[{large_docs}] _id={doc_id}")
+        print(f"  원본: {tokens:,} 토큰, law_article_id: {chunks[0]['metadata'].get('law_article_id', 'N/A')}")
         print(f"  → {len(chunks)}개 청크로 분할")
-
         for j, chunk in enumerate(chunks):
-            chunk_tokens = count_tokens(chunk['text'])
-            chunk_type = chunk['chunk_info'].get('type', 'unknown')
-            print(f"     청크 {j+1}: {chunk_tokens:,} 토큰 ({chunk_type})")
-
-            if not dry_run:
-                # 새 문서 생성
-                new_doc = {
-                    'text': chunk['text'],
-                    'metadata': {
-                        **chunk['metadata'],
-                        'parent_id': str(doc_id),
-                        'chunk_index': chunk['chunk_info']['index'],
-                        'chunk_total': chunk['chunk_info']['total'],
-                        'chunk_type': chunk_type,
-                    }
-                }
-                collection.insert_one(new_doc)
-                total_chunks_created += 1
-
-        if not dry_run:
-            # 원본 문서에 chunked 표시
-            collection.update_one(
-                {'_id': doc_id},
-                {'$set': {'chunked': True, 'chunk_count': len(chunks)}}
-            )
+            info = chunk['chunk_info']
+            print(f"     청크 {j+1}: {info.get('tokens', 0):,} 토큰 ({info.get('type', 'unknown')})")
+
+        total_chunks_created += len(chunks)
+        pending_ops.extend(build_write_ops(doc_id, chunks))
+        if len(pending_ops) >= WRITE_BATCH_SIZE:
+            flush_ops()
+
+    flush_ops()
+    elapsed = time.time() - start_time
 
     print("\n" + "=" * 60)
+    print(f"[정보] 후보 {scanned}개 중 8192 토큰 초과 {large_docs}개 ({elapsed:.1f}초)")
     if dry_run:
-        print("[완료] DRY-RUN 완료 - 실제 변경 없음")
+        print(f"[완료] DRY-RUN 완료 - 실제 변경 없음 (생성 예정 청크 {total_chunks_created}개)")
         print("       실제 실행: python app/ai/data/chunk_large_docs.py")
     else:
         print(f"[완료] {total_chunks_created}개 청크 문서 생성됨")
@@ -304,9 +397,10 @@ def process_large_documents(dry_run: bool = True):
 def main():
     parser = argparse.ArgumentParser(description="대용량 문서 청킹")
     parser.add_argument("--test", action="store_true", help="테스트 모드 (dry-run)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="분할 병렬 처리 프로세스 수")
     args = parser.parse_args()
 
-    process_large_documents(dry_run=args.test)
+    process_large_documents(dry_run=args.test, workers=args.workers)
 
 
 if __name__ == "__main__":
@@ -1,146 +1,268 @@
+"""
+규정 문서 스트리밍 로더 / 청커
+
+파일 → 페이지 → 조문 청크 → 별표 청크 순서의 제너레이터 파이프라인입니다.
+한 번에 한 파일만 메모리에 올리고, 페이지 경계를 넘는 조문도 이어 붙여 하나의 청크로 만듭니다.
+여러 파일은 프로세스 풀에서 병렬로 처리합니다.
+
+사용법:
+    # 청크 통계만 출력
+    python -m app.ai.data.document_loader
+
+    # 청크를 JSONL로 저장
+    python -m app.ai.data.document_loader --output chunks.jsonl
+
+    # MongoDB에 증분 동기화 (콘텐츠 해시 기반, 변경된 조문만 재임베딩 대상)
+    python -m app.ai.data.document_loader --sync --workers 4
+"""
+
+import argparse
+import json
 import os
-from dotenv import load_dotenv
-from typing import List, Dict
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 기본 PDF 디렉토리 (app/ai/pdfs)
+DEFAULT_PDFS_DIR = Path(__file__).parent.parent / "pdfs"
+
+# 조항 제목 패턴: 제12조(목적), 제3조의2(정의)
+ARTICLE_PATTERN = re.compile(r"(제\s*\d+조(?:의\d+)?)(\([^)]{1,30}\))")
+# 별표 블록/참조 패턴: <별표 1>
+STAR_PATTERN = re.compile(r"\<별표\s*\d+\>")
+
+
+def _star_id(marker: str) -> str:
+    """'<별표 1>' → '별표1'"""
+    return marker.strip("<>").replace(" ", "")
 
-load_dotenv("apikey.env")  # .env 로드
-os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
-os.environ["PINECONE_API_KEY"] = os.getenv("PINECONE_API_KEY")
-
-# 이후 코드: PDF 로드, 청크링, 임베딩 등 추가 예정
-print("환경 설정 완료!")
-
-from llama_index.core import SimpleDirectoryReader
-
-# 현재 파일의 디렉토리 기준으로 상대 경로 계산
-current_dir = Path(__file__).parent  # /Users/kimdaegi/Desktop/backend/app/loding
-project_root = current_dir.parent    # /Users/kimdaegi/Desktop/backend/app
-pdfs_dir = project_root / "pdfs"     # /Users/kimdaegi/Desktop/backend/app/pdfs
-
-reader = SimpleDirectoryReader(input_dir=str(pdfs_dir))
-documents = reader.load_data()
-print(f"총 {len(documents)}개의 문서 로드 완료")
-
-# 각 문서별 디버그 정보 출력
-'''
-print("\n=== 각 문서별 상세 정보 ===")
-for i, doc in enumerate(documents):
-    # 파일명 추출 (metadata에서)
-    filename = doc.metadata.get('file_name', f'문서_{i+1}')
-    file_path = doc.metadata.get('file_path', 'Unknown')
-    
-    print(f"\n📄 문서 {i+1}: {filename}")
-    print(f"   파일 경로: {file_path}")
-    print(f"   텍스트 길이: {len(doc.text)} 문자")
-    
-    # 첫 200자 미리보기
-    preview_text = doc.text[:200].replace('\n', ' ').strip()
-    print(f"   첫 200자 미리보기: {preview_text}...")
-    
-    # 메타데이터 정보
-    print(f"   메타데이터: {doc.metadata}")
-    print("-" * 80)
-
-print(f"\n총 처리된 파일 수: {len(documents)}개")
-'''
-# Detect 조문 제목 및 본문 청크
 
-def extract_chunks_finditer(text: str, filename: str) -> List[Dict]:
-    # 조항 제목 패턴 탐색
-    pattern = re.compile(r"(제\s*\d+조(?:의\d+)?)(\([^)]{1,30}\))")  
-    matches = list(pattern.finditer(text))
-
-    print(f"🔍 {filename}: 총 {len(matches)}개 조항 제목 발견")
-
-    chunks = []
-    for i in range(len(matches)):
-        start = matches[i].start()  # 현재 조항 시작
-        end = matches[i+1].start() if i + 1 < len(matches) else len(text)  # 다음 조항 전까지
-        chunk_text = text[start:end].strip()
-
-        law_id = matches[i].group(1).replace(" ", "")
-        title = matches[i].group(2).strip("()")
-        ref_stars = detect_star_references(chunk_text)
-        
-        chunks.append({
-            "text": chunk_text,
-            "metadata": {
-                "law_article_id": law_id,        # 조문번호 → law_article_id
-                "title": title,                  # 제목 (영문 유지)
-                "source_file": filename,         # 소스파일 (영문 유지)
-                "category": "law_articles",      # 카테고리 (영문 유지)
-                "referenced_tables": ref_stars   # 참조별표 → referenced_tables
-            }
-        })
-        
-        # 미리보기 출력
-        print(f"\n🧩 청크 {i+1}")
-        print(f"조문번호: {law_id}")
-        print(f"제목: {title}")
-        print(f"본문 미리보기: {chunk_text[:100].replace('\n', ' ')}...")
-        print(f"참조 별표: {', '.join(ref_stars) if ref_stars else '없음'}")
-        print("-" * 40)
-
-    print(f"\n✅ {filename} → {len(chunks)}개 청크 생성 완료")
-    return chunks
-
-# Detect 별표 블록
-def extract_star_tables(text: str, filename: str, law_blocks: List[Dict]) -> List[Dict]:
-    pattern = re.compile(r"\<별표\s*\d+\>")
-    matches = list(pattern.finditer(text))
-
-    print(f"\n📌 {filename} - 별표 블록 {len(matches)}개 발견됨")
-
-    star_chunks = []
-    for i, match in enumerate(matches):
-        start = match.start()
-        end = matches[i+1].start() if i+1 < len(matches) else len(text)
-        star_text = text[start:end].strip()
-
-        star_id = match.group().strip("<>").replace(" ", "")
-
-        # 연결 조문 추정: 가장 가까운 앞선 조문 블록 찾기
-        parent_law = None
-        for law in reversed(law_blocks):
-            if (law['metadata']['source_file'] == filename and 
-                law['metadata']['law_article_id']):  # 필드명 변경
-                if law['text'] and law['text'].find(match.group()) > -1:
-                    parent_law = law['metadata']['law_article_id']  # 필드명 변경
-                    break
-
-        star_chunks.append({
-            "text": star_text,
-            "metadata": {
-                "table_id": star_id,              # 별표번호 → table_id
-                "category": "appendix_tables",    # 카테고리 영문화
-                "parent_law_article": parent_law or "unspecified",  # parent_조문 → parent_law_article
-                "source_file": filename
-            }
-        })
-
-        print(f"🧩 별표 청크 {i+1}: {star_id} (연결: {parent_law})")
-        print(f"   미리보기: {star_text[:80].replace('\n', ' ')}...")
-
-    return star_chunks
 # Detect 별표 참조
 def detect_star_references(text: str) -> List[str]:
-    pattern = re.compile(r"\<별표\s*\d+\>")
     return [
-        m.group().strip("<>").replace(" ", "")  # 예: '별표1'
-        for m in pattern.finditer(text)
+        _star_id(m.group())  # 예: '별표1'
+        for m in STAR_PATTERN.finditer(text)
     ]
 
+
 # -------------------------------
-# 전체 문서 처리 및 요약
+# 파일 → 페이지
 # -------------------------------
-all_chunks: List[Dict] = []
-for i, doc in enumerate(documents):
-    fname = doc.metadata.get('file_name', f'문서_{i+1}')
-    chunks = extract_chunks_finditer(doc.text, fname)
-    all_chunks.extend(chunks)
-    star_chunks = extract_star_tables(doc.text, fname, chunks)
-    all_chunks.extend(star_chunks)
 
+def iter_pdf_files(pdfs_dir: Path) -> Iterator[Path]:
+    """디렉토리의 PDF 파일 (이름순)"""
+    yield from sorted(p for p in Path(pdfs_dir).iterdir() if p.is_file() and p.suffix.lower() == ".pdf")
+
+
+def iter_pages(path: Path) -> Iterator[str]:
+    """파일 1개의 페이지 텍스트를 순서대로 생성"""
+    from llama_index.core import SimpleDirectoryReader
+
+    reader = SimpleDirectoryReader(input_files=[str(path)])
+    for doc in reader.load_data():
+        yield doc.text
+
+
+# -------------------------------
+# 페이지 → 블록
+# -------------------------------
+
+class BlockScanner:
+    """페이지 스트림에서 pattern으로 시작하는 블록을 잘라내는 스캐너
+
+    블록은 현재 매치부터 다음 매치 직전까지입니다. 다음 매치가 나타날 때까지
+    마지막 블록만 버퍼에 유지하므로 메모리는 가장 긴 블록 크기로 제한됩니다.
+    첫 매치 이전 텍스트(표지, 머리말 등)는 버립니다.
+    """
+
+    def __init__(self, pattern: re.Pattern):
+        self.pattern = pattern
+        self._buffer = ""
+
+    def feed(self, page: str) -> List[Tuple[re.Match, str]]:
+        """페이지를 추가하고 완성된 블록 반환"""
+        self._buffer += page
+        matches = list(self.pattern.finditer(self._buffer))
+        if not matches:
+            # 첫 매치 전: 헤더가 페이지 경계에 걸친 경우만 대비해 꼬리만 유지
+            self._buffer = self._buffer[-64:]
+            return []
+
+        blocks = [
+            (current, self._buffer[current.start():following.start()].strip())
+            for current, following in zip(matches, matches[1:])
+        ]
+        # 마지막 블록은 다음 페이지에서 이어질 수 있으므로 보류
+        self._buffer = self._buffer[matches[-1].start():]
+        return blocks
+
+    def finish(self) -> List[Tuple[re.Match, str]]:
+        """파일 끝: 보류 중인 마지막 블록 반환"""
+        last = self.pattern.match(self._buffer)
+        self._buffer = ""
+        return [(last, last.string.strip())] if last else []
+
+
+# -------------------------------
+# 블록 → 조문 / 별표 청크
+# -------------------------------
+
+def _article_chunk(match: re.Match, chunk_text: str, filename: str) -> Dict:
+    return {
+        "text": chunk_text,
+        "metadata": {
+            "law_article_id": match.group(1).replace(" ", ""),  # 조문번호 → law_article_id
+            "title": match.group(2).strip("()"),                # 제목 (영문 유지)
+            "source_file": filename,                            # 소스파일 (영문 유지)
+            "category": "law_articles",                         # 카테고리 (영문 유지)
+            "referenced_tables": detect_star_references(chunk_text)  # 참조별표 → referenced_tables
+        }
+    }
+
+
+def _star_chunk(match: re.Match, star_text: str, filename: str, parent_law: Optional[str]) -> Dict:
+    return {
+        "text": star_text,
+        "metadata": {
+            "table_id": _star_id(match.group()),                # 별표번호 → table_id
+            "category": "appendix_tables",                      # 카테고리 영문화
+            "parent_law_article": parent_law or "unspecified",  # parent_조문 → parent_law_article
+            "source_file": filename
+        }
+    }
+
+
+def iter_file_chunks(filename: str, pages: Iterable[str]) -> Iterator[Dict]:
+    """페이지 스트림 → 조문 청크 + 별표 청크 (단일 패스)
+
+    페이지를 한 번만 읽으면서 조문/별표 스캐너에 동시에 공급합니다.
+    별표의 연결 조문은 파일 전체에서 해당 별표를 참조한 가장 마지막 조문이므로,
+    별표 블록(분량이 작음)은 파일 끝까지 보류했다가 완성된 참조 색인으로 연결합니다.
+    """
+    articles = BlockScanner(ARTICLE_PATTERN)
+    stars = BlockScanner(STAR_PATTERN)
+    ref_index: Dict[str, str] = {}   # {별표ID: 조문번호}
+    star_blocks: List[Tuple[re.Match, str]] = []
+
+    def emit_articles(blocks):
+        for match, text in blocks:
+            chunk = _article_chunk(match, text, filename)
+            for table_id in chunk["metadata"]["referenced_tables"]:
+                ref_index[table_id] = chunk["metadata"]["law_article_id"]
+            yield chunk
+
+    for page in pages:
+        yield from emit_articles(articles.feed(page))
+        star_blocks.extend(stars.feed(page))
+
+    yield from emit_articles(articles.finish())
+    star_blocks.extend(stars.finish())
+
+    for match, text in star_blocks:
+        yield _star_chunk(match, text, filename, ref_index.get(_star_id(match.group())))
+
+
+def extract_chunks_finditer(text: str, filename: str) -> List[Dict]:
+    """전체 텍스트 → 조문 청크 (단일 텍스트용)"""
+    scanner = BlockScanner(ARTICLE_PATTERN)
+    blocks = scanner.feed(text) + scanner.finish()
+    return [_article_chunk(match, chunk_text, filename) for match, chunk_text in blocks]
+
+
+def extract_star_tables(text: str, filename: str, law_blocks: List[Dict]) -> List[Dict]:
+    """전체 텍스트 → 별표 청크 (단일 텍스트용, 연결 조문은 law_blocks에서 추정)"""
+    ref_index: Dict[str, str] = {}
+    for law in law_blocks:
+        if law["metadata"]["source_file"] == filename and law["metadata"].get("law_article_id"):
+            for table_id in detect_star_references(law["text"]):
+                ref_index[table_id] = law["metadata"]["law_article_id"]
+
+    scanner = BlockScanner(STAR_PATTERN)
+    blocks = scanner.feed(text) + scanner.finish()
+    return [
+        _star_chunk(match, star_text, filename, ref_index.get(_star_id(match.group())))
+        for match, star_text in blocks
+    ]
+
+
+# -------------------------------
+# 파일 단위 처리 / 프로세스 풀
+# -------------------------------
+
+def load_file_chunks(path: str) -> Tuple[str, List[Dict]]:
+    """파일 1개 처리 (프로세스 풀 작업 단위)
+
+    Returns:
+        (파일명, 청크 목록)
+    """
+    file_path = Path(path)
+    return file_path.name, list(iter_file_chunks(file_path.name, iter_pages(file_path)))
+
+
+def iter_corpus_chunks(pdfs_dir: Path = DEFAULT_PDFS_DIR, workers: int = 1) -> Iterator[Tuple[str, List[Dict]]]:
+    """디렉토리의 모든 PDF를 파일 단위로 처리
+
+    workers > 1이면 프로세스 풀에서 병렬 처리하며, 결과는 파일 순서대로 생성됩니다.
+    제출된 작업은 최대 workers * 2개로 제한하여 소비가 느려도 결과가 쌓이지 않습니다.
+
+    Yields:
+        (파일명, 청크 목록)
+    """
+    files = [str(p) for p in iter_pdf_files(pdfs_dir)]
+    if workers <= 1:
+        for path in files:
+            yield load_file_chunks(path)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for path in files:
+            in_flight.append(pool.submit(load_file_chunks, path))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="규정 PDF → 조문/별표 청크")
+    parser.add_argument("--pdfs-dir", default=str(DEFAULT_PDFS_DIR), help="PDF 디렉토리")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="병렬 처리 프로세스 수")
+    parser.add_argument("--output", help="청크를 저장할 JSONL 경로")
+    parser.add_argument("--sync", action="store_true", help="MongoDB에 증분 동기화 (sync_chunks_to_mongo)")
+    parser.add_argument("--dry-run", action="store_true", help="--sync 시 변경 없이 통계만 출력")
+    args = parser.parse_args()
+
+    sync = None
+    if args.sync:
+        # MongoDB 연결은 동기화가 필요할 때만 생성
+        from app.ai.data.mongodb_client import sync_chunks_to_mongo
+        sync = sync_chunks_to_mongo
+
+    out_file = open(args.output, "w", encoding="utf-8") if args.output else None
+    total_files = total_articles = total_stars = 0
+    try:
+        for filename, chunks in iter_corpus_chunks(Path(args.pdfs_dir), workers=args.workers):
+            articles = sum(1 for c in chunks if c["metadata"]["category"] == "law_articles")
+            stars = len(chunks) - articles
+            print(f"✅ {filename} → 조문 {articles}개, 별표 {stars}개")
+            total_files += 1
+            total_articles += articles
+            total_stars += stars
+
+            if out_file:
+                for chunk in chunks:
+                    out_file.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+            if sync and chunks:
+                sync(chunks, dry_run=args.dry_run)
+    finally:
+        if out_file:
+            out_file.close()
+
+    print(f"\n총 {total_files}개 파일: 조문 {total_articles}개, 별표 {total_stars}개")
 
 
+if __name__ == "__main__":
+    main()
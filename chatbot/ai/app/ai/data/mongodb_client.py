@@ -1,5 +1,8 @@
-from pymongo import MongoClient
-from typing import List, Dict
+from pymongo import MongoClient, InsertOne, UpdateOne, DeleteMany
+from typing import Dict, List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime, timezone
+import hashlib
 import os
 from dotenv import load_dotenv
 import certifi
@@ -42,14 +45,169 @@ db = client[DB_NAME]
 collection = db[COLLECTION_NAME]
 
 
-def insert_chunks_to_mongo(chunks: List[Dict]):
+# ============================================================
+# 콘텐츠 해시 기반 증분 적재
+# ============================================================
+
+def content_hash(text: str) -> str:
+    """청크 본문 해시 (공백 차이는 무시)"""
+    normalized = " ".join((text or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _article_id(metadata: Dict) -> str:
+    """청크의 조문/별표 식별자 (law_article_id → table_id 순)"""
+    return metadata.get("law_article_id") or metadata.get("table_id") or ""
+
+
+def assign_chunk_keys(chunks: List[Dict]) -> List[Tuple[str, str]]:
+    """청크별 (chunk_key, content_hash) 계산
+
+    chunk_key = source_file | 조문/별표 ID | 같은 ID의 등장 순번
+    (부칙의 제1조처럼 한 파일에 같은 조문번호가 반복될 수 있어 순번을 포함)
+    """
+    seen: Dict[Tuple[str, str], int] = defaultdict(int)
+    keys = []
+    for chunk in chunks:
+        metadata = chunk.get("metadata", {})
+        article = _article_id(metadata)
+        ident = (metadata.get("source_file", ""), article)
+        occurrence = seen[ident]
+        seen[ident] += 1
+        keys.append((f"{ident[0]}|{article}|{occurrence}", content_hash(chunk.get("text", ""))))
+    return keys
+
+
+def _load_existing(target, source_file: str) -> Dict[str, Dict]:
+    """저장된 청크를 chunk_key 기준으로 조회
+
+    chunk_key/content_hash가 없는 기존(전체 재적재 방식) 문서는
+    _id(삽입) 순서로 키를 재구성하고 본문 해시를 계산하여 매칭합니다.
+    대용량 분할 청크(metadata.parent_id)는 원본 문서를 통해 함께 관리되므로 제외합니다.
+    """
+    cursor = target.find(
+        {"metadata.source_file": source_file, "metadata.parent_id": {"$exists": False}},
+        {"_id": 1, "text": 1, "metadata": 1, "content_hash": 1, "chunked": 1},
+    ).sort("_id", 1)
+
+    docs = list(cursor)
+    legacy = [d for d in docs if not d.get("metadata", {}).get("chunk_key") or not d.get("content_hash")]
+    legacy_keys = dict(zip((id(d) for d in legacy), assign_chunk_keys(legacy))) if legacy else {}
+
+    existing: Dict[str, Dict] = {}
+    for doc in docs:
+        if id(doc) in legacy_keys:
+            key, digest = legacy_keys[id(doc)]
+            doc["_legacy"] = True
+        else:
+            key, digest = doc["metadata"]["chunk_key"], doc["content_hash"]
+        doc["_key"], doc["_hash"] = key, digest
+        if key in existing:
+            # 중복 키는 이후 문서를 삭제 대상으로 처리
+            existing[f"{key}#dup{doc['_id']}"] = doc
+        else:
+            existing[key] = doc
+    return existing
+
+
+def sync_chunks_to_mongo(chunks: List[Dict], dry_run: bool = False, target=None) -> Dict[str, int]:
+    """청크를 source_file 단위로 증분 동기화
+
+    - 본문 해시가 같은 청크: 유지 (embedding 보존, metadata만 갱신)
+    - 본문이 바뀐 청크: text/metadata 갱신 + embedding 제거 (add_embeddings.py가 재임베딩)
+    - 새 청크: 삽입 (embedding 없음)
+    - 사라진 청크: 삭제 (대용량 분할 청크 포함)
+
+    Args:
+        chunks: document_loader가 생성한 청크 목록 ({"text", "metadata"})
+        dry_run: True면 변경 없이 통계만 계산
+        target: 대상 컬렉션 (기본: regulation_chunks)
+
+    Returns:
+        Dict: {"unchanged", "metadata_updated", "changed", "inserted", "deleted"}
+    """
+    target = collection if target is None else target
+    # 로컬 벡터 인덱스가 변경을 감지하는 기준 (local_vector_index.collection_fingerprint)
+    now = datetime.now(timezone.utc)
+    stats = {"unchanged": 0, "metadata_updated": 0, "changed": 0, "inserted": 0, "deleted": 0}
+    if not dry_run:
+        # source_file 단위 조회용 인덱스 (이미 있으면 no-op)
+        target.create_index("metadata.source_file")
+
+    by_file: Dict[str, List[Dict]] = defaultdict(list)
+    for chunk in chunks:
+        by_file[chunk["metadata"]["source_file"]].append(chunk)
+
+    for fname, file_chunks in by_file.items():
+        existing = _load_existing(target, fname)
+        file_stats = dict.fromkeys(stats, 0)
+        ops = []
+        stale_parent_ids: List[str] = []
+
+        for chunk, (key, digest) in zip(file_chunks, assign_chunk_keys(file_chunks)):
+            metadata = {**chunk["metadata"], "chunk_key": key}
+            doc = existing.pop(key, None)
+
+            if doc is None:
+                ops.append(InsertOne({"text": chunk["text"], "metadata": metadata, "content_hash": digest, "updated_at": now}))
+                file_stats["inserted"] += 1
+            elif doc["_hash"] != digest:
+                ops.append(UpdateOne(
+                    {"_id": doc["_id"]},
+                    {
+                        "$set": {"text": chunk["text"], "metadata": metadata, "content_hash": digest, "updated_at": now},
+                        "$unset": {"embedding": "", "chunked": "", "chunk_count": ""},
+                    },
+                ))
+                if doc.get("chunked"):
+                    stale_parent_ids.append(str(doc["_id"]))
+                file_stats["changed"] += 1
+            elif doc.get("_legacy") or doc.get("metadata") != metadata:
+                ops.append(UpdateOne(
+                    {"_id": doc["_id"]},
+                    {"$set": {"metadata": metadata, "content_hash": digest, "updated_at": now}},
+                ))
+                file_stats["metadata_updated"] += 1
+            else:
+                file_stats["unchanged"] += 1
+
+        # 새 리비전에 없는 청크 삭제
+        removed_ids = [doc["_id"] for doc in existing.values()]
+        if removed_ids:
+            ops.append(DeleteMany({"_id": {"$in": removed_ids}}))
+            stale_parent_ids.extend(str(doc["_id"]) for doc in existing.values() if doc.get("chunked"))
+            file_stats["deleted"] += len(removed_ids)
+
+        # 원본이 바뀌거나 삭제된 대용량 문서의 분할 청크 정리
+        if stale_parent_ids:
+            ops.append(DeleteMany({"metadata.parent_id": {"$in": stale_parent_ids}}))
+
+        print(f" {fname}: 유지 {file_stats['unchanged']} / 메타데이터 {file_stats['metadata_updated']} / "
+              f"변경 {file_stats['changed']} / 신규 {file_stats['inserted']} / 삭제 {file_stats['deleted']}")
+        for k, v in file_stats.items():
+            stats[k] += v
+
+        if ops and not dry_run:
+            target.bulk_write(ops, ordered=False)
+
+    to_embed = stats["changed"] + stats["inserted"]
+    print(f"동기화 완료{' (DRY-RUN)' if dry_run else ''}: 재임베딩 필요 {to_embed}개 "
+          f"(python app/ai/data/add_embeddings.py)")
+    return stats
+
+
+def insert_chunks_to_mongo(chunks: List[Dict], full_replace: bool = False) -> Optional[Dict[str, int]]:
+    """청크 저장
+
+    기본은 콘텐츠 해시 기반 증분 동기화(sync_chunks_to_mongo)이며,
+    full_replace=True면 기존처럼 source_file 단위로 전부 삭제 후 재삽입합니다.
+    """
     try:
         if not MONGO_AVAILABLE:
             print("[Mongo] 현재 연결이 불안정합니다(ping 실패). 저장 시도는 계속합니다.")
-        cluster = client 
 
-        db = cluster[DB_NAME]
-        collection = db[COLLECTION_NAME]
+        if not full_replace:
+            return sync_chunks_to_mongo(chunks)
 
         filenames = set(chunk['metadata']['source_file'] for chunk in chunks)
         for fname in filenames:
@@ -59,4 +217,5 @@ def insert_chunks_to_mongo(chunks: List[Dict]):
         result = collection.insert_many(chunks)
         print(f"저장 완료: {len(result.inserted_ids)}개")
     except Exception as e:
-        print(f" Mongo 에러: {str(e)} URI/네트워크/TLS 설정을 확인하세요")
\ No newline at end of file
+        print(f" Mongo 에러: {str(e)} URI/네트워크/TLS 설정을 확인하세요")
+    return None
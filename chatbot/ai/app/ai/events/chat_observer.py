@@ -2,15 +2,25 @@
 채팅 이벤트 옵저버 패턴 구현
 
 사용자 채팅이 완료되면 관리자 페이지로 실시간 알림을 보냅니다.
+이벤트 전달은 이벤트 버스(event_bus.py)가 담당하며, CHAT_EVENT_BUS 설정으로
+프로세스 내부(memory) 또는 워커 간 브로커(redis / mongo)를 선택합니다.
 """
 
-import asyncio
 import json
+import os
 import time
 from typing import Dict, List, Optional, AsyncGenerator
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
+from .event_bus import EventBus, Subscription, create_event_bus
+
+# SSE 프레임 하나에 담는 최대 이벤트 수 / 첫 이벤트 이후 모으는 시간(초)
+CHAT_EVENT_BATCH_SIZE = int(os.getenv("CHAT_EVENT_BATCH_SIZE", "50"))
+CHAT_EVENT_BATCH_WINDOW = float(os.getenv("CHAT_EVENT_BATCH_WINDOW", "0.2"))
+# 이벤트가 없을 때 heartbeat 주기(초)
+HEARTBEAT_INTERVAL = 30.0
+
 @dataclass
 class ChatEvent:
     """채팅 이벤트 데이터"""
@@ -20,84 +30,96 @@ class ChatEvent:
     timestamp: datetime
     metadata: Optional[Dict] = None
     language: str = "KOR"
-    
+
     def to_dict(self) -> Dict:
         """JSON 직렬화용"""
         data = asdict(self)
         data['timestamp'] = self.timestamp.isoformat()
         return data
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ChatEvent":
+        """브로커에서 받은 JSON → 이벤트"""
+        return cls(**{**data, 'timestamp': datetime.fromisoformat(data['timestamp'])})
+
 class ChatEventObserver:
     """채팅 이벤트 관찰자 (Singleton)"""
-    
+
     _instance = None
-    _observers: List[asyncio.Queue] = []
-    
+    _bus: EventBus
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance._observers = []
+            cls._instance._bus = create_event_bus(encode=ChatEvent.to_dict, decode=ChatEvent.from_dict)
+            print(f"[CHAT_OBSERVER] 이벤트 버스: {cls._instance._bus.name}")
         return cls._instance
-    
+
+    @property
+    def bus(self) -> EventBus:
+        return self._bus
+
     async def notify_chat_completed(self, event: ChatEvent):
-        """채팅 완료 이벤트를 모든 관리자에게 알림"""
+        """채팅 완료 이벤트를 모든 관리자에게 알림
+
+        구독자 큐는 크기가 제한되어 있어 느린 관리자 연결이 발행을 막지 않습니다.
+        브로커 백엔드면 다른 워커에 연결된 관리자에게도 전달됩니다.
+        """
         print(f"[CHAT_OBSERVER] 새 채팅 완료: {event.user_message[:50]}...")
-        
-        # 모든 관리자 연결에 이벤트 전송
-        dead_observers = []
-        for observer_queue in self._observers:
-            try:
-                await observer_queue.put(event)
-            except Exception as e:
-                print(f"[CHAT_OBSERVER] 관리자 연결 오류: {e}")
-                dead_observers.append(observer_queue)
-        
-        # 끊어진 연결 정리
-        for dead in dead_observers:
-            self._observers.remove(dead)
-        
-        print(f"[CHAT_OBSERVER] {len(self._observers)}명의 관리자에게 알림 전송")
-    
-    def add_observer(self, observer_queue: asyncio.Queue):
+
+        try:
+            await self._bus.publish(event)
+        except Exception as e:
+            # 알림 실패가 채팅 응답에 영향을 주지 않도록 함
+            print(f"[CHAT_OBSERVER] 이벤트 발행 오류 ({self._bus.name}): {e}")
+
+    def subscribe(self) -> Subscription:
         """새 관리자 연결 추가"""
-        self._observers.append(observer_queue)
-        print(f"[CHAT_OBSERVER] 관리자 연결 추가. 총 {len(self._observers)}명")
-    
-    def remove_observer(self, observer_queue: asyncio.Queue):
+        subscription = self._bus.subscribe()
+        print(f"[CHAT_OBSERVER] 관리자 연결 추가. 이 워커 총 {self._bus.subscriber_count}명")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
         """관리자 연결 제거"""
-        if observer_queue in self._observers:
-            self._observers.remove(observer_queue)
-            print(f"[CHAT_OBSERVER] 관리자 연결 제거. 총 {len(self._observers)}명")
+        self._bus.unsubscribe(subscription)
+        print(f"[CHAT_OBSERVER] 관리자 연결 제거. 이 워커 총 {self._bus.subscriber_count}명")
 
 # 전역 인스턴스
 chat_observer = ChatEventObserver()
 
+def _sse(payload: Dict) -> str:
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+def _batch_frame(events: List[ChatEvent], dropped: int) -> str:
+    """이벤트 묶음 → SSE 프레임 1개 (1건이면 기존 new_chat 형식 유지)"""
+    if len(events) == 1 and not dropped:
+        return _sse({'type': 'new_chat', 'data': events[0].to_dict()})
+    payload = {'type': 'new_chats', 'data': [event.to_dict() for event in events]}
+    if dropped:
+        # 큐가 가득 차 버려진 이벤트 수 (관리자 화면에서 새로고침 안내용)
+        payload['dropped'] = dropped
+    return _sse(payload)
+
 async def admin_event_stream() -> AsyncGenerator[str, None]:
     """관리자용 SSE 스트림 생성"""
-    observer_queue = asyncio.Queue()
-    chat_observer.add_observer(observer_queue)
-    
+    subscription = chat_observer.subscribe()
+
     try:
         # 연결 확인용 heartbeat
-        yield f"data: {json.dumps({'type': 'connected', 'timestamp': datetime.now().isoformat()})}\n\n"
-        
+        yield _sse({'type': 'connected', 'timestamp': datetime.now().isoformat()})
+
         while True:
-            try:
-                # 새 채팅 이벤트 대기 (30초 타임아웃)
-                event = await asyncio.wait_for(observer_queue.get(), timeout=30.0)
-                
-                # SSE 형식으로 전송
-                sse_data = {
-                    'type': 'new_chat',
-                    'data': event.to_dict()
-                }
-                yield f"data: {json.dumps(sse_data, ensure_ascii=False)}\n\n"
-                
-            except asyncio.TimeoutError:
+            # 새 채팅 이벤트 대기 (30초 타임아웃), 도착하면 잠시 더 모아서 프레임 하나로 전송
+            events = await subscription.get_batch(
+                CHAT_EVENT_BATCH_SIZE, timeout=HEARTBEAT_INTERVAL, linger=CHAT_EVENT_BATCH_WINDOW
+            )
+            if events:
+                yield _batch_frame(events, subscription.take_dropped())
+            else:
                 # Heartbeat (연결 유지용)
-                yield f"data: {json.dumps({'type': 'heartbeat', 'timestamp': datetime.now().isoformat()})}\n\n"
-                
+                yield _sse({'type': 'heartbeat', 'timestamp': datetime.now().isoformat()})
+
     except Exception as e:
         print(f"[ADMIN_STREAM] 오류: {e}")
     finally:
-        chat_observer.remove_observer(observer_queue)
+        chat_observer.unsubscribe(subscription)
@@ -0,0 +1,307 @@
+"""
+채팅 이벤트 버스
+
+gunicorn 워커마다 프로세스가 따로 떠 있으므로, 프로세스 내부 큐만으로는
+관리자 SSE 연결이 자기 워커가 처리한 채팅만 보게 됩니다.
+발행(publish)과 구독자 전달(fan-out)을 분리하여 백엔드를 바꿀 수 있게 합니다.
+
+- memory: 프로세스 내부 전달 (기본값, 단일 워커/로컬)
+- redis:  Redis 호환 pub/sub 채널로 발행, 모든 워커가 구독하여 각자의 구독자에게 전달
+- mongo:  chat_events 컬렉션에 삽입 + change stream 구독 (Redis가 없을 때의 대안, 레플리카셋 필요)
+
+구독자 큐는 크기가 제한되며, 가득 차면 정책에 따라 버리거나 합칩니다.
+느린 관리자 탭 하나가 메모리를 계속 잡아먹거나 발행자를 막지 않습니다.
+
+- drop_oldest: 가장 오래된 이벤트를 버림
+- drop_newest: 새 이벤트를 버림
+- coalesce:    같은 세션의 대기 중인 이벤트를 최신 것으로 교체, 그래도 가득 차면 가장 오래된 것을 버림
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+# 백엔드 선택: memory | redis | mongo
+CHAT_EVENT_BUS = os.getenv("CHAT_EVENT_BUS", "memory").lower()
+CHAT_EVENT_REDIS_URL = os.getenv("CHAT_EVENT_REDIS_URL", "redis://localhost:6379/0")
+CHAT_EVENT_CHANNEL = os.getenv("CHAT_EVENT_CHANNEL", "chat-events")
+CHAT_EVENT_COLLECTION = os.getenv("CHAT_EVENT_COLLECTION", "chat_events")
+# mongo 백엔드 이벤트 문서 보관 시간(초), TTL 인덱스
+CHAT_EVENT_TTL_SECONDS = int(os.getenv("CHAT_EVENT_TTL_SECONDS", "3600"))
+
+# 구독자 큐 크기/정책
+CHAT_EVENT_QUEUE_SIZE = int(os.getenv("CHAT_EVENT_QUEUE_SIZE", "256"))
+CHAT_EVENT_QUEUE_POLICY = os.getenv("CHAT_EVENT_QUEUE_POLICY", "coalesce")
+
+QUEUE_POLICIES = ("drop_oldest", "drop_newest", "coalesce")
+
+# 브로커 구독이 끊겼을 때 재연결 대기(초)
+RECONNECT_DELAY = 3.0
+
+
+class Subscription:
+    """크기가 제한된 구독자 버퍼 (이벤트 루프 스레드에서만 접근)"""
+
+    def __init__(
+        self,
+        maxsize: int = CHAT_EVENT_QUEUE_SIZE,
+        policy: str = CHAT_EVENT_QUEUE_POLICY,
+        key: Callable[[Any], Any] = lambda event: getattr(event, "session_id", None),
+    ):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"지원하지 않는 큐 정책: {policy} (가능: {', '.join(QUEUE_POLICIES)})")
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self._key = key
+        self._buffer: Deque[Any] = deque()
+        self._ready = asyncio.Event()
+        self.dropped = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def offer(self, event: Any) -> bool:
+        """이벤트 추가 (블로킹 없음), 버려졌으면 False"""
+        if self.policy == "coalesce":
+            key = self._key(event)
+            if key is not None:
+                for i, pending in enumerate(self._buffer):
+                    if self._key(pending) == key:
+                        self._buffer[i] = event
+                        self.coalesced += 1
+                        return True
+
+        if len(self._buffer) >= self.maxsize:
+            if self.policy == "drop_newest":
+                self.dropped += 1
+                return False
+            self._buffer.popleft()
+            self.dropped += 1
+
+        self._buffer.append(event)
+        self._ready.set()
+        return True
+
+    async def get_batch(self, max_items: int, timeout: float, linger: float = 0.0) -> List[Any]:
+        """최대 timeout초 기다려 이벤트를 max_items개까지 반환 (없으면 빈 리스트)
+
+        첫 이벤트가 도착한 뒤 linger초 동안 더 모아서 한 번에 돌려줍니다.
+        """
+        if not self._buffer:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return []
+        if linger > 0 and len(self._buffer) < max_items:
+            await asyncio.sleep(linger)
+
+        batch = []
+        while self._buffer and len(batch) < max_items:
+            batch.append(self._buffer.popleft())
+        return batch
+
+    def take_dropped(self) -> int:
+        """마지막 확인 이후 버려진 이벤트 수 (확인 후 0으로 초기화)"""
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class EventBus:
+    """프로세스 내부 이벤트 버스 (구독자 관리 + fan-out)
+
+    하위 클래스는 publish에서 브로커로 보내고, 브로커에서 받은 이벤트를 _deliver로 전달합니다.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._subscriptions: Set[Subscription] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, maxsize: int = CHAT_EVENT_QUEUE_SIZE, policy: str = CHAT_EVENT_QUEUE_POLICY) -> Subscription:
+        subscription = Subscription(maxsize=maxsize, policy=policy)
+        self._subscriptions.add(subscription)
+        self._on_subscribe()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+        if not self._subscriptions:
+            self._on_idle()
+
+    async def publish(self, event: Any) -> None:
+        self._deliver(event)
+
+    def _deliver(self, event: Any) -> int:
+        """이 프로세스의 모든 구독자에게 전달 (버려진 구독자 수 반환)"""
+        dropped = 0
+        for subscription in list(self._subscriptions):
+            if not subscription.offer(event):
+                dropped += 1
+        return dropped
+
+    def _on_subscribe(self) -> None:
+        """첫 구독자가 생기면 브로커 수신 시작 (memory는 할 일 없음)"""
+
+    def _on_idle(self) -> None:
+        """구독자가 모두 떠나면 브로커 수신 중지"""
+
+    async def close(self) -> None:
+        self._subscriptions.clear()
+        self._on_idle()
+
+
+async def _aclose(resource) -> None:
+    # redis-py 5.x는 aclose, 4.x는 close
+    await (resource.aclose() if hasattr(resource, "aclose") else resource.close())
+
+
+class RedisEventBus(EventBus):
+    """Redis 호환 pub/sub 백엔드
+
+    발행은 채널로만 보내고, 구독자가 있는 워커만 채널을 구독해 자기 구독자에게 전달합니다.
+    (발행한 워커도 채널을 통해 받으므로 중복 전달 없음)
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = CHAT_EVENT_REDIS_URL, channel: str = CHAT_EVENT_CHANNEL,
+                 encode: Callable[[Any], Dict] = None, decode: Callable[[Dict], Any] = None):
+        super().__init__()
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as e:
+            raise ImportError("CHAT_EVENT_BUS=redis 사용 시 redis 패키지가 필요합니다 (pip install redis)") from e
+        self._redis = aioredis.from_url(url)
+        self.channel = channel
+        self._encode = encode or (lambda event: event)
+        self._decode = decode or (lambda data: data)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def publish(self, event: Any) -> None:
+        await self._redis.publish(self.channel, json.dumps(self._encode(event), ensure_ascii=False))
+
+    def _on_subscribe(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    def _on_idle(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        self._deliver(self._decode(json.loads(message["data"])))
+                    except (ValueError, KeyError, TypeError) as e:
+                        print(f"[EVENT_BUS] 잘못된 이벤트 무시: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[EVENT_BUS] Redis 구독 오류, {RECONNECT_DELAY}초 후 재연결: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
+            finally:
+                await _aclose(pubsub)
+
+    async def close(self) -> None:
+        await super().close()
+        await _aclose(self._redis)
+
+
+class MongoChangeStreamEventBus(EventBus):
+    """MongoDB change stream 백엔드 (Redis가 없을 때의 대안)
+
+    이벤트를 chat_events 컬렉션에 삽입하고, 구독자가 있는 워커는 insert change stream을 받아 전달합니다.
+    pymongo(동기)를 쓰므로 삽입은 스레드에서, change stream은 전용 스레드에서 읽어 이벤트 루프로 넘깁니다.
+    이벤트 문서는 TTL 인덱스로 CHAT_EVENT_TTL_SECONDS 후 삭제됩니다.
+    """
+
+    name = "mongo"
+
+    def __init__(self, collection=None, encode: Callable[[Any], Dict] = None, decode: Callable[[Dict], Any] = None):
+        super().__init__()
+        if collection is None:
+            from app.ai.data.mongodb_client import db
+            collection = db[CHAT_EVENT_COLLECTION]
+        self._collection = collection
+        self._encode = encode or (lambda event: event)
+        self._decode = decode or (lambda data: data)
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._indexed = False
+
+    def _insert(self, doc: Dict) -> None:
+        from datetime import datetime, timezone
+
+        if not self._indexed:
+            self._collection.create_index("created_at", expireAfterSeconds=CHAT_EVENT_TTL_SECONDS)
+            self._indexed = True
+        self._collection.insert_one({"event": doc, "created_at": datetime.now(timezone.utc)})
+
+    async def publish(self, event: Any) -> None:
+        await asyncio.to_thread(self._insert, self._encode(event))
+
+    def _on_subscribe(self) -> None:
+        if self._watcher is None or not self._watcher.is_alive():
+            loop = asyncio.get_running_loop()
+            self._stop = threading.Event()
+            self._watcher = threading.Thread(target=self._watch, args=(loop, self._stop), daemon=True, name="chat-event-watch")
+            self._watcher.start()
+
+    def _on_idle(self) -> None:
+        self._stop.set()
+        self._watcher = None
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, stop: threading.Event) -> None:
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        while not stop.is_set():
+            try:
+                with self._collection.watch(pipeline, max_await_time_ms=1000) as stream:
+                    # try_next는 max_await_time_ms마다 돌아오므로 중지 신호를 확인할 수 있음
+                    while not stop.is_set() and stream.alive:
+                        change = stream.try_next()
+                        if change is None:
+                            continue
+                        try:
+                            event = self._decode(change["fullDocument"]["event"])
+                        except (KeyError, ValueError, TypeError) as e:
+                            print(f"[EVENT_BUS] 잘못된 이벤트 무시: {e}")
+                            continue
+                        loop.call_soon_threadsafe(self._deliver, event)
+            except Exception as e:
+                if loop.is_closed():
+                    return
+                print(f"[EVENT_BUS] change stream 오류, {RECONNECT_DELAY}초 후 재연결: {e}")
+                stop.wait(RECONNECT_DELAY)
+
+
+def create_event_bus(backend: str = CHAT_EVENT_BUS, encode: Callable[[Any], Dict] = None,
+                     decode: Callable[[Dict], Any] = None) -> EventBus:
+    """설정된 백엔드로 이벤트 버스 생성 (브로커 초기화 실패 시 memory로 대체)"""
+    try:
+        if backend == "redis":
+            return RedisEventBus(encode=encode, decode=decode)
+        if backend == "mongo":
+            return MongoChangeStreamEventBus(encode=encode, decode=decode)
+    except Exception as e:
+        print(f"[EVENT_BUS] {backend} 백엔드 초기화 실패, memory로 대체 (워커 간 전달 안 됨): {e}")
+        return EventBus()
+    if backend != "memory":
+        print(f"[EVENT_BUS] 알 수 없는 백엔드 {backend}, memory 사용")
+    return EventBus()
@@ -23,6 +23,11 @@ except ImportError:
     # 상대 경로로 시도
     from ..llm import get_provider
 
+try:
+    from app.ai.utils.token_counter import current_token_counter
+except ImportError:
+    from ..utils.token_counter import current_token_counter
+
 # ShuttleBus Service import
 try:
     from app.ai.functions.shuttle_bus_service import ShuttleBusService
@@ -444,6 +449,11 @@ async def search_internet(user_input: str, chat_context=None, token_counter=None
                 if hasattr(response.usage, 'output_tokens_details') and response.usage.output_tokens_details:
                     reasoning_tok = getattr(response.usage.output_tokens_details, 'reasoning_tokens', 0)
 
+                # cached_tokens 추출 (프롬프트 캐시 적중분)
+                cached_tok = 0
+                if getattr(response.usage, 'input_tokens_details', None):
+                    cached_tok = getattr(response.usage.input_tokens_details, 'cached_tokens', 0) or 0
+
                 # total_tokens 계산
                 total_tok = getattr(response.usage, "total_tokens", input_tok + output_tok)
 
@@ -451,6 +461,7 @@ async def search_internet(user_input: str, chat_context=None, token_counter=None
                     "input_tokens": input_tok,
                     "output_tokens": output_tok,
                     "reasoning_tokens": reasoning_tok,
+                    "cached_tokens": cached_tok,
                     "total_tokens": total_tok,
                 }
 
@@ -1080,10 +1091,25 @@ def get_department_phone_number(department_query: str) -> str:
     return "일치하는 학과를 찾지 못했습니다. 학과명을 다시 확인해주세요.\n\n" + content
 
 
+# 함수 호출 판단용 고정 날짜 규칙 (요청마다 바뀌는 현재 날짜는 별도 메시지로 전달)
+FUNCTION_CALLING_DATE_RULES = """[필수 규칙]
+모든 날짜를 반드시 YYYY-MM-DD 형식으로 계산하여 출력하세요.
+- 오늘 → 아래 '현재 날짜' 메시지의 날짜
+- 내일 → 오늘+1일 계산
+- 모레 → 오늘+2일 계산
+- 글피/그을피 → 오늘+3일 계산
+- 그글피 → 오늘+4일 계산
+- "N일 후" → 오늘+N일 계산
+- "다음주 월요일" → 해당 날짜 계산
+- 날짜 미언급 → 오늘 날짜 출력
+
+사용자가 오타(야모레, 그을피 등)를 쓰더라도 의도를 파악하여 YYYY-MM-DD로 변환."""
+
+
 class FunctionCalling:
     def __init__(self, model, available_functions=None, token_counter=None):
         self.model = model
-        self.token_counter = token_counter
+        self._token_counter = token_counter
         default_functions = {
             "search_internet": search_internet,
             "get_halla_cafeteria_menu": get_halla_cafeteria_menu,
@@ -1096,6 +1122,11 @@ class FunctionCalling:
             default_functions.update(available_functions)
 
         self.available_functions = default_functions
+
+    @property
+    def token_counter(self):
+        """현재 요청에 바인딩된 토큰 카운터 (없으면 생성 시 전달된 카운터)"""
+        return current_token_counter(self._token_counter)
        
     async def analyze(self, user_message, tools):
         """사용자 메시지를 분석하여 필요한 함수와 판단 근거를 반환
@@ -1165,7 +1196,6 @@ class FunctionCalling:
 
         # 현재 날짜 정보 생성
         current_date = datetime.now()
-        date_info = current_date.strftime("%Y년 %m월 %d일 (%A)")
         weekday_map = {
             "Monday": "월요일", "Tuesday": "화요일", "Wednesday": "수요일",
             "Thursday": "목요일", "Friday": "금요일", "Saturday": "토요일", "Sunday": "일요일"
@@ -1173,23 +1203,16 @@ class FunctionCalling:
         weekday_kr = weekday_map.get(current_date.strftime("%A"), "")
         date_info = current_date.strftime(f"%Y년 %m월 %d일 ({weekday_kr})")
 
+        # 프롬프트 캐시: tools → 고정 규칙(system) 까지가 요청 간 동일한 접두가 되도록
+        # 날짜처럼 매 요청 달라지는 값은 사용자 메시지 직전의 별도 system 메시지로 분리
         structured_input = [
             {
                 "role": "system",
-                "content": f"""현재 날짜: {date_info}
-
-[필수 규칙]
-모든 날짜를 반드시 YYYY-MM-DD 형식으로 계산하여 출력하세요.
-- 오늘 → {current_date.strftime("%Y-%m-%d")}
-- 내일 → 오늘+1일 계산
-- 모레 → 오늘+2일 계산
-- 글피/그을피 → 오늘+3일 계산
-- 그글피 → 오늘+4일 계산
-- "N일 후" → 오늘+N일 계산
-- "다음주 월요일" → 해당 날짜 계산
-- 날짜 미언급 → 오늘 날짜 출력
-
-사용자가 오타(야모레, 그을피 등)를 쓰더라도 의도를 파악하여 YYYY-MM-DD로 변환."""
+                "content": FUNCTION_CALLING_DATE_RULES,
+            },
+            {
+                "role": "system",
+                "content": f"현재 날짜: {date_info}\n오늘 → {current_date.strftime('%Y-%m-%d')}",
             },
             {
                 "role": "user",
@@ -1212,6 +1235,7 @@ class FunctionCalling:
                     "output_tokens": getattr(response.usage, "output_tokens", 0),
                     "total_tokens": getattr(response.usage, "total_tokens", 0),
                     "reasoning_tokens": getattr(response.usage.output_tokens_details, 'reasoning_tokens', 0) if hasattr(response.usage, 'output_tokens_details') else 0,
+                    "cached_tokens": getattr(response.usage.input_tokens_details, 'cached_tokens', 0) if getattr(response.usage, 'input_tokens_details', None) else 0,
                 }
                 self.token_counter.update_from_api_usage(
                     usage=usage_data,
@@ -1282,6 +1306,7 @@ class FunctionCalling:
                 "output_tokens": getattr(response.usage, "output_tokens", 0),
                 "total_tokens": getattr(response.usage, "total_tokens", 0),
                 "reasoning_tokens": getattr(response.usage.output_tokens_details, 'reasoning_tokens', 0) if hasattr(response.usage, 'output_tokens_details') else 0,
+                "cached_tokens": getattr(response.usage.input_tokens_details, 'cached_tokens', 0) if getattr(response.usage, 'input_tokens_details', None) else 0,
             }
             self.token_counter.update_from_api_usage(
                 usage=usage_data,  # ✅ 수정: usage_info → usage
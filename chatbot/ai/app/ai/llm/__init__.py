@@ -7,6 +7,7 @@ OpenAI와 Gemini API를 교체 가능한 구조로 관리합니다.
 from .base import BaseLLMProvider
 from .openai_provider import OpenAIProvider
 from .gemini_provider import GeminiProvider
+from .extractive_provider import ExtractiveProvider
 from .llm_manager import LLMManager, get_llm_manager, get_provider
 from .preset_manager import PresetManager
 from .context_converter import ContextConverter
@@ -15,6 +16,7 @@ __all__ = [
     "BaseLLMProvider",
     "OpenAIProvider",
     "GeminiProvider",
+    "ExtractiveProvider",
     "LLMManager",
     "PresetManager",
     "ContextConverter",
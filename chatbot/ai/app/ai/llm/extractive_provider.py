@@ -0,0 +1,85 @@
+"""
+Extractive (LLM-free) Provider implementation.
+
+condense 역할 전용 로컬 Provider입니다. API 호출 없이 ExtractiveCondenser로
+질문 관련 조/항/호/표 행을 추출합니다. 프리셋에서 다음처럼 선택합니다.
+
+    condense:
+      provider: extractive
+      model: extractive-v1
+"""
+
+import re
+from typing import List, Dict, Any, Optional, Sequence
+
+from .base import BaseLLMProvider
+from app.ai.utils.token_counter import get_shared_encoding
+
+# condense 프롬프트(get_condense_prompt_narrow/broad)에서 질문과 원문 추출
+_CONTEXT_PATTERN = re.compile(r"<기억검색>(.*?)</기억검색>", re.DOTALL)
+_QUESTION_PATTERN = re.compile(r"^(?:사용자 질문|질문):\s*(.+)$", re.MULTILINE)
+
+
+class ExtractiveProvider(BaseLLMProvider):
+    """LLM 없이 추출 요약을 수행하는 condense Provider"""
+
+    def __init__(self, model_name: str = "extractive-v1", token_budget: Optional[int] = None, **kwargs):
+        """
+        Extractive Provider 초기화
+
+        Args:
+            model_name: 표시용 모델 이름 (extractive-v1)
+            token_budget: 추출 결과 토큰 예산 (None이면 RAG_EXTRACTIVE_TOKEN_BUDGET)
+            **kwargs: 추가 설정
+        """
+        super().__init__(model_name, **kwargs)
+        # rag 패키지 import 순환을 피하기 위해 지연 import
+        from app.ai.rag.extractive_condenser import ExtractiveCondenser, EXTRACTIVE_TOKEN_BUDGET, format_condensed
+
+        self._format = format_condensed
+        self.condenser = ExtractiveCondenser(token_budget=token_budget or EXTRACTIVE_TOKEN_BUDGET)
+        self.encoding = get_shared_encoding("gpt-4.1")
+
+    def condense(self, question: str, context: str, documents: Optional[Sequence[dict]] = None) -> str:
+        """질문/원문을 직접 받아 <반영> 블록 반환"""
+        return self._format(self.condenser.condense(question, context, documents))
+
+    async def simple_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: float = 1.0,
+        max_tokens: Optional[int] = None,
+        **kwargs
+    ) -> tuple[str, Dict[str, int]]:
+        """
+        condense 프롬프트를 해석하여 추출 요약
+
+        메시지에서 <기억검색> 원문과 "사용자 질문:" 줄을 찾아 condense()를 호출합니다.
+        API 호출이 없으므로 usage는 빈 dict입니다.
+        """
+        prompt = "\n".join(self._message_text(message) for message in messages)
+        context_match = _CONTEXT_PATTERN.search(prompt)
+        if not context_match:
+            raise ValueError("ExtractiveProvider는 <기억검색> 블록이 있는 condense 프롬프트만 처리합니다")
+        question_match = _QUESTION_PATTERN.search(prompt)
+        question = question_match.group(1).strip() if question_match else ""
+        return self.condense(question, context_match.group(1)), {}
+
+    async def structured_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        schema: Dict[str, Any],
+        temperature: float = 1.0,
+        **kwargs
+    ) -> tuple[str, Dict[str, int]]:
+        raise NotImplementedError("ExtractiveProvider는 condense 역할 전용입니다 (구조화 출력 미지원)")
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode(text))
+
+    @staticmethod
+    def _message_text(message: Dict[str, Any]) -> str:
+        content = message.get("content", "")
+        if isinstance(content, str):
+            return content
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
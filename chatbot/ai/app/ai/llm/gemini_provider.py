@@ -131,6 +131,7 @@ class GeminiProvider(BaseLLMProvider):
                         "input_tokens": getattr(metadata, "prompt_token_count", 0),
                         "output_tokens": getattr(metadata, "candidates_token_count", 0),
                         "reasoning_tokens": 0,  # Gemini는 reasoning tokens 없음
+                        "cached_tokens": getattr(metadata, "cached_content_token_count", 0) or 0,
                         "total_tokens": getattr(metadata, "total_token_count", 0),
                     }
 
@@ -245,6 +246,7 @@ class GeminiProvider(BaseLLMProvider):
                         "input_tokens": getattr(metadata, "prompt_token_count", 0),
                         "output_tokens": getattr(metadata, "candidates_token_count", 0),
                         "reasoning_tokens": 0,  # Gemini는 reasoning tokens 없음
+                        "cached_tokens": getattr(metadata, "cached_content_token_count", 0) or 0,
                         "total_tokens": getattr(metadata, "total_token_count", 0),
                     }
 
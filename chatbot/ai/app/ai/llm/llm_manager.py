@@ -10,7 +10,8 @@ from pathlib import Path
 from .base import BaseLLMProvider
 from .openai_provider import OpenAIProvider
 from .gemini_provider import GeminiProvider
-from .preset_manager import PresetManager
+from .extractive_provider import ExtractiveProvider
+from .preset_manager import PresetManager, validate_role_config
 
 
 class LLMManager:
@@ -26,11 +27,16 @@ class LLMManager:
         # Preset Manager 초기화
         self.preset_manager = PresetManager(config_path)
         
-        # Provider 인스턴스 캐시
+        # Provider 인스턴스 캐시 (provider:model 키, 프리셋 간 공유)
         self._provider_cache: Dict[str, BaseLLMProvider] = {}
-        
-        # Fixed roles (OpenAI 전용, 교체 불가)
-        self._fixed_roles = self._load_fixed_roles()
+
+        # 프리셋이 바뀌면(이 워커의 전환 또는 다른 워커의 변경 감지) 새 조합의 Provider를 미리 생성
+        self.preset_manager.add_listener(lambda _snapshot: self.warm_providers())
+    
+    @property
+    def _fixed_roles(self) -> Dict[str, Dict[str, str]]:
+        """Fixed roles (OpenAI 전용, 교체 불가) - 현재 설정 스냅샷 기준"""
+        return self._load_fixed_roles()
     
     def _load_fixed_roles(self) -> Dict[str, Dict[str, str]]:
         """
@@ -57,7 +63,7 @@ class LLMManager:
             BaseLLMProvider: 해당 역할에 지정된 Provider 인스턴스
         
         Raises:
-            ValueError: 역할 설정을 찾을 수 없을 때
+            ValueError: 역할 설정을 찾을 수 없거나, 역할이 지원하지 않는 Provider가 지정되었을 때
             NotImplementedError: 지원하지 않는 Provider일 때
         """
         # Fixed roles 확인 (교체 불가)
@@ -74,6 +80,8 @@ class LLMManager:
         
         if not provider_name or not model_name:
             raise ValueError(f"Invalid config for role '{role}': {role_config}")
+        # condense 전용 Provider(extractive)를 다른 역할에 쓰지 않도록 확인
+        validate_role_config(role, role_config)
         
         # 캐시 키 생성 (provider:model)
         cache_key = f"{provider_name}:{model_name}"
@@ -85,10 +93,22 @@ class LLMManager:
         # Provider 인스턴스 생성
         provider = self._create_provider(provider_name, model_name)
         
-        # 캐시에 저장
-        self._provider_cache[cache_key] = provider
+        # 캐시에 저장 (다른 스레드가 먼저 생성했다면 그 인스턴스 사용)
+        return self._provider_cache.setdefault(cache_key, provider)
+
+    def warm_providers(self) -> None:
+        """
+        활성 프리셋과 고정 역할의 Provider를 미리 생성
         
-        return provider
+        provider:model이 같은 Provider는 캐시에서 재사용되므로,
+        프리셋 전환 시 새로 필요한 조합만 생성됩니다.
+        """
+        roles = list(self._fixed_roles) + list(self.preset_manager.get_all_roles())
+        for role in roles:
+            try:
+                self.get_provider(role)
+            except Exception as e:
+                print(f"[LLMManager] Failed to warm provider for role '{role}': {e}")
     
     def _create_provider(
         self,
@@ -99,7 +119,7 @@ class LLMManager:
         Provider 인스턴스 생성
         
         Args:
-            provider_name: Provider 이름 ("openai", "gemini")
+            provider_name: Provider 이름 ("openai", "gemini", "extractive")
             model_name: 모델 ID
         
         Returns:
@@ -112,17 +132,21 @@ class LLMManager:
             return OpenAIProvider(model_name=model_name)
         elif provider_name == "gemini":
             return GeminiProvider(model_name=model_name)
+        elif provider_name == "extractive":
+            # LLM 없는 로컬 추출 요약 (condense 역할 전용)
+            return ExtractiveProvider(model_name=model_name)
         else:
             raise NotImplementedError(
                 f"Provider '{provider_name}' is not implemented. "
-                f"Supported providers: openai, gemini"
+                f"Supported providers: openai, gemini, extractive"
             )
     
     def clear_cache(self) -> None:
         """
         Provider 캐시 초기화
         
-        프리셋 전환 후 호출하여 새로운 Provider 인스턴스를 생성하도록 합니다.
+        프리셋 전환 시에는 호출할 필요가 없습니다 (provider:model 단위로 재사용).
+        API 키 교체 등으로 클라이언트를 새로 만들어야 할 때만 사용합니다.
         """
         self._provider_cache.clear()
         print("[LLMManager] Provider cache cleared")
@@ -142,7 +166,11 @@ class LLMManager:
     
     def switch_preset(self, preset_name: str) -> bool:
         """
-        프리셋 전환 및 캐시 초기화
+        프리셋 전환
+        
+        설정 스냅샷을 copy-on-write로 교체하고(파일 저장은 백그라운드),
+        기존 Provider 캐시는 유지하여 바뀐 역할의 Provider만 새로 준비합니다.
+        다른 워커는 설정 파일 변경을 감지하여 반영합니다.
         
         Args:
             preset_name: 전환할 프리셋 이름
@@ -150,10 +178,7 @@ class LLMManager:
         Returns:
             bool: 성공 여부
         """
-        success = self.preset_manager.switch_preset(preset_name)
-        if success:
-            self.clear_cache()
-        return success
+        return self.preset_manager.switch_preset(preset_name)
     
     def get_provider_info(self, role: str) -> Dict[str, str]:
         """
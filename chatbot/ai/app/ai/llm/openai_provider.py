@@ -5,11 +5,11 @@ OpenAI Responses API를 사용하는 Provider 구현체입니다.
 """
 
 import os
-import tiktoken
 from typing import List, Dict, Any, Optional
 from openai import OpenAI
 
 from .base import BaseLLMProvider
+from app.ai.utils.token_counter import get_shared_encoding
 
 
 class OpenAIProvider(BaseLLMProvider):
@@ -37,12 +37,8 @@ class OpenAIProvider(BaseLLMProvider):
             max_retries=kwargs.get("max_retries", 1)
         )
         
-        # Tiktoken 인코더 초기화
-        try:
-            self.encoding = tiktoken.encoding_for_model(model_name)
-        except KeyError:
-            # 모델명이 tiktoken에 없으면 cl100k_base 사용
-            self.encoding = tiktoken.get_encoding("cl100k_base")
+        # Tiktoken 인코더 (프로세스 전역 레지스트리 공유, 미등록 모델은 cl100k_base)
+        self.encoding = get_shared_encoding(model_name)
     
     async def simple_completion(
         self,
@@ -66,6 +62,7 @@ class OpenAIProvider(BaseLLMProvider):
                       "input_tokens": int,
                       "output_tokens": int,
                       "reasoning_tokens": int,
+                      "cached_tokens": int,  # 프롬프트 캐시 적중 입력 토큰
                       "total_tokens": int
                   }
         """
@@ -93,10 +90,16 @@ class OpenAIProvider(BaseLLMProvider):
                         details = response.usage.output_tokens_details
                         reasoning_tokens = getattr(details, "reasoning_tokens", 0)
 
+                    # input_tokens_details에서 프롬프트 캐시 적중 토큰 추출
+                    cached_tokens = 0
+                    if getattr(response.usage, "input_tokens_details", None):
+                        cached_tokens = getattr(response.usage.input_tokens_details, "cached_tokens", 0) or 0
+
                     usage = {
                         "input_tokens": getattr(response.usage, "input_tokens", 0),
                         "output_tokens": getattr(response.usage, "output_tokens", 0),
                         "reasoning_tokens": reasoning_tokens,
+                        "cached_tokens": cached_tokens,
                         "total_tokens": getattr(response.usage, "total_tokens", 0),
                     }
 
@@ -176,10 +179,16 @@ class OpenAIProvider(BaseLLMProvider):
                         details = response.usage.output_tokens_details
                         reasoning_tokens = getattr(details, "reasoning_tokens", 0)
 
+                    # input_tokens_details에서 프롬프트 캐시 적중 토큰 추출
+                    cached_tokens = 0
+                    if getattr(response.usage, "input_tokens_details", None):
+                        cached_tokens = getattr(response.usage.input_tokens_details, "cached_tokens", 0) or 0
+
                     usage = {
                         "input_tokens": getattr(response.usage, "input_tokens", 0),
                         "output_tokens": getattr(response.usage, "output_tokens", 0),
                         "reasoning_tokens": reasoning_tokens,
+                        "cached_tokens": cached_tokens,
                         "total_tokens": getattr(response.usage, "total_tokens", 0),
                     }
 
@@ -4,11 +4,68 @@ LLM Preset Manager for saving and switching model combinations.
 프리셋 기반으로 LLM 조합을 저장하고 전환할 수 있습니다.
 """
 
+import copy
+import os
+import tempfile
+import threading
+import time
 import yaml
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 
+try:
+    import fcntl  # POSIX 파일 락 (워커 간 쓰기 직렬화)
+except ImportError:  # pragma: no cover - Windows 개발 환경
+    fcntl = None
+
+
+# 다른 워커가 변경한 설정 파일을 감지하는 주기 (초)
+PRESET_WATCH_INTERVAL = float(os.getenv("PRESET_WATCH_INTERVAL", "0.5"))
+
+# 특정 역할에만 지정할 수 있는 Provider (extractive는 구조화 출력을 지원하지 않는 condense 전용)
+PROVIDER_ALLOWED_ROLES: Dict[str, tuple] = {
+    "extractive": ("condense",),
+}
+
+
+def validate_role_config(role: str, role_config: Dict[str, Any]) -> None:
+    """
+    역할에 지정된 Provider가 해당 역할을 지원하는지 확인
+
+    Raises:
+        ValueError: 역할 전용 Provider를 다른 역할에 지정했을 때
+    """
+    provider_name = (role_config or {}).get("provider")
+    allowed_roles = PROVIDER_ALLOWED_ROLES.get(provider_name)
+    if allowed_roles is not None and role not in allowed_roles:
+        raise ValueError(
+            f"Provider '{provider_name}' cannot be used for role '{role}'. "
+            f"Allowed roles: {', '.join(allowed_roles)}"
+        )
+
+
+def validate_config(config: Dict[str, Any]) -> None:
+    """
+    모든 프리셋/고정 역할의 Provider 지정 검증
+
+    Raises:
+        ValueError: 잘못 지정된 역할이 있을 때 (프리셋 이름 포함)
+    """
+    sections = [("fixed_roles", config.get("fixed_roles") or {})]
+    sections += [
+        (f"preset '{name}'", (preset or {}).get("roles") or {})
+        for name, preset in (config.get("presets") or {}).items()
+    ]
+    for section, roles in sections:
+        for role, role_config in roles.items():
+            try:
+                validate_role_config(role, role_config)
+            except ValueError as e:
+                raise ValueError(f"Invalid llm_config.yaml {section}: {e}") from None
+
 
 @dataclass
 class PresetInfo:
@@ -18,37 +75,91 @@ class PresetInfo:
     roles: Dict[str, Dict[str, str]]  # {role: {provider: str, model: str}}
 
 
+@dataclass(frozen=True)
+class PresetSnapshot:
+    """설정 스냅샷 (불변, copy-on-write로 통째로 교체)"""
+    config: Dict[str, Any]
+    version: int
+    mtime_ns: int
+
+    @property
+    def active_preset(self) -> str:
+        return self.config.get("active_preset", "balanced")
+
+
 class PresetManager:
-    """LLM 조합 프리셋 관리자"""
+    """LLM 조합 프리셋 관리자
+
+    llm_config.yaml을 버전이 있는 공유 저장소로 사용합니다.
+    - 읽기: 불변 스냅샷 참조만 사용 (락 없음)
+    - 변경: 새 스냅샷을 만들어 참조를 원자적으로 교체하고(copy-on-write),
+      파일 저장은 백그라운드 스레드에서 임시 파일 + os.replace로 원자적으로 수행
+    - 감시: 다른 gunicorn 워커가 저장한 변경은 파일 mtime으로 감지하여
+      PRESET_WATCH_INTERVAL 이내에 반영
+    """
     
-    def __init__(self, config_path: str = "config/llm_config.yaml"):
+    def __init__(self, config_path: str = "config/llm_config.yaml", watch_interval: float = PRESET_WATCH_INTERVAL):
         """
         PresetManager 초기화
         
         Args:
             config_path: llm_config.yaml 파일 경로 (프로젝트 루트 기준)
+            watch_interval: 설정 파일 변경 감지 주기 (초)
         """
         # 절대 경로 처리
         self.config_path = Path(config_path)
         if not self.config_path.is_absolute():
             base_dir = Path(__file__).resolve().parent.parent.parent  # app/
             self.config_path = base_dir / config_path
+        self._lock_path = self.config_path.with_name(self.config_path.name + ".lock")
         
         # 설정 로드
-        self.config = self._load_config()
-        
-        # 현재 활성 프리셋
-        self.active_preset_name = self.config.get("active_preset", "balanced")
+        config, mtime_ns = self._load_config()
+        self._snapshot = PresetSnapshot(config=config, version=config.get("preset_version", 0), mtime_ns=mtime_ns)
+
+        # 변경 감지 / 백그라운드 저장 상태
+        self._watch_interval = watch_interval
+        self._next_check = time.monotonic() + watch_interval
+        self._pending_writes = 0
+        self._state_lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preset-writer")
+        self._listeners: List[Callable[[PresetSnapshot], None]] = []
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """현재 설정 (읽기 전용으로 사용)"""
+        return self.snapshot.config
+
+    @property
+    def active_preset_name(self) -> str:
+        """현재 활성 프리셋 이름"""
+        return self.snapshot.active_preset
+
+    @property
+    def version(self) -> int:
+        """현재 설정 버전 (변경 시마다 1씩 증가)"""
+        return self.snapshot.version
+
+    @property
+    def snapshot(self) -> PresetSnapshot:
+        """현재 설정 스냅샷 (다른 워커의 변경 여부를 주기적으로 확인)"""
+        self._maybe_reload()
+        return self._snapshot
+
+    def add_listener(self, listener: Callable[[PresetSnapshot], None]) -> None:
+        """설정 스냅샷이 교체될 때 호출될 콜백 등록"""
+        self._listeners.append(listener)
     
-    def _load_config(self) -> Dict[str, Any]:
+    def _load_config(self) -> tuple:
         """
         llm_config.yaml 파일 로드
         
         Returns:
-            Dict: 설정 딕셔너리
+            tuple: (설정 딕셔너리, 파일 mtime_ns)
         
         Raises:
             FileNotFoundError: 설정 파일이 없을 때
+            ValueError: 역할 전용 Provider가 다른 역할에 지정되어 있을 때
         """
         if not self.config_path.exists():
             raise FileNotFoundError(
@@ -57,12 +168,132 @@ class PresetManager:
             )
         
         with open(self.config_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+            mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            config = yaml.safe_load(f) or {}
+        validate_config(config)
+        return config, mtime_ns
+
+    def _maybe_reload(self) -> None:
+        """다른 워커가 저장한 변경이 있으면 스냅샷 교체 (mtime 기반, 주기 제한)"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self._watch_interval
+
+        # 이 워커의 저장이 진행 중이면 디스크가 아직 이전 상태이므로 건너뜀
+        if self._pending_writes:
+            return
+
+        try:
+            mtime_ns = self.config_path.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime_ns == self._snapshot.mtime_ns:
+            return
+
+        try:
+            config, mtime_ns = self._load_config()
+        except Exception as e:
+            print(f"[PresetManager] Failed to reload config: {e}")
+            return
+
+        with self._state_lock:
+            if self._pending_writes:
+                return
+            self._replace_snapshot(config, mtime_ns)
+        self._notify()
+        print(f"[PresetManager] Reloaded config v{self._snapshot.version} "
+              f"(active preset: {self._snapshot.active_preset})")
+
+    def _replace_snapshot(self, config: Dict[str, Any], mtime_ns: int) -> None:
+        """스냅샷 참조 원자적 교체"""
+        self._snapshot = PresetSnapshot(config=config, version=config.get("preset_version", 0), mtime_ns=mtime_ns)
+
+    def _notify(self) -> None:
+        """리스너 통지 (_state_lock 밖에서 호출)"""
+        for listener in self._listeners:
+            try:
+                listener(self._snapshot)
+            except Exception as e:
+                print(f"[PresetManager] Listener error: {e}")
+
+    def _commit(self, mutate: Callable[[Dict[str, Any]], None]) -> None:
+        """설정 변경 (copy-on-write 후 백그라운드 저장)
+
+        메모리 스냅샷은 즉시 교체되어 이 워커에서 바로 적용되고,
+        파일 저장은 요청 경로 밖(preset-writer 스레드)에서 수행됩니다.
+
+        Args:
+            mutate: 설정 딕셔너리를 변경하는 함수 (디스크 최신본에도 다시 적용됨)
+        """
+        with self._state_lock:
+            current = self._snapshot
+            config = copy.deepcopy(current.config)
+            mutate(config)
+            config["preset_version"] = current.version + 1
+            self._pending_writes += 1
+            self._replace_snapshot(config, current.mtime_ns)
+
+        self._notify()
+        self._writer.submit(self._persist, mutate)
+
+    def _persist(self, mutate: Callable[[Dict[str, Any]], None]) -> None:
+        """변경 사항을 디스크 최신본에 적용하여 원자적으로 저장 (preset-writer 스레드)"""
+        try:
+            with self._file_lock():
+                # 다른 워커의 변경을 잃지 않도록 디스크 최신본에 다시 적용
+                config, _ = self._load_config()
+                mutate(config)
+                config["preset_version"] = max(config.get("preset_version", 0) + 1, self._snapshot.version)
+                mtime_ns = self._save_config(config)
+
+            with self._state_lock:
+                self._pending_writes -= 1
+                synced = not self._pending_writes
+                if synced:
+                    # 저장된 최신본(다른 워커 변경 포함)으로 스냅샷 동기화
+                    self._replace_snapshot(config, mtime_ns)
+            if synced:
+                self._notify()
+        except Exception as e:
+            with self._state_lock:
+                self._pending_writes -= 1
+            print(f"[PresetManager] Failed to save config: {e}")
+
+    @contextmanager
+    def _file_lock(self):
+        """워커 간 설정 파일 쓰기 직렬화용 락 (fcntl 미지원 환경에서는 no-op)"""
+        with open(self._lock_path, 'a') as fh:
+            if fcntl:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
     
-    def _save_config(self) -> None:
-        """llm_config.yaml 파일 저장"""
-        with open(self.config_path, 'w', encoding='utf-8') as f:
-            yaml.dump(self.config, f, allow_unicode=True, sort_keys=False)
+    def _save_config(self, config: Dict[str, Any]) -> int:
+        """llm_config.yaml 파일 원자적 저장 (임시 파일 작성 후 os.replace)
+
+        Returns:
+            int: 저장된 파일의 mtime_ns
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.config_path.parent, prefix=".llm_config.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                yaml.dump(config, f, allow_unicode=True, sort_keys=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.config_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return self.config_path.stat().st_mtime_ns
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """대기 중인 백그라운드 저장이 끝날 때까지 대기 (테스트/종료 시 사용)"""
+        self._writer.submit(lambda: None).result(timeout=timeout)
     
     def get_active_preset(self) -> str:
         """
@@ -88,18 +319,13 @@ class PresetManager:
             print(f"[PresetManager] Preset '{preset_name}' not found")
             return False
         
-        # 활성 프리셋 변경
-        self.active_preset_name = preset_name
-        self.config["active_preset"] = preset_name
-        
-        # 설정 파일에 저장
-        try:
-            self._save_config()
-            print(f"[PresetManager] Switched to preset: {preset_name}")
-            return True
-        except Exception as e:
-            print(f"[PresetManager] Failed to save config: {e}")
-            return False
+        # 활성 프리셋 변경 (즉시 적용, 파일 저장은 백그라운드)
+        def _apply(config: Dict[str, Any]) -> None:
+            config["active_preset"] = preset_name
+
+        self._commit(_apply)
+        print(f"[PresetManager] Switched to preset: {preset_name}")
+        return True
     
     def get_preset_info(self, preset_name: str) -> Optional[PresetInfo]:
         """
@@ -161,19 +387,24 @@ class PresetManager:
             bool: 성공 여부
         """
         try:
-            # presets 섹션이 없으면 생성
-            if "presets" not in self.config:
-                self.config["presets"] = {}
-            
-            # 새 프리셋 추가
-            self.config["presets"][preset_name] = {
-                "name": description,
-                "description": description,
-                "roles": roles
-            }
-            
-            # 설정 파일에 저장
-            self._save_config()
+            for role, role_config in roles.items():
+                validate_role_config(role, role_config)
+        except ValueError as e:
+            print(f"[PresetManager] Failed to save preset: {e}")
+            return False
+
+        preset_data = {
+            "name": description,
+            "description": description,
+            "roles": copy.deepcopy(roles)
+        }
+
+        def _apply(config: Dict[str, Any]) -> None:
+            # presets 섹션이 없으면 생성 후 새 프리셋 추가
+            config.setdefault("presets", {})[preset_name] = copy.deepcopy(preset_data)
+
+        try:
+            self._commit(_apply)
             print(f"[PresetManager] Saved preset: {preset_name}")
             return True
             
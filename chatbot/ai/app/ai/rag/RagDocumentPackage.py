@@ -66,37 +66,7 @@ class ContextBuilder:
 
         retrieved_chunks = await self._repository.fetch_chunks(chunk_ids)
         if retrieved_chunks:
-            extracted_texts = [chunk.get("text", "") for chunk in retrieved_chunks]
-            merged_text = self._joiner.join(filter(None, extracted_texts))
-            
-            # 출처 문서 메타데이터 추출
-            source_docs = []
-            for chunk in retrieved_chunks:
-                # MongoDB 문서 구조: 최상위 레벨에 law_article_id, source_file, title이 있음
-                # metadata 필드가 있다면 그것도 체크
-                metadata = chunk.get("metadata", {})
-                
-                source_doc = {
-                    "law_article_id": chunk.get("law_article_id") or metadata.get("law_article_id", ""),
-                    "source_file": chunk.get("source_file") or metadata.get("source_file", ""),
-                    "title": chunk.get("title") or metadata.get("title", ""),
-                }
-                
-                # 디버그: 추출된 메타데이터 확인
-                self._debug(f"  문서 메타데이터: {source_doc}")
-                source_docs.append(source_doc)
-            
-            # 디버그: Mongo 본문으로 컨텍스트를 구성했을 때, 길이/문서개수 로그
-            self._debug(
-                f"context_builder.build: 컨텍스트 결합 글자수={len(merged_text)} 문서 수={len(retrieved_chunks)}"
-            )
-            final_merged_text = merged_text.strip()
-            return RagDocumentPackage(
-                merged_documents_text=final_merged_text or None,
-                source="mongo",
-                document_count=len(retrieved_chunks),
-                source_documents=source_docs,
-            )
+            return self.package_documents(retrieved_chunks)
 
         # MongoDB에서 문서를 찾지 못했을 때는 Pinecone 매치의 metadata.text_preview를 모아 임시 컨텍스트로 사용합니다.
         previews: list[str] = []
@@ -121,3 +91,37 @@ class ContextBuilder:
         # Mongo 문서도, 미리보기 텍스트도 없을 때
         self._debug("context_builder.build: 문서/미리보기 없음 -> 컨텍스트 없음(None)")
         return RagDocumentPackage(merged_documents_text=None, source="none")
+
+    def package_documents(self, retrieved_chunks: Sequence[dict]) -> RagDocumentPackage:
+        """MongoDB 청크 문서 목록 → 컨텍스트 패키지 (source="mongo")"""
+        extracted_texts = [chunk.get("text", "") for chunk in retrieved_chunks]
+        merged_text = self._joiner.join(filter(None, extracted_texts))
+
+        # 출처 문서 메타데이터 추출
+        source_docs = []
+        for chunk in retrieved_chunks:
+            # MongoDB 문서 구조: 최상위 레벨에 law_article_id, source_file, title이 있음
+            # metadata 필드가 있다면 그것도 체크
+            metadata = chunk.get("metadata", {})
+
+            source_doc = {
+                "law_article_id": chunk.get("law_article_id") or metadata.get("law_article_id", ""),
+                "source_file": chunk.get("source_file") or metadata.get("source_file", ""),
+                "title": chunk.get("title") or metadata.get("title", ""),
+            }
+
+            # 디버그: 추출된 메타데이터 확인
+            self._debug(f"  문서 메타데이터: {source_doc}")
+            source_docs.append(source_doc)
+
+        # 디버그: Mongo 본문으로 컨텍스트를 구성했을 때, 길이/문서개수 로그
+        self._debug(
+            f"context_builder.build: 컨텍스트 결합 글자수={len(merged_text)} 문서 수={len(retrieved_chunks)}"
+        )
+        final_merged_text = merged_text.strip()
+        return RagDocumentPackage(
+            merged_documents_text=final_merged_text or None,
+            source="mongo",
+            document_count=len(retrieved_chunks),
+            source_documents=source_docs,
+        )
@@ -4,6 +4,9 @@ from .RagDocumentPackage import RagDocumentPackage, ContextBuilder
 from .gate import GateDecision, RegulationGate
 from .repository import MongoChunkRepository
 from .mongo_vector_retriever import MongoVectorRetriever, RetrieverResult
+from .local_vector_index import LocalVectorIndex, LocalVectorRetriever
+from .hybrid_retriever import BM25Index, HybridRetriever
+from .article_lookup import ArticleLookup, ArticleLookupIndex, parse_references
 from .service import RagResult, RagService
 
 __all__ = [
@@ -14,6 +17,13 @@ __all__ = [
 	"MongoChunkRepository",
 	"MongoVectorRetriever",
 	"RetrieverResult",
+	"LocalVectorIndex",
+	"LocalVectorRetriever",
+	"BM25Index",
+	"HybridRetriever",
+	"ArticleLookup",
+	"ArticleLookupIndex",
+	"parse_references",
 	"RagResult",
 	"RagService",
 ]
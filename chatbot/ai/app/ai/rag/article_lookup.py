@@ -0,0 +1,164 @@
+"""Direct lookup of explicitly referenced regulation articles / appendix tables.
+
+"학칙 제34조", "별표 2"처럼 질문이 조문/별표를 직접 지목하면 정답 청크가 이미 정해져 있으므로
+gate → 임베딩 → `$vectorSearch` 과정을 건너뛰고 식별자 색인에서 바로 청크를 찾습니다.
+
+식별자 정규형은 document_loader와 같습니다.
+    - law_article_id: '제34조', '제3조의2'
+    - table_id: '별표2'
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+from .hybrid_retriever import ARTICLE_ID_PATTERN, TABLE_ID_PATTERN, BM25Index, get_bm25_index
+
+# 여러 규정 파일에 같은 조문번호가 있을 때, 이 수를 넘으면 직접 조회하지 않고 일반 검색으로 넘김
+MAX_AMBIGUOUS_SOURCES = 1
+
+# 파일명에서 규정 이름만 남기기 위한 접두 번호/괄호 제거 패턴: "01_학칙(2024).pdf" → "학칙"
+_SOURCE_NAME_NOISE = re.compile(r"^[\d\s._-]+|\(.*?\)|\[.*?\]")
+
+
+@dataclass(frozen=True, slots=True)
+class ArticleReference:
+    kind: str   # "article" | "table"
+    id: str     # '제34조' | '별표2'
+
+
+def parse_references(question: str) -> List[ArticleReference]:
+    """질문에서 조문/별표 참조 추출 (등장 순서, 중복 제거)"""
+    found: Dict[tuple, ArticleReference] = {}
+    spans = []
+    for m in ARTICLE_ID_PATTERN.finditer(question):
+        article_id = f"제{m.group(1)}조" + (f"의{m.group(2)}" if m.group(2) else "")
+        spans.append((m.start(), ArticleReference("article", article_id)))
+    for m in TABLE_ID_PATTERN.finditer(question):
+        spans.append((m.start(), ArticleReference("table", f"별표{m.group(1)}")))
+    for _, ref in sorted(spans, key=lambda item: item[0]):
+        found.setdefault((ref.kind, ref.id), ref)
+    return list(found.values())
+
+
+def _source_name(source_file: str) -> str:
+    return _SOURCE_NAME_NOISE.sub("", Path(source_file).stem).strip()
+
+
+class ArticleLookupIndex:
+    """(종류, 식별자) → 청크 목록 메모리 색인
+
+    분할된 원본(chunked)은 제외하고 분할 청크를 chunk_index 순서로 보관합니다.
+    """
+
+    def __init__(self, entries: Dict[tuple, List[dict]]) -> None:
+        self._entries = entries
+        self.source_names = {
+            _source_name(doc["metadata"].get("source_file", "")) for docs in entries.values() for doc in docs
+        } - {""}
+
+    def __len__(self) -> int:
+        return sum(len(docs) for docs in self._entries.values())
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[dict]) -> "ArticleLookupIndex":
+        entries: Dict[tuple, List[dict]] = {}
+        for doc in docs:
+            metadata = doc.get("metadata", {}) or {}
+            if metadata.get("table_id"):
+                key = ("table", str(metadata["table_id"]).replace(" ", ""))
+            elif metadata.get("law_article_id"):
+                key = ("article", str(metadata["law_article_id"]).replace(" ", ""))
+            else:
+                continue
+            entries.setdefault(key, []).append({
+                "_id": str(doc["_id"]),
+                "text": doc.get("text", ""),
+                "metadata": metadata,
+            })
+        for docs in entries.values():
+            docs.sort(key=lambda d: (d["metadata"].get("source_file", ""), d["metadata"].get("chunk_index", 0)))
+        return cls(entries)
+
+    def resolve(self, question: str, references: List[ArticleReference] | None = None) -> List[dict]:
+        """질문의 참조를 청크 목록으로 변환
+
+        질문에 규정 이름(파일명)이 있으면 해당 파일로 좁힙니다.
+        참조 하나라도 찾지 못하거나, 여러 규정 파일에 걸쳐 모호하면 []를 반환해 일반 검색으로 넘깁니다.
+        """
+        references = references if references is not None else parse_references(question)
+        if not references:
+            return []
+
+        compact = question.replace(" ", "")
+        hinted = {name for name in self.source_names if name.replace(" ", "") in compact}
+        # "학칙시행세칙"이 있으면 그 안에 포함된 "학칙"은 힌트에서 제외
+        hinted = {name for name in hinted if not any(name != other and name in other for other in hinted)}
+
+        resolved: List[dict] = []
+        for ref in references:
+            docs = self._entries.get((ref.kind, ref.id), [])
+            if hinted:
+                docs = [d for d in docs if _source_name(d["metadata"].get("source_file", "")) in hinted]
+            sources = {d["metadata"].get("source_file") for d in docs}
+            if not docs or len(sources) > MAX_AMBIGUOUS_SOURCES:
+                return []
+            resolved.extend(docs)
+        return resolved
+
+
+_index_lock = threading.Lock()
+_cached_index: ArticleLookupIndex | None = None
+_cached_source: BM25Index | None = None
+
+
+def get_article_index(mongo_collection=None, *, refresh: bool = False) -> ArticleLookupIndex:
+    """프로세스 공용 식별자 색인
+
+    컬렉션을 따로 스캔하지 않고 BM25 색인이 들고 있는 청크 문서로 만들며,
+    BM25 색인이 교체되면 다음 호출에서 다시 만듭니다 (본문 문자열은 BM25 색인과 공유).
+    """
+    global _cached_index, _cached_source
+    bm25_index = get_bm25_index(mongo_collection, refresh=refresh)
+    with _index_lock:
+        if _cached_index is None or _cached_source is not bm25_index:
+            _cached_index = ArticleLookupIndex.from_documents(bm25_index.documents)
+            _cached_source = bm25_index
+        return _cached_index
+
+
+class ArticleLookup:
+    """RagService용 직접 조회기"""
+
+    def __init__(
+        self,
+        index: ArticleLookupIndex | None = None,
+        *,
+        mongo_collection=None,
+        debug_fn: Callable[[str], None] | None = None,
+    ) -> None:
+        self._index = index
+        self._collection = mongo_collection
+        self._debug = debug_fn or (lambda _: None)
+
+    def lookup(self, question: str) -> List[dict]:
+        """명시적 참조가 있으면 해당 청크 목록, 없거나 모호하면 []"""
+        references = parse_references(question)
+        if not references:
+            return []
+        start_ts = time.time()
+        try:
+            index = self._index or get_article_index(self._collection)
+        except Exception as exc:
+            self._debug(f"article_lookup: index unavailable: {exc}")
+            return []
+        docs = index.resolve(question, references)
+        self._debug(
+            f"article_lookup: refs={[r.id for r in references]} resolved={len(docs)} "
+            f"duration={time.time() - start_ts:.4f}s"
+        )
+        return docs
@@ -0,0 +1,133 @@
+"""Token-aware policy deciding how to condense retrieved RAG context.
+
+요청마다 검색 컨텍스트의 토큰 수, 청크 수, 점수 분포를 보고 다음 중 하나를 고릅니다.
+    - raw: 원문 그대로 전달 (이미 충분히 짧음)
+    - extractive: 로컬 문장/줄 추출 (LLM 호출 없음)
+    - llm: 기존 LLM condense
+
+LLM condense 지연 시간은 지수 이동 평균으로 추적하여, 생략한 요청의 절약 시간을 추정합니다.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from app.ai.utils.token_counter import get_shared_encoding
+
+CONDENSE_MODES = ("raw", "extractive", "llm")
+
+# 이 토큰 수 이하면 원문 그대로
+RAW_MAX_TOKENS = int(os.getenv("RAG_CONDENSE_RAW_MAX_TOKENS", os.getenv("RAG_CONDENSE_MIN_TOKENS", "1500")))
+# 이 토큰 수 이하이고 근거가 한 곳에 모여 있으면 로컬 추출
+EXTRACTIVE_MAX_TOKENS = int(os.getenv("RAG_CONDENSE_EXTRACTIVE_MAX_TOKENS", "5000"))
+# 1위 점수가 2위보다 이 비율 이상 높으면 근거가 한 곳에 모여 있다고 봄
+DOMINANCE_GAP = 0.1
+# 근거가 모여 있다고 보는 최대 청크 수
+FOCUSED_CHUNK_COUNT = 2
+
+# LLM condense 지연 시간 초기 추정치(ms)와 EWMA 계수
+_LLM_LATENCY_PRIOR_MS = 3000.0
+_EWMA_ALPHA = 0.2
+
+
+@dataclass(slots=True)
+class CondenseDecision:
+    mode: str                  # raw | extractive | llm
+    reason: str
+    context_tokens: int
+    chunk_count: int
+    score_gap: float           # 벡터 유사도 (1위 - 2위) / 1위, 청크 1개면 1.0
+
+
+def _vector_score(item: Any) -> float:
+    # HybridRetriever는 score가 RRF 점수(≈1/61)이고 벡터 유사도는 vector_score에 있음
+    if isinstance(item, dict):
+        value = item["vector_score"] if "vector_score" in item else item.get("score")
+    else:
+        value = getattr(item, "vector_score", getattr(item, "score", None))
+    return float(value or 0)
+
+
+def _score_gap(items: Sequence[Any]) -> float:
+    scores = sorted((_vector_score(item) for item in items), reverse=True)
+    if not scores or scores[0] <= 0:
+        return 0.0
+    if len(scores) == 1:
+        return 1.0
+    return (scores[0] - scores[1]) / scores[0]
+
+
+class CondensePolicy:
+    """condense 모드 결정 + LLM condense 지연 시간 추적"""
+
+    def __init__(
+        self,
+        *,
+        raw_max_tokens: int = RAW_MAX_TOKENS,
+        extractive_max_tokens: int = EXTRACTIVE_MAX_TOKENS,
+        dominance_gap: float = DOMINANCE_GAP,
+        model: str = "gpt-4.1",
+    ) -> None:
+        self.raw_max_tokens = raw_max_tokens
+        self.extractive_max_tokens = extractive_max_tokens
+        self.dominance_gap = dominance_gap
+        self._model = model
+        self._llm_latency_ms = _LLM_LATENCY_PRIOR_MS
+        self._lock = threading.Lock()
+
+    def decide(self, rag_result, *, enabled: bool = True) -> CondenseDecision:
+        """RagResult로 condense 모드 결정
+
+        Args:
+            rag_result: RagService.retrieve_context 결과
+            enabled: USE_RAG_CONDENSE (False면 항상 raw)
+        """
+        text = rag_result.merged_documents_text or ""
+        tokens = rag_result.context_tokens or len(get_shared_encoding(self._model).encode(text))
+        chunk_count = rag_result.document_count or len(rag_result.chunk_ids)
+        # 컨텍스트 문서(벡터 점수 보존)가 있으면 그것으로, 없으면 검색 hit으로 점수 분포 계산
+        gap = _score_gap(rag_result.context_documents or rag_result.hits)
+
+        def _decision(mode: str, reason: str) -> CondenseDecision:
+            return CondenseDecision(mode=mode, reason=reason, context_tokens=tokens, chunk_count=chunk_count, score_gap=round(gap, 4))
+
+        if not enabled:
+            return _decision("raw", "USE_RAG_CONDENSE=0")
+        if tokens <= self.raw_max_tokens:
+            return _decision("raw", f"{tokens} <= {self.raw_max_tokens} 토큰")
+        if tokens <= self.extractive_max_tokens:
+            if chunk_count <= FOCUSED_CHUNK_COUNT:
+                return _decision("extractive", f"청크 {chunk_count}개에 근거 집중")
+            if gap >= self.dominance_gap:
+                return _decision("extractive", f"1위 점수 우세 (gap={gap:.2f})")
+        return _decision("llm", f"{tokens} 토큰, 청크 {chunk_count}개, gap={gap:.2f}")
+
+    @property
+    def estimated_llm_latency_ms(self) -> float:
+        return self._llm_latency_ms
+
+    def record_llm_latency(self, elapsed_ms: float) -> None:
+        """LLM condense 실측 지연 시간 반영 (EWMA)"""
+        with self._lock:
+            self._llm_latency_ms += _EWMA_ALPHA * (elapsed_ms - self._llm_latency_ms)
+
+    def saved_latency_ms(self, mode: str, elapsed_ms: float) -> float:
+        """LLM condense 대비 절약 시간 추정 (llm 모드는 0)"""
+        if mode == "llm":
+            return 0.0
+        return max(0.0, self._llm_latency_ms - elapsed_ms)
+
+
+_default_policy: CondensePolicy | None = None
+_default_lock = threading.Lock()
+
+
+def get_condense_policy() -> CondensePolicy:
+    """프로세스 공용 정책 (LLM 지연 시간 추정치 공유)"""
+    global _default_policy
+    with _default_lock:
+        if _default_policy is None:
+            _default_policy = CondensePolicy()
+        return _default_policy
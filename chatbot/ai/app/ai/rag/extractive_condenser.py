@@ -0,0 +1,207 @@
+"""Local extractive condenser (no LLM).
+
+검색 컨텍스트를 조/항/호 단위와 별표(표) 행 단위로 나누고, 질문과의 용어 겹침과
+청크 임베딩 유사도(검색 단계에서 이미 계산된 청크 점수)로 단위를 골라
+머리글(조 제목, 항 본문 첫 줄, 표 제목/열 머리말)과 주석을 함께 원문 순서대로 돌려줍니다.
+get_condense_prompt_narrow의 규칙(헤더 + 관련 항/행, 주석 포함, 원문 인용)을 LLM 없이 근사합니다.
+"""
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set
+
+from app.ai.utils.token_counter import get_shared_encoding
+from .hybrid_retriever import extract_identifiers, tokenize_korean
+
+# 추출 결과 토큰 예산
+EXTRACTIVE_TOKEN_BUDGET = int(os.getenv("RAG_EXTRACTIVE_TOKEN_BUDGET", "1500"))
+
+# 구조 패턴
+ARTICLE_HEADER = re.compile(r"^\s*제\s*\d+\s*조")
+TABLE_HEADER = re.compile(r"^\s*(?:<\s*별표\s*\d+|\[\s*별표\s*\d+|별표\s*\d+\s*$)")
+PARAGRAPH_START = re.compile(r"^\s*[①-⑳]")
+ITEM_START = re.compile(r"^\s*\d+\.\s")
+NOTE_START = re.compile(r"^\s*(?:주\)|※|비고)")
+
+# 표 제목 다음 열 머리말로 간주할 줄 수
+TABLE_HEADER_ROWS = 2
+
+# 생략 구간 표시
+GAP_MARKER = "..."
+
+# 점수 가중치 (용어 겹침 / 청크 임베딩 유사도)
+LEXICAL_WEIGHT = 0.7
+PRIOR_WEIGHT = 0.3
+
+
+@dataclass(slots=True)
+class Unit:
+    """조/항/호/표 행 단위 (lines는 전체 줄 목록의 위치)"""
+    kind: str                      # article | paragraph | item | row | note | text
+    lines: List[int]
+    headers: List[int] = field(default_factory=list)   # 함께 포함할 머리글 줄
+    notes: List[int] = field(default_factory=list)     # 함께 포함할 주석 줄 (표)
+    doc: int = 0
+
+
+def split_units(lines: Sequence[str], start: int = 0, end: Optional[int] = None, doc: int = 0) -> List[Unit]:
+    """lines[start:end]를 구조 단위로 분할
+
+    이어지는 줄(PDF 줄바꿈, 목 '가.' 등)은 직전 단위에 붙입니다.
+    """
+    end = len(lines) if end is None else end
+    units: List[Unit] = []
+    article: Optional[int] = None       # 현재 조 머리글 줄
+    paragraph: Optional[int] = None     # 현재 항 첫 줄
+    table: Optional[List[int]] = None   # 현재 표 제목 + 열 머리말 줄
+    table_notes: List[int] = []
+    current: Optional[Unit] = None
+
+    def _open(kind: str, i: int, headers: List[int]) -> Unit:
+        unit = Unit(kind=kind, lines=[i], headers=[h for h in headers if h != i], doc=doc)
+        units.append(unit)
+        return unit
+
+    for i in range(start, end):
+        line = lines[i]
+        if not line.strip():
+            continue
+        if ARTICLE_HEADER.match(line):
+            article, paragraph, table = i, None, None
+            current = _open("article", i, [])
+        elif TABLE_HEADER.match(line):
+            article, paragraph, table = None, None, [i]
+            table_notes = []
+            current = _open("row", i, [])
+        elif table is not None:
+            if NOTE_START.match(line):
+                table_notes.append(i)
+                current = _open("note", i, table)
+            elif len(table) <= TABLE_HEADER_ROWS:
+                # 표 제목 다음 줄들은 열 머리말
+                table.append(i)
+                current.lines.append(i)
+            else:
+                current = _open("row", i, table)
+                current.notes = table_notes
+        elif PARAGRAPH_START.match(line):
+            paragraph = i
+            current = _open("paragraph", i, [article] if article is not None else [])
+        elif ITEM_START.match(line):
+            headers = [h for h in (article, paragraph) if h is not None]
+            current = _open("item", i, headers)
+        elif current is not None and not NOTE_START.match(line):
+            current.lines.append(i)
+        else:
+            headers = [article] if article is not None else []
+            current = _open("note" if NOTE_START.match(line) else "text", i, headers)
+    return units
+
+
+class ExtractiveCondenser:
+    """질문 관련 구조 단위를 토큰 예산 안에서 추출"""
+
+    def __init__(
+        self,
+        *,
+        token_budget: int = EXTRACTIVE_TOKEN_BUDGET,
+        model: str = "gpt-4.1",
+    ) -> None:
+        self.token_budget = token_budget
+        self._encoding = get_shared_encoding(model)
+
+    def condense(self, question: str, context: str, documents: Optional[Sequence[dict]] = None) -> str:
+        """추출 요약
+
+        Args:
+            question: 사용자 질문
+            context: 원본 RAG 컨텍스트 (documents가 없을 때 사용)
+            documents: 패킹된 검색 문서 (text, score/vector_score) - 있으면 문서별 점수를 사전 점수로 사용
+        """
+        lines: List[str] = []
+        units: List[Unit] = []
+        priors: List[float] = []
+        sources = [d.get("text", "") for d in documents] if documents else [context]
+        for doc_index, text in enumerate(sources):
+            start = len(lines)
+            lines.extend(text.split("\n"))
+            units.extend(split_units(lines, start, len(lines), doc=doc_index))
+            lines.append("")  # 문서 경계
+
+        if documents:
+            raw = [float(d.get("vector_score", d.get("score")) or 0.0) for d in documents]
+            low, high = min(raw), max(raw)
+            priors = [(value - low) / ((high - low) or 1.0) for value in raw]
+        else:
+            priors = [0.0]
+
+        line_tokens = [len(self._encoding.encode(line)) for line in lines]
+        if sum(line_tokens) <= self.token_budget:
+            return context.strip()
+
+        query_terms = set(tokenize_korean(question))
+        query_ids = set(extract_identifiers(question))
+
+        scored = []
+        for order, unit in enumerate(units):
+            text = " ".join(lines[j] for j in unit.lines)
+            terms = set(tokenize_korean(text))
+            lexical = len(query_terms & terms) / (len(query_terms) or 1)
+            if query_ids & set(extract_identifiers(text)):
+                lexical += 1.0
+            if lexical <= 0:
+                continue
+            scored.append((LEXICAL_WEIGHT * lexical + PRIOR_WEIGHT * priors[unit.doc], order, unit))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+
+        if not scored and documents:
+            # 겹치는 용어가 없으면 최상위 문서의 단위를 앞에서부터
+            best = max(range(len(priors)), key=priors.__getitem__)
+            scored = [(0.0, order, unit) for order, unit in enumerate(units) if unit.doc == best]
+
+        selected: Set[int] = set()
+        used = 0
+        for _, _, unit in scored:
+            block = [j for j in unit.headers + unit.lines + unit.notes if j not in selected]
+            cost = sum(line_tokens[j] for j in block)
+            if used + cost > self.token_budget:
+                continue
+            selected.update(block)
+            used += cost
+
+        if not selected:
+            # 단위 하나도 예산에 들어가지 않으면 앞부분만 예산만큼
+            return self._encoding.decode(self._encoding.encode(context)[: self.token_budget]).strip()
+
+        parts: List[str] = []
+        previous = None
+        for j in sorted(selected):
+            if previous is not None and j != previous + 1:
+                parts.append(GAP_MARKER)
+            parts.append(lines[j])
+            previous = j
+        return "\n".join(parts).strip()
+
+
+def format_condensed(extracted: str) -> str:
+    """condense 결과 형식(<반영> 블록)으로 감싸기"""
+    return f"<반영>\n{extracted}\n</반영>" if extracted else ""
+
+
+_default_condensers: Dict[int, ExtractiveCondenser] = {}
+
+
+def extractive_condense(
+    question: str,
+    context: str,
+    *,
+    token_budget: int = EXTRACTIVE_TOKEN_BUDGET,
+    documents: Optional[Sequence[dict]] = None,
+) -> str:
+    """기본 설정 ExtractiveCondenser로 추출 요약"""
+    condenser = _default_condensers.get(token_budget)
+    if condenser is None:
+        condenser = _default_condensers.setdefault(token_budget, ExtractiveCondenser(token_budget=token_budget))
+    return condenser.condense(question, context, documents)
@@ -10,6 +10,7 @@ from app.ai.chatbot.config import client, model
 
 # LLM Manager import
 from app.ai.llm import get_provider
+from app.ai.utils.token_counter import current_token_counter
 
 
 @dataclass(slots=True)
@@ -32,7 +33,12 @@ class RegulationGate:
         self._client = openai_client
         self._model_name = model_name or model.advanced
         self._debug = debug_fn or (lambda _: None)
-        self.token_counter = token_counter
+        self._token_counter = token_counter
+
+    @property
+    def token_counter(self):
+        """현재 요청에 바인딩된 토큰 카운터 (없으면 생성 시 전달된 카운터)"""
+        return current_token_counter(self._token_counter)
 
     async def decide(self, question: str) -> GateDecision:
         self._debug(
@@ -0,0 +1,312 @@
+"""Hybrid lexical + vector retriever for the RAG pipeline.
+
+"제12조", "별표 3", "조기졸업"처럼 정확한 용어가 핵심인 규정 질문은
+임베딩 유사도만으로는 순위가 낮게 나오는 경우가 많습니다.
+`regulation_chunks`로 BM25 역색인(한국어 문자 bigram + 조문/별표 식별자)을 만들고
+벡터 검색 결과와 RRF(Reciprocal Rank Fusion)로 합칩니다.
+
+RetrieverResult 계약은 그대로 유지합니다. hit.score는 RRF 점수이며
+벡터/BM25 개별 점수는 documents의 vector_score / bm25_score에 담깁니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from app.ai.data import collection
+from .mongo_vector_retriever import MongoVectorRetriever, RetrieverResult
+
+# 조문/별표 식별자: 제12조, 제3조의2, 별표 3, <별표 3>
+ARTICLE_ID_PATTERN = re.compile(r"제\s*(\d+)\s*조(?:\s*의\s*(\d+))?")
+TABLE_ID_PATTERN = re.compile(r"별표\s*(\d+)")
+# 한글/영문/숫자 연속 구간
+WORD_PATTERN = re.compile(r"[가-힣]+|[A-Za-z]+|\d+")
+
+# 식별자 토큰은 질의에 나오면 거의 확실한 단서이므로 가중치를 높임
+IDENTIFIER_BOOST = 3.0
+
+# 인덱스 재생성 주기(초). 청크 재적재 후 자동 반영용
+BM25_INDEX_TTL = float(os.getenv("BM25_INDEX_TTL", "600"))
+
+
+def extract_identifiers(text: str) -> List[str]:
+    """조문/별표 식별자 토큰 ('제3조의2', '별표3')"""
+    ids = [
+        f"제{m.group(1)}조" + (f"의{m.group(2)}" if m.group(2) else "")
+        for m in ARTICLE_ID_PATTERN.finditer(text)
+    ]
+    ids.extend(f"별표{m.group(1)}" for m in TABLE_ID_PATTERN.finditer(text))
+    return ids
+
+
+def tokenize_korean(text: str) -> List[str]:
+    """BM25용 토큰화
+
+    - 한글 구간: 문자 bigram (조사가 붙어도 어간 bigram이 겹치도록), 1글자는 그대로
+    - 영문: 소문자 단어, 숫자: 그대로
+    - 조문/별표 식별자: 공백을 제거한 정규형 토큰 추가
+    """
+    tokens: List[str] = []
+    for word in WORD_PATTERN.findall(text):
+        if word[0] >= "가":
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word.lower())
+    tokens.extend(extract_identifiers(text))
+    return tokens
+
+
+@dataclass(slots=True)
+class _Postings:
+    doc_ids: np.ndarray   # int32
+    weights: np.ndarray   # float32, idf * BM25 tf 항 (문서 길이 정규화 포함)
+
+
+class BM25Index:
+    """정적 BM25 역색인
+
+    문서가 바뀌지 않으므로 (idf * tf 항)을 색인 시점에 미리 계산해 두고,
+    검색은 질의 토큰별 postings를 점수 배열에 더하기만 합니다.
+    """
+
+    def __init__(self, documents: List[dict], postings: Dict[str, _Postings]) -> None:
+        self.documents = documents
+        self._postings = postings
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @staticmethod
+    def _document_tokens(doc: dict) -> List[str]:
+        metadata = doc.get("metadata", {}) or {}
+        tokens = tokenize_korean(doc.get("text", ""))
+        # 메타데이터 식별자/제목도 색인 (본문에 조문번호가 빠진 분할 청크 대비)
+        for key in ("law_article_id", "table_id", "parent_law_article"):
+            value = metadata.get(key)
+            if isinstance(value, str):
+                tokens.extend(extract_identifiers(value))
+        if isinstance(metadata.get("title"), str):
+            tokens.extend(tokenize_korean(metadata["title"]))
+        return tokens
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[dict], *, k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        documents: List[dict] = []
+        term_freqs: List[Counter] = []
+        for doc in docs:
+            documents.append({
+                "_id": str(doc["_id"]),
+                "text": doc.get("text", ""),
+                "metadata": doc.get("metadata", {}),
+            })
+            term_freqs.append(Counter(cls._document_tokens(doc)))
+
+        n_docs = len(documents)
+        lengths = np.array([sum(tf.values()) for tf in term_freqs], dtype=np.float32)
+        avg_length = float(lengths.mean()) if n_docs else 0.0
+        norm = k1 * (1 - b + b * lengths / (avg_length or 1.0))
+
+        raw: Dict[str, tuple[List[int], List[int]]] = {}
+        for doc_id, tf in enumerate(term_freqs):
+            for term, count in tf.items():
+                ids, counts = raw.setdefault(term, ([], []))
+                ids.append(doc_id)
+                counts.append(count)
+
+        postings: Dict[str, _Postings] = {}
+        for term, (ids, counts) in raw.items():
+            doc_ids = np.array(ids, dtype=np.int32)
+            tf = np.array(counts, dtype=np.float32)
+            idf = np.log(1 + (n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            weights = (idf * tf * (k1 + 1) / (tf + norm[doc_ids])).astype(np.float32)
+            postings[term] = _Postings(doc_ids, weights)
+        return cls(documents, postings)
+
+    @classmethod
+    def build_from_collection(cls, mongo_collection=None) -> "BM25Index":
+        """regulation_chunks로 색인 생성 (분할된 원본은 제외, 청크로 대체)"""
+        mongo_collection = mongo_collection if mongo_collection is not None else collection
+        cursor = mongo_collection.find(
+            {"chunked": {"$exists": False}},
+            {"_id": 1, "text": 1, "metadata": 1},
+        ).sort("_id", 1)
+        return cls.from_documents(cursor)
+
+    def search(self, query: str, top_k: int = 20) -> List[tuple[int, float]]:
+        """BM25 상위 top_k
+
+        Returns:
+            [(문서 위치, score)] - score > 0 인 문서만
+        """
+        if not self.documents or top_k <= 0:
+            return []
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        identifiers = set(extract_identifiers(query))
+        for term, count in Counter(tokenize_korean(query)).items():
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            boost = IDENTIFIER_BOOST if term in identifiers else 1.0
+            scores[postings.doc_ids] += postings.weights * (count * boost)
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k)[:top_k]]
+        order = matched[np.argsort(-scores[matched])]
+        return [(int(pos), float(scores[pos])) for pos in order]
+
+
+_index_lock = threading.Lock()      # 캐시 변수 보호 (짧게만 보유)
+_build_lock = threading.Lock()      # 컬렉션 스캔은 한 번에 하나만
+_cached_index: BM25Index | None = None
+_cached_at = 0.0
+_rebuilding = False
+
+
+def _build_index(mongo_collection) -> BM25Index:
+    global _cached_index, _cached_at
+    with _build_lock:
+        index = BM25Index.build_from_collection(mongo_collection)
+        with _index_lock:
+            _cached_index, _cached_at = index, time.monotonic()
+        return index
+
+
+def _rebuild_in_background(mongo_collection) -> None:
+    global _rebuilding
+    try:
+        _build_index(mongo_collection)
+    except Exception as e:
+        print(f"[BM25] 색인 재생성 실패, 기존 색인 유지: {e}")
+    finally:
+        with _index_lock:
+            _rebuilding = False
+
+
+def get_bm25_index(mongo_collection=None, *, refresh: bool = False) -> BM25Index:
+    """프로세스 공용 BM25 색인 (BM25_INDEX_TTL마다 재생성)
+
+    만료되면 백그라운드 스레드가 새로 만드는 동안 기존 색인으로 응답합니다.
+    색인이 아직 없거나 refresh=True일 때만 호출한 스레드가 생성을 기다립니다.
+    """
+    global _rebuilding
+    with _index_lock:
+        index = _cached_index
+        if index is not None and not refresh:
+            if time.monotonic() - _cached_at > BM25_INDEX_TTL and not _rebuilding:
+                _rebuilding = True
+                threading.Thread(
+                    target=_rebuild_in_background, args=(mongo_collection,), name="bm25-rebuild", daemon=True
+                ).start()
+            return index
+
+    if not refresh:
+        with _build_lock:
+            # 기다리는 동안 다른 스레드가 최초 생성을 마쳤으면 그 색인 사용
+            if _cached_index is not None:
+                return _cached_index
+    return _build_index(mongo_collection)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], *, k: int = 60) -> List[tuple[str, float]]:
+    """RRF: score(d) = Σ 1 / (k + rank_i(d)), rank는 1부터"""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridRetriever:
+    """BM25 + 벡터 검색 RRF 결합 retriever (MongoVectorRetriever와 같은 인터페이스)"""
+
+    def __init__(
+        self,
+        vector_retriever: MongoVectorRetriever | None = None,
+        bm25_index: BM25Index | None = None,
+        *,
+        mongo_collection=None,
+        top_k: int = 5,
+        candidate_k: int = 20,
+        rrf_k: int = 60,
+        debug_fn: Callable[[str], None] | None = None,
+    ) -> None:
+        self._debug = debug_fn or (lambda _: None)
+        self._vector = vector_retriever or MongoVectorRetriever(
+            mongo_collection=mongo_collection, top_k=candidate_k, debug_fn=self._debug
+        )
+        self._bm25 = bm25_index
+        self._collection = mongo_collection
+        self._top_k = top_k
+        self._candidate_k = candidate_k
+        self._rrf_k = rrf_k
+
+    def _lexical_search(self, query: str) -> tuple[BM25Index, List[tuple[int, float]]]:
+        index = self._bm25 or get_bm25_index(self._collection)
+        return index, index.search(query, self._candidate_k)
+
+    async def search(self, query: str, *, threshold: float = 0.4) -> RetrieverResult:
+        start_ts = time.time()
+        self._debug(
+            f"hybrid_retriever.search: query='{query[:80]}' top_k={self._top_k} "
+            f"candidates={self._candidate_k} threshold={threshold}"
+        )
+
+        vector_task = self._vector.search(query, threshold=threshold)
+        lexical_task = asyncio.to_thread(self._lexical_search, query)
+        vector_result, lexical = await asyncio.gather(vector_task, lexical_task, return_exceptions=True)
+
+        if isinstance(vector_result, BaseException):
+            self._debug(f"hybrid_retriever.search: vector search failed: {vector_result}")
+            vector_result = RetrieverResult(hits=[], chunk_ids=[], documents=[])
+        if isinstance(lexical, BaseException):
+            self._debug(f"hybrid_retriever.search: bm25 search failed: {lexical}")
+            index, lexical_hits = None, []
+        else:
+            index, lexical_hits = lexical
+
+        # 후보 문서 (벡터 결과 우선, BM25 전용 후보는 색인의 본문 사용)
+        candidates: Dict[str, dict] = {}
+        for doc in vector_result.documents:
+            candidates[str(doc["_id"])] = {**doc, "vector_score": doc.get("score")}
+        lexical_ranking: List[str] = []
+        for pos, score in lexical_hits:
+            doc = index.documents[pos]
+            lexical_ranking.append(doc["_id"])
+            candidates.setdefault(doc["_id"], {**doc, "vector_score": None})["bm25_score"] = score
+
+        vector_ranking = [str(doc["_id"]) for doc in vector_result.documents]
+        fused = reciprocal_rank_fusion([vector_ranking, lexical_ranking], k=self._rrf_k)[: self._top_k]
+
+        hits, chunk_ids, documents = [], [], []
+        for doc_id, rrf_score in fused:
+            doc = candidates[doc_id]
+            doc.setdefault("bm25_score", None)
+            doc["score"] = rrf_score
+            hit = {"id": doc_id, "score": rrf_score, "metadata": doc.get("metadata", {})}
+            hits.append(type("Hit", (), hit)())
+            chunk_ids.append(doc_id)
+            documents.append(doc)
+            self._debug(
+                f"  hit: _id={doc_id} rrf={rrf_score:.4f} "
+                f"vector={doc['vector_score']} bm25={doc['bm25_score']}"
+            )
+
+        self._debug(
+            f"hybrid_retriever.search summary: vector={len(vector_ranking)} bm25={len(lexical_ranking)} "
+            f"fused={len(hits)} duration={time.time() - start_ts:.3f}s"
+        )
+        return RetrieverResult(hits=hits, chunk_ids=chunk_ids, documents=documents)
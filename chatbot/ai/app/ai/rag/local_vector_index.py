@@ -0,0 +1,469 @@
+"""In-process vector index used when Atlas Vector Search is unavailable.
+
+stg(M0/M2), 로컬 개발, 테스트 환경에서는 `$vectorSearch`를 쓸 수 없으므로
+`regulation_chunks`의 임베딩을 정규화된 float32 행렬로 디스크에 저장하고
+memory-map으로 읽어 NumPy 행렬곱으로 top-k를 계산합니다.
+
+- exact: 전체 행렬곱 (수천 건 규모에서는 1ms 내외)
+- ivf: k-means 조대 양자화 후 nprobe개 리스트만 탐색 (대규모 코퍼스 대비)
+
+점수는 Atlas cosine vectorSearchScore와 같은 (1 + cos) / 2 로 반환하여
+기존 threshold(0.4)를 그대로 사용할 수 있습니다.
+
+재적재/분할/임베딩 백필 후 오래된 인덱스를 쓰지 않도록 meta.json에 컬렉션 지문
+(임베딩 문서 수, 최대 _id, 최대 updated_at)을 저장하고, LOCAL_VECTOR_INDEX_CHECK_INTERVAL초마다
+지문을 비교하여 달라졌거나 LOCAL_VECTOR_INDEX_TTL초가 지나면 다시 생성합니다.
+생성은 프로세스 내 락 + 파일 락으로 한 번에 하나만 수행하며, 그동안 다른 요청은 기존 인덱스를 사용합니다.
+
+사용법:
+    # 인덱스 생성 (regulation_chunks → app/ai/data/.vector_index)
+    python -m app.ai.rag.local_vector_index --build
+
+    # IVF 모드로 생성 후 검색 확인
+    python -m app.ai.rag.local_vector_index --build --mode ivf --query "휴학 신청 기간"
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Sequence
+
+import numpy as np
+
+try:
+    import fcntl  # POSIX 파일 락 (워커 간 생성 직렬화)
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from app.ai.data import collection, MONGO_AVAILABLE
+from .mongo_vector_retriever import RetrieverResult, get_embedding
+
+# 기본 인덱스 저장 위치 (환경변수로 변경 가능)
+DEFAULT_INDEX_DIR = Path(
+    os.getenv("LOCAL_VECTOR_INDEX_DIR", str(Path(__file__).parent.parent / "data" / ".vector_index"))
+)
+
+# 컬렉션 지문 확인 주기(초) / 지문이 같아도 다시 생성하는 주기(초, 0이면 사용 안 함)
+LOCAL_VECTOR_INDEX_CHECK_INTERVAL = float(os.getenv("LOCAL_VECTOR_INDEX_CHECK_INTERVAL", "300"))
+LOCAL_VECTOR_INDEX_TTL = float(os.getenv("LOCAL_VECTOR_INDEX_TTL", "86400"))
+
+INDEX_MODES = ("exact", "ivf")
+
+_VECTORS_FILE = "vectors.npy"
+_META_FILE = "meta.json"
+_IVF_FILE = "ivf.npz"
+_LOCK_FILE = ".build.lock"
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (영벡터는 그대로 둠)"""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """점수 내림차순 상위 k개 위치 (argpartition 후 k개만 정렬)"""
+    if k >= scores.shape[0]:
+        return np.argsort(-scores)
+    part = np.argpartition(-scores, k)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 10, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """정규화 벡터용 spherical k-means
+
+    Returns:
+        (centroids [n_lists, dim], assignments [n])
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(vectors.shape[0], n_lists, replace=False)].copy()
+    assignments = np.zeros(vectors.shape[0], dtype=np.int32)
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+        for c in range(n_lists):
+            members = vectors[assignments == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+    return centroids, assignments
+
+
+def collection_fingerprint(mongo_collection) -> Dict[str, Any]:
+    """임베딩 문서 수 + 최대 _id + 최대 updated_at (적재/백필 스크립트가 기록)
+
+    삽입은 최대 _id, 삭제는 문서 수, 본문/메타데이터/임베딩 갱신은 updated_at으로 드러납니다.
+    """
+    result = list(mongo_collection.aggregate([
+        {"$match": {"embedding": {"$exists": True}}},
+        {"$group": {"_id": None, "count": {"$sum": 1}, "max_id": {"$max": "$_id"}, "max_updated_at": {"$max": "$updated_at"}}},
+    ]))
+    if not result:
+        return {"count": 0, "max_id": None, "max_updated_at": None}
+    row = result[0]
+    updated_at = row.get("max_updated_at")
+    return {
+        "count": row["count"],
+        "max_id": str(row["max_id"]) if row.get("max_id") is not None else None,
+        "max_updated_at": updated_at.isoformat() if hasattr(updated_at, "isoformat") else updated_at,
+    }
+
+
+@contextmanager
+def _file_lock(index_dir: Path):
+    """워커 간 인덱스 생성/교체 직렬화 (fcntl 미지원 환경에서는 no-op)"""
+    index_dir.mkdir(parents=True, exist_ok=True)
+    with open(index_dir / _LOCK_FILE, "a") as fh:
+        if fcntl:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+class LocalVectorIndex:
+    """정규화된 float32 임베딩 행렬 + 문서 메타데이터
+
+    vectors는 디스크의 .npy를 mmap_mode='r'로 연 memory-map이므로
+    여러 워커 프로세스가 같은 페이지 캐시를 공유합니다.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        documents: List[dict],
+        *,
+        mode: str = "exact",
+        centroids: np.ndarray | None = None,
+        list_offsets: np.ndarray | None = None,
+        list_rows: np.ndarray | None = None,
+        nprobe: int = 8,
+        fingerprint: Dict[str, Any] | None = None,
+        built_at: float | None = None,
+    ) -> None:
+        if mode not in INDEX_MODES:
+            raise ValueError(f"mode는 {INDEX_MODES} 중 하나여야 합니다: {mode}")
+        if mode == "ivf" and centroids is None:
+            raise ValueError("ivf 모드에는 centroids가 필요합니다")
+        self.vectors = vectors
+        self.documents = documents
+        self.mode = mode
+        self.nprobe = nprobe
+        self._centroids = centroids
+        self._list_offsets = list_offsets
+        self._list_rows = list_rows
+        # 생성 당시 컬렉션 지문 / 생성 시각(epoch)
+        self.fingerprint = fingerprint
+        self.built_at = built_at if built_at is not None else time.time()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    # -------------------------------
+    # 생성 / 저장 / 로드
+    # -------------------------------
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[dict], *, mode: str = "exact", n_lists: int | None = None) -> "LocalVectorIndex":
+        """embedding 필드가 있는 문서들로 인덱스 생성"""
+        rows: List[Sequence[float]] = []
+        documents: List[dict] = []
+        for doc in docs:
+            embedding = doc.get("embedding")
+            if not embedding:
+                continue
+            rows.append(embedding)
+            documents.append({
+                "_id": str(doc["_id"]),
+                "text": doc.get("text", ""),
+                "metadata": doc.get("metadata", {}),
+            })
+
+        vectors = _normalize(np.asarray(rows, dtype=np.float32)) if rows else np.zeros((0, 0), dtype=np.float32)
+
+        if mode != "ivf" or not len(documents):
+            return cls(vectors, documents, mode="exact")
+
+        n_lists = min(n_lists or max(1, int(np.sqrt(len(documents)))), len(documents))
+        centroids, assignments = _kmeans(vectors, n_lists)
+        list_rows = np.argsort(assignments, kind="stable").astype(np.int64)
+        list_offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=n_lists)))).astype(np.int64)
+        return cls(
+            vectors, documents, mode="ivf",
+            centroids=centroids, list_offsets=list_offsets, list_rows=list_rows,
+        )
+
+    @classmethod
+    def build_from_collection(cls, mongo_collection=None, *, mode: str = "exact", n_lists: int | None = None) -> "LocalVectorIndex":
+        """regulation_chunks에서 임베딩이 있는 문서를 읽어 인덱스 생성
+
+        지문은 읽기 전에 계산 → 읽는 도중 바뀐 내용은 다음 확인 때 재생성됩니다.
+        """
+        mongo_collection = mongo_collection if mongo_collection is not None else collection
+        fingerprint = collection_fingerprint(mongo_collection)
+        cursor = mongo_collection.find(
+            {"embedding": {"$exists": True}},
+            {"_id": 1, "text": 1, "metadata": 1, "embedding": 1},
+        ).sort("_id", 1)
+        index = cls.from_documents(cursor, mode=mode, n_lists=n_lists)
+        index.fingerprint = fingerprint
+        return index
+
+    def save(self, index_dir: Path = DEFAULT_INDEX_DIR) -> None:
+        """디스크에 저장 (임시 파일 작성 후 교체)"""
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+
+        tmp_vectors = index_dir / f"{_VECTORS_FILE}.tmp"
+        with open(tmp_vectors, "wb") as f:
+            np.save(f, np.ascontiguousarray(self.vectors, dtype=np.float32))
+        os.replace(tmp_vectors, index_dir / _VECTORS_FILE)
+
+        ivf_path = index_dir / _IVF_FILE
+        if self.mode == "ivf":
+            tmp_ivf = index_dir / f"{_IVF_FILE}.tmp"
+            with open(tmp_ivf, "wb") as f:
+                np.savez(f, centroids=self._centroids, list_offsets=self._list_offsets, list_rows=self._list_rows)
+            os.replace(tmp_ivf, ivf_path)
+        elif ivf_path.exists():
+            ivf_path.unlink()
+
+        # 메타데이터는 마지막에 교체 → meta.json이 있으면 벡터도 완성된 상태
+        tmp_meta = index_dir / f"{_META_FILE}.tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({
+                "mode": self.mode,
+                "count": len(self.documents),
+                "fingerprint": self.fingerprint,
+                "built_at": self.built_at,
+                "documents": self.documents,
+            }, f, ensure_ascii=False, default=str)
+        os.replace(tmp_meta, index_dir / _META_FILE)
+
+    @classmethod
+    def load(cls, index_dir: Path = DEFAULT_INDEX_DIR, *, nprobe: int = 8) -> "LocalVectorIndex":
+        """디스크에서 로드 (벡터는 memory-map)"""
+        index_dir = Path(index_dir)
+        with open(index_dir / _META_FILE, encoding="utf-8") as f:
+            meta = json.load(f)
+        vectors = np.load(index_dir / _VECTORS_FILE, mmap_mode="r")
+        # 지문이 없는 이전 형식은 built_at=0 → 다음 확인 때 재생성
+        info = {"fingerprint": meta.get("fingerprint"), "built_at": meta.get("built_at", 0.0)}
+
+        if meta.get("mode") == "ivf" and (index_dir / _IVF_FILE).exists():
+            with np.load(index_dir / _IVF_FILE) as ivf:
+                return cls(
+                    vectors, meta["documents"], mode="ivf", nprobe=nprobe,
+                    centroids=ivf["centroids"], list_offsets=ivf["list_offsets"], list_rows=ivf["list_rows"],
+                    **info,
+                )
+        return cls(vectors, meta["documents"], mode="exact", **info)
+
+    # -------------------------------
+    # 검색
+    # -------------------------------
+
+    def _candidate_rows(self, query: np.ndarray) -> np.ndarray | None:
+        """ivf 모드에서 탐색할 행 번호 (exact 모드는 None = 전체)"""
+        if self.mode != "ivf":
+            return None
+        lists = _top_k(self._centroids @ query, min(self.nprobe, self._centroids.shape[0]))
+        return np.concatenate([
+            self._list_rows[self._list_offsets[c]:self._list_offsets[c + 1]] for c in lists
+        ])
+
+    def search(self, query_vector: Sequence[float], top_k: int = 5) -> List[tuple[int, float]]:
+        """코사인 유사도 상위 top_k
+
+        Returns:
+            [(문서 위치, score)] - score는 Atlas와 같은 (1 + cos) / 2
+        """
+        if not len(self.documents) or top_k <= 0:
+            return []
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+
+        rows = self._candidate_rows(query)
+        if rows is None:
+            cosine = self.vectors @ query
+            order = _top_k(cosine, top_k)
+            positions = order
+        else:
+            cosine = self.vectors[rows] @ query
+            order = _top_k(cosine, top_k)
+            positions = rows[order]
+
+        return [(int(pos), float((1.0 + cosine[o]) / 2.0)) for pos, o in zip(positions, order)]
+
+
+class LocalVectorRetriever:
+    """LocalVectorIndex 기반 retriever (MongoVectorRetriever와 같은 인터페이스)
+
+    인덱스는 첫 검색 시 index_dir에서 로드하고, 없거나 컬렉션 지문과 다르면 생성해 저장합니다.
+    이후 check_interval초마다 지문을 다시 확인합니다 (Mongo에 접근할 수 없으면 기존 인덱스 유지).
+    """
+
+    def __init__(
+        self,
+        index: LocalVectorIndex | None = None,
+        embed_fn: Callable[[str], Iterable[float]] | None = None,
+        *,
+        index_dir: Path = DEFAULT_INDEX_DIR,
+        mongo_collection=None,
+        top_k: int = 5,
+        debug_fn: Callable[[str], None] | None = None,
+        check_interval: float = LOCAL_VECTOR_INDEX_CHECK_INTERVAL,
+        ttl: float = LOCAL_VECTOR_INDEX_TTL,
+    ) -> None:
+        self._index = index
+        self._embed = embed_fn or get_embedding
+        self._index_dir = Path(index_dir)
+        self._collection = mongo_collection
+        self._top_k = top_k
+        self._debug = debug_fn or (lambda _: None)
+        self._check_interval = check_interval
+        self._ttl = ttl
+        # 직접 넘겨받은 인덱스는 확인하지 않음
+        self._next_check = float("inf") if index is not None else 0.0
+        self._lock = threading.Lock()
+
+    def _current_fingerprint(self) -> Dict[str, Any] | None:
+        """컬렉션 지문 (컬렉션에 접근할 수 없으면 None)"""
+        if self._collection is None and not MONGO_AVAILABLE:
+            return None
+        try:
+            return collection_fingerprint(self._collection if self._collection is not None else collection)
+        except Exception as e:
+            self._debug(f"local_retriever: fingerprint failed, keeping current index: {e}")
+            return None
+
+    def _is_fresh(self, index: LocalVectorIndex, fingerprint: Dict[str, Any] | None) -> bool:
+        if fingerprint is None:
+            return True
+        if index.fingerprint != fingerprint:
+            return False
+        return self._ttl <= 0 or time.time() - index.built_at < self._ttl
+
+    def _ensure_index(self) -> LocalVectorIndex | None:
+        if self._index is not None and time.monotonic() < self._next_check:
+            return self._index
+        # 다른 스레드가 확인/생성 중이면 기존 인덱스로 응답 (없을 때만 기다림)
+        if not self._lock.acquire(blocking=self._index is None):
+            return self._index
+        try:
+            if self._index is not None and time.monotonic() < self._next_check:
+                return self._index
+            try:
+                self._refresh()
+            except Exception as e:
+                if self._index is None:
+                    raise
+                self._debug(f"local_retriever: refresh failed, keeping current index: {e}")
+            self._next_check = time.monotonic() + self._check_interval
+            return self._index
+        finally:
+            self._lock.release()
+
+    def _refresh(self) -> None:
+        """(락 보유) 지문 비교 → 디스크 인덱스 로드 또는 재생성"""
+        fingerprint = self._current_fingerprint()
+        if self._index is not None and self._is_fresh(self._index, fingerprint):
+            return
+
+        # 재생성 시 기존 검색 모드(exact/ivf) 유지
+        mode = self._index.mode if self._index is not None else "exact"
+        with _file_lock(self._index_dir):
+            # 다른 워커가 이미 새로 만들었을 수 있으므로 디스크부터 확인
+            if (self._index_dir / _META_FILE).exists():
+                loaded = LocalVectorIndex.load(self._index_dir)
+                mode = loaded.mode
+                if self._is_fresh(loaded, fingerprint):
+                    self._index = loaded
+                    self._debug(f"local_retriever: loaded {len(loaded)} vectors from {self._index_dir}")
+                    return
+            if fingerprint is None:
+                return
+
+            index = LocalVectorIndex.build_from_collection(self._collection, mode=mode)
+            index.save(self._index_dir)
+            self._index = index
+            self._debug(f"local_retriever: built {len(index)} vectors → {self._index_dir}")
+
+    async def search(
+        self, query: str, *, threshold: float = 0.4, query_vector: Sequence[float] | None = None
+    ) -> RetrieverResult:
+        """query_vector가 주어지면 임베딩을 다시 만들지 않습니다 (Atlas 실패 후 전환 시)"""
+        start_ts = time.time()
+        self._debug(f"local_retriever.search: query='{query[:80]}' top_k={self._top_k} threshold={threshold}")
+
+        try:
+            index = await asyncio.to_thread(self._ensure_index)
+            if query_vector is None:
+                query_vector = self._embed(query)
+        except Exception as e:
+            self._debug(f"local_retriever.search: setup failed: {e}")
+            return RetrieverResult(hits=[], chunk_ids=[], documents=[])
+        if index is None:
+            self._debug("local_retriever.search: index unavailable")
+            return RetrieverResult(hits=[], chunk_ids=[], documents=[])
+
+        results = index.search(query_vector, self._top_k)
+
+        hits, chunk_ids, documents = [], [], []
+        for pos, score in results:
+            doc = index.documents[pos]
+            if score < threshold:
+                self._debug(f"  filtered: _id={doc['_id']} score={score:.4f} < {threshold}")
+                continue
+            hit = {"id": doc["_id"], "score": score, "metadata": doc.get("metadata", {})}
+            hits.append(type("Hit", (), hit)())
+            chunk_ids.append(doc["_id"])
+            documents.append({**doc, "score": score})
+            self._debug(f"  hit: _id={doc['_id']} score={score:.4f} text_len={len(doc.get('text', ''))}")
+
+        self._debug(
+            f"local_retriever.search summary: total={len(results)} filtered={len(hits)} "
+            f"mode={index.mode} duration={time.time() - start_ts:.3f}s"
+        )
+        return RetrieverResult(hits=hits, chunk_ids=chunk_ids, documents=documents)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="로컬 벡터 인덱스 생성/검색")
+    parser.add_argument("--index-dir", default=str(DEFAULT_INDEX_DIR), help="인덱스 저장 디렉토리")
+    parser.add_argument("--build", action="store_true", help="regulation_chunks에서 인덱스 생성")
+    parser.add_argument("--mode", choices=INDEX_MODES, default="exact", help="검색 모드")
+    parser.add_argument("--lists", type=int, default=None, help="ivf 리스트 수 (기본: sqrt(N))")
+    parser.add_argument("--query", help="검색해 볼 질의")
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.build:
+        start = time.time()
+        with _file_lock(Path(args.index_dir)):
+            index = LocalVectorIndex.build_from_collection(mode=args.mode, n_lists=args.lists)
+            index.save(Path(args.index_dir))
+        print(f"✅ {len(index)}개 벡터 저장 ({index.mode}) → {args.index_dir} ({time.time() - start:.1f}초)")
+
+    if args.query:
+        index = LocalVectorIndex.load(Path(args.index_dir))
+        query_vector = get_embedding(args.query)
+        start = time.perf_counter()
+        results = index.search(query_vector, args.top_k)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for rank, (pos, score) in enumerate(results, 1):
+            doc = index.documents[pos]
+            label = doc["metadata"].get("law_article_id") or doc["metadata"].get("table_id") or doc["_id"]
+            print(f"{rank}. {label} score={score:.4f}")
+        print(f"검색 시간: {elapsed_ms:.3f}ms ({index.mode}, {len(index)}개)")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ from typing import Any, Callable, Iterable, List, Sequence
 
 from openai import OpenAI
 from dotenv import load_dotenv
+from pymongo.errors import OperationFailure
 
 from app.ai.data import collection, MONGO_AVAILABLE
 
@@ -30,6 +31,25 @@ def get_embedding(text: str) -> List[float]:
     return response.data[0].embedding
 
 
+# $vectorSearch 스테이지 자체를 지원하지 않을 때의 서버 오류 코드
+# 40324: Unrecognized pipeline stage name (Atlas가 아닌 mongod)
+# 6047401: $vectorSearch is not allowed (Atlas 외 환경 / 미지원 티어)
+_UNSUPPORTED_STAGE_CODES = {40324, 6047401}
+
+
+def is_vector_search_unsupported(error: Exception) -> bool:
+    """aggregation 오류가 `$vectorSearch` 미지원(영구적)인지 판단
+
+    타임아웃, 네트워크 오류 등 일시적인 오류는 False → 다음 요청에서 Atlas를 다시 시도합니다.
+    """
+    if not isinstance(error, OperationFailure):
+        return False
+    if error.code in _UNSUPPORTED_STAGE_CODES:
+        return True
+    message = str(error).lower()
+    return "$vectorsearch" in message and ("not allowed" in message or "unrecognized" in message or "unknown" in message)
+
+
 @dataclass(slots=True)
 class RetrieverResult:
     """Container for retriever outputs.
@@ -55,6 +75,10 @@ class MongoVectorRetriever:
     - MongoDB Atlas M10+ tier
     - Vector Search Index named 'vector_index' on 'embedding' field
     - Documents with 'embedding' field (1536 dimensions, OpenAI text-embedding-3-small)
+
+    `$vectorSearch`를 쓸 수 없는 환경(stg, 로컬)에서는 fallback(기본: LocalVectorRetriever)으로 검색합니다.
+    - 스테이지 미지원 오류: 이후 요청도 바로 fallback 사용
+    - 그 밖의 오류(타임아웃, 네트워크 등): 해당 요청만 fallback, 다음 요청은 Atlas 재시도
     """
 
     def __init__(
@@ -65,12 +89,29 @@ class MongoVectorRetriever:
         index_name: str = "vector_index",
         top_k: int = 5,
         debug_fn: Callable[[str], None] | None = None,
+        fallback=None,
+        use_fallback: bool = True,
     ) -> None:
         self._collection = mongo_collection or collection
         self._embed = embed_fn or get_embedding
         self._index_name = index_name
         self._top_k = top_k
         self._debug = debug_fn or (lambda _: None)
+        self._fallback = fallback
+        self._use_fallback = use_fallback
+        self._atlas_unavailable = False
+
+    def _get_fallback(self):
+        """로컬 벡터 인덱스 retriever (첫 사용 시 생성)"""
+        if self._fallback is None:
+            from .local_vector_index import LocalVectorRetriever
+            self._fallback = LocalVectorRetriever(
+                embed_fn=self._embed,
+                mongo_collection=self._collection,
+                top_k=self._top_k,
+                debug_fn=self._debug,
+            )
+        return self._fallback
 
     async def search(self, query: str, *, threshold: float = 0.4) -> RetrieverResult:
         """Execute vector search on MongoDB.
@@ -82,6 +123,9 @@ class MongoVectorRetriever:
         Returns:
             RetrieverResult: hits, chunk_ids, documents를 포함한 검색 결과
         """
+        if self._atlas_unavailable:
+            return await self._get_fallback().search(query, threshold=threshold)
+
         start_ts = time.time()
         self._debug(
             f"mongo_retriever.search: query='{query[:80]}' index={self._index_name} "
@@ -128,6 +172,14 @@ class MongoVectorRetriever:
             )
         except Exception as e:
             self._debug(f"mongo_retriever.search: aggregation failed: {e}")
+            if self._use_fallback:
+                if is_vector_search_unsupported(e):
+                    # $vectorSearch 미지원(Atlas M10 미만, 로컬 mongod) → 로컬 인덱스로 전환
+                    self._atlas_unavailable = True
+                    self._debug("mongo_retriever.search: switching to local vector index")
+                else:
+                    self._debug("mongo_retriever.search: transient error, local vector index for this request")
+                return await self._get_fallback().search(query, threshold=threshold, query_vector=query_vector)
             return RetrieverResult(hits=[], chunk_ids=[], documents=[])
 
         # 4. threshold 필터링 및 결과 구성
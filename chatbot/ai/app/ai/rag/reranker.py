@@ -0,0 +1,173 @@
+"""Post-retrieval reranking and token-budgeted context packing.
+
+검색 후보를 로컬 점수(벡터 점수 + 질의 용어 겹침 + 조문 인접성)로 재정렬하고,
+chunk_large_docs의 원본/분할 청크 중복을 제거한 뒤 고정 토큰 예산 안에 담습니다.
+예산 안에 들어온 컨텍스트는 이미 충분히 짧으므로 LLM 요약을 생략할 수 있습니다.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Sequence
+
+from app.ai.utils.token_counter import get_shared_encoding
+from .hybrid_retriever import extract_identifiers, tokenize_korean
+
+# 컨텍스트 토큰 예산 (gpt-4.1 기준 토큰)
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "6000"))
+# 재정렬할 검색 후보 수 (retriever top_k)
+RERANK_CANDIDATES = int(os.getenv("RAG_RERANK_CANDIDATES", "10"))
+
+# 점수 가중치
+VECTOR_WEIGHT = 0.5
+TERM_WEIGHT = 0.4
+ADJACENCY_WEIGHT = 0.1
+# 질문에 조문/별표 식별자가 그대로 있으면 사실상 정답
+IDENTIFIER_BONUS = 1.0
+
+_ARTICLE_NUMBER = re.compile(r"제(\d+)조")
+
+
+@dataclass(slots=True)
+class PackedContext:
+    """재정렬/중복 제거/예산 적용 결과"""
+    documents: List[dict]          # 컨텍스트에 담을 문서 (최종 순서)
+    tokens: int = 0                # 담긴 문서 토큰 합
+    dropped: int = 0               # 중복 제거 + 예산 초과로 빠진 후보 수
+    truncated: bool = False        # 첫 문서가 예산보다 커서 잘렸는지
+    scores: Dict[str, float] = field(default_factory=dict)  # _id → 재정렬 점수
+
+
+def _article_number(metadata: dict) -> int | None:
+    match = _ARTICLE_NUMBER.search(str(metadata.get("law_article_id") or metadata.get("parent_law_article") or ""))
+    return int(match.group(1)) if match else None
+
+
+def _vector_score(doc: dict) -> float:
+    # HybridRetriever는 score가 RRF 점수이고 벡터 점수는 vector_score에 있음
+    value = doc["vector_score"] if "vector_score" in doc else doc.get("score")
+    return float(value) if value is not None else 0.0
+
+
+def dedupe_documents(docs: Sequence[dict]) -> List[dict]:
+    """원본/분할 청크 및 동일 본문 중복 제거 (앞선 문서 우선)
+
+    같은 후보에 원본과 그 분할 청크가 함께 있으면 분할 청크만 남깁니다.
+    """
+    parent_ids = {str(d.get("metadata", {}).get("parent_id")) for d in docs if d.get("metadata", {}).get("parent_id")}
+    seen_text = set()
+    result = []
+    for doc in docs:
+        if str(doc["_id"]) in parent_ids:
+            continue
+        digest = hashlib.sha1(" ".join(doc.get("text", "").split()).encode("utf-8")).digest()
+        if digest in seen_text:
+            continue
+        seen_text.add(digest)
+        result.append(doc)
+    return result
+
+
+class ContextPacker:
+    """후보 문서 재정렬 + 중복 제거 + 토큰 예산 패킹"""
+
+    def __init__(
+        self,
+        *,
+        token_budget: int = RAG_CONTEXT_TOKEN_BUDGET,
+        model: str = "gpt-4.1",
+        debug_fn: Callable[[str], None] | None = None,
+    ) -> None:
+        self._budget = token_budget
+        self._encoding = get_shared_encoding(model)
+        self._debug = debug_fn or (lambda _: None)
+
+    def rerank(self, question: str, docs: Sequence[dict]) -> List[tuple[float, dict]]:
+        """(점수, 문서) 내림차순"""
+        if not docs:
+            return []
+        query_terms = set(tokenize_korean(question))
+        query_ids = set(extract_identifiers(question))
+
+        vectors = [_vector_score(d) for d in docs]
+        low, high = min(vectors), max(vectors)
+        spread = (high - low) or 1.0
+
+        base = []
+        for doc, vector in zip(docs, vectors):
+            doc_terms = set(tokenize_korean(doc.get("text", "")))
+            term = len(query_terms & doc_terms) / len(query_terms) if query_terms else 0.0
+            base.append(VECTOR_WEIGHT * (vector - low) / spread + TERM_WEIGHT * term)
+
+        # 인접성: 1위 후보와 같은 파일의 앞뒤 조문, 또는 같은 원본의 분할 청크
+        anchor = docs[max(range(len(docs)), key=base.__getitem__)]
+        anchor_meta = anchor.get("metadata", {})
+        anchor_number = _article_number(anchor_meta)
+        anchor_parent = anchor_meta.get("parent_id")
+
+        ranked = []
+        for doc, score in zip(docs, base):
+            metadata = doc.get("metadata", {})
+            number = _article_number(metadata)
+            same_file = metadata.get("source_file") == anchor_meta.get("source_file")
+            if doc is not anchor and (
+                (anchor_parent and metadata.get("parent_id") == anchor_parent)
+                or (same_file and number is not None and anchor_number is not None and abs(number - anchor_number) <= 1)
+            ):
+                score += ADJACENCY_WEIGHT
+            doc_ids = {str(metadata.get(key, "")).replace(" ", "") for key in ("law_article_id", "table_id")}
+            if query_ids & doc_ids:
+                score += IDENTIFIER_BONUS
+            ranked.append((score, doc))
+
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return ranked
+
+    def pack(self, question: str, docs: Sequence[dict], *, rerank: bool = True) -> PackedContext:
+        """재정렬 후 예산 안에 담기
+
+        rerank=False면 입력 순서를 유지합니다 (직접 조회 결과 등).
+        같은 원본의 분할 청크는 chunk_index 순서로 이어 붙입니다.
+        """
+        candidates = dedupe_documents(docs)
+        ranked = self.rerank(question, candidates) if rerank else [(0.0, d) for d in candidates]
+
+        selected: List[tuple[int, dict]] = []
+        used = 0
+        truncated = False
+        for rank, (_, doc) in enumerate(ranked):
+            tokens = self._encoding.encode(doc.get("text", ""))
+            if used + len(tokens) <= self._budget:
+                selected.append((rank, doc))
+                used += len(tokens)
+            elif not selected:
+                # 첫 문서부터 예산 초과 → 앞부분만 사용
+                doc = {**doc, "text": self._encoding.decode(tokens[: self._budget])}
+                selected.append((rank, doc))
+                used = self._budget
+                truncated = True
+
+        # 그룹(원본 단위) 순서는 최고 순위, 그룹 내부는 chunk_index 순서
+        group_rank: Dict[str, int] = {}
+        for rank, doc in selected:
+            key = str(doc.get("metadata", {}).get("parent_id") or doc["_id"])
+            group_rank.setdefault(key, rank)
+        selected.sort(key=lambda item: (
+            group_rank[str(item[1].get("metadata", {}).get("parent_id") or item[1]["_id"])],
+            item[1].get("metadata", {}).get("chunk_index", 0),
+        ))
+
+        packed = PackedContext(
+            documents=[doc for _, doc in selected],
+            tokens=used,
+            dropped=len(docs) - len(selected),
+            truncated=truncated,
+            scores={str(doc["_id"]): round(score, 4) for score, doc in ranked},
+        )
+        self._debug(
+            f"context_packer.pack: candidates={len(docs)} selected={len(packed.documents)} "
+            f"tokens={packed.tokens}/{self._budget} dropped={packed.dropped} truncated={packed.truncated}"
+        )
+        return packed
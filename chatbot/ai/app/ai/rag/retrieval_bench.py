@@ -0,0 +1,140 @@
+"""
+검색기 recall@5 / 지연 시간 벤치마크 (MongoVectorRetriever vs HybridRetriever)
+
+평가 질의는 --queries JSONL({"query": ..., "relevant_ids": [...]})로 주거나,
+없으면 regulation_chunks에서 조문을 샘플링해 자동 생성합니다.
+    - 식별자 질의: "제12조 내용 알려줘"
+    - 용어 질의:   "<조문 제목> 규정 알려줘"
+같은 파일·같은 조문번호의 청크는 모두 정답으로 봅니다.
+
+질의 임베딩은 미리 계산해 두 검색기가 공유하므로 지연 시간에는 임베딩 API 호출이 포함되지 않습니다.
+
+실행:
+    python -m app.ai.rag.retrieval_bench --samples 50
+    python -m app.ai.rag.retrieval_bench --queries eval.jsonl --local
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from app.ai.data import collection
+from .hybrid_retriever import HybridRetriever, get_bm25_index
+from .local_vector_index import LocalVectorRetriever
+from .mongo_vector_retriever import MongoVectorRetriever, get_embedding
+
+TOP_K = 5
+
+
+def build_eval_queries(samples: int, seed: int = 0) -> List[Dict]:
+    """조문 청크를 샘플링하여 (질의, 정답 _id 목록) 생성"""
+    groups: Dict[tuple, Dict] = {}
+    cursor = collection.find(
+        {"metadata.law_article_id": {"$exists": True}, "chunked": {"$exists": False}},
+        {"_id": 1, "metadata.law_article_id": 1, "metadata.title": 1, "metadata.source_file": 1},
+    )
+    for doc in cursor:
+        metadata = doc["metadata"]
+        key = (metadata.get("source_file"), metadata["law_article_id"])
+        group = groups.setdefault(key, {"title": metadata.get("title"), "ids": []})
+        group["ids"].append(str(doc["_id"]))
+
+    rng = random.Random(seed)
+    keys = rng.sample(sorted(groups, key=str), min(samples, len(groups)))
+    queries = []
+    for source_file, article_id in keys:
+        group = groups[(source_file, article_id)]
+        queries.append({"query": f"{article_id} 내용 알려줘", "relevant_ids": group["ids"], "kind": "identifier"})
+        if group["title"]:
+            queries.append({"query": f"{group['title']} 규정 알려줘", "relevant_ids": group["ids"], "kind": "term"})
+    return queries
+
+
+def load_queries(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def recall_at_k(retrieved: List[str], relevant: List[str], k: int = TOP_K) -> float:
+    """|정답 ∩ 상위 k| / min(|정답|, k)"""
+    if not relevant:
+        return 0.0
+    found = len(set(retrieved[:k]) & set(relevant))
+    return found / min(len(relevant), k)
+
+
+async def _evaluate(name: str, retriever, queries: List[Dict]) -> Dict:
+    recalls: Dict[str, List[float]] = {}
+    latencies: List[float] = []
+    for item in queries:
+        start = time.perf_counter()
+        result = await retriever.search(item["query"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        recall = recall_at_k([str(cid) for cid in result.chunk_ids], item["relevant_ids"])
+        recalls.setdefault(item.get("kind", "all"), []).append(recall)
+
+    all_recalls = [r for values in recalls.values() for r in values]
+    latencies.sort()
+    return {
+        "name": name,
+        "recall": statistics.mean(all_recalls) if all_recalls else 0.0,
+        "recall_by_kind": {kind: statistics.mean(values) for kind, values in recalls.items()},
+        "p50_ms": latencies[len(latencies) // 2] if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+    }
+
+
+async def run_benchmark(queries: List[Dict], *, local: bool = False) -> List[Dict]:
+    # 질의 임베딩 사전 계산 (두 검색기 공유)
+    embeddings = {item["query"]: get_embedding(item["query"]) for item in queries}
+    embed_fn = embeddings.__getitem__
+
+    if local:
+        vector = LocalVectorRetriever(embed_fn=embed_fn, top_k=TOP_K)
+        candidates = LocalVectorRetriever(embed_fn=embed_fn, top_k=20)
+    else:
+        vector = MongoVectorRetriever(embed_fn=embed_fn, top_k=TOP_K)
+        candidates = MongoVectorRetriever(embed_fn=embed_fn, top_k=20)
+
+    start = time.perf_counter()
+    get_bm25_index(refresh=True)
+    print(f"[정보] BM25 색인 생성 {(time.perf_counter() - start) * 1000:.0f}ms")
+    hybrid = HybridRetriever(vector_retriever=candidates, top_k=TOP_K)
+
+    # 워밍업 (로컬 인덱스 로드 등)
+    await vector.search(queries[0]["query"])
+    await hybrid.search(queries[0]["query"])
+
+    return [
+        await _evaluate("vector", vector, queries),
+        await _evaluate("hybrid", hybrid, queries),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="검색기 recall@5 / 지연 시간 벤치마크")
+    parser.add_argument("--queries", help="평가 질의 JSONL (query, relevant_ids)")
+    parser.add_argument("--samples", type=int, default=50, help="자동 생성 시 샘플링할 조문 수")
+    parser.add_argument("--local", action="store_true", help="Atlas 대신 로컬 벡터 인덱스 사용")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries) if args.queries else build_eval_queries(args.samples)
+    if not queries:
+        print("[경고] 평가 질의가 없습니다.")
+        return
+    print(f"[정보] 평가 질의 {len(queries)}개")
+
+    for row in asyncio.run(run_benchmark(queries, local=args.local)):
+        kinds = ", ".join(f"{kind}={value:.3f}" for kind, value in row["recall_by_kind"].items())
+        print(
+            f"{row['name']:>8}: recall@{TOP_K}={row['recall']:.3f} ({kinds}) "
+            f"p50={row['p50_ms']:.1f}ms p95={row['p95_ms']:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
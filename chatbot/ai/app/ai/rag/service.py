@@ -1,6 +1,8 @@
 """RAG service orchestrating the modular Phase 2 components."""
 from __future__ import annotations
 
+import asyncio
+import os
 from dataclasses import dataclass
 from typing import Any, Callable, Optional, Sequence
 
@@ -8,6 +10,10 @@ from .RagDocumentPackage import RagDocumentPackage, ContextBuilder
 from .gate import GateDecision, RegulationGate
 from .repository import MongoChunkRepository
 from .mongo_vector_retriever import MongoVectorRetriever, RetrieverResult
+from .local_vector_index import LocalVectorRetriever
+from .hybrid_retriever import HybridRetriever
+from .article_lookup import ArticleLookup
+from .reranker import ContextPacker, RERANK_CANDIDATES
 
 
 @dataclass(slots=True)
@@ -30,10 +36,14 @@ class RagResult:
         document_count: int = 0            # DB에서 불러온 문서 조각 개수
         preview_count: int = 0             # 미리보기 문장을 사용했다면 그 개수
         source_documents: list = None      # 검색된 문서들의 메타데이터 (law_article_id, source_file, title)
+        context_tokens: int = 0            # 토큰 예산 패킹 후 컨텍스트 토큰 수 (0이면 미측정)
+        context_documents: list = None     # 컨텍스트에 담긴 문서 (text, score) - 로컬 추출 요약용
         
         def __post_init__(self):
             if self.source_documents is None:
                 object.__setattr__(self, 'source_documents', [])
+            if self.context_documents is None:
+                object.__setattr__(self, 'context_documents', [])
 
 
 class RagService:
@@ -46,24 +56,34 @@ class RagService:
         repository: MongoChunkRepository | None = None,
         context_builder: ContextBuilder | None = None,
         gate: RegulationGate | None = None,
+        article_lookup: ArticleLookup | None = None,
+        context_packer: ContextPacker | None = None,
         debug_fn: Callable[[str], None] | None = None,
         token_counter=None,
     ) -> None:
         self._debug = debug_fn or (lambda _: None)
         self._repository = repository or MongoChunkRepository(debug_fn=self._debug)
 
-        # MongoDB Vector Search 사용
+        # MongoDB Vector Search 사용 (VECTOR_SEARCH_BACKEND=local이면 로컬 인덱스만 사용)
         if retriever is not None:
             self._retriever = retriever
+        elif os.getenv("VECTOR_SEARCH_BACKEND", "atlas").lower() == "local":
+            self._debug("RagService: Using LocalVectorRetriever")
+            self._retriever = LocalVectorRetriever(top_k=RERANK_CANDIDATES, debug_fn=self._debug)
+        elif os.getenv("RAG_RETRIEVER", "vector").lower() == "hybrid":
+            self._debug("RagService: Using HybridRetriever (BM25 + MongoVectorRetriever)")
+            self._retriever = HybridRetriever(top_k=RERANK_CANDIDATES, debug_fn=self._debug)
         else:
             self._debug("RagService: Using MongoVectorRetriever")
-            self._retriever = MongoVectorRetriever(top_k=5, debug_fn=self._debug)
+            self._retriever = MongoVectorRetriever(top_k=RERANK_CANDIDATES, debug_fn=self._debug)
 
         self._use_mongo_vector = True
         self._context_builder = context_builder or ContextBuilder(
             self._repository, debug_fn=self._debug
         )
         self._gate = gate or RegulationGate(debug_fn=self._debug, token_counter=token_counter)
+        self._article_lookup = article_lookup or ArticleLookup(debug_fn=self._debug)
+        self._context_packer = context_packer or ContextPacker(debug_fn=self._debug)
         self._last_result: RagResult | None = None
 
     def _make_result(
@@ -78,6 +98,8 @@ class RagService:
         document_count: int = 0,
         preview_count: int = 0,
         source_documents: list = None,
+        context_tokens: int = 0,
+        context_documents: list = None,
     ) -> RagResult:
         """RagResult 생성 및 캐시 저장 헬퍼 (중복 코드 제거용)"""
         result = RagResult(
@@ -90,6 +112,8 @@ class RagService:
             document_count=document_count,
             preview_count=preview_count,
             source_documents=source_documents or [],
+            context_tokens=context_tokens,
+            context_documents=context_documents or [],
         )
         self._last_result = result
         return result
@@ -99,12 +123,36 @@ class RagService:
         질문을 받아 RAG 검색 및 컨텍스트 조회 전 과정을 수행합니다.
         
         처리 흐름:
+        0) 조문/별표 직접 참조 ("제34조", "별표 2") → 식별자 색인에서 바로 조회 후 종료
         1) 규정 질문 여부 판정 (gate) → 아니면 즉시 종료
         2) 벡터 검색 수행 (retriever) → 결과 없으면 종료
         3) 청크 ID 추출 확인 → 없으면 종료
         4) MongoDB 본문 조회 + 컨텍스트 조립 (context_builder)
         5) 최종 결과 반환 (컨텍스트 문자열 + 메타데이터)
         """
+        # 0단계: 명시적 조문/별표 참조는 gate/임베딩/벡터검색 없이 직접 조회
+        direct_docs = await asyncio.to_thread(self._article_lookup.lookup, question)
+        if direct_docs:
+            self._debug(f"rag_service.retrieve_context: 직접 참조 조회 {len(direct_docs)}건 → 검색 생략")
+            hits = [
+                type("Hit", (), {"id": doc["_id"], "score": 1.0, "metadata": doc.get("metadata", {})})()
+                for doc in direct_docs
+            ]
+            packed = self._context_packer.pack(question, direct_docs, rerank=False)
+            doc_package = self._context_builder.package_documents(packed.documents)
+            return self._make_result(
+                merged_documents_text=doc_package.merged_documents_text,
+                hits=hits,
+                chunk_ids=[doc["_id"] for doc in packed.documents],
+                gate_reason="조문/별표 직접 참조",
+                is_regulation=True,
+                context_source=doc_package.source,
+                document_count=doc_package.document_count,
+                source_documents=doc_package.source_documents,
+                context_tokens=packed.tokens,
+                context_documents=packed.documents,
+            )
+
         # 1단계: 규정 질문 여부 판정
         self._debug("rag_service.retrieve_context: 레그검사 시작")
         decision: GateDecision = await self._gate.decide(question)
@@ -153,9 +201,19 @@ class RagService:
                 context_source="none",
             )
 
-        # 4단계: MongoDB 본문 조회 + 문서 패키지 조립
+        # 4단계: 재정렬 + 토큰 예산 패킹 + 문서 패키지 조립
         self._debug("rag_service.retrieve_context: 문서 패키지 조립 시작")
-        doc_package: RagDocumentPackage = await self._context_builder.build(hits, chunk_ids)
+        context_tokens = 0
+        context_documents = []
+        if retrieval.documents:
+            # 검색기가 본문을 함께 돌려준 경우: MongoDB 재조회 없이 재정렬 후 예산 안에 담기
+            packed = self._context_packer.pack(question, retrieval.documents)
+            chunk_ids = [doc["_id"] for doc in packed.documents]
+            context_tokens = packed.tokens
+            context_documents = packed.documents
+            doc_package = self._context_builder.package_documents(packed.documents)
+        else:
+            doc_package: RagDocumentPackage = await self._context_builder.build(hits, chunk_ids)
         
         if doc_package.source in {"preview", "none"}:
             print("[INFO] MongoDB에서 매칭된 문서 없음")
@@ -173,6 +231,8 @@ class RagService:
             document_count=doc_package.document_count,
             preview_count=doc_package.preview_count,
             source_documents=doc_package.source_documents,
+            context_tokens=context_tokens,
+            context_documents=context_documents,
         )
 
     def is_regulation(self, question: str) -> bool:
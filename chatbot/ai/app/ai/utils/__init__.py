@@ -4,10 +4,23 @@ AI 유틸리티 모듈
 토큰 카운팅, 비용 계산 등 공통 유틸리티 제공
 """
 
-from .token_counter import TokenCounter
+from .token_counter import (
+    TokenCounter,
+    bind_token_counter,
+    current_token_counter,
+    get_shared_encoding,
+)
 from .cost_calculator import CostCalculator
+from .cost_engine import PricingTable, get_pricing_table, price_columns, price_usage_list
 
 __all__ = [
     "TokenCounter",
+    "bind_token_counter",
+    "current_token_counter",
+    "get_shared_encoding",
     "CostCalculator",
+    "PricingTable",
+    "get_pricing_table",
+    "price_columns",
+    "price_usage_list",
 ]
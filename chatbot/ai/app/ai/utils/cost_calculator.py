@@ -11,6 +11,54 @@ from pathlib import Path
 from decimal import Decimal
 from typing import Dict, List
 from collections import defaultdict
+from functools import lru_cache
+
+from .cost_engine import get_pricing_table, price_usage_list, resolve_pricing_path
+
+
+@lru_cache(maxsize=None)
+def _load_decimal_pricing(pricing_file: Path):
+    """pricing.yaml → (원본 데이터, 모델별 Decimal 단가 맵, 기본 단가) (경로별 1회)
+
+    Raises:
+        FileNotFoundError: pricing.yaml 파일이 없을 때
+    """
+    if not pricing_file.exists():
+        raise FileNotFoundError(f"pricing.yaml not found: {pricing_file}")
+    
+    with open(pricing_file, 'r', encoding='utf-8') as f:
+        pricing_data = yaml.safe_load(f)
+    
+    # 모델별 가격 맵 생성
+    pricing_map = {}
+    for model_entry in pricing_data.get("models", []):
+        model_id = model_entry["id"]
+        # 캐시 입력 단가: cache_input(OpenAI) → cache(Gemini) → input
+        cache_rate = model_entry.get(
+            "cache_input_per_1m_tokens_usd",
+            model_entry.get("cache_per_1m_tokens_usd", model_entry["input_per_1m_tokens_usd"]),
+        )
+        pricing_map[model_id] = {
+            "input": Decimal(str(model_entry["input_per_1m_tokens_usd"])),
+            "output": Decimal(str(model_entry["output_per_1m_tokens_usd"])),
+            "cache_input": Decimal(str(cache_rate)),
+            "cache": Decimal(str(model_entry.get("cache_per_1m_tokens_usd", model_entry["input_per_1m_tokens_usd"]))),
+            "currency": model_entry["currency"],
+            "provider": model_entry.get("provider", "unknown"),
+            "note": model_entry.get("note", "")
+        }
+    
+    # 폴백 기본값
+    default_entry = pricing_data.get("default", {})
+    default_pricing = {
+        "input": Decimal(str(default_entry.get("input_per_1m_tokens_usd", 2.50))),
+        "output": Decimal(str(default_entry.get("output_per_1m_tokens_usd", 10.00))),
+        "cache_input": Decimal(str(default_entry.get("input_per_1m_tokens_usd", 2.50))),
+        "currency": default_entry.get("currency", "USD"),
+        "provider": default_entry.get("provider", "unknown"),
+    }
+    
+    return pricing_data, pricing_map, default_pricing
 
 
 class CostCalculator:
@@ -21,6 +69,7 @@ class CostCalculator:
     Provider별 비용 집계 기능도 지원합니다.
     
     Decimal을 사용하여 소수점 정밀도를 유지합니다.
+    여러 role을 한 번에 계산하는 calculate_batch는 컴파일된 가격표(cost_engine)로 벡터 계산합니다.
     """
     
     def __init__(self, pricing_path: str = "config/pricing.yaml"):
@@ -32,41 +81,11 @@ class CostCalculator:
         Raises:
             FileNotFoundError: pricing.yaml 파일이 없을 때
         """
-        # 절대 경로 또는 상대 경로 처리
-        pricing_file = Path(pricing_path)
-        if not pricing_file.is_absolute():
-            # 상대 경로인 경우 app/ 디렉토리 기준으로 해석
-            base_dir = Path(__file__).resolve().parent.parent.parent  # app/
-            pricing_file = base_dir / pricing_path
-        
-        if not pricing_file.exists():
-            raise FileNotFoundError(f"pricing.yaml not found: {pricing_file}")
-        
-        with open(pricing_file, 'r', encoding='utf-8') as f:
-            self.pricing_data = yaml.safe_load(f)
-        
-        # 모델별 가격 맵 생성
-        self.pricing_map = {}
-        for model_entry in self.pricing_data.get("models", []):
-            model_id = model_entry["id"]
-            self.pricing_map[model_id] = {
-                "input": Decimal(str(model_entry["input_per_1m_tokens_usd"])),
-                "output": Decimal(str(model_entry["output_per_1m_tokens_usd"])),
-                "cache_input": Decimal(str(model_entry.get("cache_input_per_1m_tokens_usd", model_entry["input_per_1m_tokens_usd"]))),
-                "cache": Decimal(str(model_entry.get("cache_per_1m_tokens_usd", model_entry["input_per_1m_tokens_usd"]))),
-                "currency": model_entry["currency"],
-                "provider": model_entry.get("provider", "unknown"),
-                "note": model_entry.get("note", "")
-            }
-        
-        # 폴백 기본값
-        default_entry = self.pricing_data.get("default", {})
-        self.default_pricing = {
-            "input": Decimal(str(default_entry.get("input_per_1m_tokens_usd", 2.50))),
-            "output": Decimal(str(default_entry.get("output_per_1m_tokens_usd", 10.00))),
-            "currency": default_entry.get("currency", "USD"),
-            "provider": default_entry.get("provider", "unknown"),
-        }
+        # 가격표는 경로별로 프로세스당 1회만 파싱/컴파일 (인스턴스 간 공유, 읽기 전용)
+        self.pricing_table = get_pricing_table(pricing_path)
+        self.pricing_data, self.pricing_map, self.default_pricing = _load_decimal_pricing(
+            resolve_pricing_path(pricing_path)
+        )
         
         # Provider별 비용 집계용 (선택적)
         self.cost_by_provider = defaultdict(lambda: {"input_cost": 0.0, "output_cost": 0.0, "total_cost": 0.0})
@@ -79,7 +98,7 @@ class CostCalculator:
         
         Args:
             token_usage: 토큰 사용량 통계
-                        {"input_tokens": N, "output_tokens": M, ...}
+                        {"input_tokens": N, "output_tokens": M, "cached_tokens": C, ...}
             model: 모델 ID (예: "gpt-4.1")
         
         Returns:
@@ -99,10 +118,16 @@ class CostCalculator:
         input_tokens = Decimal(token_usage.get("input_tokens", 0))
         output_tokens = Decimal(token_usage.get("output_tokens", 0))
         reasoning_tokens = Decimal(token_usage.get("reasoning_tokens", 0))  # 선택적 필드, o3-mini 등만 사용
+        # 프롬프트 캐시 적중 토큰은 input_tokens에 포함되어 있으므로 그 범위로 제한
+        cached_tokens = min(Decimal(token_usage.get("cached_tokens", 0) or 0), input_tokens)
 
         # 비용 계산 (1M 토큰 기준)
         # reasoning 토큰은 output 가격으로 계산됨 (OpenAI API 정책)
-        input_cost = (input_tokens / Decimal("1000000")) * pricing["input"]
+        # 캐시 적중 입력 토큰은 cache_input 단가로 계산
+        input_cost = (
+            ((input_tokens - cached_tokens) / Decimal("1000000")) * pricing["input"]
+            + (cached_tokens / Decimal("1000000")) * pricing.get("cache_input", pricing["input"])
+        )
         output_cost = ((output_tokens + reasoning_tokens) / Decimal("1000000")) * pricing["output"]
         total_cost = input_cost + output_cost
         
@@ -163,26 +188,12 @@ class CostCalculator:
                     "currency": "USD"
                 }
         """
-        total_cost = 0.0
-        by_model = {}
+        # 같은 모델을 쓰는 role들은 by_model에서 합산됨
+        result = price_usage_list(usage_list, self.pricing_table)
         
         self.reset_provider_costs()
+        for provider, costs in result["by_provider"].items():
+            self.cost_by_provider[provider].update(costs)
         
-        for usage in usage_list:
-            model = usage.get("model")
-            token_usage = {
-                "input_tokens": usage.get("input_tokens", 0),
-                "output_tokens": usage.get("output_tokens", 0),
-                "reasoning_tokens": usage.get("reasoning_tokens", 0),  # o3-mini 등의 추론 토큰 지원
-            }
-
-            cost_data = self.calculate(token_usage, model)
-            total_cost += cost_data["total_cost_usd"]
-            by_model[model] = cost_data
-        
-        return {
-            "total_cost_usd": total_cost,
-            "by_provider": self.get_cost_by_provider(),
-            "by_model": by_model,
-            "currency": "USD"
-        }
+        result["currency"] = "USD"
+        return result
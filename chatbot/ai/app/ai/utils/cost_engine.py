@@ -0,0 +1,394 @@
+"""
+벡터화 비용 엔진
+
+pricing.yaml을 프로세스당 1회 "모델 ID → 단가 배열"로 컴파일하고,
+단일 요청(role별 사용량 리스트) 또는 컬럼형 배치(NumPy 배열)를 한 번의 벡터 연산으로 계산합니다.
+
+가격 변경 시 과거 사용 로그(JSONL 메타데이터)를 재계산하는 CLI도 제공합니다.
+    python -m app.ai.utils.cost_engine --input data.jsonl --output repriced.jsonl
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import yaml
+
+# app/ 디렉토리 기준 기본 가격표 경로
+_APP_DIR = Path(__file__).resolve().parent.parent.parent
+DEFAULT_PRICING_PATH = "config/pricing.yaml"
+
+# 단가 배열 컬럼 인덱스 (USD / 1 token)
+RATE_INPUT = 0
+RATE_CACHE_INPUT = 1
+RATE_OUTPUT = 2
+
+_PER_TOKEN = 1_000_000.0
+
+
+@dataclass(frozen=True)
+class PricingTable:
+    """컴파일된 가격표
+
+    rates[i]는 model_ids[i]의 (input, cache_input, output) 토큰당 단가이며,
+    마지막 행(default_index)은 미등록 모델용 기본값입니다.
+    """
+
+    model_ids: Tuple[str, ...]
+    """등록된 모델 ID 목록 (rates 행 순서와 동일)"""
+
+    providers: Tuple[str, ...]
+    """행별 provider 이름 (마지막은 기본값 provider)"""
+
+    rates: np.ndarray
+    """shape (모델 수 + 1, 3), float64, USD per token"""
+
+    index: Dict[str, int]
+    """모델 ID → 행 인덱스"""
+
+    currency: str = "USD"
+
+    @property
+    def default_index(self) -> int:
+        """미등록 모델에 사용되는 기본값 행 인덱스"""
+        return len(self.model_ids)
+
+    def model_index(self, model: Optional[str]) -> int:
+        """모델 ID → 행 인덱스 (미등록 모델은 기본값)"""
+        return self.index.get(model or "", self.default_index)
+
+    def encode_models(self, models: Iterable[Optional[str]]) -> np.ndarray:
+        """모델 ID 시퀀스를 행 인덱스 배열로 변환"""
+        return np.fromiter((self.model_index(m) for m in models), dtype=np.intp)
+
+    def model_name(self, idx: int) -> str:
+        """행 인덱스 → 모델 ID (기본값 행은 "default")"""
+        return self.model_ids[idx] if idx < len(self.model_ids) else "default"
+
+
+def _rate_row(entry: Dict[str, Any], default_input: float = 2.50, default_output: float = 10.00) -> List[float]:
+    """pricing.yaml 항목 → [input, cache_input, output] 토큰당 단가
+
+    캐시 입력 단가는 cache_input(OpenAI) → cache(Gemini) → input 순서로 사용합니다.
+    """
+    input_rate = float(entry.get("input_per_1m_tokens_usd", default_input))
+    output_rate = float(entry.get("output_per_1m_tokens_usd", default_output))
+    cache_rate = float(entry.get("cache_input_per_1m_tokens_usd", entry.get("cache_per_1m_tokens_usd", input_rate)))
+    return [input_rate / _PER_TOKEN, cache_rate / _PER_TOKEN, output_rate / _PER_TOKEN]
+
+
+def resolve_pricing_path(pricing_path: str = DEFAULT_PRICING_PATH) -> Path:
+    """가격표 경로 해석 (상대 경로는 app/ 디렉토리 기준)"""
+    pricing_file = Path(pricing_path)
+    if not pricing_file.is_absolute():
+        pricing_file = _APP_DIR / pricing_path
+    return pricing_file.resolve()
+
+
+def compile_pricing(pricing_data: Dict[str, Any]) -> PricingTable:
+    """파싱된 pricing.yaml 데이터를 PricingTable로 컴파일
+
+    Args:
+        pricing_data: yaml.safe_load 결과
+
+    Returns:
+        PricingTable: 컴파일된 가격표
+    """
+    model_ids: List[str] = []
+    providers: List[str] = []
+    rows: List[List[float]] = []
+
+    for entry in pricing_data.get("models", []):
+        model_ids.append(entry["id"])
+        providers.append(entry.get("provider", "unknown"))
+        rows.append(_rate_row(entry))
+
+    default_entry = pricing_data.get("default", {})
+    providers.append(default_entry.get("provider", "unknown"))
+    rows.append(_rate_row(default_entry))
+
+    rates = np.asarray(rows, dtype=np.float64)
+    rates.setflags(write=False)
+
+    return PricingTable(
+        model_ids=tuple(model_ids),
+        providers=tuple(providers),
+        rates=rates,
+        index={model_id: i for i, model_id in enumerate(model_ids)},
+        currency=default_entry.get("currency", "USD"),
+    )
+
+
+@lru_cache(maxsize=None)
+def _load_pricing_table(pricing_file: Path) -> PricingTable:
+    if not pricing_file.exists():
+        raise FileNotFoundError(f"pricing.yaml not found: {pricing_file}")
+
+    with open(pricing_file, "r", encoding="utf-8") as f:
+        return compile_pricing(yaml.safe_load(f) or {})
+
+
+def get_pricing_table(pricing_path: str = DEFAULT_PRICING_PATH) -> PricingTable:
+    """가격표를 프로세스당 1회 컴파일하여 반환 (경로별 캐시)
+
+    Raises:
+        FileNotFoundError: pricing.yaml 파일이 없을 때
+    """
+    return _load_pricing_table(resolve_pricing_path(pricing_path))
+
+
+def price_columns(
+    table: PricingTable,
+    model_idx: np.ndarray,
+    input_tokens: np.ndarray,
+    output_tokens: np.ndarray,
+    cached_tokens: Optional[np.ndarray] = None,
+    reasoning_tokens: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """컬럼형 배치 비용 계산 (단일 벡터 연산)
+
+    CostCalculator.calculate와 동일한 규칙을 따릅니다.
+    - 캐시 적중 토큰은 input_tokens 범위로 제한하고 cache_input 단가 적용
+    - reasoning 토큰은 output 단가 적용
+
+    Args:
+        table: 컴파일된 가격표
+        model_idx: 행별 모델 인덱스 (PricingTable.encode_models)
+        input_tokens / output_tokens / cached_tokens / reasoning_tokens: 행별 토큰 수
+
+    Returns:
+        Dict: {"input_cost_usd": ndarray, "output_cost_usd": ndarray, "total_cost_usd": ndarray}
+    """
+    rates = table.rates[model_idx]
+    inp = np.asarray(input_tokens, dtype=np.float64)
+    out = np.asarray(output_tokens, dtype=np.float64)
+    cached = np.zeros_like(inp) if cached_tokens is None else np.minimum(np.asarray(cached_tokens, dtype=np.float64), inp)
+    if reasoning_tokens is not None:
+        out = out + np.asarray(reasoning_tokens, dtype=np.float64)
+
+    input_cost = (inp - cached) * rates[:, RATE_INPUT] + cached * rates[:, RATE_CACHE_INPUT]
+    output_cost = out * rates[:, RATE_OUTPUT]
+
+    return {
+        "input_cost_usd": input_cost,
+        "output_cost_usd": output_cost,
+        "total_cost_usd": input_cost + output_cost,
+    }
+
+
+def price_usage_list(usage_list: Sequence[Dict[str, Any]], table: Optional[PricingTable] = None) -> Dict[str, Any]:
+    """role별 사용량 리스트(TokenCounter.get_role_usage_for_cost_calc) 비용 계산
+
+    Args:
+        usage_list: [{"role": ..., "model": ..., "input_tokens": N, "output_tokens": M,
+                      "reasoning_tokens": K, "cached_tokens": C}, ...]
+        table: 컴파일된 가격표 (None이면 기본 가격표)
+
+    Returns:
+        Dict: CostCalculator.calculate_batch와 동일한 형식
+              (by_model은 같은 모델을 쓰는 role들을 합산)
+    """
+    table = table or get_pricing_table()
+    if not usage_list:
+        return {"total_cost_usd": 0.0, "by_provider": {}, "by_model": {}, "currency": table.currency}
+
+    model_idx = table.encode_models(u.get("model") for u in usage_list)
+    columns = np.array(
+        [
+            [
+                u.get("input_tokens", 0) or 0,
+                u.get("output_tokens", 0) or 0,
+                u.get("cached_tokens", 0) or 0,
+                u.get("reasoning_tokens", 0) or 0,
+            ]
+            for u in usage_list
+        ],
+        dtype=np.float64,
+    )
+    costs = price_columns(table, model_idx, columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3])
+
+    by_model: Dict[str, Dict[str, Any]] = {}
+    by_provider: Dict[str, Dict[str, float]] = {}
+    for i, usage in enumerate(usage_list):
+        idx = int(model_idx[i])
+        provider = table.providers[idx]
+        model_key = usage.get("model") or table.model_name(idx)
+        input_cost = float(costs["input_cost_usd"][i])
+        output_cost = float(costs["output_cost_usd"][i])
+
+        model_entry = by_model.setdefault(model_key, {
+            "input_cost_usd": 0.0,
+            "output_cost_usd": 0.0,
+            "total_cost_usd": 0.0,
+            "currency": table.currency,
+            "provider": provider,
+        })
+        model_entry["input_cost_usd"] += input_cost
+        model_entry["output_cost_usd"] += output_cost
+        model_entry["total_cost_usd"] += input_cost + output_cost
+
+        provider_entry = by_provider.setdefault(provider, {"input_cost": 0.0, "output_cost": 0.0, "total_cost": 0.0})
+        provider_entry["input_cost"] += input_cost
+        provider_entry["output_cost"] += output_cost
+        provider_entry["total_cost"] += input_cost + output_cost
+
+    return {
+        "total_cost_usd": float(costs["total_cost_usd"].sum()),
+        "by_provider": by_provider,
+        "by_model": by_model,
+        "currency": table.currency,
+    }
+
+
+# ============================================================
+# 과거 사용 로그 재계산 (re-pricing)
+# ============================================================
+
+def _extract_token_usage(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """로그 레코드에서 token_usage 메타데이터 추출
+
+    지원 형식: {"token_usage": {...}}, {"metadata": {"token_usage": {...}}}, {"data": {"token_usage": {...}}}
+    """
+    for container in (record, record.get("metadata") or {}, record.get("data") or {}):
+        if isinstance(container, dict) and isinstance(container.get("token_usage"), dict):
+            return container["token_usage"]
+    return None
+
+
+def _usage_rows(token_usage: Dict[str, Any]) -> Iterator[Tuple[Optional[str], int, int, int, int]]:
+    """token_usage → (model, input, output, cached, reasoning) 행
+
+    role_breakdown이 있으면 role별로, 없으면 합계 1행을 생성합니다.
+    role별 모델(role_models)이 기록되지 않은 과거 로그는 대표 모델로 계산합니다.
+    """
+    default_model = token_usage.get("model")
+    breakdown = token_usage.get("role_breakdown")
+    role_models = token_usage.get("role_models") or {}
+
+    if breakdown:
+        for role, tokens in breakdown.items():
+            yield (
+                role_models.get(role, default_model),
+                tokens.get("input", 0) or 0,
+                tokens.get("output", 0) or 0,
+                tokens.get("cached", 0) or 0,
+                tokens.get("reasoning", 0) or 0,
+            )
+    else:
+        yield (
+            default_model,
+            token_usage.get("input_tokens", 0) or 0,
+            token_usage.get("output_tokens", 0) or 0,
+            token_usage.get("cached_tokens", 0) or 0,
+            token_usage.get("reasoning_tokens", 0) or 0,
+        )
+
+
+def reprice_records(records: List[Dict[str, Any]], table: PricingTable) -> Dict[str, float]:
+    """레코드 묶음의 token_usage 비용을 새 가격표로 재계산 (in-place)
+
+    모든 role 행을 하나의 컬럼형 배치로 만들어 1회 벡터 연산 후
+    np.bincount로 레코드별 합계를 구합니다.
+
+    Returns:
+        Dict: {"records": 재계산 건수, "old_total_usd": float, "new_total_usd": float}
+    """
+    owners: List[int] = []
+    models: List[Optional[str]] = []
+    rows: List[Tuple[int, int, int, int]] = []
+    usages: List[Dict[str, Any]] = []
+
+    for record in records:
+        token_usage = _extract_token_usage(record)
+        if token_usage is None:
+            continue
+        owner = len(usages)
+        usages.append(token_usage)
+        for model, inp, out, cached, reasoning in _usage_rows(token_usage):
+            owners.append(owner)
+            models.append(model)
+            rows.append((inp, out, cached, reasoning))
+
+    if not usages:
+        return {"records": 0, "old_total_usd": 0.0, "new_total_usd": 0.0}
+
+    columns = np.asarray(rows, dtype=np.float64)
+    costs = price_columns(
+        table, table.encode_models(models), columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3]
+    )
+
+    owner_idx = np.asarray(owners, dtype=np.intp)
+    n = len(usages)
+    input_cost = np.bincount(owner_idx, weights=costs["input_cost_usd"], minlength=n)
+    output_cost = np.bincount(owner_idx, weights=costs["output_cost_usd"], minlength=n)
+
+    old_total = 0.0
+    for i, token_usage in enumerate(usages):
+        old_total += float(token_usage.get("total_cost_usd", 0) or 0)
+        token_usage["input_cost_usd"] = float(input_cost[i])
+        token_usage["output_cost_usd"] = float(output_cost[i])
+        token_usage["total_cost_usd"] = float(input_cost[i] + output_cost[i])
+
+    return {
+        "records": n,
+        "old_total_usd": old_total,
+        "new_total_usd": float((input_cost + output_cost).sum()),
+    }
+
+
+def _iter_jsonl_batches(path: Path, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="과거 사용 로그(JSONL) 비용 재계산")
+    parser.add_argument("--input", required=True, help="사용 로그 JSONL (token_usage 메타데이터 포함)")
+    parser.add_argument("--output", help="재계산 결과 JSONL 경로 (생략 시 요약만 출력)")
+    parser.add_argument("--pricing", default=DEFAULT_PRICING_PATH, help="가격표 경로 (app/ 기준 상대 경로 가능)")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="한 번에 벡터 계산할 레코드 수")
+    args = parser.parse_args(argv)
+
+    input_path = Path(args.input)
+    if not input_path.exists():
+        print(f"[cost_engine] 입력 파일 없음: {input_path}", file=sys.stderr)
+        return 1
+
+    table = get_pricing_table(args.pricing)
+    out_file = open(args.output, "w", encoding="utf-8") if args.output else None
+
+    totals = {"records": 0, "old_total_usd": 0.0, "new_total_usd": 0.0}
+    try:
+        for batch in _iter_jsonl_batches(input_path, args.batch_size):
+            summary = reprice_records(batch, table)
+            for key in totals:
+                totals[key] += summary[key]
+            if out_file:
+                for record in batch:
+                    out_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        if out_file:
+            out_file.close()
+
+    print(f"[cost_engine] 재계산 {totals['records']}건: "
+          f"${totals['old_total_usd']:.6f} → ${totals['new_total_usd']:.6f} "
+          f"(차이 ${totals['new_total_usd'] - totals['old_total_usd']:+.6f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+토큰 추적 모드별 스트리밍 델타 오버헤드 마이크로 벤치마크
+
+_stream_openai_response의 델타 처리 경로를 그대로 재현하여
+추적 모드(api_only / api_first / tiktoken_only / hybrid)별 델타당 오버헤드를 측정합니다.
+
+실행:
+    python -m app.ai.utils.token_bench --deltas 2000 --repeat 5
+"""
+
+import argparse
+import time
+from typing import Dict, List
+
+from .token_counter import TRACKING_MODES, TokenCounter
+
+# 한국어 응답 스트림을 흉내 낸 델타 (Responses API는 보통 1~3 토큰 단위로 전송)
+_SAMPLE_DELTAS = ["한라", "대학교", " 학사", "일정", "은 ", "다음", "과 ", "같습니다", ".", "\n", "- ", "수강", "신청", ": ", "2월", " 24", "일"]
+
+_SAMPLE_CONTEXT = [
+    {"role": "system", "content": "당신은 한라대학교 안내 챗봇입니다."},
+    {"role": "system", "content": "[일반지침]\n규정과 검색 결과에 근거해 답변하세요."},
+    {"role": "user", "content": "수강신청 일정 알려줘"},
+    {"role": "system", "content": "[요청정보]\n\n[사용자쿼리]\n수강신청 일정 알려줘"},
+]
+
+
+def _simulate_stream(counter: TokenCounter, deltas: List[str], with_usage: bool) -> None:
+    """stream.py의 스트리밍 토큰 집계 경로 1회 실행"""
+    counter.count_openai_streaming_tokens(_SAMPLE_CONTEXT, role="streaming")
+
+    track_deltas = counter.tracks_stream_deltas()
+    completed_text = ""
+    for delta in deltas:
+        completed_text += delta
+        if track_deltas:
+            counter.count_output_delta(delta)
+
+    if with_usage:
+        counter.update_from_api_usage(
+            usage={"input_tokens": 120, "output_tokens": len(deltas), "reasoning_tokens": 0, "cached_tokens": 0},
+            role="streaming",
+            model=counter.model,
+            category="input",
+            replace=True,
+        )
+    counter.finalize_streaming(role="streaming", output_text=completed_text)
+
+
+def run_benchmark(
+    deltas: int = 2000,
+    repeat: int = 5,
+    model: str = "gpt-4.1",
+    with_usage: bool = True,
+) -> Dict[str, float]:
+    """모드별 델타당 평균 오버헤드(마이크로초) 측정
+
+    Args:
+        deltas: 스트림 1회당 델타 수
+        repeat: 반복 횟수 (최솟값 사용)
+        model: 인코딩 기준 모델
+        with_usage: response.completed usage 수신 여부 (False면 api_only 폴백 경로 측정)
+
+    Returns:
+        Dict: {mode: 델타당 마이크로초}
+    """
+    stream = [_SAMPLE_DELTAS[i % len(_SAMPLE_DELTAS)] for i in range(deltas)]
+    results: Dict[str, float] = {}
+
+    for mode in TRACKING_MODES:
+        # 인코딩/설정 로드 비용은 측정에서 제외 (프로세스 전역 캐시 워밍업)
+        _simulate_stream(TokenCounter(model=model, tracking_mode=mode), stream[:10], with_usage)
+
+        best = float("inf")
+        for _ in range(repeat):
+            counter = TokenCounter(model=model, tracking_mode=mode)
+            start = time.perf_counter()
+            _simulate_stream(counter, stream, with_usage)
+            best = min(best, time.perf_counter() - start)
+
+        results[mode] = best / deltas * 1_000_000
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="토큰 추적 모드별 델타 오버헤드 벤치마크")
+    parser.add_argument("--deltas", type=int, default=2000, help="스트림 1회당 델타 수")
+    parser.add_argument("--repeat", type=int, default=5, help="반복 횟수")
+    parser.add_argument("--model", default="gpt-4.1", help="인코딩 기준 모델")
+    parser.add_argument("--no-usage", action="store_true", help="usage 미수신(폴백) 시나리오 측정")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        deltas=args.deltas,
+        repeat=args.repeat,
+        model=args.model,
+        with_usage=not args.no_usage,
+    )
+
+    print(f"델타 {args.deltas}개 x {args.repeat}회, usage={'없음' if args.no_usage else '있음'}")
+    for mode, per_delta_us in results.items():
+        print(f"  {mode:<14} {per_delta_us:8.2f} µs/delta")
+
+
+if __name__ == "__main__":
+    main()
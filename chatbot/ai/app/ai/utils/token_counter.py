@@ -5,13 +5,18 @@ provider별 실제 토큰 계산 방식을 사용하여 토큰 수를 추적합
 - OpenAI: tiktoken
 - Gemini: model.count_tokens()
 입력/출력/함수/RAG 토큰을 분리하여 집계합니다.
+
+프로세스 전역 자원(tiktoken 인코딩, llm_config.yaml 설정, 고정 프롬프트의 토큰 길이)은
+모듈 수준에서 한 번만 로드/계산하여 공유하므로 TokenCounter 생성 비용은 사실상 0입니다.
+요청별 카운터는 bind_token_counter()로 현재 컨텍스트에 바인딩하여 사용합니다.
 """
 
 import tiktoken
-import threading
 import json
 import yaml
 import logging
+from contextvars import ContextVar
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Any, Optional, TYPE_CHECKING
 
@@ -21,6 +26,112 @@ if TYPE_CHECKING:
     from app.ai.llm.base import BaseLLMProvider
 
 
+_CONFIG_PATH = Path(__file__).parent.parent.parent / "config" / "llm_config.yaml"
+
+# 고정 문자열(시스템 프롬프트, tools 스키마 등) 토큰 길이 캐시 크기
+STATIC_TOKEN_CACHE_SIZE = 512
+
+# 지원하는 토큰 추적 모드
+TRACKING_MODES = ("api_only", "api_first", "tiktoken_only", "hybrid")
+
+
+@lru_cache(maxsize=None)
+def get_shared_encoding(model: str) -> "tiktoken.Encoding":
+    """모델별 tiktoken 인코딩을 프로세스 전역에서 공유합니다.
+
+    tiktoken.encoding_for_model은 BPE 랭크 테이블을 로드하므로 비용이 큽니다.
+    같은 모델에 대해서는 최초 1회만 로드하고 이후에는 캐시된 인스턴스를 반환합니다.
+
+    Args:
+        model: 모델 ID (예: "gpt-4.1", "gemini-2.0-flash")
+
+    Returns:
+        tiktoken.Encoding: 모델 인코딩 (미등록 모델은 cl100k_base)
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # 폴백: cl100k_base (gpt-4, gpt-3.5-turbo 공통)
+        logger.debug(f"[TokenCounter] 모델 {model}의 encoding이 없어 cl100k_base 사용")
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@lru_cache(maxsize=STATIC_TOKEN_CACHE_SIZE)
+def _static_token_len(encoding_name: str, text: str) -> int:
+    """반복되는 고정 문자열의 토큰 길이 메모이제이션
+
+    system_role, 고정 지침 블록, tools 스키마처럼 요청마다 동일한 문자열은
+    한 번만 인코딩합니다. LRU이므로 자주 쓰이는 고정 문자열만 캐시에 남습니다.
+    """
+    encoding = tiktoken.get_encoding(encoding_name)
+    return len(encoding.encode(text))
+
+
+@lru_cache(maxsize=1)
+def _load_shared_config() -> Dict[str, Any]:
+    """llm_config.yaml에서 전체 설정을 프로세스당 1회 로드
+
+    Returns:
+        Dict: 전체 설정 (provider_config, token_tracking 등). 읽기 전용으로 사용합니다.
+    """
+    try:
+        with open(_CONFIG_PATH, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f)
+
+        provider_config = config.get("provider_config", {})
+        logger.debug(f"[TokenCounter] Provider config loaded: {provider_config}")
+        return config
+    except Exception as e:
+        logger.debug(f"[TokenCounter] Failed to load config: {e}")
+        # 폴백: 기본값 사용
+        return {
+            "provider_config": {
+                "openai": {
+                    "message_overhead": 3,
+                    "reply_priming_overhead": 3,
+                    "name_field_overhead": 1
+                },
+                "gemini": {
+                    "message_overhead": 0,
+                    "reply_priming_overhead": 0,
+                    "name_field_overhead": 0
+                }
+            },
+            "token_tracking": {
+                "mode": "tiktoken_only",
+                "fallback_to_tiktoken": True,
+                "track_reasoning_tokens": False
+            }
+        }
+
+
+# 현재 요청에 바인딩된 TokenCounter (asyncio 태스크/to_thread로 컨텍스트가 전파됨)
+_current_token_counter: ContextVar[Optional["TokenCounter"]] = ContextVar(
+    "current_token_counter", default=None
+)
+
+
+def bind_token_counter(counter: "TokenCounter") -> "TokenCounter":
+    """현재 컨텍스트(요청)에 TokenCounter를 바인딩합니다.
+
+    요청 처리 코루틴 시작 시 호출하면 이후 생성되는 asyncio 태스크
+    (asyncio.gather, asyncio.to_thread 등)에도 동일한 카운터가 전파됩니다.
+
+    Args:
+        counter: 이번 요청 전용 TokenCounter
+
+    Returns:
+        TokenCounter: 바인딩된 카운터 (그대로 반환)
+    """
+    _current_token_counter.set(counter)
+    return counter
+
+
+def current_token_counter(default: Optional["TokenCounter"] = None) -> Optional["TokenCounter"]:
+    """현재 요청에 바인딩된 TokenCounter 반환 (없으면 default)"""
+    return _current_token_counter.get() or default
+
+
 class TokenCounter:
     """토큰 카운터
     
@@ -30,23 +141,20 @@ class TokenCounter:
     - 함수 토큰: 함수 정의 (tools)
     - RAG 토큰: 검색된 컨텍스트
     
-    스레드세이프하며, 배치 인코딩으로 성능을 최적화합니다.
+    요청마다 새 인스턴스를 만들어 bind_token_counter()로 바인딩하는 것을 전제로 하며,
+    한 요청 안에서는 이벤트 루프 스레드에서만 갱신되므로 락을 사용하지 않습니다.
+    인코딩/설정/고정 문자열 토큰 길이는 프로세스 전역 캐시를 공유합니다.
     """
     
-    def __init__(self, model: str = "gpt-4"):
+    def __init__(self, model: str = "gpt-4", tracking_mode: Optional[str] = None):
         """토큰 카운터 초기화
 
         Args:
             model: 모델 ID (예: "gpt-4", "gemini-2.0-flash")
                    OpenAI 모델은 tiktoken, Gemini는 폴백
+            tracking_mode: 토큰 추적 모드 (None이면 llm_config.yaml의 token_tracking.mode)
         """
-        try:
-            self.encoding = tiktoken.encoding_for_model(model)
-        except KeyError:
-            # 폴백: cl100k_base (gpt-4, gpt-3.5-turbo 공통)
-            self.encoding = tiktoken.get_encoding("cl100k_base")
-            logger.debug(f"[TokenCounter] 모델 {model}의 encoding이 없어 cl100k_base 사용")
-
+        self.encoding = get_shared_encoding(model)
         self.model = model
 
         # 카테고리별 토큰 누적
@@ -55,6 +163,7 @@ class TokenCounter:
         self.function_tokens = 0
         self.rag_tokens = 0
         self.reasoning_tokens = 0  # o3-mini 등 추론 토큰
+        self.cached_input_tokens = 0  # 프롬프트 캐시 적중 입력 토큰 (input/rag/function 토큰의 부분집합)
 
         # 역할별 세부 추적
         self._role_breakdown: Dict[str, Dict[str, int]] = {}
@@ -63,13 +172,16 @@ class TokenCounter:
         self._role_model_map: Dict[str, str] = {}
 
         self._delta_buffer = []
-        self._lock = threading.Lock()
 
         # 프로바이더 설정 및 토큰 추적 설정 로드
         config = self._load_full_config()
         self.provider_overheads = config.get("provider_config", {})
         self._tracking_config = config.get("token_tracking", {})
-        self._tracking_mode = self._tracking_config.get("mode", "tiktoken_only")
+        self._tracking_mode = tracking_mode or self._tracking_config.get("mode", "tiktoken_only")
+        if self._tracking_mode not in TRACKING_MODES:
+            logger.debug(f"[TokenCounter] 알 수 없는 추적 모드 {self._tracking_mode}, tiktoken_only 사용")
+            self._tracking_mode = "tiktoken_only"
+        self._fallback_to_tiktoken = self._tracking_config.get("fallback_to_tiktoken", True)
 
         logger.debug(f"[TokenCounter] 토큰 추적 모드: {self._tracking_mode}")
 
@@ -82,6 +194,11 @@ class TokenCounter:
 
         # API usage 캐시 (hybrid 모드에서 비교용)
         self._api_usage_cache: Dict[str, Dict[str, int]] = {}
+
+        # api_only 모드: usage를 받지 못한 경우를 위한 지연 계산 대상 {role: context}
+        self._deferred_input: Dict[str, List[Dict[str, Any]]] = {}
+        # API usage가 반영된 역할
+        self._usage_reported: set = set()
     
     def count_openai_chat_input_tokens(self, messages: List[Dict[str, str]]) -> int:
         """OpenAI Chat API 입력 토큰 수 계산 (API 포맷 오버헤드 포함)
@@ -101,18 +218,38 @@ class TokenCounter:
         Returns:
             int: 계산된 토큰 수 (OpenAI API가 실제로 청구하는 토큰)
         """
-        with self._lock:
-            num_tokens = 0
-            for message in messages:
-                num_tokens += 3  # role, content 구조 오버헤드
-                for key, value in message.items():
+        num_tokens = 0
+        last_index = len(messages) - 1
+        for index, message in enumerate(messages):
+            num_tokens += 3  # role, content 구조 오버헤드
+            # 선두 system 메시지는 고정 프롬프트이므로 전역 캐시 사용
+            # (마지막 메시지는 요청별 동적 정보이므로 캐시하지 않음)
+            is_static = message.get("role") == "system" and index < last_index
+            for key, value in message.items():
+                if is_static and key == "content":
+                    num_tokens += self.count_static(str(value))
+                else:
                     num_tokens += len(self.encoding.encode(str(value)))
-                    if key == "name":
-                        num_tokens += 1
-            num_tokens += 3  # reply priming
-            self.input_tokens += num_tokens
-            return num_tokens
+                if key == "name":
+                    num_tokens += 1
+        num_tokens += 3  # reply priming
+        self.input_tokens += num_tokens
+        return num_tokens
     
+    def count_static(self, text: str) -> int:
+        """고정 문자열 토큰 수 계산 (프로세스 전역 메모이제이션)
+
+        시스템 프롬프트, tools 스키마처럼 요청 간 반복되는 문자열에 사용합니다.
+        카운터 누적은 하지 않으며 토큰 수만 반환합니다.
+
+        Args:
+            text: 고정 문자열
+
+        Returns:
+            int: 토큰 수
+        """
+        return _static_token_len(self.encoding.name, text)
+
     def count_output(self, text: str) -> int:
         """출력 텍스트 토큰 계산
         
@@ -122,11 +259,21 @@ class TokenCounter:
         Returns:
             int: 계산된 토큰 수
         """
-        with self._lock:
-            num_tokens = len(self.encoding.encode(text))
-            self.output_tokens += num_tokens
-            return num_tokens
+        num_tokens = len(self.encoding.encode(text))
+        self.output_tokens += num_tokens
+        return num_tokens
     
+    def tracks_stream_deltas(self) -> bool:
+        """스트리밍 중 델타 단위 토큰화 필요 여부
+
+        api_only 모드는 스트리밍 중 토큰화를 하지 않고 response.completed의
+        usage만 사용하므로 호출 측에서 count_output_delta 호출 자체를 생략할 수 있습니다.
+
+        Returns:
+            bool: 델타 토큰화가 필요하면 True
+        """
+        return self._tracking_mode != "api_only"
+
     def count_output_delta(self, delta: str, role: str = "streaming") -> None:
         """스트리밍 델타 청크 누적 (배치 인코딩)
 
@@ -137,19 +284,18 @@ class TokenCounter:
             delta: 스트리밍 응답 델타 청크
             role: 역할 이름 (기본: "streaming")
         """
-        with self._lock:
-            self._delta_buffer.append(delta)
-            if len(self._delta_buffer) >= 10:
-                batch_text = "".join(self._delta_buffer)
-                num_tokens = len(self.encoding.encode(batch_text))
-                self.output_tokens += num_tokens
+        self._delta_buffer.append(delta)
+        if len(self._delta_buffer) >= 10:
+            batch_text = "".join(self._delta_buffer)
+            num_tokens = len(self.encoding.encode(batch_text))
+            self.output_tokens += num_tokens
 
-                # role_breakdown에도 추가
-                if role not in self._role_breakdown:
-                    self._role_breakdown[role] = {"input": 0, "output": 0, "reasoning": 0}
-                self._role_breakdown[role]["output"] += num_tokens
+            # role_breakdown에도 추가
+            if role not in self._role_breakdown:
+                self._role_breakdown[role] = {"input": 0, "output": 0, "reasoning": 0, "cached": 0}
+            self._role_breakdown[role]["output"] += num_tokens
 
-                self._delta_buffer.clear()
+            self._delta_buffer.clear()
 
     def flush_delta_buffer(self, role: str = "streaming") -> None:
         """남은 델타 버퍼 처리 (스트리밍 완료 시)
@@ -159,18 +305,48 @@ class TokenCounter:
         Args:
             role: 역할 이름 (기본: "streaming")
         """
-        with self._lock:
-            if self._delta_buffer:
-                batch_text = "".join(self._delta_buffer)
-                num_tokens = len(self.encoding.encode(batch_text))
-                self.output_tokens += num_tokens
-
-                # role_breakdown에도 추가
-                if role not in self._role_breakdown:
-                    self._role_breakdown[role] = {"input": 0, "output": 0, "reasoning": 0}
-                self._role_breakdown[role]["output"] += num_tokens
-
-                self._delta_buffer.clear()
+        if self._delta_buffer:
+            batch_text = "".join(self._delta_buffer)
+            num_tokens = len(self.encoding.encode(batch_text))
+            self.output_tokens += num_tokens
+
+            # role_breakdown에도 추가
+            if role not in self._role_breakdown:
+                self._role_breakdown[role] = {"input": 0, "output": 0, "reasoning": 0, "cached": 0}
+            self._role_breakdown[role]["output"] += num_tokens
+
+            self._delta_buffer.clear()
+
+    def finalize_streaming(self, role: str = "streaming", output_text: str = "") -> None:
+        """스트리밍 종료 시 토큰 집계 마무리
+
+        - api_only 이외 모드: 남은 델타 버퍼 플러시
+        - api_only 모드: API usage가 반영되지 않은 경우에만 tiktoken으로 지연 계산
+          (지연해 둔 입력 컨텍스트 + 전체 출력 텍스트를 1회씩 인코딩)
+
+        Args:
+            role: 역할 이름 (기본: "streaming")
+            output_text: 완료된 전체 출력 텍스트 (api_only 폴백용)
+        """
+        if self._tracking_mode != "api_only":
+            self.flush_delta_buffer(role=role)
+            return
+
+        context = self._deferred_input.pop(role, None)
+        if role in self._usage_reported or not self._fallback_to_tiktoken:
+            return
+
+        input_tokens = self.count_openai_chat_input_tokens(context) if context else 0
+        output_tokens = len(self.encoding.encode(output_text)) if output_text else 0
+        self.output_tokens += output_tokens
+
+        if role not in self._role_breakdown:
+            self._role_breakdown[role] = {"input": 0, "output": 0, "reasoning": 0, "cached": 0}
+        self._role_breakdown[role]["input"] += input_tokens
+        self._role_breakdown[role]["output"] += output_tokens
+
+        logger.debug(f"[TokenCounter][api_only] {role} usage 없음, tiktoken 폴백: "
+              f"input={input_tokens}, output={output_tokens}")
     
     def count_openai_tools_tokens(self, tools: List[Dict[str, Any]]) -> int:
         """OpenAI API tools 파라미터 토큰 계산
@@ -185,14 +361,13 @@ class TokenCounter:
         Returns:
             int: 계산된 토큰 수
         """
-        with self._lock:
-            num_tokens = 0
-            for tool in tools:
-                # function 스키마를 JSON 문자열로 변환 후 인코딩
-                json_str = json.dumps(tool, ensure_ascii=False)
-                num_tokens += len(self.encoding.encode(json_str))
-            self.function_tokens += num_tokens
-            return num_tokens
+        num_tokens = 0
+        for tool in tools:
+            # function 스키마를 JSON 문자열로 변환 후 인코딩
+            json_str = json.dumps(tool, ensure_ascii=False)
+            num_tokens += self.count_static(json_str)
+        self.function_tokens += num_tokens
+        return num_tokens
     
     def count_function_call(self, function_name: str, arguments: Dict[str, Any], result: str) -> int:
         """개별 함수 호출 토큰 계산
@@ -207,12 +382,11 @@ class TokenCounter:
         Returns:
             int: 계산된 토큰 수
         """
-        with self._lock:
-            # 함수 호출 전체를 하나의 텍스트로 구성
-            call_text = f"{function_name}({json.dumps(arguments, ensure_ascii=False)})\n결과: {result}"
-            num_tokens = len(self.encoding.encode(call_text))
-            self.function_tokens += num_tokens
-            return num_tokens
+        # 함수 호출 전체를 하나의 텍스트로 구성
+        call_text = f"{function_name}({json.dumps(arguments, ensure_ascii=False)})\n결과: {result}"
+        num_tokens = len(self.encoding.encode(call_text))
+        self.function_tokens += num_tokens
+        return num_tokens
     
     def count_rag(self, context: str, actual_tokens: Optional[int] = None, role: str = "condense") -> int:
         """RAG 컨텍스트 토큰 계산
@@ -225,19 +399,18 @@ class TokenCounter:
         Returns:
             int: 계산된 토큰 수
         """
-        with self._lock:
-            if actual_tokens is not None:
-                # Provider가 제공한 실제 토큰 수 사용
-                num_tokens = actual_tokens
-                self._provider_tokens["rag"][role] = actual_tokens
-                logger.debug(f"[TokenCounter] RAG ({role}): {actual_tokens} 토큰 (provider 실제값)")
-            else:
-                # tiktoken 폴백
-                num_tokens = len(self.encoding.encode(context))
-                logger.debug(f"[TokenCounter] RAG ({role}): {num_tokens} 토큰 (tiktoken 추정)")
+        if actual_tokens is not None:
+            # Provider가 제공한 실제 토큰 수 사용
+            num_tokens = actual_tokens
+            self._provider_tokens["rag"][role] = actual_tokens
+            logger.debug(f"[TokenCounter] RAG ({role}): {actual_tokens} 토큰 (provider 실제값)")
+        else:
+            # tiktoken 폴백
+            num_tokens = len(self.encoding.encode(context))
+            logger.debug(f"[TokenCounter] RAG ({role}): {num_tokens} 토큰 (tiktoken 추정)")
             
-            self.rag_tokens += num_tokens
-            return num_tokens
+        self.rag_tokens += num_tokens
+        return num_tokens
     
     def count_rag_with_provider(
         self,
@@ -263,51 +436,50 @@ class TokenCounter:
         Returns:
             int: 계산된 토큰 수
         """
-        with self._lock:
-            provider_name = provider.get_provider_name()
+        provider_name = provider.get_provider_name()
             
-            # Provider별 토큰 계산 방식 선택
-            match provider_name:
-                case "gemini":
-                    # Gemini 실제 토큰 계산
-                    try:
-                        output_tokens = provider.count_tokens(output_text)
-                        input_tokens = provider.count_tokens(input_text) if input_text else 0
-                        total_tokens = input_tokens + output_tokens
+        # Provider별 토큰 계산 방식 선택
+        match provider_name:
+            case "gemini":
+                # Gemini 실제 토큰 계산
+                try:
+                    output_tokens = provider.count_tokens(output_text)
+                    input_tokens = provider.count_tokens(input_text) if input_text else 0
+                    total_tokens = input_tokens + output_tokens
                         
-                        logger.debug(f"[TokenCounter] {role} (Gemini 실제): "
-                              f"입력 {input_tokens} + 출력 {output_tokens} = {total_tokens}")
+                    logger.debug(f"[TokenCounter] {role} (Gemini 실제): "
+                          f"입력 {input_tokens} + 출력 {output_tokens} = {total_tokens}")
                         
-                        self._provider_tokens["rag"][role] = total_tokens
-                        self.rag_tokens += total_tokens
-                        return total_tokens
-                    except Exception as e:
-                        logger.debug(f"[TokenCounter] Gemini 토큰 계산 실패: {e}, tiktoken 폴백")
-                        # 폴백으로 계속 진행
+                    self._provider_tokens["rag"][role] = total_tokens
+                    self.rag_tokens += total_tokens
+                    return total_tokens
+                except Exception as e:
+                    logger.debug(f"[TokenCounter] Gemini 토큰 계산 실패: {e}, tiktoken 폴백")
+                    # 폴백으로 계속 진행
                 
-                case "openai":
-                    # OpenAI tiktoken 사용
-                    output_tokens = len(self.encoding.encode(output_text))
-                    input_tokens = len(self.encoding.encode(input_text)) if input_text else 0
-                    total_tokens = input_tokens + output_tokens
+            case "openai":
+                # OpenAI tiktoken 사용
+                output_tokens = len(self.encoding.encode(output_text))
+                input_tokens = len(self.encoding.encode(input_text)) if input_text else 0
+                total_tokens = input_tokens + output_tokens
                     
-                    logger.debug(f"[TokenCounter] {role} (OpenAI tiktoken): "
-                          f"입력 {input_tokens} + 출력 {output_tokens} = {total_tokens}")
+                logger.debug(f"[TokenCounter] {role} (OpenAI tiktoken): "
+                      f"입력 {input_tokens} + 출력 {output_tokens} = {total_tokens}")
                     
-                    self.rag_tokens += total_tokens
-                    return total_tokens
+                self.rag_tokens += total_tokens
+                return total_tokens
                 
-                case _:
-                    # 기타 Provider 또는 폴백: tiktoken 사용
-                    output_tokens = len(self.encoding.encode(output_text))
-                    input_tokens = len(self.encoding.encode(input_text)) if input_text else 0
-                    total_tokens = input_tokens + output_tokens
+            case _:
+                # 기타 Provider 또는 폴백: tiktoken 사용
+                output_tokens = len(self.encoding.encode(output_text))
+                input_tokens = len(self.encoding.encode(input_text)) if input_text else 0
+                total_tokens = input_tokens + output_tokens
                     
-                    logger.debug(f"[TokenCounter] {role} ({provider_name} → tiktoken 폴백): "
-                          f"입력 {input_tokens} + 출력 {output_tokens} = {total_tokens}")
+                logger.debug(f"[TokenCounter] {role} ({provider_name} → tiktoken 폴백): "
+                      f"입력 {input_tokens} + 출력 {output_tokens} = {total_tokens}")
                     
-            self.rag_tokens += total_tokens
-            return total_tokens
+        self.rag_tokens += total_tokens
+        return total_tokens
     
     def get_role_breakdown(self) -> Dict[str, Dict[str, int]]:
         """역할별 토큰 세부 분석 반환
@@ -320,8 +492,7 @@ class TokenCounter:
                     ...
                 }
         """
-        with self._lock:
-            return dict(self._role_breakdown)
+        return dict(self._role_breakdown)
     
     def get_total(self) -> Dict[str, int]:
         """누적 토큰 통계 반환
@@ -334,77 +505,53 @@ class TokenCounter:
                     "function_tokens": int,
                     "rag_tokens": int,
                     "reasoning_tokens": int,
+                    "cached_input_tokens": int,
                     "total_tokens": int
                 }
+
+            cached_input_tokens는 다른 카테고리에 이미 포함된 값이므로 total_tokens에 더하지 않습니다.
         """
-        with self._lock:
-            return {
-                "input_tokens": self.input_tokens,
-                "output_tokens": self.output_tokens,
-                "function_tokens": self.function_tokens,
-                "rag_tokens": self.rag_tokens,
-                "reasoning_tokens": self.reasoning_tokens,
-                "total_tokens": (
-                    self.input_tokens +
-                    self.output_tokens +
-                    self.function_tokens +
-                    self.rag_tokens +
-                    self.reasoning_tokens
-                ),
-            }
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "function_tokens": self.function_tokens,
+            "rag_tokens": self.rag_tokens,
+            "reasoning_tokens": self.reasoning_tokens,
+            "cached_input_tokens": self.cached_input_tokens,
+            "total_tokens": (
+                self.input_tokens +
+                self.output_tokens +
+                self.function_tokens +
+                self.rag_tokens +
+                self.reasoning_tokens
+            ),
+        }
     
     def reset(self) -> None:
         """카운터 초기화
 
         대화 완료 후 카운터를 리셋합니다.
         """
-        with self._lock:
-            self.input_tokens = 0
-            self.output_tokens = 0
-            self.function_tokens = 0
-            self.rag_tokens = 0
-            self.reasoning_tokens = 0
-            self._delta_buffer.clear()
-            self._role_breakdown.clear()
-            self._role_model_map.clear()
-            self._api_usage_cache.clear()
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.function_tokens = 0
+        self.rag_tokens = 0
+        self.reasoning_tokens = 0
+        self.cached_input_tokens = 0
+        self._delta_buffer.clear()
+        self._role_breakdown.clear()
+        self._role_model_map.clear()
+        self._api_usage_cache.clear()
+        self._deferred_input.clear()
+        self._usage_reported.clear()
     
     def _load_full_config(self) -> Dict[str, Any]:
-        """llm_config.yaml에서 전체 설정 로드
+        """llm_config.yaml에서 전체 설정 로드 (프로세스 전역 캐시)
 
         Returns:
             Dict: 전체 설정 (provider_config, token_tracking 등)
         """
-        try:
-            config_path = Path(__file__).parent.parent.parent / "config" / "llm_config.yaml"
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-
-            provider_config = config.get("provider_config", {})
-            logger.debug(f"[TokenCounter] Provider config loaded: {provider_config}")
-            return config
-        except Exception as e:
-            logger.debug(f"[TokenCounter] Failed to load config: {e}")
-            # 폴백: 기본값 사용
-            return {
-                "provider_config": {
-                    "openai": {
-                        "message_overhead": 3,
-                        "reply_priming_overhead": 3,
-                        "name_field_overhead": 1
-                    },
-                    "gemini": {
-                        "message_overhead": 0,
-                        "reply_priming_overhead": 0,
-                        "name_field_overhead": 0
-                    }
-                },
-                "token_tracking": {
-                    "mode": "tiktoken_only",
-                    "fallback_to_tiktoken": True,
-                    "track_reasoning_tokens": False
-                }
-            }
+        return _load_shared_config()
     
     def _calculate_openai_overhead(self, messages: List[Dict[str, Any]]) -> int:
         """OpenAI 메시지 구조 오버헤드 계산
@@ -453,36 +600,35 @@ class TokenCounter:
         Returns:
             Dict: {"input": X, "output": Y, "total": Z}
         """
-        with self._lock:
-            # 1. Provider의 count_tokens() 사용
-            input_tokens = provider.count_tokens(input_text)
-            output_tokens = provider.count_tokens(output_text)
+        # 1. Provider의 count_tokens() 사용
+        input_tokens = provider.count_tokens(input_text)
+        output_tokens = provider.count_tokens(output_text)
             
-            # 2. 프로바이더별 오버헤드 적용 (OpenAI만)
-            # 주의: 여기서는 단순 텍스트 토큰만 계산. 
-            # 메시지 구조 오버헤드는 count_openai_chat_input_tokens에서 처리
+        # 2. 프로바이더별 오버헤드 적용 (OpenAI만)
+        # 주의: 여기서는 단순 텍스트 토큰만 계산. 
+        # 메시지 구조 오버헤드는 count_openai_chat_input_tokens에서 처리
             
-            # 3. 카테고리별 누적
-            if category == "rag":
-                self.rag_tokens += (input_tokens + output_tokens)
-            elif category == "function":
-                self.function_tokens += (input_tokens + output_tokens)
-            else:
-                # 기본적으로 input/output에 각각 누적
-                self.input_tokens += input_tokens
-                self.output_tokens += output_tokens
+        # 3. 카테고리별 누적
+        if category == "rag":
+            self.rag_tokens += (input_tokens + output_tokens)
+        elif category == "function":
+            self.function_tokens += (input_tokens + output_tokens)
+        else:
+            # 기본적으로 input/output에 각각 누적
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
             
-            # 4. 역할별 세부 추적
-            if role not in self._role_breakdown:
-                self._role_breakdown[role] = {"input": 0, "output": 0, "reasoning": 0}
-            self._role_breakdown[role]["input"] += input_tokens
-            self._role_breakdown[role]["output"] += output_tokens
+        # 4. 역할별 세부 추적
+        if role not in self._role_breakdown:
+            self._role_breakdown[role] = {"input": 0, "output": 0, "reasoning": 0, "cached": 0}
+        self._role_breakdown[role]["input"] += input_tokens
+        self._role_breakdown[role]["output"] += output_tokens
             
-            return {
-                "input": input_tokens,
-                "output": output_tokens,
-                "total": input_tokens + output_tokens
-            }
+        return {
+            "input": input_tokens,
+            "output": output_tokens,
+            "total": input_tokens + output_tokens
+        }
     
     def count_openai_streaming_tokens(self, context: List[Dict[str, Any]], role: str = "streaming") -> int:
         """OpenAI 스트리밍 응답용 입력 토큰 계산
@@ -492,15 +638,19 @@ class TokenCounter:
             role: 역할 이름 (기본: "streaming")
 
         Returns:
-            int: 계산된 토큰 수
+            int: 계산된 토큰 수 (api_only 모드는 지연 계산하므로 0)
         """
+        if self._tracking_mode == "api_only":
+            # 토큰화는 usage가 오지 않았을 때만 finalize_streaming에서 수행
+            self._deferred_input[role] = context
+            return 0
+
         tokens = self.count_openai_chat_input_tokens(context)
 
         # 역할별 추적 (input_tokens는 이미 count_openai_chat_input_tokens에서 누적됨)
-        with self._lock:
-            if role not in self._role_breakdown:
-                self._role_breakdown[role] = {"input": 0, "output": 0, "reasoning": 0}
-            self._role_breakdown[role]["input"] += tokens
+        if role not in self._role_breakdown:
+            self._role_breakdown[role] = {"input": 0, "output": 0, "reasoning": 0, "cached": 0}
+        self._role_breakdown[role]["input"] += tokens
 
         return tokens
 
@@ -519,74 +669,89 @@ class TokenCounter:
 
         Args:
             usage: API response의 usage 객체
-                   {"input_tokens": N, "output_tokens": M, "reasoning_tokens": K, "total_tokens": T}
+                   {"input_tokens": N, "output_tokens": M, "reasoning_tokens": K,
+                    "cached_tokens": C, "total_tokens": T}
+                   cached_tokens는 input_tokens 중 프롬프트 캐시에 적중한 토큰 수입니다.
             role: 역할 이름 (gate, condense, function_analyze 등)
             model: 사용한 모델 ID (예: "o3-mini", "gpt-4.1")
             category: 토큰 카테고리 (input, output, rag, function)
             replace: True일 때 기존 role의 토큰을 제거하고 새 값으로 교체 (streaming 등에서 사용)
         """
-        with self._lock:
-            input_tok = usage.get("input_tokens", 0)
-            output_tok = usage.get("output_tokens", 0)
-            reasoning_tok = usage.get("reasoning_tokens", 0)
-
-            # 모드별 처리
-            if self._tracking_mode == "api_first":
-                # API usage를 실제값으로 사용
-                pass
-            elif self._tracking_mode == "hybrid":
-                # 비교를 위해 캐시에 저장
-                self._api_usage_cache[role] = usage.copy()
-                logger.debug(f"[TokenCounter][hybrid] {role} API usage: {usage}")
-
-            # replace 모드: 기존 role의 토큰을 제거
-            if replace and role in self._role_breakdown:
-                old_tokens = self._role_breakdown[role]
-
-                # 카테고리별 기존 토큰 제거
-                if category == "rag":
-                    self.rag_tokens -= (old_tokens["input"] + old_tokens["output"])
-                elif category == "function":
-                    self.function_tokens -= (old_tokens["input"] + old_tokens["output"])
-                else:
-                    self.input_tokens -= old_tokens["input"]
-                    self.output_tokens -= old_tokens["output"]
+        input_tok = usage.get("input_tokens", 0)
+        output_tok = usage.get("output_tokens", 0)
+        reasoning_tok = usage.get("reasoning_tokens", 0)
+        cached_tok = usage.get("cached_tokens", 0) or 0
+
+        # 모드별 처리
+        if self._tracking_mode in ("api_only", "api_first"):
+            # API usage를 실제값으로 사용
+            pass
+        elif self._tracking_mode == "hybrid":
+            # 비교를 위해 캐시에 저장
+            self._api_usage_cache[role] = usage.copy()
+            logger.debug(f"[TokenCounter][hybrid] {role} API usage: {usage}")
+
+        # replace 모드: 기존 role의 토큰을 제거
+        if replace and role in self._role_breakdown:
+            old_tokens = self._role_breakdown[role]
+
+            # 카테고리별 기존 토큰 제거
+            if category == "rag":
+                self.rag_tokens -= (old_tokens["input"] + old_tokens["output"])
+            elif category == "function":
+                self.function_tokens -= (old_tokens["input"] + old_tokens["output"])
+            else:
+                self.input_tokens -= old_tokens["input"]
+                self.output_tokens -= old_tokens["output"]
 
-                # reasoning tokens 제거
-                self.reasoning_tokens -= old_tokens["reasoning"]
+            # reasoning / cached tokens 제거
+            self.reasoning_tokens -= old_tokens["reasoning"]
+            self.cached_input_tokens -= old_tokens["cached"]
 
-                logger.debug(f"[TokenCounter] {role} 기존 토큰 제거 (replace=True): "
-                      f"input={old_tokens['input']}, output={old_tokens['output']}, reasoning={old_tokens['reasoning']}")
+            logger.debug(f"[TokenCounter] {role} 기존 토큰 제거 (replace=True): "
+                  f"input={old_tokens['input']}, output={old_tokens['output']}, reasoning={old_tokens['reasoning']}, "
+                  f"cached={old_tokens['cached']}")
 
-                # role_breakdown 초기화
-                self._role_breakdown[role] = {"input": 0, "output": 0, "reasoning": 0}
+            # role_breakdown 초기화
+            self._role_breakdown[role] = {"input": 0, "output": 0, "reasoning": 0, "cached": 0}
 
-            # 카테고리별 누적
-            if category == "rag":
-                self.rag_tokens += (input_tok + output_tok)
-            elif category == "function":
-                self.function_tokens += (input_tok + output_tok)
-            else:
-                self.input_tokens += input_tok
-                self.output_tokens += output_tok
+            # 아직 인코딩되지 않은 델타도 추정값이므로 함께 폐기 (이후 flush 시 중복 가산 방지)
+            self._delta_buffer.clear()
 
-            # reasoning tokens 누적
-            if reasoning_tok > 0:
-                self.reasoning_tokens += reasoning_tok
+        self._usage_reported.add(role)
+        self._deferred_input.pop(role, None)
 
-            # 역할별 세부 추적
-            if role not in self._role_breakdown:
-                self._role_breakdown[role] = {"input": 0, "output": 0, "reasoning": 0}
+        # 카테고리별 누적
+        if category == "rag":
+            self.rag_tokens += (input_tok + output_tok)
+        elif category == "function":
+            self.function_tokens += (input_tok + output_tok)
+        else:
+            self.input_tokens += input_tok
+            self.output_tokens += output_tok
+
+        # reasoning tokens 누적
+        if reasoning_tok > 0:
+            self.reasoning_tokens += reasoning_tok
+
+        # 캐시 적중 입력 토큰 누적
+        if cached_tok > 0:
+            self.cached_input_tokens += cached_tok
 
-            self._role_breakdown[role]["input"] += input_tok
-            self._role_breakdown[role]["output"] += output_tok
-            self._role_breakdown[role]["reasoning"] += reasoning_tok
+        # 역할별 세부 추적
+        if role not in self._role_breakdown:
+            self._role_breakdown[role] = {"input": 0, "output": 0, "reasoning": 0, "cached": 0}
+
+        self._role_breakdown[role]["input"] += input_tok
+        self._role_breakdown[role]["output"] += output_tok
+        self._role_breakdown[role]["reasoning"] += reasoning_tok
+        self._role_breakdown[role]["cached"] += cached_tok
 
-            # 역할별 모델 추적 (비용 계산용)
-            self._role_model_map[role] = model
+        # 역할별 모델 추적 (비용 계산용)
+        self._role_model_map[role] = model
 
-            logger.debug(f"[TokenCounter] {role} ({model}) API usage 반영 (replace={replace}): "
-                  f"input={input_tok}, output={output_tok}, reasoning={reasoning_tok}")
+        logger.debug(f"[TokenCounter] {role} ({model}) API usage 반영 (replace={replace}): "
+              f"input={input_tok}, cached={cached_tok}, output={output_tok}, reasoning={reasoning_tok}")
 
     def get_role_usage_for_cost_calc(self) -> List[Dict[str, any]]:
         """비용 계산용 role별 사용량 데이터 생성
@@ -597,32 +762,40 @@ class TokenCounter:
         Returns:
             List: 사용량 리스트
                  예: [
-                     {"model": "o3-mini", "input_tokens": 638, "output_tokens": 55},
+                     {"model": "o3-mini", "input_tokens": 638, "output_tokens": 55, "cached_tokens": 512},
                      {"model": "gpt-4.1-nano", "input_tokens": 4195, "output_tokens": 287},
                      ...
                  ]
         """
-        with self._lock:
-            usage_list = []
+        usage_list = []
+
+        for role, tokens in self._role_breakdown.items():
+            model = self._role_model_map.get(role, self.model)  # 기본값: streaming 모델
 
-            for role, tokens in self._role_breakdown.items():
-                model = self._role_model_map.get(role, self.model)  # 기본값: streaming 모델
+            usage_list.append({
+                "role": role,
+                "model": model,
+                "input_tokens": tokens["input"],
+                "output_tokens": tokens["output"],
+                "reasoning_tokens": tokens.get("reasoning", 0),
+                "cached_tokens": tokens.get("cached", 0),
+            })
 
-                usage_list.append({
-                    "role": role,
-                    "model": model,
-                    "input_tokens": tokens["input"],
-                    "output_tokens": tokens["output"],
-                    "reasoning_tokens": tokens.get("reasoning", 0),
-                })
+        return usage_list
 
-            return usage_list
+    def get_role_model_map(self) -> Dict[str, str]:
+        """역할별 사용 모델 반환 (비용 재계산용 메타데이터)
+
+        Returns:
+            Dict: {role: model}. API usage가 반영되지 않은 역할은 기본 모델
+        """
+        return {role: self._role_model_map.get(role, self.model) for role in self._role_breakdown}
 
     def get_tracking_mode(self) -> str:
         """현재 토큰 추적 모드 반환
 
         Returns:
-            str: 추적 모드 (api_first, tiktoken_only, hybrid)
+            str: 추적 모드 (api_only, api_first, tiktoken_only, hybrid)
         """
         return self._tracking_mode
 
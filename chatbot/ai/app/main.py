@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import router
+from app.ai.data.chat_log_writer import get_chat_log_writer
 
 origins = [
     "http://localhost",
@@ -30,6 +31,11 @@ app.add_middleware(
 
 app.include_router(router, prefix="/api")
 
+@app.on_event("shutdown")
+async def flush_chat_logs():
+    # 워커 종료 전 큐에 남은 채팅 로그 저장 (Mongo 불가 시 디스크 스풀)
+    await get_chat_log_writer().close()
+
 @app.get("/")
 async def root():
     return {"message": "chatbot project access"}
\ No newline at end of file
@@ -1,8 +1,11 @@
 package com.hallachatbot.backend.domain.chat.component;
 
+import java.time.ZonedDateTime;
+
 import org.springframework.stereotype.Component;
 import org.springframework.transaction.annotation.Transactional;
 
+import com.hallachatbot.backend.domain.chat.dao.ChatStatsRollupDao;
 import com.hallachatbot.backend.domain.chat.entity.ChatMessage;
 import com.hallachatbot.backend.domain.chat.entity.ChatMetadata;
 import com.hallachatbot.backend.domain.chat.entity.ChatTokenUsage;
@@ -25,6 +28,7 @@ import lombok.extern.slf4j.Slf4j;
  * <ul>
  * <li><b>분산 저장:</b> 대화 내용(Chat), 토큰 사용량(Token), 상세 메타데이터(Metadata)를 각각의 컬렉션에 저장</li>
  * <li><b>트랜잭션:</b> 모든 저장 작업은 하나의 트랜잭션으로 묶여 데이터 일관성을 보장.</li>
+ * <li><b>통계 롤업:</b> 관리자 대시보드용 시간/일/월 버킷을 함께 누적 (실패해도 대화 저장에는 영향 없음)</li>
  * </ul>
  * @author pwk0131
  */
@@ -37,6 +41,7 @@ public class ChatWriter {
 	private final ChatMessageRepository chatMessageRepository;
 	private final ChatTokenUsageRepository chatTokenUsageRepository;
 	private final ChatMetadataRepository chatMetadataRepository;
+	private final ChatStatsRollupDao chatStatsRollupDao;
 
 	@Transactional
 	public void saveChatData(ChatStreamContext context) {
@@ -70,5 +75,13 @@ public class ChatWriter {
 			.metadata(context.getMetadataMap())
 			.build();
 		chatMetadataRepository.save(metadata);
+
+		// 4. 대시보드 롤업 버킷 누적
+		try {
+			chatStatsRollupDao.incrementChat(
+				ZonedDateTime.now(), context.getPreset(), context.getTotalTokens(), context.getCost());
+		} catch (Exception e) {
+			log.warn("[ChatWriter] 통계 롤업 누적 실패 (MessageId: {})", messageId, e);
+		}
 	}
 }
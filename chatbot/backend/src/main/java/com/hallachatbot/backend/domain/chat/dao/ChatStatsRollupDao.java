@@ -0,0 +1,101 @@
+package com.hallachatbot.backend.domain.chat.dao;
+
+import java.math.BigDecimal;
+import java.time.ZoneId;
+import java.time.ZonedDateTime;
+import java.time.format.DateTimeFormatter;
+import java.util.Map;
+
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.data.mongodb.core.BulkOperations;
+import org.springframework.data.mongodb.core.MongoTemplate;
+import org.springframework.data.mongodb.core.query.Criteria;
+import org.springframework.data.mongodb.core.query.Query;
+import org.springframework.data.mongodb.core.query.Update;
+import org.springframework.stereotype.Repository;
+
+/**
+ * <b>관리자 대시보드용 시간 버킷 롤업 DAO</b>
+ *
+ * <ul>
+ * <li><b>저장소:</b> MongoDB {@code rollup} 컬렉션 (시간/일/월 버킷)</li>
+ * <li><b>동시성 제어:</b> 버킷 문서에 대한 원자적 {@code $inc} upsert</li>
+ * <li><b>호환성:</b> 버킷 ID/키 포맷은 관리자 백엔드 {@code app/db/rollups.py}와 동일 (KST 기준)</li>
+ * </ul>
+ */
+@Repository
+public class ChatStatsRollupDao {
+
+	private static final ZoneId SEOUL_ZONE = ZoneId.of("Asia/Seoul");
+
+	private static final Map<String, DateTimeFormatter> GRANULARITY_FORMATS = Map.of(
+		"hour", DateTimeFormatter.ofPattern("yyyy-MM-dd'T'HH:00"),
+		"day", DateTimeFormatter.ofPattern("yyyy-MM-dd"),
+		"month", DateTimeFormatter.ofPattern("yyyy-MM")
+	);
+
+	private final MongoTemplate mongoTemplate;
+	private final String collectionName;
+
+	public ChatStatsRollupDao(
+		MongoTemplate mongoTemplate,
+		@Value("${app.mongodb-suffix}") String mongodbSuffix) {
+		this.mongoTemplate = mongoTemplate;
+		this.collectionName = "rollup" + mongodbSuffix;
+	}
+
+	/**
+	 * <b>대화 1건을 시간/일/월 버킷에 누적</b>
+	 *
+	 * <ul>
+	 * <li>버킷별 질문 수, 토큰 합, 비용 합 및 프리셋별 동일 항목을 {@code $inc}로 증가</li>
+	 * <li>버킷 문서가 없으면 upsert로 생성</li>
+	 * </ul>
+	 *
+	 * @param occurredAt 대화 저장 시각
+	 * @param preset 사용된 LLM 프리셋
+	 * @param totalTokens 총 소모 토큰 수
+	 * @param cost 산출 비용 (USD)
+	 */
+	public void incrementChat(ZonedDateTime occurredAt, String preset, Integer totalTokens, BigDecimal cost) {
+		ZonedDateTime kst = occurredAt.withZoneSameInstant(SEOUL_ZONE);
+		String model = "models." + toModelKey(preset) + ".";
+		long tokens = totalTokens != null ? totalTokens : 0L;
+		double costUsd = cost != null ? cost.doubleValue() : 0.0;
+
+		BulkOperations bulkOps = mongoTemplate.bulkOps(BulkOperations.BulkMode.UNORDERED, collectionName);
+
+		GRANULARITY_FORMATS.forEach((granularity, formatter) -> {
+			String key = kst.format(formatter);
+			Update update = new Update()
+				.setOnInsert("granularity", granularity)
+				.setOnInsert("key", key)
+				.inc("queries", 1)
+				.inc("tokens", tokens)
+				.inc("cost_usd", costUsd)
+				.inc(model + "queries", 1)
+				.inc(model + "tokens", tokens)
+				.inc(model + "cost_usd", costUsd);
+			bulkOps.upsert(Query.query(Criteria.where("_id").is(toBucketId(granularity, key))), update);
+		});
+
+		bulkOps.execute();
+	}
+
+	/**
+	 * 버킷 문서 ID 조합 (예: {@code hour:2024-11-16T15:00})
+	 */
+	static String toBucketId(String granularity, String key) {
+		return granularity + ":" + key;
+	}
+
+	/**
+	 * 프리셋 이름을 MongoDB 필드명으로 사용 가능하도록 정리 ('.', '$' 치환)
+	 */
+	static String toModelKey(String preset) {
+		if (preset == null || preset.isBlank()) {
+			return "unknown";
+		}
+		return preset.trim().replace(".", "_").replace("$", "_");
+	}
+}
@@ -0,0 +1,117 @@
+package com.hallachatbot.backend.domain.survey.dao;
+
+import java.time.LocalDateTime;
+import java.time.ZoneId;
+import java.util.Date;
+import java.util.List;
+
+import org.bson.Document;
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.data.domain.Sort;
+import org.springframework.data.mongodb.core.BulkOperations;
+import org.springframework.data.mongodb.core.MongoTemplate;
+import org.springframework.data.mongodb.core.query.Criteria;
+import org.springframework.data.mongodb.core.query.Query;
+import org.springframework.data.mongodb.core.query.Update;
+import org.springframework.stereotype.Repository;
+
+import com.hallachatbot.backend.domain.survey.entity.ChatSurvey;
+
+/**
+ * <b>관리자 대시보드용 설문 통계 사전 집계 DAO</b>
+ *
+ * <ul>
+ * <li><b>저장소:</b> MongoDB {@code survey_stats} 컬렉션 (사용자 그룹별 + 전체({@code all}) 통계 문서)</li>
+ * <li><b>동시성 제어:</b> 통계 문서에 대한 원자적 {@code $inc} / {@code $push} upsert</li>
+ * <li><b>호환성:</b> 문서 형태는 관리자 백엔드 {@code app/db/survey_stats.py}와 동일</li>
+ * </ul>
+ */
+@Repository
+public class SurveyStatsDao {
+
+	static final String ALL_GROUP = "all";
+
+	// 통계 문서에 유지하는 최신 코멘트 수
+	static final int COMMENT_LIMIT = 100;
+
+	private final MongoTemplate mongoTemplate;
+	private final String collectionName;
+
+	public SurveyStatsDao(
+		MongoTemplate mongoTemplate,
+		@Value("${app.mongodb-suffix}") String mongodbSuffix) {
+		this.mongoTemplate = mongoTemplate;
+		this.collectionName = "survey_stats" + mongodbSuffix;
+	}
+
+	/**
+	 * <b>설문 1건을 사용자 그룹 문서와 전체 문서에 누적</b>
+	 *
+	 * <ul>
+	 * <li>응답 수, 평점 합, 평점/응답 속도/응답 품질 분포를 {@code $inc}로 증가</li>
+	 * <li>코멘트가 있으면 날짜 역순으로 정렬해 최신 {@value #COMMENT_LIMIT}개만 유지</li>
+	 * <li>통계 문서가 없으면 upsert로 생성</li>
+	 * </ul>
+	 *
+	 * @param survey 저장된 설문 엔티티
+	 */
+	public void incrementSurvey(ChatSurvey survey) {
+		BulkOperations bulkOps = mongoTemplate.bulkOps(BulkOperations.BulkMode.UNORDERED, collectionName);
+
+		for (String group : toGroups(survey.getUserCategory())) {
+			bulkOps.upsert(Query.query(Criteria.where("_id").is(group)), toUpdate(survey));
+		}
+
+		bulkOps.execute();
+	}
+
+	/**
+	 * 누적 대상 문서 ID (사용자 그룹이 없으면 전체 문서만)
+	 */
+	static List<String> toGroups(String userCategory) {
+		if (userCategory == null || userCategory.isBlank()) {
+			return List.of(ALL_GROUP);
+		}
+		return List.of(userCategory, ALL_GROUP);
+	}
+
+	static Update toUpdate(ChatSurvey survey) {
+		Update update = new Update()
+			.inc("count", 1)
+			.inc("ratingSum", survey.getRating())
+			.inc("ratings." + survey.getRating(), 1)
+			.currentDate("updatedAt");
+
+		if (hasText(survey.getResponseSpeed())) {
+			update.inc("responseSpeed." + toFieldKey(survey.getResponseSpeed()), 1);
+		}
+		if (hasText(survey.getResponseQuality())) {
+			update.inc("responseQuality." + toFieldKey(survey.getResponseQuality()), 1);
+		}
+
+		if (hasText(survey.getComment())) {
+			LocalDateTime date = survey.getDate() != null ? survey.getDate() : LocalDateTime.now();
+			Document comment = new Document("id", survey.getId())
+				.append("rating", survey.getRating())
+				.append("feedback", survey.getComment())
+				.append("date", Date.from(date.atZone(ZoneId.systemDefault()).toInstant()));
+			update.push("comments")
+				.sort(Sort.by(Sort.Direction.DESC, "date"))
+				.slice(COMMENT_LIMIT)
+				.each(comment);
+		}
+
+		return update;
+	}
+
+	/**
+	 * 분포 값을 MongoDB 필드명으로 사용 가능하도록 정리 ('.', '$' 치환)
+	 */
+	static String toFieldKey(String value) {
+		return value.trim().replace(".", "_").replace("$", "_");
+	}
+
+	private static boolean hasText(String value) {
+		return value != null && !value.isBlank();
+	}
+}
@@ -16,6 +16,7 @@ public interface SurveyService {
 	 * <b>챗봇 만족도 설문 제출 처리</b>
 	 * * <ul>
 	 * <li><b>동작:</b> 요청 DTO를 엔티티로 변환 후 MongoDB에 영구 저장</li>
+	 * <li><b>통계:</b> 저장 후 관리자 대시보드 설문 통계({@code survey_stats})에 누적 (실패해도 저장은 유지)</li>
 	 * <li><b>트랜잭션:</b> 쓰기 작업에 대한 단일 트랜잭션 보장</li>
 	 * </ul>
 	 *
@@ -3,7 +3,9 @@ package com.hallachatbot.backend.domain.survey.service;
 import org.springframework.stereotype.Service;
 import org.springframework.transaction.annotation.Transactional;
 
+import com.hallachatbot.backend.domain.survey.dao.SurveyStatsDao;
 import com.hallachatbot.backend.domain.survey.dto.request.ChatSurveyRequest;
+import com.hallachatbot.backend.domain.survey.entity.ChatSurvey;
 import com.hallachatbot.backend.domain.survey.repository.ChatSurveyRepository;
 
 import lombok.RequiredArgsConstructor;
@@ -15,11 +17,19 @@ import lombok.extern.slf4j.Slf4j;
 public class SurveyServiceImpl implements SurveyService {
 
 	private final ChatSurveyRepository chatSurveyRepository;
+	private final SurveyStatsDao surveyStatsDao;
 
 	@Override
 	@Transactional
 	public void submitChatSurvey(ChatSurveyRequest request) {
-		chatSurveyRepository.save(request.toEntity());
+		ChatSurvey survey = chatSurveyRepository.save(request.toEntity());
 		log.info("[Survey] 챗봇 만족도 설문 저장 성공");
+
+		// 관리자 대시보드 설문 통계 누적 (실패해도 설문 저장은 유지)
+		try {
+			surveyStatsDao.incrementSurvey(survey);
+		} catch (Exception e) {
+			log.warn("[Survey] 설문 통계 누적 실패", e);
+		}
 	}
 }
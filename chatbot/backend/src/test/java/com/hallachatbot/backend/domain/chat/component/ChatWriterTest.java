@@ -2,10 +2,14 @@ package com.hallachatbot.backend.domain.chat.component;
 
 import static org.assertj.core.api.Assertions.assertThat;
 import static org.mockito.ArgumentMatchers.any;
+import static org.mockito.ArgumentMatchers.eq;
 import static org.mockito.BDDMockito.given;
+import static org.mockito.BDDMockito.willThrow;
 import static org.mockito.Mockito.never;
 import static org.mockito.Mockito.verify;
 
+import java.math.BigDecimal;
+import java.time.ZonedDateTime;
 import java.util.Map;
 
 import org.junit.jupiter.api.DisplayName;
@@ -17,6 +21,7 @@ import org.mockito.Mock;
 import org.mockito.junit.jupiter.MockitoExtension;
 import org.springframework.test.util.ReflectionTestUtils;
 
+import com.hallachatbot.backend.domain.chat.dao.ChatStatsRollupDao;
 import com.hallachatbot.backend.domain.chat.entity.ChatMessage;
 import com.hallachatbot.backend.domain.chat.entity.ChatMetadata;
 import com.hallachatbot.backend.domain.chat.entity.ChatTokenUsage;
@@ -37,6 +42,8 @@ class ChatWriterTest {
 	private ChatTokenUsageRepository chatTokenUsageRepository;
 	@Mock
 	private ChatMetadataRepository chatMetadataRepository;
+	@Mock
+	private ChatStatsRollupDao chatStatsRollupDao;
 
 	@Test
 	@DisplayName("Context의 내용을 분해하여 Message, Token, Metadata 엔티티로 저장한다")
@@ -80,6 +87,39 @@ class ChatWriterTest {
 		ArgumentCaptor<ChatMetadata> metaCaptor = ArgumentCaptor.forClass(ChatMetadata.class);
 		verify(chatMetadataRepository).save(metaCaptor.capture());
 		assertThat(metaCaptor.getValue().getMessageId()).isEqualTo("msg-id-123");
+
+		// 4. 대시보드 롤업 누적 검증
+		verify(chatStatsRollupDao).incrementChat(any(ZonedDateTime.class), eq("gpt-4"), eq(150), any(BigDecimal.class));
+	}
+
+	@Test
+	@DisplayName("통계 롤업 누적이 실패해도 대화 데이터는 저장된다")
+	void saveChatData_RollupFailure() {
+		// given
+		ChatStreamContext context = new ChatStreamContext("chat-1", "질문");
+		context.appendAnswer("최종 답변");
+		ReflectionTestUtils.setField(context, "totalTokens", 150);
+		ReflectionTestUtils.setField(context, "preset", "gpt-4");
+
+		ChatMessage savedMsg = ChatMessage.builder()
+			.chatId("chat-1")
+			.question("질문")
+			.answer("최종 답변")
+			.build();
+		ReflectionTestUtils.setField(savedMsg, "id", "msg-id-123");
+
+		given(chatMessageRepository.save(any(ChatMessage.class))).willReturn(savedMsg);
+		willThrow(new RuntimeException("rollup unavailable"))
+			.given(chatStatsRollupDao).incrementChat(any(), any(), any(), any());
+
+		// when (예외가 전파되지 않아야 함)
+		chatWriter.saveChatData(context);
+
+		// then
+		verify(chatMessageRepository).save(any(ChatMessage.class));
+		verify(chatTokenUsageRepository).save(any(ChatTokenUsage.class));
+		verify(chatMetadataRepository).save(any(ChatMetadata.class));
+		verify(chatStatsRollupDao).incrementChat(any(ZonedDateTime.class), eq("gpt-4"), eq(150), any(BigDecimal.class));
 	}
 
 	@Test
@@ -97,5 +137,6 @@ class ChatWriterTest {
 		verify(chatMessageRepository, never()).save(any());
 		verify(chatTokenUsageRepository, never()).save(any());
 		verify(chatMetadataRepository, never()).save(any());
+		verify(chatStatsRollupDao, never()).incrementChat(any(), any(), any(), any());
 	}
 }
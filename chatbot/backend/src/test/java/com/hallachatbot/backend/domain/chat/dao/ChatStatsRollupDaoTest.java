@@ -0,0 +1,88 @@
+package com.hallachatbot.backend.domain.chat.dao;
+
+import static org.junit.jupiter.api.Assertions.*;
+import static org.mockito.ArgumentMatchers.*;
+import static org.mockito.Mockito.*;
+
+import java.math.BigDecimal;
+import java.time.ZoneOffset;
+import java.time.ZonedDateTime;
+import java.util.List;
+
+import org.bson.Document;
+import org.junit.jupiter.api.BeforeEach;
+import org.junit.jupiter.api.DisplayName;
+import org.junit.jupiter.api.Test;
+import org.junit.jupiter.api.extension.ExtendWith;
+import org.mockito.ArgumentCaptor;
+import org.mockito.Mock;
+import org.mockito.junit.jupiter.MockitoExtension;
+import org.springframework.data.mongodb.core.BulkOperations;
+import org.springframework.data.mongodb.core.MongoTemplate;
+import org.springframework.data.mongodb.core.query.Query;
+import org.springframework.data.mongodb.core.query.Update;
+
+@ExtendWith(MockitoExtension.class)
+class ChatStatsRollupDaoTest {
+
+	private ChatStatsRollupDao chatStatsRollupDao;
+
+	@Mock
+	private MongoTemplate mongoTemplate;
+
+	// mongoTemplate.bulkOps()의 반환값을 대체할 가짜 객체
+	@Mock
+	private BulkOperations bulkOperations;
+
+	@BeforeEach
+	void setUp() {
+		chatStatsRollupDao = new ChatStatsRollupDao(mongoTemplate, "-stg");
+		lenient().when(mongoTemplate.bulkOps(BulkOperations.BulkMode.UNORDERED, "rollup-stg")).thenReturn(bulkOperations);
+	}
+
+	@Test
+	@DisplayName("롤업 누적: KST 기준 시간/일/월 버킷 3개에 upsert 후 한 번에 실행한다")
+	void incrementChat_UpsertsThreeBucketsInKst() {
+		// given: UTC 2024-11-30 15:30 == KST 2024-12-01 00:30 (월 경계)
+		ZonedDateTime occurredAt = ZonedDateTime.of(2024, 11, 30, 15, 30, 0, 0, ZoneOffset.UTC);
+
+		// when
+		chatStatsRollupDao.incrementChat(occurredAt, "gpt-4.1", 120, new BigDecimal("0.0015"));
+
+		// then
+		ArgumentCaptor<Query> queryCaptor = ArgumentCaptor.forClass(Query.class);
+		verify(bulkOperations, times(3)).upsert(queryCaptor.capture(), any(Update.class));
+		verify(bulkOperations, times(1)).execute();
+
+		List<Object> bucketIds = queryCaptor.getAllValues().stream()
+			.map(query -> query.getQueryObject().get("_id"))
+			.toList();
+		assertTrue(bucketIds.containsAll(List.of("hour:2024-12-01T00:00", "day:2024-12-01", "month:2024-12")));
+	}
+
+	@Test
+	@DisplayName("롤업 누적: 프리셋별 필드명에서 '.'이 치환되고 값이 $inc로 누적된다")
+	void incrementChat_IncrementsPerModelFields() {
+		// when
+		chatStatsRollupDao.incrementChat(ZonedDateTime.now(), "gpt-4.1", 120, new BigDecimal("0.0015"));
+
+		// then
+		ArgumentCaptor<Update> updateCaptor = ArgumentCaptor.forClass(Update.class);
+		verify(bulkOperations, times(3)).upsert(any(Query.class), updateCaptor.capture());
+
+		Document inc = (Document)updateCaptor.getValue().getUpdateObject().get("$inc");
+		assertEquals(1, inc.get("queries"));
+		assertEquals(120L, inc.get("tokens"));
+		assertEquals(0.0015, inc.get("cost_usd"));
+		assertEquals(120L, inc.get("models.gpt-4_1.tokens"));
+	}
+
+	@Test
+	@DisplayName("프리셋 정리: 비어 있으면 unknown, '.'/'$'는 '_'로 치환된다")
+	void toModelKey_SanitizesPresetName() {
+		assertEquals("unknown", ChatStatsRollupDao.toModelKey(null));
+		assertEquals("unknown", ChatStatsRollupDao.toModelKey(" "));
+		assertEquals("gpt-4_1", ChatStatsRollupDao.toModelKey("gpt-4.1"));
+		assertEquals("a_b", ChatStatsRollupDao.toModelKey("a$b"));
+	}
+}
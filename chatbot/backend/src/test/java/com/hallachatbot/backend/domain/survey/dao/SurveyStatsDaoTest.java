@@ -0,0 +1,93 @@
+package com.hallachatbot.backend.domain.survey.dao;
+
+import static org.junit.jupiter.api.Assertions.*;
+import static org.mockito.ArgumentMatchers.*;
+import static org.mockito.Mockito.*;
+
+import java.util.List;
+
+import org.bson.Document;
+import org.junit.jupiter.api.BeforeEach;
+import org.junit.jupiter.api.DisplayName;
+import org.junit.jupiter.api.Test;
+import org.junit.jupiter.api.extension.ExtendWith;
+import org.mockito.ArgumentCaptor;
+import org.mockito.Mock;
+import org.mockito.junit.jupiter.MockitoExtension;
+import org.springframework.data.mongodb.core.BulkOperations;
+import org.springframework.data.mongodb.core.MongoTemplate;
+import org.springframework.data.mongodb.core.query.Query;
+import org.springframework.data.mongodb.core.query.Update;
+
+import com.hallachatbot.backend.domain.survey.entity.ChatSurvey;
+
+@ExtendWith(MockitoExtension.class)
+class SurveyStatsDaoTest {
+
+	private SurveyStatsDao surveyStatsDao;
+
+	@Mock
+	private MongoTemplate mongoTemplate;
+
+	// mongoTemplate.bulkOps()의 반환값을 대체할 가짜 객체
+	@Mock
+	private BulkOperations bulkOperations;
+
+	@BeforeEach
+	void setUp() {
+		surveyStatsDao = new SurveyStatsDao(mongoTemplate, "-stg");
+		lenient().when(mongoTemplate.bulkOps(BulkOperations.BulkMode.UNORDERED, "survey_stats-stg")).thenReturn(bulkOperations);
+	}
+
+	@Test
+	@DisplayName("설문 누적: 사용자 그룹 문서와 전체 문서 2개에 upsert 후 한 번에 실행한다")
+	void incrementSurvey_UpsertsGroupAndAllDocuments() {
+		// given
+		ChatSurvey survey = ChatSurvey.of("1학년", 5, "high", "mid", "좋아요");
+
+		// when
+		surveyStatsDao.incrementSurvey(survey);
+
+		// then
+		ArgumentCaptor<Query> queryCaptor = ArgumentCaptor.forClass(Query.class);
+		verify(bulkOperations, times(2)).upsert(queryCaptor.capture(), any(Update.class));
+		verify(bulkOperations, times(1)).execute();
+
+		List<Object> ids = queryCaptor.getAllValues().stream()
+			.map(query -> query.getQueryObject().get("_id"))
+			.toList();
+		assertEquals(List.of("1학년", "all"), ids);
+	}
+
+	@Test
+	@DisplayName("설문 누적: 응답 수/평점 합/분포가 $inc로 누적되고 코멘트는 $push된다")
+	void incrementSurvey_IncrementsDistributions() {
+		// when
+		Update update = SurveyStatsDao.toUpdate(ChatSurvey.of("교직원", 4, "low", "high", "답변이 정확해요"));
+
+		// then
+		Document inc = (Document)update.getUpdateObject().get("$inc");
+		assertEquals(1, inc.get("count"));
+		assertEquals(4, inc.get("ratingSum"));
+		assertEquals(1, inc.get("ratings.4"));
+		assertEquals(1, inc.get("responseSpeed.low"));
+		assertEquals(1, inc.get("responseQuality.high"));
+		assertTrue(((Document)update.getUpdateObject().get("$push")).containsKey("comments"));
+	}
+
+	@Test
+	@DisplayName("설문 누적: 코멘트가 비어 있으면 $push 하지 않는다")
+	void toUpdate_SkipsBlankComment() {
+		Update update = SurveyStatsDao.toUpdate(ChatSurvey.of("외부인", 3, "mid", "mid", " "));
+
+		assertNull(update.getUpdateObject().get("$push"));
+	}
+
+	@Test
+	@DisplayName("누적 대상: 사용자 그룹이 없으면 전체 문서만 갱신한다")
+	void toGroups_FallsBackToAllGroup() {
+		assertEquals(List.of("all"), SurveyStatsDao.toGroups(null));
+		assertEquals(List.of("all"), SurveyStatsDao.toGroups(" "));
+		assertEquals(List.of("대학원생", "all"), SurveyStatsDao.toGroups("대학원생"));
+	}
+}
@@ -1,9 +1,12 @@
 package com.hallachatbot.backend.domain.survey.service;
 
 import static org.assertj.core.api.Assertions.assertThat;
+import static org.assertj.core.api.Assertions.assertThatCode;
 import static org.mockito.ArgumentMatchers.any;
+import static org.mockito.Mockito.doThrow;
 import static org.mockito.Mockito.times;
 import static org.mockito.Mockito.verify;
+import static org.mockito.Mockito.when;
 
 import org.junit.jupiter.api.DisplayName;
 import org.junit.jupiter.api.Test;
@@ -13,6 +16,7 @@ import org.mockito.InjectMocks;
 import org.mockito.Mock;
 import org.mockito.junit.jupiter.MockitoExtension;
 
+import com.hallachatbot.backend.domain.survey.dao.SurveyStatsDao;
 import com.hallachatbot.backend.domain.survey.dto.request.ChatSurveyRequest;
 import com.hallachatbot.backend.domain.survey.entity.ChatSurvey;
 import com.hallachatbot.backend.domain.survey.repository.ChatSurveyRepository;
@@ -26,6 +30,9 @@ class SurveyServiceImplTest {
 	@Mock
 	private ChatSurveyRepository chatSurveyRepository;
 
+	@Mock
+	private SurveyStatsDao surveyStatsDao;
+
 	@Test
 	@DisplayName("설문 제출 시 리포지토리의 save 메서드가 올바르게 호출되어야 한다")
 	void submitChatSurvey_Success() {
@@ -55,4 +62,30 @@ class SurveyServiceImplTest {
 		assertThat(savedEntity.getRating()).isEqualTo(request.rating());
 		assertThat(savedEntity.getComment()).isEqualTo(request.comment());
 	}
+
+	@Test
+	@DisplayName("설문 제출 시 저장된 엔티티로 설문 통계가 누적되어야 한다")
+	void submitChatSurvey_IncrementsSurveyStats() {
+		// given
+		ChatSurveyRequest request = new ChatSurveyRequest("교직원", 4, "mid", "high", null);
+		ChatSurvey saved = request.toEntity();
+		when(chatSurveyRepository.save(any(ChatSurvey.class))).thenReturn(saved);
+
+		// when
+		surveyService.submitChatSurvey(request);
+
+		// then
+		verify(surveyStatsDao, times(1)).incrementSurvey(saved);
+	}
+
+	@Test
+	@DisplayName("설문 통계 누적이 실패해도 설문 제출은 성공해야 한다")
+	void submitChatSurvey_IgnoresStatsFailure() {
+		// given
+		ChatSurveyRequest request = new ChatSurveyRequest("외부인", 3, "low", "low", "");
+		doThrow(new RuntimeException("mongo down")).when(surveyStatsDao).incrementSurvey(any());
+
+		// when & then
+		assertThatCode(() -> surveyService.submitChatSurvey(request)).doesNotThrowAnyException();
+	}
 }